@@ -0,0 +1,323 @@
+"""
+Stateful alert aggregation and batched delivery to Task Master.
+
+AlertAggregator remembers every open issue between monitoring cycles, in one SQLite file:
+- An issue's fingerprint is a hash of (url, issue type, issue class); the class is the detail
+  without its free text (see issue_class()), so the same issue found again is the same alert,
+  not a new one, even when its message changes. An alert carries the latest detail.
+- A new issue is sent once ('new'), then suppressed while it persists, except for a 'repeat'
+  once `repeat_window` seconds have passed since it was last sent.
+- An issue still open `escalate_after` seconds after it was first seen is sent once more as
+  'escalated', one severity level up (info -> warning -> critical).
+- An open issue of a checked URL not found in a cycle is sent as 'resolved' and forgotten.
+
+AlertOutbox queues outgoing alerts in the same file as batches of up to `batch_size` alerts,
+so a cycle with thousands of issues makes a handful of requests and nothing is lost if Task
+Master is down or the process restarts:
+- flush() posts batches in order (a batch backing off holds back later ones); each carries an Idempotency-Key, so a batch resent after
+  a timeout is not applied twice
+- a failed batch (connection error, 429 or 5xx) is retried with exponential backoff and jitter,
+  or after the server's Retry-After; after `max_attempts` it stays in the outbox as dead
+- other 4xx answers mark the batch dead at once
+
+task_master_server is a local stand-in for the Task Master API.
+"""
+import os
+import json
+import time
+import uuid
+import re
+import random
+import sqlite3
+import hashlib
+import threading
+import http.client
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+ALERT_STATE_PATH = os.getenv('ALERT_STATE_PATH', 'cache/alerts.sqlite3')
+ALERT_REPEAT_WINDOW = float(os.getenv('ALERT_REPEAT_WINDOW', 6 * 3600))
+ALERT_ESCALATE_AFTER = float(os.getenv('ALERT_ESCALATE_AFTER', 3600))
+ALERT_BATCH_SIZE = int(os.getenv('ALERT_BATCH_SIZE', 500))
+ALERT_MAX_ATTEMPTS = int(os.getenv('ALERT_MAX_ATTEMPTS', 10))
+TASK_MASTER_URL = os.getenv('TASK_MASTER_URL', 'http://127.0.0.1:8097')
+TASK_MASTER_API_KEY = os.getenv('TASK_MASTER_API_KEY', '')
+SEVERITIES = ('info', 'warning', 'critical')
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    fingerprint TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    issue_type TEXT NOT NULL,
+    detail TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_sent REAL NOT NULL,
+    occurrences INTEGER NOT NULL,
+    escalated INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    alerts INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_next ON outbox(next_attempt);
+"""
+
+_ERROR_TYPE = re.compile(r'[A-Z]\w*(Error|Exception)')
+
+def issue_class(detail: str) -> str:
+    """
+    The stable part of an issue's detail: its label, plus the exception type name if it names one.
+    "Request failed: ConnectionRefusedError: [Errno 111] ..." -> "Request failed: ConnectionRefusedError",
+    "Request failed: Timed out after 15s" -> "Request failed: timeout",
+    "Redirect to a non-HTTP URL: ftp://..." -> "Redirect to a non-HTTP URL".
+    Details without free text ("Redirect chain ends in HTTP 404") are their own class.
+    """
+    label, _, rest = detail.partition(': ')
+    if not rest:
+        return detail
+    kind = rest.partition(': ')[0]
+    if _ERROR_TYPE.fullmatch(kind):
+        return f"{label}: {kind}"
+    if kind.startswith('Timed out'):
+        return f"{label}: timeout"
+    return label
+
+def fingerprint(url: str, issue_type: str, detail: str) -> str:
+    key = f"{url}\x00{issue_type}\x00{issue_class(detail)}"
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+def severity_of(detail: str) -> str:
+    detail = detail.lower()
+    return "critical" if "downtime" in detail or "exceeds" in detail else "warning"
+
+def _raise(severity: str) -> str:
+    return SEVERITIES[min(SEVERITIES.index(severity) + 1, len(SEVERITIES) - 1)]
+
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+class AlertAggregator:
+    def __init__(self, path: str = ALERT_STATE_PATH, repeat_window: float = ALERT_REPEAT_WINDOW,
+                 escalate_after: float = ALERT_ESCALATE_AFTER, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.repeat_window = repeat_window
+        self.escalate_after = escalate_after
+        self.clock = clock
+        self.conn = _connect(path)
+        self._lock = threading.Lock()
+
+    def observe(self, issues: list, checked: Optional[list] = None) -> list:
+        """
+        Update the open issues with one monitoring cycle's findings.
+        Args:
+            issues: (url, issue_type, detail) for every issue found in the cycle.
+            checked: URLs the cycle checked; open issues of other URLs are left open (default:
+                the cycle checked every URL).
+        Returns:
+            list: Alerts to send: fingerprint, url, issue_type, severity, detail, status ('new',
+            'repeat', 'escalated' or 'resolved'), first_seen, last_seen and occurrences.
+        """
+        now = self.clock()
+        alerts, upserts = [], []
+        with self._lock:
+            conn = self.conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                known = {row[0]: row for row in conn.execute(
+                    'SELECT fingerprint, url, issue_type, detail, severity, first_seen, last_sent, occurrences, '
+                    'escalated FROM alerts')}
+                seen = set()
+                for url, issue_type, detail in issues:
+                    key = fingerprint(url, issue_type, detail)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    row = known.get(key)
+                    if row is None:
+                        severity, first_seen, last_sent, occurrences, escalated = severity_of(detail), now, now, 1, 0
+                        status = 'new'
+                    else:
+                        _, _, _, _, severity, first_seen, last_sent, occurrences, escalated = row
+                        occurrences += 1
+                        status = None
+                        if not escalated and now - first_seen >= self.escalate_after:
+                            severity, escalated, status = _raise(severity), 1, 'escalated'
+                        elif now - last_sent >= self.repeat_window:
+                            status = 'repeat'
+                        if status:
+                            last_sent = now
+                    upserts.append((key, url, issue_type, detail, severity, first_seen, now, last_sent,
+                                    occurrences, escalated))
+                    if status:
+                        alerts.append(self._alert(key, url, issue_type, detail, severity, status, first_seen, now,
+                                                  occurrences))
+                checked = None if checked is None else set(checked)
+                resolved = [row for key, row in known.items()
+                            if key not in seen and (checked is None or row[1] in checked)]
+                for key, url, issue_type, detail, severity, first_seen, _, occurrences, _ in resolved:
+                    alerts.append(self._alert(key, url, issue_type, detail, severity, 'resolved', first_seen, now,
+                                              occurrences))
+                conn.executemany("""
+                    INSERT INTO alerts (fingerprint, url, issue_type, detail, severity, first_seen, last_seen,
+                                        last_sent, occurrences, escalated)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (fingerprint) DO UPDATE SET
+                        detail = excluded.detail, severity = excluded.severity, last_seen = excluded.last_seen, last_sent = excluded.last_sent,
+                        occurrences = excluded.occurrences, escalated = excluded.escalated
+                """, upserts)
+                conn.executemany('DELETE FROM alerts WHERE fingerprint = ?', [(row[0],) for row in resolved])
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return alerts
+
+    @staticmethod
+    def _alert(key, url, issue_type, detail, severity, status, first_seen, last_seen, occurrences) -> dict:
+        return {
+            "fingerprint": key,
+            "url": url,
+            "issue_type": issue_type,
+            "severity": severity,
+            "detail": detail,
+            "status": status,
+            "first_seen": first_seen,
+            "last_seen": last_seen,
+            "occurrences": occurrences,
+        }
+
+    def open_alerts(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+
+class TaskMasterClient:
+    """
+    Posts alert batches to Task Master over one keep-alive connection.
+    """
+    def __init__(self, base_url: str = TASK_MASTER_URL, api_key: str = TASK_MASTER_API_KEY, timeout: float = 10.0):
+        parts = urlsplit(base_url)
+        self.scheme, self.netloc, self.path = parts.scheme, parts.netloc, parts.path.rstrip('/')
+        self.headers = {'Content-Type': 'application/json'}
+        if api_key:
+            self.headers['Authorization'] = f"Bearer {api_key}"
+        self.timeout = timeout
+        self._conn = None
+
+    def post(self, path: str, body: bytes, headers: Optional[dict] = None) -> tuple:
+        """
+        Returns:
+            tuple: (HTTP status, lower-cased headers dict, response body bytes)
+        """
+        for attempt in range(2):
+            reused = self._conn is not None
+            if self._conn is None:
+                cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+                self._conn = cls(self.netloc, timeout=self.timeout)
+            try:
+                self._conn.request('POST', self.path + path, body, {**self.headers, **(headers or {})})
+                resp = self._conn.getresponse()
+                data = resp.read()
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if reused and not attempt:
+                    continue  # stale keep-alive connection: retry once on a fresh one
+                raise
+            return resp.status, {k.lower(): v for k, v in resp.getheaders()}, data
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+class AlertOutbox:
+    def __init__(self, path: str = ALERT_STATE_PATH, batch_size: int = ALERT_BATCH_SIZE,
+                 max_attempts: int = ALERT_MAX_ATTEMPTS, backoff: float = 1.0, max_backoff: float = 300.0,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.conn = _connect(path)
+        self._lock = threading.Lock()
+
+    def enqueue(self, alerts: list) -> int:
+        """
+        Queue alerts in batches of up to `batch_size`.
+        Returns:
+            int: Batches queued.
+        """
+        batches = [alerts[i:i + self.batch_size] for i in range(0, len(alerts), self.batch_size)]
+        now = self.clock()
+        with self._lock:
+            self.conn.executemany(
+                'INSERT INTO outbox (idempotency_key, payload, alerts, next_attempt) VALUES (?, ?, ?, ?)',
+                [(uuid.uuid4().hex, json.dumps({"alerts": batch}), len(batch), now) for batch in batches]
+            )
+        return len(batches)
+
+    def _delay(self, attempts: int, retry_after: Optional[str]) -> float:
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return min(self.backoff * 2 ** (attempts - 1), self.max_backoff) * random.uniform(0.5, 1.0)
+
+    def flush(self, client: TaskMasterClient, path: str = '/api/alerts/batch') -> dict:
+        """
+        Send queued batches oldest first, until one is not due yet or fails with a retryable error.
+        Returns:
+            dict: Counts of 'sent', 'retry' and 'dead' batches, and 'alerts' sent.
+        """
+        counts = {'sent': 0, 'retry': 0, 'dead': 0, 'alerts': 0}
+        with self._lock:
+            pending = self.conn.execute(
+                'SELECT id, idempotency_key, alerts, attempts, next_attempt FROM outbox '
+                'WHERE next_attempt IS NOT NULL ORDER BY id'
+            ).fetchall()
+            for batch_id, key, size, attempts, next_attempt in pending:
+                if next_attempt > self.clock():
+                    break  # later batches wait, so Task Master sees updates in order
+                payload = self.conn.execute('SELECT payload FROM outbox WHERE id = ?', (batch_id,)).fetchone()[0]
+                attempts += 1
+                try:
+                    status, headers, body = client.post(path, payload.encode(), {'Idempotency-Key': key})
+                except (http.client.HTTPException, OSError) as e:
+                    status, headers, error = None, {}, f"{type(e).__name__}: {e}"
+                else:
+                    error = f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}"
+                if status is not None and 200 <= status < 300:
+                    self.conn.execute('DELETE FROM outbox WHERE id = ?', (batch_id,))
+                    counts['sent'] += 1
+                    counts['alerts'] += size
+                    continue
+                retryable = status is None or status in RETRYABLE_STATUSES
+                if retryable and attempts < self.max_attempts:
+                    next_attempt = self.clock() + self._delay(attempts, headers.get('retry-after'))
+                    counts['retry'] += 1
+                else:
+                    next_attempt = None
+                    counts['dead'] += 1
+                self.conn.execute('UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?',
+                                  (attempts, next_attempt, error, batch_id))
+                if next_attempt is not None:
+                    break
+        return counts
+
+    def pending(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM outbox WHERE next_attempt IS NOT NULL').fetchone()[0]
+
+    def dead(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM outbox WHERE next_attempt IS NULL').fetchone()[0]
@@ -0,0 +1,97 @@
+from alerts import AlertAggregator, AlertOutbox, TaskMasterClient, fingerprint, issue_class
+from task_master_server import TaskMasterServer
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_suppression_escalation_and_resolution(tmp_path):
+    clock = Clock()
+    aggregator = AlertAggregator(str(tmp_path / 'alerts.sqlite3'), repeat_window=3600, escalate_after=900, clock=clock)
+    down = ('https://a.example/', 'uptime', 'Downtime detected')
+    loop = ('https://b.example/', 'redirect', 'Infinite redirect loop detected')
+    first = aggregator.observe([down, loop, loop])
+    assert [(a['url'], a['status'], a['severity']) for a in first] == [
+        ('https://a.example/', 'new', 'critical'), ('https://b.example/', 'new', 'warning')]
+    assert first[0]['fingerprint'] == fingerprint(*down)
+    clock.now += 300
+    assert aggregator.observe([down, loop]) == []
+    clock.now += 600
+    escalated = aggregator.observe([down, loop])
+    assert [(a['status'], a['severity'], a['occurrences']) for a in escalated] == [
+        ('escalated', 'critical', 3), ('escalated', 'critical', 3)]
+    clock.now += 300
+    assert aggregator.observe([loop], checked=['https://b.example/']) == []
+    clock.now += 3600
+    repeat, resolved = aggregator.observe([loop])
+    assert repeat['status'] == 'repeat' and repeat['first_seen'] == 1_700_000_000.0
+    assert resolved['status'] == 'resolved' and resolved['url'] == 'https://a.example/'
+    assert aggregator.open_alerts() == 1
+
+def test_state_survives_restart(tmp_path):
+    path = str(tmp_path / 'alerts.sqlite3')
+    issue = ('https://a.example/', 'uptime', 'Persistent errors detected')
+    assert len(AlertAggregator(path).observe([issue])) == 1
+    assert AlertAggregator(path).observe([issue]) == []
+
+def test_changing_messages_keep_one_alert_per_issue_class(tmp_path):
+    aggregator = AlertAggregator(str(tmp_path / 'alerts.sqlite3'))
+    url = 'https://a.example/'
+    refused = "Request failed: ConnectionRefusedError: [Errno 111] Connect call failed ('10.0.0.1', 443)"
+    assert issue_class(refused) == "Request failed: ConnectionRefusedError"
+    assert issue_class("Request failed: Timed out after 15s") == "Request failed: timeout"
+    assert issue_class("Redirect to a non-HTTP URL: ftp://files.example.com/a") == "Redirect to a non-HTTP URL"
+    assert len(aggregator.observe([(url, 'redirect', refused), (url, 'redirect', "Redirect chain ends in HTTP 404")])) == 2
+    # Another address in the message, same error: still the same alerts
+    assert aggregator.observe([(url, 'redirect', refused.replace('10.0.0.1', '10.0.0.2')),
+                               (url, 'redirect', "Redirect chain ends in HTTP 404")]) == []
+    # Another status code is another issue; the 404 is resolved
+    new, resolved = aggregator.observe([(url, 'redirect', refused), (url, 'redirect', "Redirect chain ends in HTTP 500")])
+    assert new['status'] == 'new' and new['detail'] == "Redirect chain ends in HTTP 500"
+    assert resolved['status'] == 'resolved' and resolved['detail'] == "Redirect chain ends in HTTP 404"
+
+def test_outbox_batches_and_retries(tmp_path):
+    clock = Clock()
+    server = TaskMasterServer().start()
+    client = TaskMasterClient(server.base_url)
+    try:
+        outbox = AlertOutbox(str(tmp_path / 'alerts.sqlite3'), batch_size=100, backoff=10, clock=clock)
+        aggregator = AlertAggregator(str(tmp_path / 'alerts.sqlite3'), clock=clock)
+        alerts = aggregator.observe([(f'https://site{i}.example/', 'uptime', 'Downtime detected') for i in range(250)])
+        assert outbox.enqueue(alerts) == 3
+        server.fail(1, 503)
+        assert outbox.flush(client) == {'sent': 0, 'retry': 1, 'dead': 0, 'alerts': 0}
+        assert outbox.flush(client)['sent'] == 0 and outbox.pending() == 3  # backing off
+        clock.now += 10
+        assert outbox.flush(client) == {'sent': 3, 'retry': 0, 'dead': 0, 'alerts': 250}
+        assert server.batches == 3 and len(server.tickets) == 250 and outbox.pending() == 0
+
+        outbox.enqueue(aggregator.observe([]))
+        server.fail(1, 429, retry_after=30)
+        assert outbox.flush(client)['retry'] == 1
+        clock.now += 30
+        assert outbox.flush(client)['alerts'] == 250
+        assert all(ticket['status'] == 'resolved' for ticket in server.tickets.values())
+    finally:
+        client.close()
+        server.stop()
+
+def test_rejected_batches_are_kept_as_dead_and_duplicates_are_not_applied(tmp_path):
+    server = TaskMasterServer().start()
+    client = TaskMasterClient(server.base_url)
+    try:
+        outbox = AlertOutbox(str(tmp_path / 'alerts.sqlite3'), max_attempts=2, backoff=0)
+        outbox.enqueue([{'fingerprint': 'x', 'url': 'u', 'issue_type': 'uptime', 'detail': 'd', 'severity': 'warning',
+                         'status': 'new'}])
+        server.fail(1, 400)
+        assert outbox.flush(client)['dead'] == 1 and outbox.dead() == 1 and outbox.pending() == 0
+        body = b'{"alerts": []}'
+        assert client.post('/api/alerts/batch', body, {'Idempotency-Key': 'k'})[0] == 202
+        status, _, data = client.post('/api/alerts/batch', body, {'Idempotency-Key': 'k'})
+        assert status == 202 and b'"duplicate": true' in data and server.batches == 1
+    finally:
+        client.close()
+        server.stop()
@@ -4,12 +4,24 @@ from urllib.parse import urljoin
 import json
 from .discovery import aggregate_urls
 from .gsc import fetch_gsc_data
+from .metrics import timed_get, PARSE_SECONDS, CHECKS_TOTAL, ISSUES_TOTAL
+from .tracing import start_span, traced
 
-def check_indexability(domain: str, path: str = "/") -> dict:
+def _fetch_html(url: str, kind: str, session=None) -> BeautifulSoup:
+    # `session`: a requests.Session shared by a batch of checks (default: one connection per call)
+    with start_span('http.fetch', url=url, kind=kind) as span:
+        resp = timed_get(session or requests, url, 'audit', kind, timeout=10)
+        span.set_attribute('http.status_code', resp.status_code)
+        span.set_attribute('bytes', len(resp.content))
+        resp.raise_for_status()
+    with start_span('parse.html', kind=kind), PARSE_SECONDS.labels('html').time():
+        return BeautifulSoup(resp.text, "html.parser")
+
+@traced('audit.check_indexability')
+def check_indexability(domain: str, path: str = "/", session=None) -> dict:
     url = urljoin(domain, path)
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+    CHECKS_TOTAL.labels('indexability').inc()
+    soup = _fetch_html(url, 'indexability', session)
     meta_robots = soup.find("meta", attrs={"name": "robots"})
     robots_content = meta_robots["content"] if meta_robots and meta_robots.has_attr("content") else None
     return {
@@ -18,6 +30,7 @@ def check_indexability(domain: str, path: str = "/") -> dict:
         "indexable": robots_content is None or "noindex" not in robots_content.lower()
     }
 
+@traced('audit.check_core_web_vitals')
 def check_core_web_vitals(domain: str, path: str = "/") -> dict:
     # Placeholder: Real Core Web Vitals require field data or Lighthouse/CrUX API
     return {
@@ -25,11 +38,11 @@ def check_core_web_vitals(domain: str, path: str = "/") -> dict:
         "core_web_vitals": "Not implemented (requires external API or browser)"
     }
 
-def check_schema_markup(domain: str, path: str = "/") -> dict:
+@traced('audit.check_schema_markup')
+def check_schema_markup(domain: str, path: str = "/", session=None) -> dict:
     url = urljoin(domain, path)
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+    CHECKS_TOTAL.labels('schema').inc()
+    soup = _fetch_html(url, 'schema', session)
     schemas = []
     # JSON-LD
     for script in soup.find_all("script", type="application/ld+json"):
@@ -47,11 +60,11 @@ def check_schema_markup(domain: str, path: str = "/") -> dict:
         "rdfa_count": len(rdfa)
     }
 
-def check_mobile_friendly(domain: str, path: str = "/") -> dict:
+@traced('audit.check_mobile_friendly')
+def check_mobile_friendly(domain: str, path: str = "/", session=None) -> dict:
     url = urljoin(domain, path)
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+    CHECKS_TOTAL.labels('mobile').inc()
+    soup = _fetch_html(url, 'mobile', session)
     meta_viewport = soup.find("meta", attrs={"name": "viewport"})
     mobile_friendly = meta_viewport is not None
     return {
@@ -60,6 +73,7 @@ def check_mobile_friendly(domain: str, path: str = "/") -> dict:
         "viewport": meta_viewport["content"] if mobile_friendly else None
     }
 
+@traced('audit.correlate')
 def correlate_metrics_and_generate_issues(domain: str) -> list:
     """
     Correlate technical checks and GSC data for all discovered URLs and generate a JSON list of issues.
@@ -105,6 +119,8 @@ def correlate_metrics_and_generate_issues(domain: str) -> list:
                 url_issues['issues'].append('Low impressions')
             if gsc_data.get('clicks', 0) < 10:
                 url_issues['issues'].append('Low clicks')
+            for issue in url_issues['issues']:
+                ISSUES_TOTAL.labels(issue).inc()
             issues.append(url_issues)
         return issues
     except Exception as e:
@@ -1,21 +1,33 @@
 import psycopg2
+from psycopg2.extras import execute_values, Json
 import os
-import boto3
-from botocore.exceptions import NoRegionError
-from .logging_utils import setup_logging, get_logger
-import logging
-
-# Set up logging with PII redaction
-setup_logging(
-    level=logging.INFO,
-    format_str='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    log_file='logs/app.log',
-    json_format=True
-)
-
-# Get logger for this module
+from .logging_utils import get_logger, limit_logging
+from .metrics import DB_WRITE_SECONDS
+from .tracing import traced
+from .tenant_generations import bump_tenant_generation
+from .aws_secrets import get_secrets_client  # one cached client per process, shared with aws_secrets
+
+# Get logger for this module (logging is configured by the process entry point, see configure_logging)
 logger = get_logger(__name__)
 
+# Per-row insert logs run once per DB row; keep a trickle of them instead of every row
+limit_logging(logger, 'store_search_analytics', rate=5, burst=20)
+limit_logging(logger, 'store_pagespeed_opportunities', rate=5, burst=20)
+
+DB_CONFIG = {
+    'dbname': os.getenv('DB_NAME', 'jaffebot'),
+    'user': os.getenv('DB_USER', 'postgres'),
+    'password': os.getenv('DB_PASSWORD', ''),
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', 5432),
+}
+
+def get_connection():
+    """
+    Open a new connection to the audit DB using the DB_* environment variables.
+    """
+    return psycopg2.connect(**DB_CONFIG)
+
 def create_tenant(conn, name: str) -> int:
     """
     Create a new tenant and return its ID.
@@ -38,13 +50,25 @@ def get_tenant_id(conn, name: str) -> int:
         result = cur.fetchone()
         return result[0] if result else None
 
+def get_tenant_schedules(conn) -> dict:
+    """
+    Get each tenant's fair-share scheduling settings.
+    Returns:
+        dict: {tenant_id: (schedule_weight, max_concurrency)}
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, schedule_weight, max_concurrency FROM tenants;")
+        return {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+@DB_WRITE_SECONDS.labels('search_analytics').time()
+@traced('db.store_search_analytics')
 def store_search_analytics(conn, analytics: list, site_url: str, tenant_id: int):
     """
     Store search analytics data in the DB for a tenant.
     """
     with conn.cursor() as cur:
         for row in analytics:
-            logger.info(f"Inserting search_analytics for {site_url} (tenant {tenant_id}): {row}")
+            logger.info("Inserting search_analytics for %s (tenant %s): %s", site_url, tenant_id, row)
             cur.execute("""
                 INSERT INTO search_analytics (site_url, query, clicks, impressions, ctr, position, tenant_id)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
@@ -53,7 +77,10 @@ def store_search_analytics(conn, analytics: list, site_url: str, tenant_id: int)
                 row.get('ctr'), row.get('position'), tenant_id
             ))
     conn.commit()
+    bump_tenant_generation(tenant_id)
 
+@DB_WRITE_SECONDS.labels('coverage').time()
+@traced('db.store_coverage')
 def store_coverage(conn, coverage: dict, site_url: str, tenant_id: int):
     """
     Store coverage data in the DB for a tenant.
@@ -67,7 +94,10 @@ def store_coverage(conn, coverage: dict, site_url: str, tenant_id: int):
             site_url, coverage.get('valid'), coverage.get('error'), coverage.get('excluded'), tenant_id
         ))
     conn.commit()
+    bump_tenant_generation(tenant_id)
 
+@DB_WRITE_SECONDS.labels('performance').time()
+@traced('db.store_performance')
 def store_performance(conn, performance: dict, site_url: str, tenant_id: int):
     """
     Store performance data in the DB for a tenant.
@@ -82,7 +112,10 @@ def store_performance(conn, performance: dict, site_url: str, tenant_id: int):
             performance.get('total_impressions'), tenant_id
         ))
     conn.commit()
+    bump_tenant_generation(tenant_id)
 
+@DB_WRITE_SECONDS.labels('pagespeed').time()
+@traced('db.store_pagespeed')
 def store_pagespeed(conn, pagespeed: dict, tenant_id: int) -> int:
     """
     Store pagespeed data in the DB for a tenant and return inserted id.
@@ -102,15 +135,18 @@ def store_pagespeed(conn, pagespeed: dict, tenant_id: int) -> int:
         ))
         pagespeed_id = cur.fetchone()[0]
     conn.commit()
+    bump_tenant_generation(tenant_id)
     return pagespeed_id
 
+@DB_WRITE_SECONDS.labels('pagespeed_opportunities').time()
+@traced('db.store_pagespeed_opportunities')
 def store_pagespeed_opportunities(conn, opportunities: list, pagespeed_id: int):
     """
     Store pagespeed opportunities in the DB.
     """
     with conn.cursor() as cur:
         for opp in opportunities:
-            logger.info(f"Inserting pagespeed_opportunity for pagespeed_id {pagespeed_id}: {opp}")
+            logger.info("Inserting pagespeed_opportunity for pagespeed_id %s: %s", pagespeed_id, opp)
             cur.execute("""
                 INSERT INTO pagespeed_opportunities (pagespeed_id, name, savings)
                 VALUES (%s, %s, %s)
@@ -119,14 +155,159 @@ def store_pagespeed_opportunities(conn, opportunities: list, pagespeed_id: int):
             ))
     conn.commit()
 
-def get_secrets_client():
-    try:
-        return boto3.client('secretsmanager')
-    except NoRegionError:
-        # Fallback to a default region, but log a warning
-        logger.warning("AWS region not set. Falling back to 'us-east-1'.")
-        return boto3.client('secretsmanager', region_name='us-east-1')
-
-# Log messages with PII will be automatically redacted
-logger.info("User email: john.doe@example.com")  # Will be redacted
-logger.error("API key: sk-1234567890")  # Will be redacted 
\ No newline at end of file
+@DB_WRITE_SECONDS.labels('url_check_results').time()
+@traced('db.store_url_check_results')
+def store_url_check_results(conn, results: list):
+    """
+    Store the per-URL outcomes of a batch of checks in one transaction.
+    Args:
+        results (list): Dicts with item_id, kind, url, ok, and result or error.
+    """
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO url_check_results (item_id, kind, url, ok, result, error) VALUES %s
+        """, [
+            (r['item_id'], r['kind'], r['url'], r['ok'], Json(r.get('result')), r.get('error'))
+            for r in results
+        ])
+    conn.commit()
+
+# Column -> SQL type; VALUES lists are cast explicitly since all-NULL columns would otherwise be text
+URL_SCHEDULE_COLUMNS = {
+    'url': 'text', 'content_hash': 'text', 'lastmod': 'timestamptz', 'last_checked_at': 'timestamptz',
+    'last_changed_at': 'timestamptz', 'checks': 'integer', 'changes': 'integer',
+    'observed_seconds': 'double precision', 'gsc_impressions': 'integer',
+    'gsc_impressions_at_check': 'integer', 'next_due_at': 'timestamptz',
+}
+
+def get_tenant_crawl_budgets(conn) -> dict:
+    """
+    Returns:
+        dict: {tenant_id: re-audit fetches allowed per hour}
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, crawl_budget_per_hour FROM tenants;")
+        return {row[0]: row[1] for row in cur.fetchall()}
+
+def get_tenant_sites(conn) -> dict:
+    """
+    Returns:
+        dict: {tenant_id: site_url} for tenants with a site to sync re-audits from.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, site_url FROM tenants WHERE site_url IS NOT NULL;")
+        return {row[0]: row[1] for row in cur.fetchall()}
+
+def upsert_sitemap_urls(conn, tenant_id: int, entries: list) -> None:
+    """
+    Add sitemap URLs to the re-audit schedule (new URLs are due now) and record their lastmod.
+    A lastmod newer than the last check makes the URL due now.
+    Args:
+        entries (list): (url, lastmod aware datetime or None) tuples.
+    """
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO url_schedule (tenant_id, url, lastmod) VALUES %s
+            ON CONFLICT (tenant_id, url) DO UPDATE SET
+                lastmod = COALESCE(EXCLUDED.lastmod, url_schedule.lastmod),
+                next_due_at = CASE
+                    WHEN EXCLUDED.lastmod > url_schedule.last_checked_at
+                    THEN LEAST(url_schedule.next_due_at, CURRENT_TIMESTAMP)
+                    ELSE url_schedule.next_due_at
+                END
+        """, [(tenant_id, url, lastmod) for url, lastmod in entries])
+    conn.commit()
+
+def update_gsc_impressions(conn, tenant_id: int, impressions: dict, movement_threshold: float) -> None:
+    """
+    Record the latest GSC impressions per URL. URLs whose impressions moved by at least
+    `movement_threshold` (relative to the last check) become due now.
+    """
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            UPDATE url_schedule s SET
+                gsc_impressions = v.impressions,
+                next_due_at = CASE
+                    WHEN ABS(v.impressions - s.gsc_impressions_at_check)::float
+                         / GREATEST(s.gsc_impressions_at_check, 1) >= v.threshold
+                    THEN LEAST(s.next_due_at, CURRENT_TIMESTAMP)
+                    ELSE s.next_due_at
+                END
+            FROM (VALUES %s) AS v (tenant_id, url, impressions, threshold)
+            WHERE s.tenant_id = v.tenant_id AND s.url = v.url
+        """, [(tenant_id, url, count, movement_threshold) for url, count in impressions.items()],
+            template='(%s::integer, %s, %s::integer, %s::float)')
+    conn.commit()
+
+def claim_due_urls(conn, tenant_id: int, limit: int, lease_seconds: int) -> list:
+    """
+    Take up to `limit` due URLs for a tenant, most overdue first, and push their due time out by
+    `lease_seconds` so they are not dispatched again while their re-audit is in flight.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE url_schedule SET next_due_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+            WHERE id IN (
+                SELECT id FROM url_schedule
+                WHERE tenant_id = %s AND next_due_at <= CURRENT_TIMESTAMP
+                ORDER BY next_due_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING url;
+        """, (lease_seconds, tenant_id, limit))
+        urls = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return urls
+
+def get_url_schedules(conn, tenant_id: int, urls: list) -> dict:
+    """
+    Returns:
+        dict: {url: row dict with URL_SCHEDULE_COLUMNS}
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT {', '.join(URL_SCHEDULE_COLUMNS)} FROM url_schedule
+            WHERE tenant_id = %s AND url = ANY(%s);
+        """, (tenant_id, list(urls)))
+        return {row[0]: dict(zip(URL_SCHEDULE_COLUMNS, row)) for row in cur.fetchall()}
+
+@DB_WRITE_SECONDS.labels('url_schedule').time()
+@traced('db.update_url_schedules')
+def update_url_schedules(conn, tenant_id: int, rows: list) -> None:
+    """
+    Write back re-audit results (rows as returned by get_url_schedules, updated) in one transaction.
+    """
+    columns = list(URL_SCHEDULE_COLUMNS)
+    template = '(%s::integer, ' + ', '.join(f'%s::{URL_SCHEDULE_COLUMNS[c]}' for c in columns) + ')'
+    with conn.cursor() as cur:
+        execute_values(cur, f"""
+            UPDATE url_schedule s SET {', '.join(f'{c} = v.{c}' for c in columns[1:])}
+            FROM (VALUES %s) AS v (tenant_id, {', '.join(columns)})
+            WHERE s.tenant_id = v.tenant_id AND s.url = v.url
+        """, [(tenant_id, *(row[c] for c in columns)) for row in rows], template=template)
+    conn.commit()
+
+def get_content_refresh_urls(conn, limit: int = 1000) -> list:
+    """
+    Get URLs due for content refresh, least recently refreshed first.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT url FROM content_pages
+            WHERE refresh_enabled
+            ORDER BY last_refreshed_at NULLS FIRST
+            LIMIT %s;
+        """, (limit,))
+        return [row[0] for row in cur.fetchall()]
+
+def mark_content_refreshed(conn, urls: list) -> None:
+    """
+    Record that the given URLs were refreshed now.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE content_pages SET last_refreshed_at = CURRENT_TIMESTAMP
+            WHERE url = ANY(%s);
+        """, (list(urls),))
+    conn.commit()
@@ -1,17 +1,39 @@
-import boto3
+"""
+AWS Secrets Manager access.
+
+boto3 takes longer to import than the rest of the API together, so it is imported on the first
+secret read or write rather than with this module, and the client it creates is kept for the
+process instead of being rebuilt (credentials, endpoint resolution) on every call.
+"""
+import os
 import json
-from botocore.exceptions import ClientError, NoRegionError
+import threading
 from typing import Optional
 from .logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
 def get_secrets_client():
-    try:
-        return boto3.client('secretsmanager')
-    except NoRegionError:
-        logger.warning("AWS region not set. Falling back to 'us-east-1'.")
-        return boto3.client('secretsmanager', region_name='us-east-1')
+    """
+    Returns:
+        The process's Secrets Manager client (created on first use, and again after a fork).
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            import boto3
+            from botocore.exceptions import NoRegionError
+            try:
+                _client = boto3.client('secretsmanager')
+            except NoRegionError:
+                logger.warning("AWS region not set. Falling back to 'us-east-1'.")
+                _client = boto3.client('secretsmanager', region_name='us-east-1')
+            _client_pid = os.getpid()
+        return _client
 
 def get_secret(secret_name: str) -> Optional[dict]:
     """
@@ -21,6 +43,7 @@ def get_secret(secret_name: str) -> Optional[dict]:
     Returns:
         dict or None: The secret value as a dictionary, or None if not found.
     """
+    from botocore.exceptions import ClientError
     secrets_client = get_secrets_client()
     try:
         response = secrets_client.get_secret_value(SecretId=secret_name)
@@ -40,6 +63,7 @@ def put_secret(secret_name: str, secret_value: dict) -> bool:
     Returns:
         bool: True if successful, False otherwise.
     """
+    from botocore.exceptions import ClientError
     secrets_client = get_secrets_client()
     try:
         # Try to update the secret if it exists
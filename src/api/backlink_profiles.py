@@ -0,0 +1,319 @@
+"""
+Competitor backlink profiles, fetched concurrently and shared across tenants.
+
+A profile (referring domains, total backlinks, anchor text distribution, example backlinks) is
+built from a provider's backlink listing, fetched page by page:
+- Rate limits per provider: every profiler using the same provider name shares one limiter
+  (requests per period and concurrent requests), whichever tenant or comparison it works for
+- Cache: profiles are stored per (provider, domain), not per tenant, so tenants tracking the same
+  competitors share them. A profile younger than `ttl` is used as is. An older one is refreshed
+  incrementally: only backlinks first seen after its watermark are fetched and folded into its
+  counts. The cache's own TTL bounds how long that goes on before a full re-fetch (which also
+  drops lost links).
+- Coalescing: concurrent requests for the same domain in this process share one fetch
+- Anchor text distribution: counts per category (brand, generic, exact_match, other), updated
+  per backlink rather than recomputed from the whole listing
+
+Referring domains are kept in the backlink store (backlink_store.BacklinkStore), which link-gap
+analysis reads.
+
+The cache (an LLMCache file) and the store are passed in. LocalBacklinkProvider stands in for
+a real backlink API.
+"""
+import os
+import re
+import time
+import random
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+BACKLINK_PROFILE_TTL = int(os.getenv('BACKLINK_PROFILE_TTL', 86400))
+BACKLINK_FETCH_CONCURRENCY = int(os.getenv('BACKLINK_FETCH_CONCURRENCY', 8))
+ANCHOR_CATEGORIES = ('brand', 'generic', 'exact_match', 'other')
+EXAMPLE_BACKLINKS = 2
+
+GENERIC_ANCHORS = frozenset({
+    '', 'click here', 'here', 'read more', 'learn more', 'more', 'this', 'this site', 'website',
+    'site', 'link', 'visit', 'visit site', 'source', 'homepage', 'home', 'see more', 'view', 'go',
+})
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def brand_name(domain: str) -> str:
+    """
+    "www.acme-tools.co.uk" -> "acmetools": the first label after "www.", without punctuation.
+    """
+    host = domain.lower().split('//')[-1].split('/')[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    return ''.join(_WORD_RE.findall(host.split('.')[0]))
+
+def anchor_category(anchor: str, target: str, brand: str) -> str:
+    """
+    Args:
+        anchor: The link's anchor text.
+        target: The linked URL; an anchor repeating its last path segment's words is an exact match.
+        brand: brand_name() of the linked domain.
+    """
+    words = _WORD_RE.findall(anchor.lower())
+    text = ' '.join(words)
+    if text in GENERIC_ANCHORS:
+        return 'generic'
+    # Short brands ("hp") must be a whole word
+    if brand and (brand in words or len(brand) > 3 and brand in ''.join(words)):
+        return 'brand'
+    slug = _WORD_RE.findall(target.lower().split('?')[0].rstrip('/').rsplit('/', 1)[-1])
+    if '//' in target and target.rstrip('/').count('/') > 2 and words == slug:
+        return 'exact_match'
+    return 'other'
+
+def new_profile(domain: str, provider: str) -> dict:
+    return {
+        "domain": domain,
+        "provider": provider,
+        "referring_domains": 0,
+        "total_backlinks": 0,
+        "anchor_text_distribution": dict.fromkeys(ANCHOR_CATEGORIES, 0),
+        "example_backlinks": [],
+        "watermark": None,
+        "fetched_at": None,
+    }
+
+def fold(profile: dict, backlinks: list) -> None:
+    """
+    Add a page of backlinks to a profile's counts, anchor distribution, examples and watermark
+    (latest first_seen).
+    """
+    brand = brand_name(profile["domain"])
+    anchors = Counter(anchor_category(b.get("anchor") or '', b.get("target") or '', brand) for b in backlinks)
+    distribution = profile["anchor_text_distribution"]
+    for category, n in anchors.items():
+        distribution[category] += n
+    profile["total_backlinks"] += len(backlinks)
+    room = EXAMPLE_BACKLINKS - len(profile["example_backlinks"])
+    if room > 0:
+        profile["example_backlinks"].extend(
+            {key: b[key] for key in ("source", "target", "anchor", "type") if key in b} for b in backlinks[:room]
+        )
+    seen = [b["first_seen"] for b in backlinks if b.get("first_seen") is not None]
+    if seen:
+        profile["watermark"] = max(seen + ([profile["watermark"]] if profile["watermark"] is not None else []))
+
+class ProviderLimiter:
+    """
+    At most `rpm` requests per `period` seconds (token bucket) and `concurrency` in flight.
+    Use as a context manager around each provider request.
+    """
+    def __init__(self, rpm: float, concurrency: int, period: float = 60.0, clock=time.monotonic):
+        self.rpm = rpm
+        self.period = period
+        self.clock = clock
+        self.tokens = rpm
+        self.updated = clock()
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Returns:
+            float: Seconds waited.
+        """
+        start = self.clock()
+        self._slots.acquire()
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.rpm, self.tokens + (now - self.updated) * self.rpm / self.period)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return self.clock() - start
+                wait = (1 - self.tokens) * self.period / self.rpm
+            time.sleep(wait)
+
+    def release(self) -> None:
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def provider_limiter(provider) -> ProviderLimiter:
+    """
+    The process-wide limiter for `provider.name`, sized by the provider's rpm, concurrency and period.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider.name)
+        if limiter is None:
+            limiter = _limiters[provider.name] = ProviderLimiter(
+                provider.rpm, provider.concurrency, getattr(provider, 'period', 60.0)
+            )
+        return limiter
+
+class LocalBacklinkProvider:
+    """
+    Stand-in for a backlink API (Ahrefs, Moz, SEMrush): a deterministic, growing backlink
+    listing per domain, paginated, with a fixed latency per request.
+
+    Domain d's i-th backlink is first seen at ORIGIN + i * interval(d) (a new link every 0.5 to
+    5 days), so a later fetch with `since` returns the links gained since. Referring domains come
+    from a shared pool, so competitors overlap.
+    """
+    ORIGIN = 1_700_000_000.0
+    POOL = 20000
+    SLUGS = ('seo-audit', 'technical-seo', 'site-speed', 'schema-markup', 'link-building', 'blog/guide')
+    OTHER_ANCHORS = ('useful resource', 'according to this study', 'great tips', 'this guide on audits')
+
+    def __init__(self, name: str = 'local', rpm: float = 600, concurrency: int = 4, page_size: int = 500,
+                 latency: float = 0.1, period: float = 60.0, clock=time.time):
+        self.name = name
+        self.rpm = rpm
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.latency = latency
+        self.period = period
+        self.clock = clock
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def interval(self, domain: str) -> float:
+        seed = int.from_bytes(hashlib.blake2b(domain.encode(), digest_size=4).digest(), 'little')
+        return 43200 + seed % 388800
+
+    def backlink(self, domain: str, i: int) -> dict:
+        rng = random.Random(f"{domain}:{i}")
+        slug = rng.choice(self.SLUGS)
+        brand = brand_name(domain)
+        anchor = rng.choice([
+            brand.title(), f"{brand} tools", 'click here', 'read more', slug.rsplit('/', 1)[-1].replace('-', ' '),
+            rng.choice(self.OTHER_ANCHORS),
+        ])
+        return {
+            "source": f"https://ref{int(rng.paretovariate(1.2) * 40) % self.POOL}.example.net/post-{rng.randrange(1000)}",
+            "target": f"https://{domain}/{slug}",
+            "anchor": anchor,
+            "type": 'nofollow' if rng.random() < 0.3 else 'dofollow',
+            "first_seen": self.ORIGIN + i * self.interval(domain),
+        }
+
+    def fetch(self, domain: str, since: Optional[float] = None, cursor: Optional[int] = None) -> tuple:
+        """
+        Args:
+            since: Only backlinks first seen after this timestamp.
+            cursor: From the previous page.
+        Returns:
+            tuple: (backlinks, cursor of the next page or None)
+        """
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            interval = self.interval(domain)
+            end = int((self.clock() - self.ORIGIN) // interval) + 1
+            start = cursor if cursor is not None else 0 if since is None else int((since - self.ORIGIN) // interval) + 1
+            stop = min(end, start + self.page_size)
+            page = [self.backlink(domain, i) for i in range(max(start, 0), stop)]
+            return page, stop if stop < end else None
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+class BacklinkProfiler:
+    def __init__(self, provider, cache, store, ttl: float = BACKLINK_PROFILE_TTL,
+                 concurrency: int = BACKLINK_FETCH_CONCURRENCY, clock=time.time):
+        """
+        Args:
+            provider: Has name, rpm, concurrency (and optionally period) and
+                fetch(domain, since, cursor) -> (backlinks, next cursor).
+            cache: Store with get(key) -> (found, value) and set(key, value) (an LLMCache).
+            store: backlink_store.BacklinkStore receiving each domain's referring domains.
+            ttl: Seconds a profile is used before it is refreshed.
+            concurrency: Domains profiled at once by profiles(); requests to the provider are
+                further limited by its limiter.
+        """
+        self.provider = provider
+        self.cache = cache
+        self.store = store
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.clock = clock
+        self.limiter = provider_limiter(provider)
+        self.stats = Counter()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _key(self, domain: str) -> str:
+        return f"backlinks:{self.provider.name}:{domain.lower()}"
+
+    def _fetch(self, domain: str, cached: Optional[dict]) -> dict:
+        profile = cached or new_profile(domain, self.provider.name)
+        since = profile["watermark"] if cached else None
+        sources, cursor = [], None
+        while True:
+            with self.limiter:
+                backlinks, cursor = self.provider.fetch(domain, since=since, cursor=cursor)
+            self.stats['requests'] += 1
+            fold(profile, backlinks)
+            sources.extend(b["source"] for b in backlinks)
+            if cursor is None:
+                break
+        if cached:
+            profile["referring_domains"] = self.store.add(domain, sources)
+        else:
+            profile["referring_domains"] = self.store.put(domain, sources)
+        profile["fetched_at"] = self.clock()
+        self.cache.set(self._key(domain), profile)
+        return profile
+
+    def profile(self, domain: str) -> dict:
+        """
+        The domain's profile: cached if younger than the TTL, else refreshed incrementally, else fetched.
+        """
+        found, cached = self.cache.get(self._key(domain))
+        if found and self.clock() - cached["fetched_at"] < self.ttl and self.store.has(domain):
+            self.stats['hits'] += 1
+            return cached
+        with self._lock:
+            future = self._inflight.get(domain)
+            owner = future is None
+            if owner:
+                future = self._inflight[domain] = Future()
+        if not owner:
+            self.stats['coalesced'] += 1
+            return future.result()
+        try:
+            refresh = found and self.store.has(domain)
+            self.stats['refreshes' if refresh else 'fetches'] += 1
+            result = self._fetch(domain, cached if refresh else None)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(domain, None)
+
+    def profiles(self, domains: list) -> dict:
+        """
+        Profiles of `domains`, fetched concurrently.
+        Returns:
+            dict: domain -> profile, in the order of `domains` (duplicates once).
+        """
+        unique = list(dict.fromkeys(domains))
+        if len(unique) <= 1:
+            return {domain: self.profile(domain) for domain in unique}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(unique)))) as pool:
+            return dict(zip(unique, pool.map(self.profile, unique)))
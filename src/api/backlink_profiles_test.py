@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from backlink_profiles import BacklinkProfiler, LocalBacklinkProvider, ProviderLimiter, anchor_category, brand_name
+from backlink_store import BacklinkStore
+from llm_cache import LLMCache
+
+DAY = 86400
+
+def profiler(tmp_path, provider, now, **kwargs):
+    cache = LLMCache(str(tmp_path / "profiles.sqlite3"), ttl=30 * DAY)
+    return BacklinkProfiler(provider, cache, BacklinkStore(str(tmp_path / "store")), ttl=DAY, clock=lambda: now[0], **kwargs)
+
+def test_anchor_categories():
+    assert brand_name("https://www.acme-tools.co.uk/x") == "acmetools"
+    target = "https://acme-tools.com/seo-audit/"
+    assert anchor_category("Click here!", target, "acmetools") == "generic"
+    assert anchor_category("", target, "acmetools") == "generic"
+    assert anchor_category("Acme Tools", target, "acmetools") == "brand"
+    assert anchor_category("SEO audit", target, "acmetools") == "exact_match"
+    assert anchor_category("SEO audit", "https://acme-tools.com", "acmetools") == "other"
+    assert anchor_category("a great resource", target, "acmetools") == "other"
+
+def test_refresh_is_incremental_and_matches_full_fetch(tmp_path):
+    now = [LocalBacklinkProvider.ORIGIN + 400 * DAY]
+    provider = LocalBacklinkProvider("incremental", page_size=50, latency=0, clock=lambda: now[0])
+    profiles = profiler(tmp_path / "a", provider, now)
+    first = profiles.profile("comp.com")
+    assert first["total_backlinks"] == sum(first["anchor_text_distribution"].values()) > 0
+    calls = provider.calls
+    assert profiles.profile("comp.com") == first and provider.calls == calls  # fresh: cached
+    now[0] += 20 * DAY
+    refreshed = profiles.profile("comp.com")
+    gained = refreshed["total_backlinks"] - first["total_backlinks"]
+    assert 4 <= gained <= 40 and provider.calls == calls + 1  # only the new links
+    full = profiler(tmp_path / "b", provider, now).profile("comp.com")
+    for key in ("total_backlinks", "referring_domains", "anchor_text_distribution", "watermark"):
+        assert refreshed[key] == full[key]
+    assert profiles.stats == {"fetches": 1, "hits": 1, "refreshes": 1, "requests": calls + 1}
+
+def test_profiles_share_cache_and_respect_provider_limits(tmp_path):
+    now = [LocalBacklinkProvider.ORIGIN + 100 * DAY]
+    provider = LocalBacklinkProvider("limited", concurrency=2, latency=0.02, clock=lambda: now[0])
+    domains = [f"competitor{i}.com" for i in range(6)]
+    tenant_a = profiler(tmp_path, provider, now, concurrency=6)
+    profiles = tenant_a.profiles(["mine.com", *domains, "competitor0.com"])
+    assert list(profiles) == ["mine.com", *domains]
+    assert provider.max_in_flight == 2 and provider.calls == 7
+    # Another tenant tracking some of the same competitors
+    tenant_b = profiler(tmp_path, provider, now)
+    assert tenant_b.profiles(domains[:3]) == {d: profiles[d] for d in domains[:3]}
+    assert provider.calls == 7 and tenant_b.stats["hits"] == 3
+
+def test_concurrent_requests_for_a_domain_share_one_fetch(tmp_path):
+    now = [LocalBacklinkProvider.ORIGIN + 100 * DAY]
+    provider = LocalBacklinkProvider("coalesced", latency=0.05, clock=lambda: now[0])
+    profiles = profiler(tmp_path, provider, now)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(profiles.profile, ["comp.com"] * 4))
+    assert provider.calls == 1 and all(r == results[0] for r in results)
+
+def test_limiter_spaces_requests():
+    now = [0.0]
+    limiter = ProviderLimiter(rpm=2, concurrency=5, period=1.0, clock=lambda: now[0])
+    assert limiter.acquire() == 0 and limiter.acquire() == 0
+    limiter.release(), limiter.release()
+    assert limiter.tokens < 1
+    now[0] += 0.5
+    assert limiter.acquire() == 0  # one request per 0.5s
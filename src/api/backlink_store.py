@@ -0,0 +1,229 @@
+"""
+Compact on-disk store of backlink profiles for link-gap analysis.
+
+Each referring domain (or referring URL) is interned to a 64-bit integer id: the first 8 bytes of
+its normalized form's BLAKE2b digest. Ids need no shared dictionary, so profiles stored at
+different times, for any tenant, are directly comparable. (Collisions are negligible: about
+3 in 10^8 for a million names.)
+
+A domain's profile is a sorted, unique uint64 array saved as .npy and memory-mapped on load,
+next to its names (a UTF-8 blob plus offsets, in id order) used only to print the prospects
+found. Gap analysis is vectorized over the id arrays:
+- shared_counts(): every id linking to any of N competitors, with how many of them it links to
+- link_gap(): those ids minus the ones already linking to the main domain
+- tiers(): high / medium / low by the share of competitors a prospect links to
+"""
+import os
+import re
+import hashlib
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+import numpy as np
+
+BACKLINK_STORE_DIR = os.getenv('BACKLINK_STORE_DIR', 'cache/backlinks')
+KINDS = ('domains', 'urls')
+# A prospect linking to at least this share of the competitors (and to 2+ of them) is high tier
+HIGH_TIER_SHARE = 0.5
+
+_SAFE_NAME_RE = re.compile(r"[^a-z0-9.-]")
+
+def normalize(source: str, kind: str = 'domains') -> str:
+    """
+    Args:
+        source: A referring URL (or bare domain).
+        kind: 'domains' keeps the host without "www."; 'urls' the URL without scheme, fragment
+            or trailing slash.
+    """
+    source = source.strip()
+    parts = urlsplit(source if '//' in source else f"//{source}")
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if kind == 'domains':
+        return host
+    path = parts.path.rstrip('/')
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+def intern(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), 'little')
+
+def encode(sources: Iterable[str], kind: str = 'domains') -> tuple:
+    """
+    Returns:
+        tuple: (sorted unique uint64 ids, their names in the same order)
+    """
+    names = {}
+    for source in sources:
+        name = normalize(source, kind)
+        if name:
+            names[name] = None
+    names = list(names)
+    ids = np.fromiter((intern(name) for name in names), dtype=np.uint64, count=len(names))
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    names = [names[i] for i in order]
+    keep = np.ones(len(ids), dtype=bool)
+    keep[1:] = ids[1:] != ids[:-1]  # drop hash collisions
+    return ids[keep], [name for name, k in zip(names, keep) if k]
+
+def contains(haystack: np.ndarray, needles: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask: which `needles` are in the sorted array `haystack`.
+    """
+    if not len(haystack):
+        return np.zeros(len(needles), dtype=bool)
+    idx = np.searchsorted(haystack, needles)
+    return haystack[np.minimum(idx, len(haystack) - 1)] == needles
+
+def union(arrays: list) -> np.ndarray:
+    return np.unique(np.concatenate(arrays)) if arrays else np.zeros(0, dtype=np.uint64)
+
+def intersect(arrays: list) -> np.ndarray:
+    if not arrays:
+        return np.zeros(0, dtype=np.uint64)
+    result = min(arrays, key=len)
+    for array in arrays:
+        if array is not result:
+            result = result[contains(array, result)]
+    return np.asarray(result)
+
+def difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.asarray(a[~contains(b, a)])
+
+def shared_counts(arrays: list) -> tuple:
+    """
+    Args:
+        arrays: Sorted unique id arrays, one per competitor.
+    Returns:
+        tuple: (sorted ids linking to any of them, number of arrays each id is in)
+    """
+    if not arrays:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    return np.unique(np.concatenate(arrays), return_counts=True)
+
+def link_gap(main: np.ndarray, competitors: list) -> tuple:
+    """
+    Returns:
+        tuple: (ids linking to a competitor but not to `main`, competitor count of each)
+    """
+    ids, counts = shared_counts(competitors)
+    missing = ~contains(main, ids)
+    return ids[missing], counts[missing]
+
+def tiers(ids: np.ndarray, counts: np.ndarray, n_competitors: int, limit: Optional[int] = None) -> dict:
+    """
+    Split prospects into tiers: high links to 2+ competitors and at least HIGH_TIER_SHARE of them,
+    medium to 2+, low to one. Within a tier, most shared first.
+    Returns:
+        dict: tier -> ids (at most `limit` each)
+    """
+    order = np.argsort(-counts, kind='stable')
+    ids, counts = ids[order], counts[order]
+    high = counts >= max(2, int(np.ceil(HIGH_TIER_SHARE * n_competitors)))
+    medium = (counts >= 2) & ~high
+    low = counts < 2
+    return {tier: ids[mask][:limit] for tier, mask in (('high', high), ('medium', medium), ('low', low))}
+
+class BacklinkStore:
+    def __init__(self, path: str = BACKLINK_STORE_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, domain: str, kind: str, suffix: str) -> str:
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        safe = _SAFE_NAME_RE.sub('_', domain.lower())
+        return os.path.join(self.path, f"{safe}.{kind}.{suffix}")
+
+    def _write(self, domain: str, kind: str, ids: np.ndarray, names: list) -> int:
+        blobs = [name.encode() for name in names]
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+        files = {'ids.npy': ids, 'offsets.npy': offsets}
+        for suffix, array in files.items():
+            with open(self._file(domain, kind, suffix) + '.tmp', 'wb') as f:
+                np.save(f, array)
+        with open(self._file(domain, kind, 'names') + '.tmp', 'wb') as f:
+            f.write(b''.join(blobs))
+        # ids last: a profile is visible once its ids file is
+        for suffix in ('names', 'offsets.npy', 'ids.npy'):
+            os.replace(self._file(domain, kind, suffix) + '.tmp', self._file(domain, kind, suffix))
+        return len(ids)
+
+    def put(self, domain: str, sources: Iterable[str], kind: str = 'domains') -> int:
+        """
+        Replace a domain's stored profile with the referring `sources` (URLs or domains).
+        Returns:
+            int: Number of distinct referring domains/URLs stored.
+        """
+        return self._write(domain, kind, *encode(sources, kind))
+
+    def add(self, domain: str, sources: Iterable[str], kind: str = 'domains') -> int:
+        """
+        Add referring `sources` to a domain's stored profile (put() if it has none).
+        Returns:
+            int: Number of distinct referring domains/URLs stored.
+        """
+        if not self.has(domain, kind):
+            return self.put(domain, sources, kind)
+        stored = self.ids(domain, kind)
+        ids, names = encode(sources, kind)
+        new = ~contains(stored, ids)
+        if not new.any():
+            return len(stored)
+        merged = np.concatenate([stored, ids[new]])
+        order = np.argsort(merged, kind='stable')
+        names = self.names(domain, kind) + [name for name, n in zip(names, new) if n]
+        return self._write(domain, kind, merged[order], [names[i] for i in order])
+
+    def has(self, domain: str, kind: str = 'domains') -> bool:
+        return os.path.exists(self._file(domain, kind, 'ids.npy'))
+
+    def ids(self, domain: str, kind: str = 'domains') -> np.ndarray:
+        """
+        The domain's sorted id array, memory-mapped (empty if not stored).
+        """
+        if not self.has(domain, kind):
+            return np.zeros(0, dtype=np.uint64)
+        return np.load(self._file(domain, kind, 'ids.npy'), mmap_mode='r')
+
+    def names(self, domain: str, kind: str = 'domains') -> list:
+        """
+        All the domain's stored names, in id order.
+        """
+        if not self.has(domain, kind):
+            return []
+        offsets = np.load(self._file(domain, kind, 'offsets.npy')).tolist()
+        with open(self._file(domain, kind, 'names'), 'rb') as f:
+            blob = f.read()
+        return [blob[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+
+    def lookup(self, domains: Iterable[str], ids, kind: str = 'domains') -> dict:
+        """
+        Names of `ids`, from the first of `domains` whose profile has each.
+        Returns:
+            dict: id -> name, for the ids found.
+        """
+        remaining = np.asarray(ids, dtype=np.uint64)
+        result = {}
+        for domain in domains:
+            if not len(remaining):
+                break
+            stored = self.ids(domain, kind)
+            found = contains(stored, remaining)
+            if not found.any():
+                continue
+            offsets = np.load(self._file(domain, kind, 'offsets.npy'), mmap_mode='r')
+            blob = np.memmap(self._file(domain, kind, 'names'), dtype=np.uint8, mode='r')
+            for id_, p in zip(remaining[found].tolist(), np.searchsorted(stored, remaining[found]).tolist()):
+                result[id_] = bytes(blob[offsets[p]:offsets[p + 1]]).decode()
+            remaining = remaining[~found]
+        return result
+
+_store = None
+
+def get_backlink_store() -> BacklinkStore:
+    global _store
+    if _store is None:
+        _store = BacklinkStore()
+    return _store
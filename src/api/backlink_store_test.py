@@ -0,0 +1,59 @@
+import numpy as np
+from backlink_store import (
+    BacklinkStore, difference, encode, intersect, link_gap, normalize, shared_counts, tiers, union
+)
+
+def ids(*names):
+    return encode(names)[0]
+
+def test_normalize_referring_domains_and_urls():
+    assert normalize("https://WWW.Example.com/blog/post/?a=1#top") == "example.com"
+    assert normalize("https://www.example.com/blog/post/?a=1#top", kind="urls") == "example.com/blog/post?a=1"
+    assert normalize("news.example.org") == "news.example.org"
+
+def test_encode_dedupes_and_sorts():
+    encoded, names = encode(["https://a.com/x", "https://www.a.com/y", "http://b.com"])
+    assert len(encoded) == 2 and list(encoded) == sorted(encoded)
+    assert sorted(names) == ["a.com", "b.com"]
+
+def test_set_algebra():
+    a, b, c = ids("x.com", "y.com", "z.com"), ids("y.com", "z.com", "w.com"), ids("z.com")
+    assert set(union([a, b, c]).tolist()) == set(ids("w.com", "x.com", "y.com", "z.com").tolist())
+    assert intersect([a, b, c]).tolist() == ids("z.com").tolist()
+    assert difference(a, b).tolist() == ids("x.com").tolist()
+    shared, counts = shared_counts([a, b, c])
+    assert dict(zip(shared.tolist(), counts.tolist()))[int(ids("z.com")[0])] == 3
+
+def test_link_gap_and_tiers():
+    main = ids("mine.com", "shared.com")
+    competitors = [
+        ids("shared.com", "everyone.com", "two.com", "one.com"),
+        ids("everyone.com", "two.com"),
+        ids("everyone.com", "mine.com"),
+        ids("everyone.com"),
+    ]
+    gap, counts = link_gap(main, competitors)
+    tiered = tiers(gap, counts, len(competitors))
+    # 4 competitors: high links to 2+ of them (half), low to one
+    assert tiered["high"].tolist() == ids("everyone.com").tolist() + ids("two.com").tolist()
+    assert tiered["medium"].tolist() == []
+    assert tiered["low"].tolist() == ids("one.com").tolist()
+    eight = tiers(np.array([1, 2, 3], dtype=np.uint64), np.array([4, 2, 1]), 8)
+    assert {tier: array.tolist() for tier, array in eight.items()} == {"high": [1], "medium": [2], "low": [3]}
+
+def test_store_round_trip_memory_mapped(tmp_path):
+    store = BacklinkStore(str(tmp_path))
+    assert not store.has("comp.com")
+    assert store.put("comp.com", ["https://a.com/1", "https://a.com/2", "https://b.org/x"]) == 2
+    assert store.put("comp.com", ["https://a.com/1", "https://b.org/x"], kind="urls") == 2
+    stored = store.ids("comp.com")
+    assert isinstance(stored, np.memmap) and len(stored) == 2
+    assert store.lookup(["other.com", "comp.com"], stored) == dict(zip(stored.tolist(), encode(["a.com", "b.org"])[1]))
+    assert sorted(store.lookup(["comp.com"], store.ids("comp.com", "urls"), "urls").values()) == ["a.com/1", "b.org/x"]
+
+def test_store_add_merges_into_profile(tmp_path):
+    store = BacklinkStore(str(tmp_path))
+    assert store.add("comp.com", ["https://a.com/1"]) == 1
+    assert store.add("comp.com", ["https://b.org/x", "https://a.com/2", "https://c.net"]) == 3
+    assert store.ids("comp.com").tolist() == encode(["a.com", "b.org", "c.net"])[0].tolist()
+    assert store.names("comp.com") == encode(["a.com", "b.org", "c.net"])[1]
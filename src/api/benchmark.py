@@ -1,8 +1,32 @@
-from typing import List
+import os
+from typing import List, Optional
+from .backlink_profiles import BacklinkProfiler, LocalBacklinkProvider
+from .backlink_store import get_backlink_store, link_gap, tiers
+from .llm_cache import LLMCache
+from .outreach import DEFAULT_TEMPLATE, OUTREACH_SENDER, OutreachPipeline, SMTPPool, iter_outreach_packets, packet_fields
+from .db_writer import get_writer
 from .logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+BACKLINK_PROFILE_CACHE_PATH = os.getenv('BACKLINK_PROFILE_CACHE_PATH', 'cache/backlink_profiles.sqlite3')
+BACKLINK_PROFILE_CACHE_MAX_BYTES = int(os.getenv('BACKLINK_PROFILE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Profiles are refreshed incrementally for this long, then fetched in full (dropping lost links)
+BACKLINK_PROFILE_RETENTION = int(os.getenv('BACKLINK_PROFILE_RETENTION', 30 * 86400))
+
+_profiler = None
+
+def get_backlink_profiler() -> BacklinkProfiler:
+    """
+    Profiler over this process's profile cache, with the local stand-in provider until a
+    backlink API is integrated.
+    """
+    global _profiler
+    cache = LLMCache.for_process(BACKLINK_PROFILE_CACHE_PATH, BACKLINK_PROFILE_CACHE_MAX_BYTES, BACKLINK_PROFILE_RETENTION)
+    if _profiler is None or _profiler.cache is not cache:
+        _profiler = BacklinkProfiler(LocalBacklinkProvider(), cache, get_backlink_store())
+    return _profiler
+
 def benchmark_competitor(domain: str, urls: List[str]) -> dict:
     # Placeholder: In a real implementation, fetch and analyze competitor data
     return {
@@ -13,40 +37,26 @@ def benchmark_competitor(domain: str, urls: List[str]) -> dict:
 
 def collect_and_analyze_backlinks(domain: str) -> dict:
     """
-    Simulate collecting and analyzing backlink data for a domain.
+    Collect and analyze backlink data for a domain (cached, see backlink_profiles.py).
     Args:
         domain (str): The domain to analyze.
     Returns:
         dict: Backlink profile including referring domains, total backlinks, anchor text distribution, and example backlinks.
     """
-    # Placeholder for real API integration (e.g., Ahrefs, Moz, SEMrush)
-    return {
-        "domain": domain,
-        "referring_domains": 42,
-        "total_backlinks": 123,
-        "anchor_text_distribution": {
-            "brand": 60,
-            "generic": 30,
-            "exact_match": 20,
-            "other": 13
-        },
-        "example_backlinks": [
-            {"source": "https://example1.com/page", "target": domain, "anchor": "Brand Name", "type": "dofollow"},
-            {"source": "https://example2.com/page", "target": domain, "anchor": "Click here", "type": "nofollow"}
-        ]
-    }
+    return get_backlink_profiler().profile(domain)
 
 def compare_backlink_profiles(domain: str, competitors: list) -> dict:
     """
-    Simulate comparing the backlink profile of a domain with competitors.
+    Compare the backlink profile of a domain with competitors. Profiles are fetched concurrently
+    and shared with other tenants tracking the same domains.
     Args:
         domain (str): The main domain.
         competitors (list): List of competitor domains.
     Returns:
         dict: Comparison results highlighting differences in referring domains, backlinks, and anchor text.
     """
-    main_profile = collect_and_analyze_backlinks(domain)
-    competitor_profiles = [collect_and_analyze_backlinks(c) for c in competitors]
+    profiles = get_backlink_profiler().profiles([domain, *competitors])
+    main_profile = profiles[domain]
     comparison = {
         "domain": domain,
         "referring_domains": main_profile["referring_domains"],
@@ -54,7 +64,8 @@ def compare_backlink_profiles(domain: str, competitors: list) -> dict:
         "anchor_text_distribution": main_profile["anchor_text_distribution"],
         "competitors": []
     }
-    for c, profile in zip(competitors, competitor_profiles):
+    for c in competitors:
+        profile = profiles[c]
         comparison["competitors"].append({
             "domain": c,
             "referring_domains": profile["referring_domains"],
@@ -63,73 +74,64 @@ def compare_backlink_profiles(domain: str, competitors: list) -> dict:
         })
     return comparison
 
-def generate_tiered_link_prospects(domain: str, competitors: list) -> dict:
+def generate_tiered_link_prospects(domain: str, competitors: list, limit_per_tier: Optional[int] = None) -> dict:
     """
-    Simulate generating a prioritized (tiered) list of link prospects based on backlink comparison.
+    Generate a prioritized (tiered) list of link prospects: referring domains that link to
+    competitors but not to the main domain, tiered by how many competitors they link to.
+    Profiles are refreshed if stale (see compare_backlink_profiles), then read from the backlink
+    store (backlink_store.py).
     Args:
         domain (str): The main domain.
         competitors (list): List of competitor domains.
+        limit_per_tier (int): Maximum prospects per tier (default: all).
     Returns:
-        dict: Tiered link prospects (high, medium, low) with mock data.
+        dict: Tiered link prospects (high, medium, low) as URLs, most shared first.
     """
-    comparison = compare_backlink_profiles(domain, competitors)
-    # Mock logic: prospects are competitor backlinks not already linking to the main domain
-    all_competitor_links = set()
-    for c in comparison["competitors"]:
-        # Simulate extracting unique backlink sources
-        all_competitor_links.update([f"https://prospect-{c['domain']}-{i}.com" for i in range(1, 6)])
-    # Simulate main domain's existing backlinks
-    main_links = set([f"https://prospect-{domain}-{i}.com" for i in range(1, 4)])
-    prospects = list(all_competitor_links - main_links)
-    # Mock tiering: first 3 are high, next 3 are medium, rest are low
-    tiers = {
-        "high": prospects[:3],
-        "medium": prospects[3:6],
-        "low": prospects[6:]
-    }
-    return tiers
+    get_backlink_profiler().profiles([domain, *competitors])
+    store = get_backlink_store()
+    gap, counts = link_gap(store.ids(domain), [store.ids(c) for c in competitors])
+    tiered = tiers(gap, counts, len(competitors), limit_per_tier)
+    names = store.lookup(competitors, [i for ids in tiered.values() for i in ids.tolist()])
+    return {tier: [f"https://{names[i]}" for i in ids.tolist()] for tier, ids in tiered.items()}
 
 def create_outreach_task_packets(domain: str, prospects: dict) -> list:
     """
-    Simulate creating outreach task packets for each prospect.
+    Create outreach task packets for each prospect, with their rendered email text.
+    automate_outreach takes iter_outreach_packets() directly and renders each message when sending it.
     Args:
         domain (str): The main domain.
         prospects (dict): Tiered link prospects (high, medium, low).
     Returns:
         list: Outreach packets with contact info and personalized templates.
     """
-    packets = []
-    for tier, urls in prospects.items():
-        for url in urls:
-            contact = {
-                "name": f"Contact for {url}",
-                "email": f"info@{url.replace('https://', '').replace('.com', '')}.com"
-            }
-            template = f"""Hello {contact['name']},\n\nI came across your site {url} and thought there could be a great opportunity for collaboration with {domain}.\n\nWould you be interested in discussing a potential partnership or backlink exchange?\n\nBest regards,\nJaffeBot Outreach Team"""
-            packets.append({
-                "prospect_url": url,
-                "tier": tier,
-                "contact": contact,
-                "template": template
-            })
-    return packets
+    return [
+        {**packet, "template": DEFAULT_TEMPLATE.render_body(packet_fields(packet))}
+        for packet in iter_outreach_packets(domain, prospects)
+    ]
 
-def automate_outreach(packets: list) -> dict:
+_outreach_pipeline = None
+_outreach_pid = None
+
+def get_outreach_pipeline() -> OutreachPipeline:
+    """
+    Per-process pipeline: its SMTP connections and rate limits are shared by every send in the process.
     """
-    Simulate automating the outreach process for a list of outreach packets.
+    global _outreach_pipeline, _outreach_pid
+    if _outreach_pipeline is None or _outreach_pid != os.getpid():
+        _outreach_pipeline = OutreachPipeline(SMTPPool(), writer=get_writer())
+        _outreach_pid = os.getpid()
+    return _outreach_pipeline
+
+def automate_outreach(packets, sender: str = OUTREACH_SENDER) -> dict:
+    """
+    Send outreach emails over pooled SMTP connections, within per-domain rate limits, recording
+    each message's status in outreach_messages (see outreach.py).
     Args:
-        packets (list): Outreach packets with contact info and templates.
+        packets: Outreach packets (a list or iter_outreach_packets()).
+        sender (str): From address; its domain's rate limit applies.
     Returns:
-        dict: Summary of sent emails (mocked).
+        dict: total, and the number of emails sent, bounced, deferred and failed.
     """
-    sent = []
-    for packet in packets:
-        # Simulate sending email (replace with real integration in future)
-        logger.info(f"Sending email to {packet['contact']['email']} for {packet['prospect_url']} (tier: {packet['tier']})")
-        sent.append({
-            "to": packet['contact']['email'],
-            "prospect_url": packet['prospect_url'],
-            "tier": packet['tier'],
-            "status": "sent"
-        })
-    return {"sent": sent, "total": len(sent)} 
\ No newline at end of file
+    summary = get_outreach_pipeline().send(packets, sender=sender)
+    logger.info("Outreach from %s: %s", sender, summary)
+    return summary
@@ -0,0 +1,159 @@
+import pytest
+from src.api import celery_app as tasks
+from src.api.dedup import FileDedupStore, dedup_key
+
+@pytest.fixture
+def eager(monkeypatch):
+    conf = tasks.celery_app.conf
+    monkeypatch.setattr(conf, 'task_always_eager', True)
+    monkeypatch.setattr(conf, 'task_eager_propagates', False)  # eager retries re-apply only when not propagated
+    return tasks.celery_app
+
+class FakeTask:
+    """Stands in for a task called with .run(); `fail` maps an argument to the number of times it raises."""
+    def __init__(self, result, fail=None):
+        self.result = result
+        self.fail = dict(fail or {})
+        self.calls = []
+
+    def run(self, *args):
+        self.calls.append(args)
+        key = args[0]
+        if self.fail.get(key):
+            self.fail[key] -= 1
+            raise RuntimeError(f'failed for {key}')
+        return self.result
+
+class FakeConnection:
+    def close(self):
+        pass
+
+def test_agent_queues_are_declared_with_the_lane_priority_range():
+    from src.api.fair_share import LANE_PRIORITY
+    queues = tasks.celery_app.conf.task_queues
+    assert {queue.name for queue in queues} == {"discovery", "audit", "content", "backlink"}
+    assert all(queue.max_priority == max(LANE_PRIORITY.values()) for queue in queues)
+    assert not tasks.celery_app.conf.task_queue_max_priority  # set per queue, not on every queue Celery declares
+
+@pytest.fixture
+def refresh(eager, monkeypatch):
+    """Content refresh with stubbed suggestion, update, database and lock; records what happened."""
+    state = {'marked': [], 'waves': [], 'released': [], 'extended': 0}
+    monkeypatch.setattr(tasks, 'CONTENT_REFRESH_CONCURRENCY', 2)
+    monkeypatch.setattr(tasks, 'openai_content_suggestion', FakeTask('new copy'))
+    monkeypatch.setattr(tasks, 'update_content_task', FakeTask('updated'))
+    monkeypatch.setattr(tasks, 'get_connection', FakeConnection)
+    monkeypatch.setattr(tasks, 'mark_content_refreshed', lambda conn, urls: state['marked'].append(list(urls)))
+    monkeypatch.setattr(tasks, 'release_lock', lambda name, token: state['released'].append(token))
+    monkeypatch.setattr(tasks, 'extend_lock', lambda name, token, ttl: state.__setitem__('extended', state['extended'] + 1))
+    dispatch = tasks._dispatch_refresh_wave
+
+    def record_wave(urls, summary, lock_token):
+        state['waves'].append(urls[:tasks.CONTENT_REFRESH_CONCURRENCY])
+        return dispatch(urls, summary, lock_token)
+
+    monkeypatch.setattr(tasks, '_dispatch_refresh_wave', record_wave)
+    return state
+
+def start(urls):
+    summary = {'total': len(urls), 'refreshed': 0, 'failed': 0, 'waves': 0}
+    return tasks._dispatch_refresh_wave(urls, summary, 'token').get()
+
+def test_refresh_runs_in_waves_of_the_concurrency_limit(refresh):
+    summary = start(['/a', '/b', '/c', '/d', '/e'])
+    assert refresh['waves'] == [['/a', '/b'], ['/c', '/d'], ['/e']]
+    assert refresh['marked'] == [['/a', '/b'], ['/c', '/d'], ['/e']]
+    assert summary == {'total': 5, 'refreshed': 5, 'failed': 0, 'waves': 3}
+    assert refresh['extended'] == 2 and refresh['released'] == ['token']
+    assert tasks.update_content_task.calls[0] == ('/a', 'new copy')
+
+def test_failed_urls_do_not_abandon_the_run(refresh, monkeypatch):
+    # '/b' fails every attempt, '/c' fails once and succeeds on retry
+    monkeypatch.setattr(tasks, 'openai_content_suggestion', FakeTask('new copy', fail={
+        'Suggest updated content for /b': tasks.CONTENT_REFRESH_MAX_RETRIES + 1,
+        'Suggest updated content for /c': 1,
+    }))
+    monkeypatch.setattr(tasks, 'update_content_task', FakeTask('updated', fail={'/d': 99}))
+    summary = start(['/a', '/b', '/c', '/d', '/e'])
+    assert refresh['marked'] == [['/a'], ['/c'], ['/e']]
+    assert summary == {'total': 5, 'refreshed': 3, 'failed': 2, 'waves': 3}
+    assert refresh['released'] == ['token']
+
+def test_missing_api_key_is_not_counted_as_refreshed(refresh, monkeypatch):
+    monkeypatch.setattr(tasks, 'openai_content_suggestion', FakeTask(tasks.API_KEY_MISSING))
+    summary = start(['/a', '/b'])
+    assert refresh['marked'] == [] and tasks.update_content_task.calls == []
+    assert summary['refreshed'] == 0 and summary['failed'] == 2
+
+calls = []
+
+@tasks.celery_app.task(base=tasks.DeduplicatedTask, name='celery_app_test.audit')
+def dedup_audit(domain: str, fail: bool = False):
+    calls.append(domain)
+    if fail:
+        raise ValueError('audit failed')
+    return {'domain': domain, 'issues': len(calls)}
+
+@pytest.fixture
+def store(eager, tmp_path, monkeypatch):
+    store = FileDedupStore(str(tmp_path / 'dedup'))
+    monkeypatch.setattr(tasks, 'get_dedup_store', lambda: store)
+    calls.clear()
+    return store
+
+def test_repeat_within_the_ttl_reuses_the_result(store):
+    result, outcome = tasks.submit_deduplicated(dedup_audit, 'https://Example.com/')
+    assert outcome == 'executed' and result.get() == {'domain': 'https://Example.com/', 'issues': 1}
+    result, outcome = tasks.submit_deduplicated(dedup_audit, 'https://example.com')
+    assert outcome == 'cache_hit' and result.get() == {'domain': 'https://Example.com/', 'issues': 1}
+    assert calls == ['https://Example.com/']
+    # The claim was released once the result was stored
+    assert store.claim(dedup_key(dedup_audit.name, ('https://example.com',)), 'next', ttl=60) is None
+
+def test_duplicate_joins_the_in_flight_task(store):
+    store.claim(dedup_key(dedup_audit.name, ('https://example.com',)), 'running-task', ttl=60)
+    result, outcome = tasks.submit_deduplicated(dedup_audit, 'https://example.com/')
+    assert outcome == 'joined_inflight' and result.id == 'running-task'
+    assert calls == []
+
+def test_failure_releases_the_claim_and_stores_nothing(store):
+    result, outcome = tasks.submit_deduplicated(dedup_audit, 'https://example.com', fail=True)
+    assert outcome == 'executed'
+    with pytest.raises(ValueError):
+        result.get()
+    key = dedup_key(dedup_audit.name, ('https://example.com',), {'fail': True})
+    assert store.get_result(key) == (False, None)
+    assert store.claim(key, 'next', ttl=60) is None
+
+def test_direct_duplicate_returns_the_stored_result(store):
+    store.set_result(dedup_key(dedup_audit.name, ('https://example.com',)), {'cached': True}, ttl=60)
+    assert dedup_audit.delay('https://example.com').get() == {'cached': True}
+    assert calls == []
+
+def test_first_sitemap_sync_builds_the_link_index(monkeypatch):
+    from src.api import internal_links
+    urls = [f"https://example.com/p{i}" for i in range(450)]
+    queued, started = [], []
+    monkeypatch.setattr(tasks.reaudit, 'sync_sitemap', lambda tenant_id, domain: urls)
+    monkeypatch.setattr(internal_links, 'queue_pages', lambda tenant_id, pages: queued.append((tenant_id, pages)))
+    monkeypatch.setattr(tasks.index_link_batch, 'delay', started.append)
+    monkeypatch.setattr(internal_links, 'index_exists', lambda tenant_id: False)
+    assert tasks.sync_tenant_sitemap.run(7, 'https://example.com/') == 450
+    assert queued == [(7, urls)] and started == [7]
+    # Once the tenant has an index, re-audits keep it current
+    queued.clear()
+    monkeypatch.setattr(internal_links, 'index_exists', lambda tenant_id: True)
+    tasks.sync_tenant_sitemap.run(7, 'https://example.com/')
+    assert queued == []
+
+def test_link_index_batches_queue_the_next_one(monkeypatch):
+    from src.api import internal_links
+    results = [{'indexed': 200, 'removed': 0, 'pages': 200, 'remaining': 250},
+               {'indexed': 200, 'removed': 0, 'pages': 400, 'remaining': 50},
+               {'indexed': 50, 'removed': 0, 'pages': 450, 'remaining': 0}]
+    started = []
+    monkeypatch.setattr(internal_links, 'index_queued_pages', lambda tenant_id: results.pop(0))
+    monkeypatch.setattr(tasks.index_link_batch, 'delay', started.append)
+    for _ in range(3):
+        tasks.index_link_batch.run(7)
+    assert started == [7, 7]
@@ -0,0 +1,114 @@
+"""
+Change-rate estimation and revisit intervals for adaptive re-audits.
+
+Each URL's changes are modelled as a Poisson process. After `checks` visits that found
+`changes` content-hash changes, the rate is estimated with Cho & Garcia-Molina's estimator for
+incomplete change histories (a visit only tells whether the page changed at least once):
+
+    rate = -ln((checks - changes + 0.5) / (checks + 1)) / mean interval
+
+(The published form has checks + 0.5 in the denominator; checks + 1 acts as a prior of half a
+change, so a page seen unchanged a couple of times is not pushed straight out to MAX_INTERVAL.)
+
+The revisit interval is the longest one whose expected freshness (share of time our copy
+matches the live page, (1 - e^(-rate*I)) / (rate*I)) still meets TARGET_FRESHNESS, clamped to
+[MIN_INTERVAL, MAX_INTERVAL]. Static pages drift out to MAX_INTERVAL; volatile ones come back
+toward MIN_INTERVAL. A large move in GSC impressions since the last check halves the interval.
+
+Pure functions only; reaudit.py applies them to url_schedule rows.
+"""
+import os
+import math
+from datetime import timedelta
+from typing import Optional
+
+TARGET_FRESHNESS = float(os.getenv('REAUDIT_TARGET_FRESHNESS', 0.9))
+MIN_INTERVAL = int(os.getenv('REAUDIT_MIN_INTERVAL', 3600))
+MAX_INTERVAL = int(os.getenv('REAUDIT_MAX_INTERVAL', 30 * 86400))
+# Interval for URLs with no history yet
+DEFAULT_INTERVAL = int(os.getenv('REAUDIT_DEFAULT_INTERVAL', 86400))
+# Relative change in GSC impressions treated as a sign the page (or its ranking) moved
+GSC_MOVEMENT_THRESHOLD = float(os.getenv('REAUDIT_GSC_MOVEMENT_THRESHOLD', 0.3))
+
+def estimate_change_rate(checks: int, changes: int, observed_seconds: float) -> Optional[float]:
+    """
+    Returns:
+        float or None: Estimated changes per second, or None without history.
+    """
+    if checks <= 0 or observed_seconds <= 0:
+        return None
+    changes = min(changes, checks)
+    mean_interval = observed_seconds / checks
+    return -math.log((checks - changes + 0.5) / (checks + 1)) / mean_interval
+
+def expected_freshness(rate: float, interval: float) -> float:
+    x = rate * interval
+    if x <= 1e-12:
+        return 1.0
+    return (1 - math.exp(-x)) / x
+
+def revisit_interval(rate: Optional[float], target: float = TARGET_FRESHNESS) -> float:
+    """
+    Longest interval (seconds) within [MIN_INTERVAL, MAX_INTERVAL] meeting the target freshness.
+    """
+    if rate is None:
+        return DEFAULT_INTERVAL
+    if expected_freshness(rate, MAX_INTERVAL) >= target:
+        return MAX_INTERVAL
+    if expected_freshness(rate, MIN_INTERVAL) <= target:
+        return MIN_INTERVAL
+    # Freshness falls monotonically with the interval: bisect
+    low, high = MIN_INTERVAL, MAX_INTERVAL
+    for _ in range(40):
+        mid = (low + high) / 2
+        if expected_freshness(rate, mid) >= target:
+            low = mid
+        else:
+            high = mid
+    return low
+
+def gsc_movement(impressions: Optional[int], impressions_at_check: Optional[int]) -> float:
+    if impressions is None or impressions_at_check is None:
+        return 0.0
+    return abs(impressions - impressions_at_check) / max(impressions_at_check, 1)
+
+def next_interval(checks: int, changes: int, observed_seconds: float, movement: float = 0.0,
+                  target: float = TARGET_FRESHNESS) -> float:
+    interval = revisit_interval(estimate_change_rate(checks, changes, observed_seconds), target)
+    if movement >= GSC_MOVEMENT_THRESHOLD:
+        interval = max(MIN_INTERVAL, interval / 2)
+    return interval
+
+def reschedule(row: dict, content_hash: Optional[str], now) -> dict:
+    """
+    Fold one visit into a url_schedule row.
+    Args:
+        row (dict): Current row: content_hash, last_checked_at, last_changed_at, lastmod, checks,
+            changes, observed_seconds, gsc_impressions, gsc_impressions_at_check.
+        content_hash (str or None): Hash of the page now, or None if the fetch failed.
+        now (datetime): Time of the visit.
+    Returns:
+        dict: The row's new values, including next_due_at.
+    """
+    updated = dict(row)
+    if content_hash is None:
+        # Failed fetch: not an observation; try again soon
+        updated['next_due_at'] = now + timedelta(seconds=MIN_INTERVAL)
+        return updated
+    if row.get('content_hash') is not None and row.get('last_checked_at') is not None:
+        lastmod = row.get('lastmod')
+        changed = content_hash != row['content_hash'] or (lastmod is not None and lastmod > row['last_checked_at'])
+        updated['checks'] = row.get('checks', 0) + 1
+        updated['changes'] = row.get('changes', 0) + int(changed)
+        updated['observed_seconds'] = row.get('observed_seconds', 0.0) + (now - row['last_checked_at']).total_seconds()
+        if changed:
+            updated['last_changed_at'] = now
+    movement = gsc_movement(row.get('gsc_impressions'), row.get('gsc_impressions_at_check'))
+    interval = next_interval(updated.get('checks', 0), updated.get('changes', 0), updated.get('observed_seconds', 0.0), movement)
+    updated.update(
+        content_hash=content_hash,
+        last_checked_at=now,
+        gsc_impressions_at_check=row.get('gsc_impressions'),
+        next_due_at=now + timedelta(seconds=interval),
+    )
+    return updated
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from change_rate import (
+    MAX_INTERVAL, MIN_INTERVAL, DEFAULT_INTERVAL, estimate_change_rate, expected_freshness, next_interval,
+    reschedule, revisit_interval
+)
+
+DAY = 86400
+
+def test_no_history_uses_default_interval():
+    assert estimate_change_rate(0, 0, 0) is None
+    assert revisit_interval(None) == DEFAULT_INTERVAL
+
+def test_static_pages_back_off_to_max_interval():
+    assert next_interval(checks=20, changes=0, observed_seconds=20 * 30 * DAY) == MAX_INTERVAL
+
+def test_volatile_pages_come_back_to_min_interval():
+    assert next_interval(checks=20, changes=20, observed_seconds=20 * 3600) == MIN_INTERVAL
+
+def test_interval_meets_target_freshness():
+    rate = estimate_change_rate(checks=30, changes=6, observed_seconds=30 * DAY)
+    interval = revisit_interval(rate, target=0.9)
+    assert MIN_INTERVAL < interval < MAX_INTERVAL
+    assert abs(expected_freshness(rate, interval) - 0.9) < 1e-3
+
+def test_gsc_movement_halves_interval():
+    calm = next_interval(30, 6, 30 * DAY)
+    assert next_interval(30, 6, 30 * DAY, movement=0.5) == calm / 2
+
+def test_reschedule_counts_hash_changes():
+    then = datetime(2026, 1, 1)
+    now = then + timedelta(days=2)
+    row = {'content_hash': 'a', 'last_checked_at': then, 'checks': 3, 'changes': 1, 'observed_seconds': 6 * DAY}
+    changed = reschedule(row, 'b', now)
+    assert (changed['checks'], changed['changes'], changed['last_changed_at']) == (4, 2, now)
+    assert changed['observed_seconds'] == 8 * DAY
+    same = reschedule(row, 'a', now)
+    assert (same['checks'], same['changes']) == (4, 1)
+    assert same['next_due_at'] > changed['next_due_at']
+
+def test_reschedule_first_visit_and_failures():
+    now = datetime(2026, 1, 1)
+    first = reschedule({'content_hash': None, 'last_checked_at': None, 'checks': 0, 'changes': 0}, 'a', now)
+    assert first['checks'] == 0 and first['content_hash'] == 'a'
+    assert first['next_due_at'] == now + timedelta(seconds=DEFAULT_INTERVAL)
+    failed = reschedule({'content_hash': 'a', 'last_checked_at': now}, None, now)
+    assert failed['content_hash'] == 'a' and failed['next_due_at'] == now + timedelta(seconds=MIN_INTERVAL)
+
+def test_newer_lastmod_counts_as_change():
+    then = datetime(2026, 1, 1)
+    row = {'content_hash': 'a', 'last_checked_at': then, 'lastmod': then + timedelta(hours=1)}
+    assert reschedule(row, 'a', then + timedelta(days=1))['changes'] == 1
@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+# Tests of modules with package-relative imports use `from src.api import ...`
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+@pytest.fixture(autouse=True)
+def trace_exporter(tmp_path, monkeypatch):
+    """
+    Spans exported by code under test (and by processes it starts) go to a per-test file,
+    never to logs/traces.jsonl in the working tree.
+    """
+    from src.api import tracing
+    path = str(tmp_path / 'traces.jsonl')
+    monkeypatch.setenv('TRACE_EXPORT_PATH', path)
+    exporter = tracing.JSONFileExporter(path)
+    previous = tracing._exporter
+    tracing.set_exporter(exporter)
+    yield exporter
+    tracing.set_exporter(previous)
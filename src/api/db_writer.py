@@ -0,0 +1,243 @@
+"""
+Write-behind buffered DB writer for Celery agents.
+
+Tasks enqueue rows instead of opening a transaction per result. A background thread
+flushes the buffer with one bulk INSERT per table when it reaches `max_rows` or
+every `flush_interval` seconds, whichever comes first. When `max_buffer` rows are
+pending, `enqueue` blocks (backpressure) and raises `queue.Full` after `enqueue_timeout`.
+Rows from a flush that fails are appended to a JSON-lines dead-letter file and can be
+re-inserted later with `replay_dead_letter`.
+
+Each worker process gets its own writer through `get_writer()`; `close_writer()` is
+called on worker shutdown to flush what is left.
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from .logging_utils import get_logger
+from .metrics import DB_WRITE_SECONDS
+
+logger = get_logger(__name__)
+
+DEAD_LETTER_PATH = os.getenv('DB_WRITER_DEAD_LETTER', 'logs/db_writer_dead_letter.jsonl')
+
+class WriteBehindWriter:
+    """
+    Buffers rows per (table, columns) and bulk-inserts them from a background thread.
+    Args:
+        connect (callable): Returns a new DB connection (e.g. audit_db.get_connection).
+        max_rows (int): Pending row count that triggers an immediate flush.
+        flush_interval (float): Maximum seconds a row waits in the buffer.
+        max_buffer (int): Pending row count at which enqueue blocks.
+        enqueue_timeout (float): Seconds enqueue blocks before raising queue.Full.
+        dead_letter_path (str): JSON-lines file receiving rows from failed flushes.
+    """
+    def __init__(
+        self,
+        connect: Callable,
+        max_rows: int = 500,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10000,
+        enqueue_timeout: float = 5.0,
+        dead_letter_path: str = DEAD_LETTER_PATH
+    ):
+        self.connect = connect
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.enqueue_timeout = enqueue_timeout
+        self.dead_letter_path = dead_letter_path
+        self._buffers = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_wanted = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self._write_lock = threading.Lock()
+        self._conn = None
+        self.stats = {'enqueued': 0, 'flushed': 0, 'flushes': 0, 'dead_lettered': 0, 'lost': 0, 'blocked': 0}
+        self._thread = threading.Thread(target=self._run, name='db-write-behind', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, table: str, row: dict) -> None:
+        """
+        Add a row to the buffer. Rows with the same table and column set are inserted together.
+        """
+        columns = tuple(sorted(row))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteBehindWriter is closed")
+            if self._pending >= self.max_buffer:
+                self.stats['blocked'] += 1
+                deadline = time.monotonic() + self.enqueue_timeout
+                while self._pending >= self.max_buffer:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Full(f"Write-behind buffer full ({self._pending} rows pending)")
+                    self._flush_wanted.notify()
+                    self._not_full.wait(remaining)
+                    if self._closed:
+                        # close() has flushed or is flushing: a row added now would never be written
+                        raise RuntimeError("WriteBehindWriter is closed")
+            self._buffers.setdefault((table, columns), []).append(tuple(row[c] for c in columns))
+            self._pending += 1
+            self.stats['enqueued'] += 1
+            if self._pending >= self.max_rows:
+                self._flush_wanted.notify()
+
+    def flush(self) -> None:
+        """
+        Write everything currently buffered.
+        """
+        with self._lock:
+            batches, self._buffers = self._buffers, {}
+        if batches:
+            self._write(batches)
+
+    def close(self) -> None:
+        """
+        Stop the background thread and flush the remaining rows.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush_wanted.notify()
+            self._not_full.notify_all()
+        self._thread.join()
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._pending < self.max_rows and not self._closed:
+                    self._flush_wanted.wait(self.flush_interval)
+                if self._closed:
+                    return
+                batches, self._buffers = self._buffers, {}
+            if batches:
+                try:
+                    self._write(batches)
+                except Exception:
+                    # The thread must outlive any failed flush, or every later enqueue blocks and fails
+                    logger.exception("Write-behind flush failed")
+
+    def _write(self, batches: dict):
+        count = sum(len(rows) for rows in batches.values())
+        try:
+            with self._write_lock:
+                self._insert(batches, count)
+        finally:
+            with self._lock:
+                self._pending -= count
+                self._not_full.notify_all()
+
+    def _insert(self, batches: dict, count: int):
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = self.connect()
+            with DB_WRITE_SECONDS.labels('write_behind').time(), self._conn.cursor() as cur:
+                for (table, columns), rows in batches.items():
+                    query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+                        sql.Identifier(table),
+                        sql.SQL(', ').join(map(sql.Identifier, columns))
+                    )
+                    execute_values(cur, query, rows, page_size=self.max_rows)
+            self._conn.commit()
+            self.stats['flushed'] += count
+            self.stats['flushes'] += 1
+        except Exception as e:
+            logger.error(f"Write-behind flush of {count} rows failed: {e}")
+            self._rollback()
+            self._dead_letter(batches, e)
+
+    def _rollback(self):
+        try:
+            if self._conn is not None and not self._conn.closed:
+                self._conn.rollback()
+        except Exception:
+            self._conn = None
+
+    def _dead_letter(self, batches: dict, error: Exception):
+        failed_at = datetime.utcnow().isoformat()
+        # Values the DB adapter accepts but JSON does not (datetime, Decimal, ...) are stored as strings
+        lines = [
+            json.dumps({'table': table, 'row': dict(zip(columns, row)), 'error': str(error), 'failed_at': failed_at},
+                       default=str) + '\n'
+            for (table, columns), rows in batches.items() for row in rows
+        ]
+        try:
+            directory = os.path.dirname(self.dead_letter_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.dead_letter_path, 'a') as f:
+                f.write(''.join(lines))
+        except OSError as e:
+            logger.error(f"Could not dead-letter {len(lines)} rows to {self.dead_letter_path}, rows lost: {e}")
+            self.stats['lost'] += len(lines)
+            return
+        self.stats['dead_lettered'] += len(lines)
+
+def replay_dead_letter(path: str = DEAD_LETTER_PATH, writer: Optional[WriteBehindWriter] = None) -> int:
+    """
+    Re-enqueue rows from a dead-letter file and truncate it.
+    Returns:
+        int: Number of rows re-enqueued.
+    """
+    if not os.path.exists(path):
+        return 0
+    writer = writer or get_writer()
+    replay_path = f"{path}.replaying"
+    os.replace(path, replay_path)
+    count = 0
+    with open(replay_path) as f:
+        for line in f:
+            entry = json.loads(line)
+            writer.enqueue(entry['table'], entry['row'])
+            count += 1
+    writer.flush()
+    os.remove(replay_path)
+    return count
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+def get_writer() -> WriteBehindWriter:
+    """
+    Return this process's writer, creating it on first use (and again after a fork).
+    """
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            from .audit_db import get_connection
+            _writer = WriteBehindWriter(
+                get_connection,
+                max_rows=int(os.getenv('DB_WRITER_MAX_ROWS', 500)),
+                flush_interval=float(os.getenv('DB_WRITER_FLUSH_INTERVAL', 1.0)),
+                max_buffer=int(os.getenv('DB_WRITER_MAX_BUFFER', 10000))
+            )
+            _writer_pid = os.getpid()
+        return _writer
+
+def close_writer() -> None:
+    """
+    Flush and close this process's writer, if one was created.
+    """
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None and _writer_pid == os.getpid():
+        writer.close()
+
+atexit.register(close_writer)
@@ -0,0 +1,183 @@
+import json
+import time
+import queue
+import threading
+from decimal import Decimal
+from datetime import datetime
+import pytest
+from src.api import db_writer
+from src.api.db_writer import WriteBehindWriter, replay_dead_letter
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.db.committed.extend(self.db.pending)
+        self.db.pending.clear()
+
+    def rollback(self):
+        self.db.pending.clear()
+
+    def close(self):
+        self.closed = True
+
+class FakeDB:
+    """
+    connect() for the writer: records committed rows as (table, row dict); `fail` makes inserts
+    raise, `gate` (an Event) holds connections until set.
+    """
+    def __init__(self):
+        self.committed = []
+        self.pending = []
+        self.fail = False
+        self.gate = None
+        self.connects = 0
+
+    def connect(self):
+        self.connects += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        return FakeConnection(self)
+
+    def rows(self, table):
+        return [row for t, row in self.committed if t == table]
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB()
+
+    def execute_values(cur, query, rows, page_size=None):
+        if db.fail:
+            raise RuntimeError('insert failed')
+        table, columns = query.seq[1].string, [c.string for c in query.seq[3].seq[::2]]
+        db.pending.extend((table, dict(zip(columns, row))) for row in rows)
+
+    monkeypatch.setattr(db_writer, 'execute_values', execute_values)
+    return db
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_flushes_when_max_rows_are_pending(db, tmp_path):
+    writer = WriteBehindWriter(db.connect, max_rows=3, flush_interval=60, dead_letter_path=str(tmp_path / 'dl.jsonl'))
+    for i in range(2):
+        writer.enqueue('content_updates', {'url': f'/p{i}', 'status': 'updated'})
+    time.sleep(0.1)
+    assert db.committed == []
+    writer.enqueue('content_updates', {'url': '/p2', 'status': 'updated'})
+    wait_for(lambda: len(db.committed) == 3)
+    assert db.rows('content_updates')[2] == {'status': 'updated', 'url': '/p2'}
+    assert writer.stats['flushes'] == 1 and db.connects == 1
+    writer.close()
+
+def test_flushes_every_interval(db, tmp_path):
+    writer = WriteBehindWriter(db.connect, max_rows=100, flush_interval=0.05, dead_letter_path=str(tmp_path / 'dl.jsonl'))
+    writer.enqueue('monitoring_events', {'url': '/a', 'status': 'ok'})
+    writer.enqueue('content_suggestions', {'prompt': 'p', 'suggestion': 's'})
+    wait_for(lambda: len(db.committed) == 2)
+    assert db.rows('content_suggestions') == [{'prompt': 'p', 'suggestion': 's'}]
+    writer.close()
+
+def test_enqueue_blocks_then_fails_when_the_buffer_is_full(db, tmp_path):
+    db.gate = threading.Event()  # the flush is stuck connecting
+    writer = WriteBehindWriter(db.connect, max_rows=100, flush_interval=60, max_buffer=2,
+                               enqueue_timeout=0.1, dead_letter_path=str(tmp_path / 'dl.jsonl'))
+    writer.enqueue('t', {'a': 1})
+    writer.enqueue('t', {'a': 2})
+    start = time.monotonic()
+    with pytest.raises(queue.Full):
+        writer.enqueue('t', {'a': 3})
+    assert time.monotonic() - start >= 0.1 and writer.stats['blocked'] == 1
+    db.gate.set()
+    wait_for(lambda: len(db.committed) == 2)
+    writer.enqueue('t', {'a': 3})  # room again
+    writer.close()
+    assert [row['a'] for row in db.rows('t')] == [1, 2, 3]
+
+def test_enqueue_waiting_when_the_writer_closes_raises(db, tmp_path):
+    db.gate = threading.Event()
+    writer = WriteBehindWriter(db.connect, max_rows=100, flush_interval=60, max_buffer=1,
+                               enqueue_timeout=5, dead_letter_path=str(tmp_path / 'dl.jsonl'))
+    writer.enqueue('t', {'a': 1})
+    errors = []
+
+    def blocked_enqueue():
+        try:
+            writer.enqueue('t', {'a': 2})
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=blocked_enqueue)
+    thread.start()
+    wait_for(lambda: writer.stats['blocked'] == 1)
+    closer = threading.Thread(target=writer.close)
+    closer.start()
+    db.gate.set()
+    thread.join(5)
+    closer.join(5)
+    assert len(errors) == 1 and isinstance(errors[0], RuntimeError)
+    assert [row['a'] for row in db.rows('t')] == [1]
+    with pytest.raises(RuntimeError):
+        writer.enqueue('t', {'a': 3})
+
+def test_failed_flush_is_dead_lettered_and_replayed(db, tmp_path):
+    path = str(tmp_path / 'dead' / 'dl.jsonl')
+    db.fail = True
+    writer = WriteBehindWriter(db.connect, max_rows=2, flush_interval=60, dead_letter_path=path)
+    checked_at = datetime(2026, 10, 19, 12, 0)
+    writer.enqueue('url_check_results', {'url': '/a', 'checked_at': checked_at, 'score': Decimal('0.5')})
+    writer.enqueue('url_check_results', {'url': '/b', 'checked_at': checked_at, 'score': Decimal('1')})
+    wait_for(lambda: writer.stats['dead_lettered'] == 2)
+    with open(path) as f:
+        entries = [json.loads(line) for line in f]
+    assert entries[0]['table'] == 'url_check_results' and entries[0]['error'] == 'insert failed'
+    assert entries[0]['row'] == {'url': '/a', 'checked_at': '2026-10-19 12:00:00', 'score': '0.5'}
+
+    db.fail = False
+    assert replay_dead_letter(path, writer) == 2
+    assert [row['url'] for row in db.rows('url_check_results')] == ['/a', '/b']
+    assert replay_dead_letter(path, writer) == 0  # file consumed
+    writer.close()
+
+def test_unwritable_dead_letter_file_does_not_stop_the_writer(db, tmp_path):
+    blocker = tmp_path / 'not_a_dir'
+    blocker.write_text('')
+    db.fail = True
+    writer = WriteBehindWriter(db.connect, max_rows=1, flush_interval=60, dead_letter_path=str(blocker / 'dl.jsonl'))
+    writer.enqueue('t', {'a': 1})
+    wait_for(lambda: writer.stats['lost'] == 1)
+    db.fail = False
+    writer.enqueue('t', {'a': 2})
+    wait_for(lambda: len(db.committed) == 1)
+    assert writer._thread.is_alive()
+    writer.close()
+
+def test_flush_thread_survives_unexpected_errors(db, tmp_path, monkeypatch):
+    writer = WriteBehindWriter(db.connect, max_rows=1, flush_interval=60, dead_letter_path=str(tmp_path / 'dl.jsonl'))
+    monkeypatch.setattr(writer, '_dead_letter', lambda batches, error: 1 / 0)
+    db.fail = True
+    writer.enqueue('t', {'a': 1})
+    wait_for(lambda: writer._pending == 0)
+    db.fail = False
+    writer.enqueue('t', {'a': 2})
+    wait_for(lambda: len(db.committed) == 1)
+    assert writer._thread.is_alive()
+    writer.close()
@@ -0,0 +1,175 @@
+"""
+Task deduplication and result reuse for agent tasks.
+
+A task invocation is identified by a dedup key: the task name plus a hash of its normalized
+arguments (the scheme and host of http(s) URLs and of bare domains like "Example.com/blog/" are
+lowercased and trailing slashes stripped, dict keys sorted), so "audit https://Example.com/" and
+"audit https://example.com" share a key. Paths, queries and other text keep their case.
+
+For each key the store keeps:
+- a claim: the id of the task currently computing it (in-flight duplicates join that task)
+- a result: the JSON-encoded return value, kept for the cache TTL
+
+Two stores are available, selected by TASK_DEDUP_STORE:
+- redis://host:port/db (default: REDIS_URL) — shared by all API and worker processes
+- file:///path/to/dir — a filesystem stand-in for local runs and tests
+"""
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Optional
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+TASK_DEDUP_STORE = os.getenv('TASK_DEDUP_STORE', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+# A scheme-less host (labels ending in an alphabetic TLD, optional port) and optional path
+_BARE_DOMAIN = re.compile(r'((?:[a-z0-9-]+\.)+[a-z]{2,}\.?(?::\d+)?)(/\S*)?', re.IGNORECASE)
+
+def normalize_arg(value):
+    """
+    Normalize an argument so equivalent requests hash the same: http(s) URLs and bare domains get a
+    lowercase scheme and host and no trailing slash.
+    """
+    if isinstance(value, str):
+        text = value.strip()
+        parts = urlsplit(text)
+        if parts.scheme in ('http', 'https') and parts.netloc:
+            path = parts.path.rstrip('/')
+            return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ''))
+        domain = _BARE_DOMAIN.fullmatch(text)
+        if domain:
+            return domain.group(1).lower() + (domain.group(2) or '').rstrip('/')
+        return text
+    if isinstance(value, dict):
+        return {str(k): normalize_arg(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize_arg(v) for v in value]
+    return value
+
+def dedup_key(task_name: str, args: tuple = (), kwargs: Optional[dict] = None) -> str:
+    payload = json.dumps([normalize_arg(list(args)), normalize_arg(kwargs or {})], sort_keys=True, default=str)
+    return f"dedup:{task_name}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+# Delete the claim only if this task still holds it
+_RELEASE_CLAIM_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end
+return 0
+"""
+
+class RedisDedupStore:
+    def __init__(self, client):
+        self.client = client
+
+    def claim(self, key: str, task_id: str, ttl: int) -> Optional[str]:
+        """
+        Claim the key for task_id. Returns None if claimed, else the id of the task holding it.
+        """
+        if self.client.set(f"{key}:claim", task_id, nx=True, ex=ttl):
+            return None
+        holder = self.client.get(f"{key}:claim")
+        if holder is None:
+            # The claim expired between SET and GET; try once more
+            return None if self.client.set(f"{key}:claim", task_id, nx=True, ex=ttl) else self.client.get(f"{key}:claim")
+        return holder
+
+    def release(self, key: str, task_id: str) -> None:
+        self.client.eval(_RELEASE_CLAIM_SCRIPT, 1, f"{key}:claim", task_id)
+
+    def get_result(self, key: str):
+        raw = self.client.get(f"{key}:result")
+        return (True, json.loads(raw)) if raw is not None else (False, None)
+
+    def set_result(self, key: str, value, ttl: int) -> None:
+        self.client.set(f"{key}:result", json.dumps(value, default=str), ex=ttl)
+
+class FileDedupStore:
+    """
+    Filesystem stand-in for RedisDedupStore. Each claim is read and replaced while holding a
+    per-key lock file created with O_CREAT | O_EXCL, so expiring a stale claim and taking it
+    over is atomic across processes on one machine.
+    """
+    # A lock file older than this was left by a crashed process
+    LOCK_STALE_AFTER = 10
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{hashlib.sha1(key.encode()).hexdigest()}.{kind}")
+
+    def _read(self, path: str) -> Optional[dict]:
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry if entry['expires_at'] >= time.time() else None
+
+    def _write(self, path: str, entry: dict) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _locked(self, path: str, timeout: float = 5.0):
+        lock_path = f"{path}.lock"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > self.LOCK_STALE_AFTER:
+                        os.remove(lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not lock {path}")
+                time.sleep(0.005)
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+
+    def claim(self, key: str, task_id: str, ttl: int) -> Optional[str]:
+        path = self._path(key, 'claim')
+        with self._locked(path):
+            entry = self._read(path)
+            if entry is not None:
+                return entry['task_id']
+            # Absent or expired: take it over
+            self._write(path, {'task_id': task_id, 'expires_at': time.time() + ttl})
+            return None
+
+    def release(self, key: str, task_id: str) -> None:
+        path = self._path(key, 'claim')
+        with self._locked(path):
+            entry = self._read(path)
+            if entry is not None and entry['task_id'] == task_id:
+                os.remove(path)
+
+    def get_result(self, key: str):
+        entry = self._read(self._path(key, 'result'))
+        return (True, entry['value']) if entry is not None else (False, None)
+
+    def set_result(self, key: str, value, ttl: int) -> None:
+        self._write(self._path(key, 'result'), {'value': value, 'expires_at': time.time() + ttl})
+
+_store = None
+
+def get_dedup_store():
+    global _store
+    if _store is None:
+        parts = urlsplit(TASK_DEDUP_STORE)
+        if parts.scheme == 'file':
+            _store = FileDedupStore(parts.path)
+        else:
+            import redis
+            _store = RedisDedupStore(redis.Redis.from_url(TASK_DEDUP_STORE, decode_responses=True))
+    return _store
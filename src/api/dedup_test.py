@@ -0,0 +1,61 @@
+import os
+import time
+import threading
+from dedup import FileDedupStore, dedup_key, normalize_arg
+
+def test_equivalent_urls_share_a_key():
+    assert dedup_key("run_audit", ("https://Example.com/",)) == dedup_key("run_audit", ("https://example.com",))
+    assert dedup_key("run_audit", ("https://example.com",)) != dedup_key("run_audit", ("https://example.org",))
+    assert dedup_key("run_audit", ("https://example.com",)) != dedup_key("other_task", ("https://example.com",))
+
+def test_kwargs_order_does_not_matter():
+    assert dedup_key("t", (), {"a": 1, "b": 2}) == dedup_key("t", (), {"b": 2, "a": 1})
+
+def test_normalize_leaves_plain_text_and_paths_case():
+    assert normalize_arg("  Hello World ") == "Hello World"
+    assert normalize_arg("https://EXAMPLE.com/Blog/Post/") == "https://example.com/Blog/Post"
+
+def test_normalize_lowercases_bare_domains():
+    assert normalize_arg(" Example.com/ ") == "example.com"
+    assert normalize_arg("WWW.Example.co.uk:8080/Blog/") == "www.example.co.uk:8080/Blog"
+    assert dedup_key("check_domain", ("Example.com",)) == dedup_key("check_domain", ("example.com",))
+    assert normalize_arg("Version 2.0") == "Version 2.0" and normalize_arg("SEO Audit") == "SEO Audit"
+
+def test_file_store_claims_once_until_released(tmp_path):
+    store = FileDedupStore(str(tmp_path))
+    assert store.claim("k", "task-1", ttl=60) is None
+    assert store.claim("k", "task-2", ttl=60) == "task-1"
+    store.release("k", "task-2")  # not the holder: no effect
+    assert store.claim("k", "task-3", ttl=60) == "task-1"
+    store.release("k", "task-1")
+    assert store.claim("k", "task-3", ttl=60) is None
+
+def test_file_store_expires_claims_and_results(tmp_path):
+    store = FileDedupStore(str(tmp_path))
+    store.claim("k", "task-1", ttl=0.01)
+    store.set_result("k", {"issues": [1, 2]}, ttl=0.01)
+    assert store.get_result("k") == (True, {"issues": [1, 2]})
+    time.sleep(0.02)
+    assert store.get_result("k") == (False, None)
+    assert store.claim("k", "task-2", ttl=60) is None
+
+def test_file_store_expired_claim_is_taken_over_once(tmp_path):
+    store = FileDedupStore(str(tmp_path))
+    store.claim("k", "stale", ttl=0.01)
+    time.sleep(0.02)
+    barrier = threading.Barrier(16)
+    results = {}
+
+    def claim(i):
+        barrier.wait()
+        results[i] = FileDedupStore(str(tmp_path)).claim("k", f"task-{i}", ttl=60)
+
+    threads = [threading.Thread(target=claim, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    winners = [i for i, holder in results.items() if holder is None]
+    assert len(winners) == 1
+    assert set(results.values()) == {None, f"task-{winners[0]}"}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(('.lock', '.tmp'))]
@@ -1,30 +1,67 @@
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from datetime import datetime, timezone
+from .metrics import timed_get, PARSE_SECONDS
+from .tracing import traced
 
+@traced('discovery.fetch_robots_txt')
 def fetch_robots_txt(domain: str) -> str:
     url = urljoin(domain, '/robots.txt')
-    resp = requests.get(url, timeout=10)
+    resp = timed_get(requests, url, 'discovery', 'robots', timeout=10)
     resp.raise_for_status()
     return resp.text
 
+@traced('discovery.fetch_sitemap_xml')
 def fetch_sitemap_xml(domain: str) -> list:
     url = urljoin(domain, '/sitemap.xml')
-    resp = requests.get(url, timeout=10)
+    resp = timed_get(requests, url, 'discovery', 'sitemap', timeout=10)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.content, 'xml')
+    with PARSE_SECONDS.labels('sitemap').time():
+        soup = BeautifulSoup(resp.content, 'xml')
     urls = [loc.text for loc in soup.find_all('loc')]
     return urls
 
+def _parse_lastmod(value: str):
+    # W3C datetime (date or full timestamp) as an aware UTC datetime; a date alone is taken as UTC
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+@traced('discovery.fetch_sitemap_entries')
+def fetch_sitemap_entries(domain: str) -> list:
+    """
+    Fetch sitemap.xml with each URL's lastmod.
+    Returns:
+        list: (url, lastmod datetime or None) tuples.
+    """
+    url = urljoin(domain, '/sitemap.xml')
+    resp = timed_get(requests, url, 'discovery', 'sitemap', timeout=10)
+    resp.raise_for_status()
+    with PARSE_SECONDS.labels('sitemap').time():
+        soup = BeautifulSoup(resp.content, 'xml')
+    entries = []
+    for node in soup.find_all('url'):
+        loc, lastmod = node.find('loc'), node.find('lastmod')
+        if loc is not None:
+            entries.append((loc.text.strip(), _parse_lastmod(lastmod.text) if lastmod is not None else None))
+    return entries
+
+@traced('discovery.fetch_llms_txt')
 def fetch_llms_txt(domain: str) -> list:
     url = urljoin(domain, '/LLMs.txt')
-    resp = requests.get(url, timeout=10)
+    resp = timed_get(requests, url, 'discovery', 'llms', timeout=10)
     if resp.status_code != 200:
         return []
     # Assume each line is a URL or resource
     urls = [line.strip() for line in resp.text.splitlines() if line.strip()]
     return urls
 
+@traced('discovery.aggregate_urls')
 def aggregate_urls(domain: str) -> dict:
     robots = fetch_robots_txt(domain)
     sitemap_urls = fetch_sitemap_xml(domain)
@@ -0,0 +1,81 @@
+"""
+Fair-share dispatch planning across priority lanes and tenants.
+
+Pending work is grouped by lane (interactive, scheduled, backfill) and tenant. Each dispatch
+round fills the free worker slots with smooth weighted round-robin at two levels:
+- lanes, weighted by LANE_WEIGHTS, so interactive work gets most slots without starving the rest
+- tenants within a lane, weighted by tenants.schedule_weight and skipped once they reach
+  tenants.max_concurrency tasks in flight
+
+A tenant with a million queued URLs therefore gets its weighted share of the slots, and a tenant
+with one small audit is dispatched within a round. Only lanes and tenants with pending work take
+part in a round, so idle capacity is never held back.
+
+This module is pure (no Redis/Celery); scheduler.py keeps the queues and calls plan_dispatch().
+"""
+from dataclasses import dataclass
+
+LANES = ('interactive', 'scheduled', 'backfill')
+LANE_WEIGHTS = {'interactive': 8, 'scheduled': 3, 'backfill': 1}
+# Broker priority per lane (0 up to the queues' x-max-priority, which defaults to the highest one here):
+# a dispatched interactive task overtakes queued batch work
+LANE_PRIORITY = {'interactive': 9, 'scheduled': 5, 'backfill': 1}
+
+@dataclass(frozen=True)
+class TenantPolicy:
+    weight: int = 1
+    max_concurrency: int = 4
+
+DEFAULT_POLICY = TenantPolicy()
+
+def _smooth_wrr(weights: dict, current: dict):
+    """
+    One pick of smooth weighted round-robin (as in nginx upstreams). `current` carries the
+    running scores between picks and rounds and is updated in place.
+    """
+    total = sum(weights.values())
+    best = None
+    for key, weight in weights.items():
+        current[key] = current.get(key, 0) + weight
+        if best is None or current[key] > current[best]:
+            best = key
+    current[best] -= total
+    return best
+
+def plan_dispatch(pending: dict, inflight: dict, policies: dict, capacity: int, state: dict) -> list:
+    """
+    Choose which queued tasks to dispatch into `capacity` free slots.
+    Args:
+        pending (dict): {lane: {tenant_id: number of queued tasks}}
+        inflight (dict): {tenant_id: tasks dispatched and not yet finished}
+        policies (dict): {tenant_id: TenantPolicy}; tenants not listed get DEFAULT_POLICY
+        capacity (int): Free worker slots this round
+        state (dict): Round-robin scores, {'lanes': {...}, lane: {...}}; updated in place so
+            fairness carries over between rounds
+    Returns:
+        list: (lane, tenant_id) pairs in dispatch order, one per task.
+    """
+    remaining = {lane: {t: n for t, n in pending.get(lane, {}).items() if n > 0} for lane in LANES}
+    running = dict(inflight)
+    picks = []
+
+    def eligible(lane):
+        return {
+            tenant: policies.get(tenant, DEFAULT_POLICY).weight
+            for tenant in remaining[lane]
+            if running.get(tenant, 0) < policies.get(tenant, DEFAULT_POLICY).max_concurrency
+        }
+
+    while len(picks) < capacity:
+        candidates = {lane: eligible(lane) for lane in LANES}
+        lanes = {lane: LANE_WEIGHTS[lane] for lane, tenants in candidates.items() if tenants}
+        if not lanes:
+            break
+        lane = _smooth_wrr(lanes, state.setdefault('lanes', {}))
+        tenant = _smooth_wrr(candidates[lane], state.setdefault(lane, {}))
+        picks.append((lane, tenant))
+        running[tenant] = running.get(tenant, 0) + 1
+        remaining[lane][tenant] -= 1
+        if not remaining[lane][tenant]:
+            del remaining[lane][tenant]
+    return picks
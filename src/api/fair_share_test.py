@@ -0,0 +1,35 @@
+from collections import Counter
+from fair_share import TenantPolicy, plan_dispatch
+
+def test_small_tenant_is_not_starved_by_large_backlog():
+    pending = {'interactive': {1: 100000, 2: 1}}
+    picks = plan_dispatch(pending, {}, {1: TenantPolicy(1, 100)}, capacity=2, state={})
+    assert sorted(picks) == [('interactive', 1), ('interactive', 2)]
+
+def test_concurrency_cap_is_respected():
+    pending = {'backfill': {1: 50}}
+    picks = plan_dispatch(pending, {1: 2}, {1: TenantPolicy(1, 3)}, capacity=10, state={})
+    assert picks == [('backfill', 1)]
+
+def test_tenant_weights_share_slots():
+    pending = {'scheduled': {1: 1000, 2: 1000}}
+    policies = {1: TenantPolicy(3, 1000), 2: TenantPolicy(1, 1000)}
+    picks = plan_dispatch(pending, {}, policies, capacity=400, state={})
+    counts = Counter(tenant for _, tenant in picks)
+    assert counts == {1: 300, 2: 100}
+
+def test_lanes_are_weighted_without_starving_backfill():
+    pending = {lane: {1: 1000} for lane in ('interactive', 'scheduled', 'backfill')}
+    picks = plan_dispatch(pending, {}, {1: TenantPolicy(1, 1000)}, capacity=120, state={})
+    assert Counter(lane for lane, _ in picks) == {'interactive': 80, 'scheduled': 30, 'backfill': 10}
+
+def test_idle_lanes_leave_capacity_to_others():
+    picks = plan_dispatch({'backfill': {1: 5}}, {}, {}, capacity=3, state={})
+    assert picks == [('backfill', 1)] * 3
+
+def test_fairness_carries_across_rounds():
+    state = {}
+    pending = {'interactive': {1: 10, 2: 10}}
+    first = plan_dispatch(pending, {}, {}, capacity=1, state=state)
+    second = plan_dispatch(pending, {}, {}, capacity=1, state=state)
+    assert {first[0][1], second[0][1]} == {1, 2}
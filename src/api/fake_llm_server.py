@@ -0,0 +1,148 @@
+"""
+Local stand-in for the OpenAI chat completions API, for tests and benchmarks.
+
+Serves POST /v1/chat/completions on 127.0.0.1 and answers deterministically from the last user
+message (a prompt ending in a JSON list that asks for a JSON list gets one item back per item).
+It emulates:
+- latency: a fixed part plus a per-completion-token part
+- rate limits: requests and tokens per `window` seconds (60 for real per-minute limits; shorter
+  windows make benchmarks quick), answered with 429, Retry-After and x-ratelimit-* headers
+
+Point the client at it with OPENAI_BASE_URL.
+
+Usage:
+    server = FakeLLMServer(latency=0.05, rpm=60, tpm=10000).start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    ...
+    server.stop()
+
+or standalone (from the repository root):
+    python -m src.api.fake_llm_server --port 8099 --latency 0.2 --rpm 500 --tpm 30000
+"""
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def fake_reply(messages: list) -> str:
+    prompt = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+    # Batched prompts end with a JSON list and ask for a JSON list back, one item per input item
+    head, _, tail = prompt.rpartition('\n\n')
+    if 'JSON list' in head:
+        try:
+            items = json.loads(tail)
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            return json.dumps([f"[fake completion] {item}" for item in items], ensure_ascii=False)
+    return f"[fake completion] {prompt}"
+
+class FakeLLMServer:
+    def __init__(self, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0, rpm: int = None,
+                 tpm: int = None, window: float = 60.0, latency_per_token: float = 0.0):
+        self.latency = latency
+        self.latency_per_token = latency_per_token
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.calls = 0
+        self.rate_limited = 0
+        self._recent = deque()  # (time, tokens) of accepted requests within the window
+        self.requests = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'FakeLLMServer':
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def complete(self, body: dict) -> tuple:
+        """
+        Returns:
+            tuple: (HTTP status, headers dict, response body dict)
+        """
+        content = fake_reply(body.get('messages', []))
+        prompt_tokens = sum(len(m.get('content', '')) for m in body.get('messages', [])) // 4
+        # Limits count the requested completion budget, as the real API does
+        charged = prompt_tokens + (body.get('max_tokens') or len(content) // 4)
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0][0] <= now - self.window:
+                self._recent.popleft()
+            used_tokens = sum(t for _, t in self._recent)
+            over_requests = self.rpm is not None and len(self._recent) >= self.rpm
+            over_tokens = self.tpm is not None and used_tokens + charged > self.tpm
+            if over_requests or over_tokens:
+                self.rate_limited += 1
+                reset = max(self._recent[0][0] + self.window - now, 0.001) if self._recent else self.window
+                return 429, {
+                    'Retry-After': f"{reset:.3f}",
+                    'x-ratelimit-reset-requests': f"{reset:.3f}s",
+                    'x-ratelimit-remaining-requests': str(max((self.rpm or 0) - len(self._recent), 0)),
+                    'x-ratelimit-remaining-tokens': str(max((self.tpm or 0) - used_tokens, 0)),
+                }, {'error': {'message': 'Rate limit reached', 'type': 'requests' if over_requests else 'tokens'}}
+            self._recent.append((now, charged))
+            self.calls += 1
+            self.requests.append(body)
+        time.sleep(self.latency + self.latency_per_token * (len(content) // 4))
+        return 200, {}, {
+            'id': f"chatcmpl-fake-{self.calls}",
+            'object': 'chat.completion',
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(content) // 4,
+                      'total_tokens': prompt_tokens + len(content) // 4},
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if self.path.rstrip('/').endswith('/chat/completions'):
+                    status, headers, payload = server.complete(body)
+                else:
+                    status, headers, payload = 404, {}, {'error': {'message': f"Unknown path {self.path}"}}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI chat completions server.")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--rpm', type=int, default=None, help="Requests per window (default: unlimited)")
+    parser.add_argument('--tpm', type=int, default=None, help="Tokens per window (default: unlimited)")
+    parser.add_argument('--window', type=float, default=60.0)
+    args = parser.parse_args()
+    server = FakeLLMServer(latency=args.latency, port=args.port, rpm=args.rpm, tpm=args.tpm, window=args.window)
+    print(f"Fake LLM server on {server.base_url}")
+    server.httpd.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,14 @@
+from datetime import date, timedelta
+from urllib.parse import quote
+import requests
 from . import google_auth
+from .tracing import traced
 
+SEARCH_ANALYTICS_URL = "https://searchconsole.googleapis.com/webmasters/v3/sites/{site}/searchAnalytics/query"
+# Largest page of rows the Search Analytics API returns
+SEARCH_ANALYTICS_ROW_LIMIT = 25000
+
+@traced('gsc.fetch_gsc_data')
 def fetch_gsc_data(domain: str) -> dict:
     # Placeholder: In a real implementation, use Google API client
     return {
@@ -9,6 +18,7 @@ def fetch_gsc_data(domain: str) -> dict:
         "ctr": 5.49
     }
 
+@traced('gsc.ingest_gsc_data')
 def ingest_gsc_data(credentials: dict = None, site_url: str = "") -> dict:
     """
     Simulate fetching data from Google Search Console using authenticated credentials.
@@ -39,6 +49,41 @@ def ingest_gsc_data(credentials: dict = None, site_url: str = "") -> dict:
         }
     }
 
+@traced('gsc.fetch_page_impressions')
+def fetch_page_impressions(site_url: str, credentials: dict = None, days: int = 28) -> dict:
+    """
+    Fetch impressions per page from the Search Analytics API (page dimension) over the last
+    `days` days, ending where Search Console data is complete (two days ago).
+    Args:
+        site_url (str): The Search Console property, e.g. "https://example.com/".
+        credentials (dict): Google API credentials. If None, will fetch from AWS Secrets Manager.
+    Returns:
+        dict: {page_url: impressions}; empty if no credentials are available.
+    """
+    if credentials is None:
+        credentials = google_auth.get_google_api_credentials()
+    if not credentials:
+        return {}
+    end = date.today() - timedelta(days=2)
+    body = {
+        "startDate": (end - timedelta(days=days - 1)).isoformat(), "endDate": end.isoformat(),
+        "dimensions": ["page"], "rowLimit": SEARCH_ANALYTICS_ROW_LIMIT, "startRow": 0,
+    }
+    url = SEARCH_ANALYTICS_URL.format(site=quote(site_url, safe=""))
+    headers = {"Authorization": f"Bearer {credentials['access_token']}"}
+    impressions = {}
+    with requests.Session() as session:
+        while True:
+            resp = session.post(url, json=body, headers=headers, timeout=30)
+            resp.raise_for_status()
+            rows = resp.json().get("rows", [])
+            for row in rows:
+                impressions[row["keys"][0]] = int(row["impressions"])
+            if len(rows) < SEARCH_ANALYTICS_ROW_LIMIT:
+                return impressions
+            body["startRow"] += len(rows)
+
+@traced('gsc.ingest_pagespeed_data')
 def ingest_pagespeed_data(credentials: dict = None, url: str = "") -> dict:
     """
     Simulate fetching performance data from the PageSpeed API using authenticated credentials.
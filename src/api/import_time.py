@@ -0,0 +1,155 @@
+"""
+Import-time budgets for the process entry modules (the API app and the Celery app).
+
+Uvicorn and Celery workers import these modules on every start, so whatever they pull in is paid
+on each deploy and each autoscaled worker. measure_import() imports a module in a fresh
+interpreter with `python -X importtime`, in an empty working directory, and reports:
+- the modules its import loaded, with their cumulative import time
+- `own_ms`: the import time not spent in the packages the process cannot start without (FastAPI,
+  Celery, ...). This is the part the repository controls, and what IMPORT_BUDGETS limits
+- whether the import configured logging or created files (it must do neither: logging is set up
+  by the process entry point, see logging_utils.configure_logging)
+
+Modules listed as `deferred` (boto3, redis, the OpenAI client, ...) must not be loaded by the
+import at all; the code using them imports them on first use.
+"""
+import os
+import sys
+import tempfile
+import subprocess
+from typing import Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Multiplies every budget, for machines slower than the one the budgets were set on
+IMPORT_BUDGET_SCALE = float(os.getenv('IMPORT_BUDGET_SCALE', 1.0))
+
+IMPORT_BUDGETS = {
+    'src.api.main': {
+        'budget_ms': 150,
+        'required': ('fastapi', 'starlette', 'pydantic', 'pydantic_core', 'prometheus_client', 'orjson'),
+        'deferred': ('boto3', 'botocore', 'redis', 'requests', 'bs4', 'celery', 'psycopg2',
+                     'src.api.audit', 'src.api.openai_client', 'src.api.celery_app'),
+    },
+    'src.api.audit_db': {
+        'budget_ms': 100,
+        'required': ('psycopg2', 'prometheus_client'),
+        'deferred': ('boto3', 'botocore', 'redis'),
+    },
+    'src.api.celery_app': {
+        'budget_ms': 250,
+        'required': ('celery', 'kombu', 'billiard', 'vine', 'psycopg2', 'prometheus_client', 'requests', 'bs4'),
+        'deferred': ('boto3', 'botocore', 'src.api.openai_client', 'src.api.llm_executor', 'src.api.llm_cache'),
+    },
+}
+
+def parse_importtime(report: str, module: str) -> list:
+    """
+    Extract the import of `module` from a `python -X importtime` report.
+    Returns:
+        list: (name, depth, cumulative_us) for `module` and every import nested under it, in the
+        report's order (children before their parent).
+    """
+    entries = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    # Entries are printed as each import finishes: `module`'s subtree is the run of nested
+    # entries just before its own top-level line
+    for end, (name, depth, _) in enumerate(entries):
+        if depth == 0 and name == module:
+            start = end
+            while start > 0 and entries[start - 1][1] > 0:
+                start -= 1
+            return entries[start:end + 1]
+    raise ValueError(f"{module} not found in the importtime report")
+
+def split_required(entries: list, required: tuple = ()) -> tuple:
+    """
+    Separate the imports of `required` packages (and everything they import) from the rest.
+    Returns:
+        tuple: (entries outside required packages, cumulative microseconds spent in required ones)
+    """
+    own = []
+    required_us = 0
+    skip_above = None  # depth of a required import being skipped; its children come first
+    for name, depth, cumulative in reversed(entries):
+        if skip_above is not None:
+            if depth > skip_above:
+                continue
+            skip_above = None
+        if name.split('.')[0] in required:
+            required_us += cumulative
+            skip_above = depth
+        else:
+            own.append((name, depth, cumulative))
+    return own[::-1], required_us
+
+def own_time_us(entries: list, required: tuple = ()) -> int:
+    """
+    Cumulative import time of the subtree's root, less the time spent importing `required`
+    packages (counted once, at their outermost import).
+    """
+    return entries[-1][2] - split_required(entries, required)[1]
+
+def measure_import(module: str, required: tuple = (), python: str = sys.executable, runs: int = 3) -> dict:
+    """
+    Import `module` in `runs` fresh interpreters and keep the fastest run (the others include
+    disk cache and scheduling noise).
+    Returns:
+        dict: total_ms, own_ms, `modules` (name -> cumulative ms, for everything the import
+        loaded), `own_modules` (the same, outside required packages), `handlers` (root log
+        handlers installed) and `files` (created in the working directory).
+    """
+    best = None
+    code = f"import {module}, logging; print(len(logging.getLogger().handlers))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (REPO_ROOT, os.getenv('PYTHONPATH')))))
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run([python, '-X', 'importtime', '-c', code], cwd=directory, env=env,
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                raise ImportError(f"import {module} failed: {(result.stderr.strip().splitlines() or [''])[-1]}")
+            files = sorted(os.listdir(directory))
+        entries = parse_importtime(result.stderr, module)
+        own, required_us = split_required(entries, required)
+        measured = {
+            'module': module,
+            'total_ms': entries[-1][2] / 1000,
+            'own_ms': (entries[-1][2] - required_us) / 1000,
+            'modules': {name: cumulative / 1000 for name, _, cumulative in entries},
+            'own_modules': {name: cumulative / 1000 for name, _, cumulative in own},
+            'handlers': int(result.stdout.split()[-1]),
+            'files': files,
+        }
+        if best is None or measured['total_ms'] < best['total_ms']:
+            best = measured
+    return best
+
+def check_budget(module: str, budget: Optional[dict] = None, **kwargs) -> dict:
+    """
+    Measure `module` against its IMPORT_BUDGETS entry.
+    Returns:
+        dict: measure_import() results plus `budget_ms` and `violations`, a list of messages
+        (empty when the import is within budget, loads no deferred module and has no side effects).
+    """
+    budget = budget or IMPORT_BUDGETS[module]
+    measured = measure_import(module, budget.get('required', ()), **kwargs)
+    limit = budget['budget_ms'] * IMPORT_BUDGET_SCALE
+    violations = []
+    if measured['own_ms'] > limit:
+        violations.append(f"{module} takes {measured['own_ms']:.0f} ms to import (budget {limit:.0f} ms)")
+    loaded = [name for name in budget.get('deferred', ())
+              if any(m == name or m.startswith(name + '.') for m in measured['modules'])]
+    if loaded:
+        violations.append(f"{module} imports {', '.join(loaded)} at import time")
+    if measured['handlers']:
+        violations.append(f"{module} configures logging at import time")
+    if measured['files']:
+        violations.append(f"{module} creates {', '.join(measured['files'])} at import time")
+    measured.update(budget_ms=limit, violations=violations)
+    return measured
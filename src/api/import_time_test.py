@@ -0,0 +1,48 @@
+import sys
+import importlib.util
+import pytest
+from import_time import IMPORT_BUDGETS, check_budget, own_time_us, parse_importtime
+
+REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |   certifi
+import time:       100 |        400 | site
+import time:        50 |         50 | src
+import time:        40 |         40 | src.api
+import time:       200 |        200 |       pydantic_core
+import time:      1000 |       1200 |     pydantic
+import time:       500 |       1700 |   fastapi
+import time:        80 |         80 |     prometheus_client.values
+import time:       300 |        380 |   prometheus_client
+import time:       120 |        120 |   src.api.logging_utils
+import time:       100 |       2300 | src.api.main
+"""
+
+def test_parse_importtime_keeps_only_the_modules_subtree():
+    entries = parse_importtime(REPORT, 'src.api.main')
+    assert [name for name, _, _ in entries] == [
+        'pydantic_core', 'pydantic', 'fastapi', 'prometheus_client.values', 'prometheus_client',
+        'src.api.logging_utils', 'src.api.main',
+    ]
+    assert entries[-1] == ('src.api.main', 0, 2300) and entries[0][1] == 3
+    with pytest.raises(ValueError):
+        parse_importtime(REPORT, 'src.api.audit_db')
+
+def test_own_time_excludes_required_packages_once():
+    entries = parse_importtime(REPORT, 'src.api.main')
+    assert own_time_us(entries) == 2300
+    # pydantic is counted inside fastapi, not subtracted a second time
+    assert own_time_us(entries, ('fastapi', 'pydantic')) == 600
+    assert own_time_us(entries, ('fastapi', 'prometheus_client')) == 220
+
+@pytest.mark.parametrize('module', sorted(IMPORT_BUDGETS))
+def test_entry_modules_import_within_budget(module):
+    # Already-imported packages count as installed (celery's lazy modules have no __spec__)
+    missing = [
+        name for name in IMPORT_BUDGETS[module]['required']
+        if name not in sys.modules and importlib.util.find_spec(name) is None
+    ]
+    if missing:
+        pytest.skip(f"{', '.join(missing)} not installed")
+    result = check_budget(module)
+    assert result['violations'] == []
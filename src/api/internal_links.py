@@ -0,0 +1,203 @@
+"""
+Per-tenant internal link indexes (link_index.LinkIndex) on disk.
+
+- update_index(): under the tenant's lock, fetches pages (LINK_FETCH_CONCURRENCY at a time),
+  re-indexes them (or drops them if they are gone) and saves the index
+- queue_pages() / index_queued_pages(): a per-tenant Redis list of pages waiting to be indexed
+  (the pages a re-audit found changed, or every sitemap URL to build a first index), taken
+  LINK_INDEX_BUILD_BATCH at a time, so one tenant's batches run one after another
+- suggest_links(): the top-k pages to link to from an indexed page, optionally re-ranked by
+  the LLM among the index's top LINK_RERANK_CANDIDATES, so the prompt never lists the whole site
+
+Indexes live in LINK_INDEX_DIR/<tenant_id>.npz/.json/.log (see LinkIndex.save). Updates for a
+tenant are serialized by a Redis lock; the updating process keeps the index it saved in memory
+and appends only its changes, and readers keep the loaded index until the files change.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from bs4 import BeautifulSoup
+from .link_index import LinkIndex
+from .locks import acquire_lock, get_redis, release_lock
+from .tenant_generations import bump_tenant_generation
+from .metrics import timed_get, PARSE_SECONDS
+from .openai_client import generate_internal_links
+from .tracing import start_span
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+LINK_INDEX_DIR = os.getenv('LINK_INDEX_DIR', 'cache/link_index')
+LINK_RERANK_CANDIDATES = int(os.getenv('LINK_RERANK_CANDIDATES', 20))
+LINK_INDEX_LOCK_TTL = 600
+LINK_FETCH_CONCURRENCY = int(os.getenv('LINK_FETCH_CONCURRENCY', 8))
+# Pages per update_index() call when building a whole site's index
+LINK_INDEX_BUILD_BATCH = int(os.getenv('LINK_INDEX_BUILD_BATCH', 200))
+
+_loaded = {}  # tenant_id -> (file state, LinkIndex), for readers
+_loaded_lock = threading.Lock()
+_saved = {}  # tenant_id -> (file state, LinkIndex) as last saved by this process
+
+def index_path(tenant_id: int) -> str:
+    return os.path.join(LINK_INDEX_DIR, str(tenant_id))
+
+def _file_state(path: str):
+    # Changes when the segment is rewritten or the log appended to
+    try:
+        segment = os.stat(f"{path}.json").st_mtime_ns
+    except FileNotFoundError:
+        return None
+    try:
+        log = os.path.getsize(f"{path}.log")
+    except FileNotFoundError:
+        log = 0
+    return segment, log
+
+def index_exists(tenant_id: int) -> bool:
+    return os.path.exists(f"{index_path(tenant_id)}.json")
+
+def load_index(tenant_id: int) -> LinkIndex:
+    """
+    The tenant's saved index (empty if none yet), reloaded only when the file changed.
+    Shared by the process's readers: do not modify it.
+    """
+    path = index_path(tenant_id)
+    state = _file_state(path)
+    if state is None:
+        return LinkIndex()
+    with _loaded_lock:
+        cached = _loaded.get(tenant_id)
+        if cached is None or cached[0] != state:
+            cached = _loaded[tenant_id] = (state, LinkIndex.load(path))
+        return cached[1]
+
+def page_text(html: str) -> tuple:
+    """
+    Returns:
+        tuple: (title, main text) with scripts, styles and site chrome (nav, header, footer) removed.
+    """
+    with PARSE_SECONDS.labels('html').time():
+        soup = BeautifulSoup(html, 'html.parser')
+    title = soup.title.get_text(' ', strip=True) if soup.title else ''
+    for tag in soup(['script', 'style', 'noscript', 'nav', 'header', 'footer', 'title']):
+        tag.decompose()
+    return title, ' '.join(soup.get_text(' ').split())
+
+def _fetch_page(session: requests.Session, url: str):
+    resp = timed_get(session, url, 'links', 'page', timeout=10)
+    if resp.status_code in (404, 410):
+        return None
+    resp.raise_for_status()
+    return page_text(resp.text)
+
+def _fetch_pages(urls: list) -> dict:
+    """
+    Fetch pages concurrently over one session.
+    Returns:
+        dict: url -> (title, text), or None for pages that no longer exist; failed fetches are left out.
+    """
+    pages = {}
+    with requests.Session() as session, ThreadPoolExecutor(
+        max_workers=max(1, min(LINK_FETCH_CONCURRENCY, len(urls))), thread_name_prefix='links-fetch'
+    ) as executor:
+        futures = {url: executor.submit(_fetch_page, session, url) for url in urls}
+        for url, future in futures.items():
+            try:
+                pages[url] = future.result()
+            except Exception as e:
+                logger.warning(f"Link index fetch failed for {url}: {e}")
+    return pages
+
+def _apply(tenant_id: int, urls: list) -> dict:
+    # Caller holds the tenant's lock
+    pages = _fetch_pages(urls)
+    with start_span('links.update_index', tenant=tenant_id, urls=len(urls)):
+        path = index_path(tenant_id)
+        saved = _saved.pop(tenant_id, None)
+        if saved is not None and saved[0] == _file_state(path):
+            index = saved[1]
+        else:
+            index = LinkIndex.load(path) if index_exists(tenant_id) else LinkIndex()
+        indexed = removed = 0
+        for url, page in pages.items():
+            if page is None:
+                removed += index.remove(url)
+            else:
+                index.add(url, page[1], page[0])
+                indexed += 1
+        index.save(path)
+        _saved[tenant_id] = (_file_state(path), index)
+    return {'indexed': indexed, 'removed': removed, 'pages': len(index)}
+
+def update_index(tenant_id: int, urls: list) -> dict:
+    """
+    Re-index `urls` for a tenant. Pages that failed to fetch keep their previous entry.
+    Returns:
+        dict: Counts of pages indexed and removed, or {'skipped': True} if another update holds the lock.
+    """
+    lock = f"link_index:{tenant_id}"
+    token = acquire_lock(lock, LINK_INDEX_LOCK_TTL)
+    if token is None:
+        return {'skipped': True}
+    try:
+        result = _apply(tenant_id, urls)
+    finally:
+        release_lock(lock, token)
+    bump_tenant_generation(tenant_id)
+    return result
+
+def _queue_key(tenant_id: int) -> str:
+    return f"link_index:queue:{tenant_id}"
+
+def queue_pages(tenant_id: int, urls: list) -> None:
+    """
+    Add pages to the tenant's indexing queue (see index_queued_pages).
+    """
+    pipe = get_redis().pipeline()
+    for i in range(0, len(urls), 1000):
+        pipe.rpush(_queue_key(tenant_id), *urls[i:i + 1000])
+    pipe.execute()
+
+def index_queued_pages(tenant_id: int) -> dict:
+    """
+    Index the next LINK_INDEX_BUILD_BATCH queued pages; they leave the queue only once the index
+    is saved.
+    Returns:
+        dict: update_index() counts plus 'remaining' queued pages, or {'skipped': True} if another
+        update holds the lock.
+    """
+    lock = f"link_index:{tenant_id}"
+    token = acquire_lock(lock, LINK_INDEX_LOCK_TTL)
+    if token is None:
+        return {'skipped': True}
+    r = get_redis()
+    key = _queue_key(tenant_id)
+    try:
+        batch = r.lrange(key, 0, LINK_INDEX_BUILD_BATCH - 1)
+        result = _apply(tenant_id, batch) if batch else {'indexed': 0, 'removed': 0}
+        r.ltrim(key, len(batch), -1)
+        result['remaining'] = r.llen(key)
+    finally:
+        release_lock(lock, token)
+    if batch:
+        bump_tenant_generation(tenant_id)
+    return result
+
+def suggest_links(tenant_id: int, url: str, k: int = 3, client: dict = None) -> list:
+    """
+    Pages to link to from `url` (which must be indexed).
+    Args:
+        client (dict): If given, the LLM re-ranks the index's top LINK_RERANK_CANDIDATES
+            (generate_internal_links); with the mock client the index order is kept.
+    Returns:
+        list: URLs, best first.
+    """
+    index = load_index(tenant_id)
+    candidates = [candidate for candidate, _ in index.related(url, max(k, LINK_RERANK_CANDIDATES) if client else k)]
+    if client is None or len(candidates) <= k:
+        return candidates[:k]
+    page = _fetch_pages([url]).get(url)
+    if page is None:
+        return candidates[:k]
+    return generate_internal_links(client, page[1], candidates, limit=k)
@@ -0,0 +1,111 @@
+import time
+import threading
+import pytest
+from src.api import internal_links
+
+PAGES = {
+    'https://example.com/running-shoes': ('Running shoes', 'running shoes for trail running and road running'),
+    'https://example.com/trail-guide': ('Trail guide', 'trail running guide with shoes and routes'),
+    'https://example.com/road-races': ('Road races', 'road running races calendar and training'),
+    'https://example.com/pricing': ('Pricing', 'plans pricing billing invoices'),
+}
+
+class FakeResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeSite:
+    """timed_get() stand-in serving PAGES, with per-request latency and overridable statuses."""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.status = {}
+        self.active = self.peak = 0
+        self.guard = threading.Lock()
+
+    def get(self, session, url, module, kind, **kwargs):
+        with self.guard:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self.guard:
+            self.active -= 1
+        status = self.status.get(url, 200)
+        if status != 200:
+            return FakeResponse(status)
+        title, text = PAGES[url]
+        return FakeResponse(200, f"<html><title>{title}</title><nav>menu</nav><main>{text}</main></html>")
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    site = FakeSite()
+    monkeypatch.setattr(internal_links, 'LINK_INDEX_DIR', str(tmp_path / 'link_index'))
+    monkeypatch.setattr(internal_links, 'timed_get', site.get)
+    monkeypatch.setattr(internal_links, 'acquire_lock', lambda name, ttl: 'token')
+    monkeypatch.setattr(internal_links, 'release_lock', lambda name, token: None)
+    monkeypatch.setattr(internal_links, 'bump_tenant_generation', lambda tenant_id: None)
+    return site
+
+def test_update_index_adds_refreshes_and_drops_pages(site):
+    assert not internal_links.index_exists(1)
+    assert internal_links.update_index(1, list(PAGES)) == {'indexed': 4, 'removed': 0, 'pages': 4}
+    assert internal_links.index_exists(1)
+    site.status = {'https://example.com/pricing': 410, 'https://example.com/road-races': 503}
+    result = internal_links.update_index(1, ['https://example.com/pricing', 'https://example.com/road-races'])
+    # The gone page is dropped; the failed fetch keeps its previous entry
+    assert result == {'indexed': 0, 'removed': 1, 'pages': 3}
+    related = [url for url, _ in internal_links.load_index(1).related('https://example.com/running-shoes', 5)]
+    assert set(related) == {'https://example.com/trail-guide', 'https://example.com/road-races'}
+
+def test_queued_pages_are_indexed_in_batches_under_the_lock(site, monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(internal_links, 'get_redis', lambda: client)
+    monkeypatch.setattr(internal_links, 'LINK_INDEX_BUILD_BATCH', 3)
+    internal_links.queue_pages(1, list(PAGES))
+    fetched = []
+    get = site.get
+    monkeypatch.setattr(internal_links, 'timed_get', lambda *args, **kwargs: fetched.append(args[1]) or get(*args, **kwargs))
+    # Another update holds the lock: nothing is fetched and the pages stay queued
+    monkeypatch.setattr(internal_links, 'acquire_lock', lambda name, ttl: None)
+    assert internal_links.index_queued_pages(1) == {'skipped': True} and fetched == []
+    monkeypatch.setattr(internal_links, 'acquire_lock', lambda name, ttl: 'token')
+    assert internal_links.index_queued_pages(1) == {'indexed': 3, 'removed': 0, 'pages': 3, 'remaining': 1}
+    assert internal_links.index_queued_pages(1) == {'indexed': 1, 'removed': 0, 'pages': 4, 'remaining': 0}
+    assert internal_links.index_queued_pages(1) == {'indexed': 0, 'removed': 0, 'remaining': 0}
+    assert fetched == list(PAGES)
+
+def test_updates_reuse_the_index_this_process_saved(site, monkeypatch):
+    internal_links.update_index(1, list(PAGES)[:2])
+    monkeypatch.setattr(internal_links.LinkIndex, 'load', lambda path: pytest.fail('reloaded'))
+    assert internal_links.update_index(1, list(PAGES)[2:]) == {'indexed': 2, 'removed': 0, 'pages': 4}
+
+def test_pages_are_fetched_concurrently(site, monkeypatch):
+    monkeypatch.setattr(internal_links, 'LINK_FETCH_CONCURRENCY', 4)
+    site.latency = 0.2
+    start = time.monotonic()
+    pages = internal_links._fetch_pages(list(PAGES))
+    assert time.monotonic() - start < 0.6 and site.peak == 4
+    assert pages['https://example.com/pricing'] == ('Pricing', 'plans pricing billing invoices')
+
+def test_suggest_links_reranks_a_bounded_candidate_list(site, monkeypatch):
+    internal_links.update_index(1, list(PAGES))
+    source = 'https://example.com/running-shoes'
+    # Without a client the index order is kept
+    assert internal_links.suggest_links(1, source, k=1) == ['https://example.com/trail-guide']
+    calls = []
+
+    def rerank(client, content, candidates, limit):
+        calls.append((content, candidates, limit))
+        return list(reversed(candidates))[:limit]
+
+    monkeypatch.setattr(internal_links, 'generate_internal_links', rerank)
+    monkeypatch.setattr(internal_links, 'LINK_RERANK_CANDIDATES', 2)
+    assert internal_links.suggest_links(1, source, k=1, client={'client': 'openai'}) == ['https://example.com/road-races']
+    content, candidates, limit = calls[0]
+    assert content == PAGES[source][1] and limit == 1
+    assert candidates == ['https://example.com/trail-guide', 'https://example.com/road-races']
@@ -0,0 +1,373 @@
+"""
+BM25 inverted index over a site's pages for internal link suggestions.
+
+Postings are NumPy arrays, laid out like a sparse matrix by term (CSC): term_ptr[t]:term_ptr[t+1]
+is the slice of post_docs / post_tfs holding the pages that contain term t. Scoring a query
+only touches the postings of its terms and sums them with one np.bincount, so related() takes
+milliseconds even on 100k-page sites.
+
+Incremental updates:
+- add() of a new or changed page appends it to a small pending segment (its postings are rebuilt
+  on the next query); a changed page's previous version is tombstoned
+- remove() tombstones the page
+- compact() rebuilds one segment from the live pages, dropping tombstones; after a batch of
+  updates, maybe_compact() does so once pending and tombstoned pages reach COMPACT_RATIO of the pages
+
+On disk, `path`.npz/.json hold the compacted segment and `path`.log the changes made since, one
+JSON line per add or remove. save() appends the changes since the last save to the log, so an
+update costs as much as the pages it changes; it rewrites the segment files (and empties the
+log) only when maybe_compact() compacts. load() replays the log over the segment.
+
+A page is used as a query through its own highest tf-idf terms (QUERY_TERMS of them), so very
+common terms, with long postings and little signal, are skipped.
+"""
+import os
+import re
+import json
+from collections import Counter
+from typing import Iterable, Optional
+import numpy as np
+
+# Query terms used when a page is the query
+QUERY_TERMS = 48
+# Title terms count this many times
+TITLE_WEIGHT = 3
+# maybe_compact() compacts once pending and tombstoned pages are this share of all pages (and at least COMPACT_MIN)
+COMPACT_RATIO = 0.25
+COMPACT_MIN = 1000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its just me more most my no nor not now of off on once only or other our ours out
+over own same she should so some such than that the their them then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you your yours
+""".split())
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def _postings(doc_ptr: np.ndarray, doc_terms: np.ndarray, doc_tfs: np.ndarray, n_terms: int, first_doc: int = 0):
+    """
+    Invert a by-document (CSR) term matrix into by-term postings.
+    Returns:
+        tuple: (term_ptr, post_docs, post_tfs); post_docs are first_doc + row numbers.
+    """
+    doc_ids = np.repeat(np.arange(first_doc, first_doc + len(doc_ptr) - 1, dtype=np.int32), np.diff(doc_ptr))
+    order = np.argsort(doc_terms, kind='stable')
+    term_ptr = np.searchsorted(doc_terms[order], np.arange(n_terms + 1))
+    return term_ptr, doc_ids[order], doc_tfs[order]
+
+class LinkIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}        # term -> term id
+        self.terms = []        # term id -> term
+        self.urls = []         # doc id -> url
+        self.titles = []       # doc id -> title
+        self.doc_ids = {}      # url -> doc id of its current version
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.live = np.zeros(0, dtype=bool)
+        self.df = np.zeros(0, dtype=np.int32)
+        self.total_length = 0.0
+        # Compacted segment: docs [0, len(doc_ptr) - 1), by document (CSR) and by term
+        self._doc_ptr = np.zeros(1, dtype=np.int64)
+        self._doc_terms = np.zeros(0, dtype=np.int32)
+        self._doc_tfs = np.zeros(0, dtype=np.float32)
+        self._segment = _postings(self._doc_ptr, self._doc_terms, self._doc_tfs, 0)
+        # Pending segment: doc id -> (terms, tfs) added since the last compaction
+        self._pending = {}
+        self._pending_segment = None
+        # URLs added or removed since the last save
+        self._unsaved = set()
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.doc_ids
+
+    @property
+    def _n_compact(self) -> int:
+        return len(self._doc_ptr) - 1
+
+    def _term_ids(self, counts: dict, grow: bool) -> tuple:
+        """
+        Args:
+            counts: token -> occurrences.
+        Returns:
+            tuple: (term ids, term frequencies) arrays; unknown tokens are added to the
+            vocabulary if `grow`, skipped otherwise.
+        """
+        terms, tfs = [], []
+        for token, count in counts.items():
+            term = self.vocab.get(token)
+            if term is None:
+                if not grow:
+                    continue
+                term = self.vocab[token] = len(self.vocab)
+                self.terms.append(token)
+            terms.append(term)
+            tfs.append(count)
+        return np.array(terms, dtype=np.int32), np.array(tfs, dtype=np.float32)
+
+    def _doc_vector(self, doc: int):
+        if doc < self._n_compact:
+            lo, hi = self._doc_ptr[doc], self._doc_ptr[doc + 1]
+            return self._doc_terms[lo:hi], self._doc_tfs[lo:hi]
+        return self._pending[doc]
+
+    def add(self, url: str, text: str, title: str = '') -> None:
+        """
+        Index a page, replacing its previous version if it was indexed already.
+        """
+        self._add(url, title, Counter(tokenize(text) + tokenize(title) * TITLE_WEIGHT))
+
+    def _add(self, url: str, title: str, counts: dict) -> None:
+        self._remove(url)
+        self._unsaved.add(url)
+        terms, tfs = self._term_ids(counts, grow=True)
+        doc = len(self.urls)
+        self.urls.append(url)
+        self.titles.append(title)
+        self.doc_ids[url] = doc
+        if doc >= len(self.lengths):
+            capacity = max(1024, 2 * len(self.lengths))
+            self.lengths = np.resize(self.lengths, capacity)
+            self.live = np.concatenate([self.live[:doc], np.zeros(capacity - doc, dtype=bool)])
+        if len(self.vocab) > len(self.df):
+            self.df = np.concatenate([self.df, np.zeros(max(len(self.vocab), 2 * len(self.df)) - len(self.df), dtype=np.int32)])
+        self.lengths[doc] = tfs.sum()
+        self.live[doc] = True
+        self.df[terms] += 1
+        self.total_length += float(self.lengths[doc])
+        self._pending[doc] = (terms, tfs)
+        self._pending_segment = None
+
+    def remove(self, url: str) -> bool:
+        removed = self._remove(url)
+        if removed:
+            self._unsaved.add(url)
+        return removed
+
+    def _remove(self, url: str) -> bool:
+        doc = self.doc_ids.pop(url, None)
+        if doc is None:
+            return False
+        terms, _ = self._doc_vector(doc)
+        self.live[doc] = False
+        self.df[terms] -= 1
+        self.total_length -= float(self.lengths[doc])
+        if self._pending.pop(doc, None) is not None:
+            self._pending_segment = None
+        return True
+
+    def maybe_compact(self) -> bool:
+        tombstones = len(self.urls) - len(self.doc_ids)
+        if len(self._pending) + tombstones >= max(COMPACT_MIN, COMPACT_RATIO * len(self.doc_ids)):
+            self.compact()
+            return True
+        return False
+
+    def compact(self) -> None:
+        """
+        Rebuild a single segment from the live pages, renumbering them and dropping tombstones.
+        """
+        docs = [doc for doc in range(len(self.urls)) if self.live[doc]]
+        vectors = [self._doc_vector(doc) for doc in docs]
+        self._doc_ptr = np.zeros(len(docs) + 1, dtype=np.int64)
+        np.cumsum([len(terms) for terms, _ in vectors], out=self._doc_ptr[1:])
+        self._doc_terms = np.concatenate([terms for terms, _ in vectors]) if vectors else np.zeros(0, dtype=np.int32)
+        self._doc_tfs = np.concatenate([tfs for _, tfs in vectors]) if vectors else np.zeros(0, dtype=np.float32)
+        self.urls = [self.urls[doc] for doc in docs]
+        self.titles = [self.titles[doc] for doc in docs]
+        self.doc_ids = {url: doc for doc, url in enumerate(self.urls)}
+        self.lengths = self.lengths[docs].copy()
+        self.live = np.ones(len(docs), dtype=bool)
+        self._segment = _postings(self._doc_ptr, self._doc_terms, self._doc_tfs, len(self.vocab))
+        self._pending = {}
+        self._pending_segment = None
+
+    def _segments(self) -> list:
+        segments = [self._segment]
+        if self._pending:
+            if self._pending_segment is None:
+                docs = sorted(self._pending)
+                # Pending doc ids are consecutive except for removed ones, which get empty rows
+                first = docs[0]
+                rows = [self._pending.get(doc, (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)))
+                        for doc in range(first, docs[-1] + 1)]
+                doc_ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+                np.cumsum([len(terms) for terms, _ in rows], out=doc_ptr[1:])
+                self._pending_segment = _postings(
+                    doc_ptr, np.concatenate([t for t, _ in rows]), np.concatenate([f for _, f in rows]),
+                    len(self.vocab), first
+                )
+            segments.append(self._pending_segment)
+        return segments
+
+    def _idf(self, terms: np.ndarray) -> np.ndarray:
+        n = len(self.doc_ids)
+        df = self.df[terms].astype(np.float64)
+        return np.log1p((n - df + 0.5) / (df + 0.5))
+
+    def _query_terms(self, terms: np.ndarray, tfs: np.ndarray, limit: int = QUERY_TERMS):
+        weights = (1 + np.log(tfs)) * self._idf(terms)
+        if len(terms) > limit:
+            top = np.argpartition(-weights, limit)[:limit]
+            terms, weights = terms[top], weights[top]
+        return terms, weights
+
+    def scores(self, terms: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        BM25 score of every doc id for query `terms` with per-term `weights` (idf included).
+        Returns:
+            np.ndarray: Scores indexed by doc id; 0 for tombstoned pages.
+        """
+        n = len(self.urls)
+        if not n or not len(terms):
+            return np.zeros(n)
+        avg_length = max(self.total_length / max(len(self.doc_ids), 1), 1.0)
+        lengths = self.lengths[:n]
+        doc_parts, score_parts = [], []
+        for term_ptr, post_docs, post_tfs in self._segments():
+            for term, weight in zip(terms.tolist(), weights.tolist()):
+                if term + 1 >= len(term_ptr):
+                    continue
+                lo, hi = term_ptr[term], term_ptr[term + 1]
+                if lo == hi:
+                    continue
+                docs, tfs = post_docs[lo:hi], post_tfs[lo:hi]
+                norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avg_length)
+                doc_parts.append(docs)
+                score_parts.append(weight * tfs * (self.k1 + 1) / (tfs + norm))
+        if not doc_parts:
+            return np.zeros(n)
+        scores = np.bincount(np.concatenate(doc_parts), weights=np.concatenate(score_parts), minlength=n)
+        scores[~self.live[:n]] = 0
+        return scores
+
+    def _top(self, scores: np.ndarray, k: int, exclude: Iterable[str] = (), allowed: Optional[Iterable[str]] = None) -> list:
+        if allowed is not None:
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[[self.doc_ids[url] for url in allowed if url in self.doc_ids]] = True
+            scores = np.where(mask, scores, 0)
+        for url in exclude:
+            doc = self.doc_ids.get(url)
+            if doc is not None:
+                scores[doc] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(self.urls[doc], float(scores[doc])) for doc in candidates]
+
+    def search(self, text: str, k: int = 10, exclude: Iterable[str] = (), allowed: Optional[Iterable[str]] = None) -> list:
+        """
+        Pages most relevant to `text`.
+        Args:
+            exclude: URLs never returned (e.g. the source page).
+            allowed: If given, only these URLs are returned.
+        Returns:
+            list: (url, score) tuples, best first.
+        """
+        terms, weights = self._query_terms(*self._term_ids(Counter(tokenize(text)), grow=False))
+        return self._top(self.scores(terms, weights), k, exclude, allowed)
+
+    def related(self, url: str, k: int = 10, allowed: Optional[Iterable[str]] = None) -> list:
+        """
+        Pages most relevant to an indexed page, excluding itself.
+        Returns:
+            list: (url, score) tuples, best first; empty if the page is not indexed.
+        """
+        doc = self.doc_ids.get(url)
+        if doc is None:
+            return []
+        terms, weights = self._query_terms(*self._doc_vector(doc))
+        return self._top(self.scores(terms, weights), k, (url,), allowed)
+
+    def suggest_all(self, k: int = 3) -> dict:
+        """
+        Returns:
+            dict: url -> related() for every indexed page.
+        """
+        return {url: self.related(url, k) for url in list(self.doc_ids)}
+
+    def save(self, path: str) -> None:
+        """
+        Persist the changes since the last save (or load): appended to `path`.log, or, when
+        maybe_compact() compacts or there is no saved index yet, written as new `path`.npz and
+        `path`.json (replaced atomically) with an empty log.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if not os.path.exists(f"{path}.json") or self.maybe_compact():
+            self._write_segment(path)
+        elif self._unsaved:
+            with open(f"{path}.log", 'a') as f:
+                f.write(''.join(json.dumps(self._change(url)) + '\n' for url in sorted(self._unsaved)))
+                f.flush()
+                os.fsync(f.fileno())
+        self._unsaved = set()
+
+    def _change(self, url: str) -> dict:
+        # A log line: the page's current version, or its removal
+        doc = self.doc_ids.get(url)
+        if doc is None:
+            return {'url': url, 'removed': True}
+        terms, tfs = self._doc_vector(doc)
+        return {'url': url, 'title': self.titles[doc],
+                'terms': {self.terms[term]: int(tf) for term, tf in zip(terms.tolist(), tfs.tolist())}}
+
+    def _write_segment(self, path: str) -> None:
+        self.compact()
+        with open(f"{path}.npz.tmp", 'wb') as f:
+            term_ptr, post_docs, post_tfs = self._segment
+            np.savez(f, doc_ptr=self._doc_ptr, doc_terms=self._doc_terms, doc_tfs=self._doc_tfs, lengths=self.lengths,
+                     term_ptr=term_ptr, post_docs=post_docs, post_tfs=post_tfs)
+        with open(f"{path}.json.tmp", 'w') as f:
+            json.dump({'k1': self.k1, 'b': self.b, 'terms': self.terms, 'urls': self.urls, 'titles': self.titles}, f)
+        os.replace(f"{path}.npz.tmp", f"{path}.npz")
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+        # Replaying the old log over the new segment would redo changes it already holds, which
+        # leaves the same pages; removing it second keeps a crash in between harmless
+        try:
+            os.remove(f"{path}.log")
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def load(cls, path: str) -> 'LinkIndex':
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+        arrays = np.load(f"{path}.npz")
+        index = cls(meta['k1'], meta['b'])
+        index.terms = meta['terms']
+        index.vocab = {term: i for i, term in enumerate(index.terms)}
+        index.urls = meta['urls']
+        index.titles = meta['titles']
+        index.doc_ids = {url: doc for doc, url in enumerate(index.urls)}
+        index._doc_ptr = arrays['doc_ptr']
+        index._doc_terms = arrays['doc_terms']
+        index._doc_tfs = arrays['doc_tfs']
+        index.lengths = arrays['lengths']
+        index.live = np.ones(len(index.urls), dtype=bool)
+        index.df = np.bincount(index._doc_terms, minlength=len(index.vocab)).astype(np.int32)
+        index.total_length = float(index.lengths.sum())
+        index._segment = (arrays['term_ptr'], arrays['post_docs'], arrays['post_tfs'])
+        try:
+            with open(f"{path}.log") as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        break  # a line cut short by a crash mid-append
+                    if change.get('removed'):
+                        index._remove(change['url'])
+                    else:
+                        index._add(change['url'], change['title'], change['terms'])
+        except FileNotFoundError:
+            pass
+        index._unsaved = set()
+        return index
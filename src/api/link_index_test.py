@@ -0,0 +1,93 @@
+import os
+import link_index
+from link_index import LinkIndex, tokenize
+
+PAGES = {
+    "/python-frameworks": ("Comparing Python web frameworks: Django, Flask and FastAPI for APIs", "Python frameworks"),
+    "/django-orm": ("Django ORM queries, models and migrations explained with Django examples", "Django ORM"),
+    "/flask-routing": ("Flask routing, blueprints and templates for small Python apps", "Flask routing"),
+    "/sourdough": ("Baking sourdough bread at home: starter, flour and hydration", "Sourdough bread"),
+    "/bread-flour": ("Choosing bread flour: protein content and hydration for sourdough loaves", "Bread flour"),
+}
+
+def build(pages=PAGES) -> LinkIndex:
+    index = LinkIndex()
+    for url, (text, title) in pages.items():
+        index.add(url, text, title)
+    return index
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("The Django ORM, and its models!") == ["django", "orm", "models"]
+
+def test_related_ranks_pages_on_the_same_topic_first():
+    index = build()
+    related = [url for url, _ in index.related("/django-orm", k=2)]
+    assert related[0] == "/python-frameworks"
+    assert "/sourdough" not in related
+    assert [url for url, _ in index.related("/sourdough", k=1)] == ["/bread-flour"]
+
+def test_search_excludes_and_restricts_urls():
+    index = build()
+    assert [url for url, _ in index.search("sourdough hydration", k=5)] == ["/sourdough", "/bread-flour"]
+    assert [url for url, _ in index.search("sourdough hydration", k=5, exclude=["/sourdough"])] == ["/bread-flour"]
+    assert index.search("sourdough hydration", k=5, allowed=["/django-orm"]) == []
+    assert index.search("unknown words only", k=5) == []
+
+def test_incremental_updates_match_a_fresh_build():
+    index = build()
+    index.compact()
+    index.add("/django-orm", "Sourdough starter feeding schedule and flour", "Starter")
+    index.remove("/flask-routing")
+    index.add("/new-page", "FastAPI dependency injection for Python APIs", "FastAPI")
+    pages = dict(PAGES)
+    pages["/django-orm"] = ("Sourdough starter feeding schedule and flour", "Starter")
+    del pages["/flask-routing"]
+    pages["/new-page"] = ("FastAPI dependency injection for Python APIs", "FastAPI")
+    fresh = build(pages)
+    assert len(index) == len(fresh) == 5
+    for url in pages:
+        assert index.related(url, k=4) == fresh.related(url, k=4)
+    index.compact()
+    for url in pages:
+        assert [u for u, _ in index.related(url, k=4)] == [u for u, _ in fresh.related(url, k=4)]
+    assert "/flask-routing" not in index
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build()
+    index.add("/pending", "Flask templates and Jinja filters", "Jinja")
+    index.save(str(tmp_path / "site"))
+    loaded = LinkIndex.load(str(tmp_path / "site"))
+    assert len(loaded) == len(index)
+    for url in list(PAGES) + ["/pending"]:
+        assert loaded.related(url, k=3) == index.related(url, k=3)
+    loaded.add("/another", "Django migrations", "Migrations")
+    assert loaded.related("/another", k=1)[0][0] == "/django-orm"
+
+def test_saves_append_changes_until_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(link_index, "COMPACT_MIN", 4)
+    path = str(tmp_path / "site")
+    index = build()
+    index.save(path)
+    segment = os.stat(path + ".npz").st_mtime_ns
+    assert not os.path.exists(path + ".log")
+    index.add("/django-orm", "Sourdough starter feeding schedule and flour", "Starter")
+    index.remove("/flask-routing")
+    index.save(path)
+    # One pending and two tombstoned pages: appended to the log, the segment is left as it is
+    assert os.stat(path + ".npz").st_mtime_ns == segment
+    with open(path + ".log") as f:
+        assert len(f.readlines()) == 2
+    loaded = LinkIndex.load(path)
+    assert "/flask-routing" not in loaded and len(loaded) == len(index) == 4
+    for url in loaded.doc_ids:
+        assert loaded.related(url, k=3) == index.related(url, k=3)
+    with open(path + ".log", "a") as f:
+        f.write('{"url": "/cut-sh')  # an append cut short by a crash
+    assert len(LinkIndex.load(path)) == 4
+    # A second pending page reaches COMPACT_MIN: the segment is rewritten, the log emptied
+    loaded.add("/new-page", "FastAPI dependency injection for Python APIs", "FastAPI")
+    loaded.save(path)
+    assert not os.path.exists(path + ".log")
+    reloaded = LinkIndex.load(path)
+    assert len(reloaded) == 5 and not reloaded._pending
+    assert [u for u, _ in reloaded.related("/new-page", k=1)] == ["/python-frameworks"]
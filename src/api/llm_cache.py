@@ -0,0 +1,214 @@
+"""
+Content-addressed, persistent cache of LLM responses.
+
+A response is keyed by a SHA-256 of the model, the rendered prompt, the request parameters and
+the prompt template's version, so bumping a template's version invalidates only its entries.
+
+Entries live in one SQLite file (WAL mode, shared by all processes on a host):
+- TTL: entries older than `ttl` seconds are misses and are removed on eviction
+- LRU + max size: when the stored bytes exceed `max_bytes`, least recently used entries are
+  removed until 90% of it is left; a hit records its access time only when the stored one is
+  more than `touch_interval` seconds old, so hot keys do not write on every read
+
+get_or_compute() is single-flight: concurrent callers of the same key, in this process (a
+per-key lock) or in other processes (a lease row in the same file), wait for one computation
+instead of each calling the model.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'cache/llm_cache.sqlite3')
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 7 * 86400))
+# Eviction frees space down to this share of max_bytes, so it does not run on every write
+EVICT_TO = 0.9
+# Hits refresh accessed_at at most this often per entry; LRU order is kept to this resolution
+LLM_CACHE_TOUCH_INTERVAL = float(os.getenv('LLM_CACHE_TOUCH_INTERVAL', 60))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY CHECK (id = 1), total_bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO stats (id, total_bytes) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses
+    BEGIN UPDATE stats SET total_bytes = total_bytes + NEW.size; END;
+CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses
+    BEGIN UPDATE stats SET total_bytes = total_bytes - OLD.size; END;
+CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses
+    BEGIN UPDATE stats SET total_bytes = total_bytes - OLD.size + NEW.size; END;
+CREATE TABLE IF NOT EXISTS inflight (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+"""
+
+def cache_key(model: str, prompt, params: Optional[dict] = None, template_version: str = '') -> str:
+    """
+    Args:
+        prompt: The rendered prompt (str) or chat messages (list of dicts).
+    """
+    payload = json.dumps(
+        {'model': model, 'prompt': prompt, 'params': params or {}, 'template_version': template_version},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class LLMCache:
+    # path -> this process's instance; see for_process()
+    _instances = {}
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES, ttl: int = LLM_CACHE_TTL,
+                 lease_seconds: float = 120.0, poll_interval: float = 0.05,
+                 touch_interval: float = LLM_CACHE_TOUCH_INTERVAL):
+        """
+        Args:
+            lease_seconds: How long another process may wait on a computation before taking it over.
+            touch_interval: Least age of an entry's accessed_at before a hit updates it.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}:{id(self)}"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._local = threading.local()
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+    @classmethod
+    def for_process(cls, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES,
+                    ttl: int = LLM_CACHE_TTL) -> 'LLMCache':
+        """
+        The instance for `path` in this process, created on first use and again after a fork
+        (SQLite connections must not be shared across fork).
+        """
+        cache = cls._instances.get(path)
+        if cache is None or cache.owner.split(':')[0] != str(os.getpid()):
+            cache = cls._instances[path] = cls(path, max_bytes, ttl)
+        return cache
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit, writes wait up to 30s for the file lock
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """
+        Returns:
+            tuple: (found, value)
+        """
+        conn = self._conn()
+        row = conn.execute('SELECT value, created_at, accessed_at FROM responses WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+        if row is None or row[1] < now - self.ttl:
+            return False, None
+        if row[2] < now - self.touch_interval:
+            conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        return True, json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        data = json.dumps(value)
+        now = time.time()
+        conn = self._conn()
+        conn.execute("""
+            INSERT INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                value = excluded.value, size = excluded.size,
+                created_at = excluded.created_at, accessed_at = excluded.accessed_at
+        """, (key, data, len(data), now, now))
+        if self.total_bytes() > self.max_bytes:
+            self.evict()
+
+    def total_bytes(self) -> int:
+        return self._conn().execute('SELECT total_bytes FROM stats WHERE id = 1').fetchone()[0]
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used ones until under EVICT_TO of max_bytes.
+        Returns:
+            int: Number of entries removed.
+        """
+        conn = self._conn()
+        removed = conn.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - self.ttl,)).rowcount
+        excess = self.total_bytes() - int(self.max_bytes * EVICT_TO)
+        if excess > 0:
+            # Least recently used first, just enough of them to free `excess` bytes
+            removed += conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, size, SUM(size) OVER (ORDER BY accessed_at ROWS UNBOUNDED PRECEDING) AS freed
+                        FROM responses
+                    ) WHERE freed - size < ?
+                )
+            """, (excess,)).rowcount
+        return removed
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._key_locks_guard:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _take_lease(self, key: str) -> bool:
+        conn = self._conn()
+        now = time.time()
+        conn.execute('DELETE FROM inflight WHERE key = ? AND expires_at < ?', (key, now))
+        cur = conn.execute(
+            'INSERT OR IGNORE INTO inflight (key, owner, expires_at) VALUES (?, ?, ?)',
+            (key, self.owner, now + self.lease_seconds)
+        )
+        return cur.rowcount == 1
+
+    def _release_lease(self, key: str) -> None:
+        self._conn().execute('DELETE FROM inflight WHERE key = ? AND owner = ?', (key, self.owner))
+
+    def get_or_compute(self, key: str, compute):
+        """
+        Return the cached value for `key`, or compute, store and return it, with at most one
+        computation per key at a time across threads and processes.
+        Returns:
+            tuple: (value, hit) where hit is False only for the caller that ran `compute`.
+        """
+        found, value = self.get(key)
+        if found:
+            return value, True
+        lock = self._key_lock(key)
+        with lock:
+            while True:
+                found, value = self.get(key)
+                if found:
+                    return value, True
+                if self._take_lease(key):
+                    break
+                # Another process is computing it
+                time.sleep(self.poll_interval)
+            try:
+                value = compute()
+                self.set(key, value)
+            finally:
+                self._release_lease(key)
+        with self._key_locks_guard:
+            if not lock.locked():
+                self._key_locks.pop(key, None)
+        return value, False
+
+def get_llm_cache() -> LLMCache:
+    return LLMCache.for_process(LLM_CACHE_PATH)
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import threading
+import urllib.request
+from fake_llm_server import FakeLLMServer
+from llm_cache import LLMCache, cache_key
+
+def ask(base_url: str, prompt: str) -> str:
+    body = json.dumps({'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': prompt}]}).encode()
+    req = urllib.request.Request(f"{base_url}/chat/completions", body, {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req) as resp:
+        return json.load(resp)['choices'][0]['message']['content']
+
+def test_key_covers_model_prompt_params_and_template_version():
+    base = cache_key('gpt-4o', 'hi', {'max_tokens': 5, 'temperature': 0}, 'schema:1')
+    assert base == cache_key('gpt-4o', 'hi', {'temperature': 0, 'max_tokens': 5}, 'schema:1')
+    assert base != cache_key('gpt-4o-mini', 'hi', {'max_tokens': 5, 'temperature': 0}, 'schema:1')
+    assert base != cache_key('gpt-4o', 'hi!', {'max_tokens': 5, 'temperature': 0}, 'schema:1')
+    assert base != cache_key('gpt-4o', 'hi', {'max_tokens': 6, 'temperature': 0}, 'schema:1')
+    assert base != cache_key('gpt-4o', 'hi', {'max_tokens': 5, 'temperature': 0}, 'schema:2')
+
+def test_repeated_prompts_call_the_model_once(tmp_path):
+    server = FakeLLMServer().start()
+    try:
+        cache = LLMCache(str(tmp_path / 'llm.sqlite3'))
+        key = cache_key('gpt-4o', 'refresh /pricing')
+        first = cache.get_or_compute(key, lambda: ask(server.base_url, 'refresh /pricing'))
+        second = cache.get_or_compute(key, lambda: ask(server.base_url, 'refresh /pricing'))
+        assert first == ('[fake completion] refresh /pricing', False)
+        assert second == ('[fake completion] refresh /pricing', True)
+        assert server.calls == 1
+    finally:
+        server.stop()
+
+def test_concurrent_identical_requests_are_single_flight(tmp_path):
+    server = FakeLLMServer(latency=0.2).start()
+    try:
+        path = str(tmp_path / 'llm.sqlite3')
+        # Two cache instances stand in for two worker processes sharing the file
+        caches = [LLMCache(path, poll_interval=0.01), LLMCache(path, poll_interval=0.01)]
+        key = cache_key('gpt-4o', 'same prompt')
+        results = []
+        def worker(cache):
+            results.append(cache.get_or_compute(key, lambda: ask(server.base_url, 'same prompt')))
+        threads = [threading.Thread(target=worker, args=(caches[i % 2],)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert server.calls == 1
+        assert sorted(hit for _, hit in results) == [False] + [True] * 7
+    finally:
+        server.stop()
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm.sqlite3'), ttl=0.05)
+    cache.set('k', 'v')
+    assert cache.get('k') == (True, 'v')
+    time.sleep(0.1)
+    assert cache.get('k') == (False, None)
+    assert cache.evict() == 1 and cache.total_bytes() == 0
+
+def test_lru_eviction_keeps_size_bounded(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm.sqlite3'), max_bytes=1000, touch_interval=0)
+    for i in range(4):
+        cache.set(f"k{i}", 'x' * 200)
+        time.sleep(0.01)
+    cache.get('k0')  # recently used: survives
+    time.sleep(0.01)
+    cache.set('k4', 'x' * 200)
+    assert cache.total_bytes() <= 900
+    assert [cache.get(f"k{i}")[0] for i in range(5)] == [True, False, True, True, True]
+
+def test_hits_touch_the_entry_at_most_once_per_interval(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm.sqlite3'), touch_interval=0.2)
+    cache.set('k', 'v')
+    accessed_at = lambda: cache._conn().execute("SELECT accessed_at FROM responses WHERE key = 'k'").fetchone()[0]
+    stored = accessed_at()
+    changes = cache._conn().total_changes
+    for _ in range(50):
+        assert cache.get('k') == (True, 'v')
+    assert accessed_at() == stored and cache._conn().total_changes == changes  # reads only
+    time.sleep(0.25)
+    cache.get('k')
+    assert accessed_at() > stored
+
+def test_failed_compute_is_not_cached(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm.sqlite3'))
+    def boom():
+        raise ValueError('bad reply')
+    try:
+        cache.get_or_compute('k', boom)
+    except ValueError:
+        pass
+    assert cache.get_or_compute('k', lambda: 'ok') == ('ok', False)
+
+def test_one_instance_per_path_and_process(tmp_path, monkeypatch):
+    path = str(tmp_path / 'llm.sqlite3')
+    cache = LLMCache.for_process(path)
+    assert LLMCache.for_process(path) is cache
+    assert LLMCache.for_process(str(tmp_path / 'other.sqlite3')) is not cache
+    monkeypatch.setattr(os, 'getpid', lambda: -1)  # as seen from a forked child
+    child = LLMCache.for_process(path)
+    assert child is not cache and LLMCache.for_process(path) is child
@@ -0,0 +1,304 @@
+"""
+Shared async executor for OpenAI-compatible chat completion requests.
+
+- Bounded concurrency: at most `max_concurrency` requests in flight, over a pool of keep-alive
+  connections of the same size
+- Rate limits: token buckets for requests/min and tokens/min; each request reserves its
+  estimated tokens (prompt estimate + max_tokens) before it is sent and the estimate is
+  corrected from the response's `usage`
+- Adaptive backoff on 429: all senders pause for the server's Retry-After / x-ratelimit-reset
+  hint (or exponential backoff), and the effective rate is halved, then recovers gradually
+  on success (AIMD)
+- Single-flight: identical requests in flight at the same time share one call. Different
+  prompts are never merged into one request; callers that can batch compatible prompts do so
+  in the prompt itself (as translation_memory does with segments)
+
+Limits apply per process. Set LLM_RPM_LIMIT / LLM_TPM_LIMIT to the account quota divided by
+the number of worker processes that call the model.
+
+Celery tasks are synchronous: complete_sync() runs a request on the per-process executor's
+event loop (a background thread) and waits for the result.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import http.client
+from queue import Queue, Empty
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlsplit
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 16))
+LLM_RPM_LIMIT = float(os.getenv('LLM_RPM_LIMIT', 500))
+LLM_TPM_LIMIT = float(os.getenv('LLM_TPM_LIMIT', 30000))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 6))
+# Completion tokens reserved when a request sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+class LLMRequestError(Exception):
+    def __init__(self, status: int, body):
+        super().__init__(f"LLM request failed with HTTP {status}: {body}")
+        self.status = status
+        self.body = body
+
+def estimate_tokens(messages: list, max_tokens: Optional[int] = None) -> int:
+    """
+    Tokens a request may use: ~4 characters per prompt token plus per-message overhead, plus
+    the completion budget.
+    """
+    prompt = 3 + sum(4 + len(m.get('content') or '') // 4 for m in messages)
+    return prompt + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Parse Retry-After ("2", "0.5") or x-ratelimit-reset-* ("1s", "6m0s", "20ms") into seconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, number = 0.0, ''
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if ch.isdigit() or ch == '.':
+            number += ch
+        elif value.startswith('ms', i):
+            total += float(number or 0) / 1000
+            number = ''
+            i += 1
+        elif ch in 'hms':
+            total += float(number or 0) * {'h': 3600, 'm': 60, 's': 1}[ch]
+            number = ''
+        else:
+            return None
+        i += 1
+    return total
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min token buckets with a shared pause and an adaptive rate scale.
+    `period` is the limits' time unit in seconds (60; shorter only for tests and benchmarks).
+    """
+    def __init__(self, rpm: float, tpm: float, clock=time.monotonic, period: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.period = period
+        self.clock = clock
+        self.scale = 1.0
+        self.requests = rpm
+        self.tokens = tpm
+        self.paused_until = 0.0
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / self.period * self.scale)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / self.period * self.scale)
+
+    def wait_time(self, tokens: int) -> float:
+        now = self.clock()
+        self._refill(now)
+        tokens = min(tokens, self.tpm)
+        waits = [self.paused_until - now]
+        if self.requests < 1:
+            waits.append((1 - self.requests) * self.period / (self.rpm * self.scale))
+        if self.tokens < tokens:
+            waits.append((tokens - self.tokens) * self.period / (self.tpm * self.scale))
+        return max(waits)
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        Wait until one request and `tokens` tokens are available, then take them.
+        Returns:
+            float: Seconds waited.
+        """
+        start = self.clock()
+        # Callers are served in arrival order
+        async with self._lock:
+            while True:
+                wait = self.wait_time(tokens)
+                if wait <= 0:
+                    self.requests -= 1
+                    self.tokens -= min(tokens, self.tpm)
+                    return self.clock() - start
+                await asyncio.sleep(wait)
+
+    def adjust(self, token_delta: int) -> None:
+        # Correct a reservation once the real usage is known (may leave the bucket negative)
+        self.tokens -= token_delta
+
+    def penalize(self, pause: float) -> None:
+        self.paused_until = max(self.paused_until, self.clock() + pause)
+        self.scale = max(0.1, self.scale * 0.5)
+
+    def reward(self) -> None:
+        self.scale = min(1.0, self.scale + 0.02)
+
+class PooledHTTPTransport:
+    """
+    Sends JSON POSTs over a pool of keep-alive http.client connections, each request on a
+    worker thread so the event loop never blocks.
+    """
+    def __init__(self, base_url: str, api_key: str, pool_size: int, timeout: float = 120):
+        parts = urlsplit(base_url)
+        self.scheme, self.netloc, self.path = parts.scheme, parts.netloc, parts.path.rstrip('/')
+        self.headers = {'Content-Type': 'application/json', 'Authorization': f"Bearer {api_key}"}
+        self.timeout = timeout
+        self._pool = Queue()
+        self._threads = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='llm-http')
+
+    def _connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except Empty:
+            cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            return cls(self.netloc, timeout=self.timeout)
+
+    def _post(self, path: str, payload: dict):
+        body = json.dumps(payload).encode()
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request('POST', self.path + path, body, self.headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                if attempt:
+                    raise
+                continue  # stale keep-alive connection: retry once on a fresh one
+            except BaseException:
+                # Timeout or other socket error: the request may have been sent, so no retry
+                conn.close()
+                raise
+            self._pool.put(conn)
+            return resp.status, {k.lower(): v for k, v in resp.getheaders()}, self._parse_body(resp.status, data)
+
+    @staticmethod
+    def _parse_body(status: int, data: bytes) -> dict:
+        if 200 <= status < 300:
+            return json.loads(data or b'{}')
+        # Error bodies from proxies and load balancers are often HTML; keep the status retryable
+        try:
+            return json.loads(data or b'{}')
+        except ValueError:
+            return {'error': {'message': data[:500].decode('utf-8', 'replace')}}
+
+    async def __call__(self, path: str, payload: dict):
+        return await asyncio.get_running_loop().run_in_executor(self._threads, self._post, path, payload)
+
+    def close(self) -> None:
+        self._threads.shutdown(wait=False)
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+class LLMExecutor:
+    """
+    Args:
+        transport: async callable (path, payload) -> (status, headers, body); defaults to a
+            PooledHTTPTransport for base_url.
+        on_event: optional callable(event, **data) for metrics; events: 'request' (tokens,
+            seconds), 'rate_limited', 'retry', 'joined', 'wait' (seconds).
+    """
+    def __init__(self, base_url: str = '', api_key: str = '', max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 rpm: float = LLM_RPM_LIMIT, tpm: float = LLM_TPM_LIMIT, max_retries: int = LLM_MAX_RETRIES,
+                 transport=None, on_event=None, period: float = 60.0):
+        self.transport = transport or PooledHTTPTransport(base_url, api_key, max_concurrency)
+        self.limiter = RateLimiter(rpm, tpm, period=period)
+        self.max_retries = max_retries
+        self.on_event = on_event or (lambda event, **data: None)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight = {}
+
+    async def complete(self, model: str, messages: list, **params) -> dict:
+        """
+        Send one chat completion request (or join an identical one in flight).
+        Returns:
+            dict: The response body.
+        """
+        key = json.dumps([model, messages, params], sort_keys=True)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.on_event('joined')
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._send(model, messages, params))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _send(self, model: str, messages: list, params: dict) -> dict:
+        payload = {'model': model, 'messages': messages, **params}
+        estimate = estimate_tokens(messages, params.get('max_tokens'))
+        for attempt in range(self.max_retries + 1):
+            waited = await self.limiter.acquire(estimate)
+            if waited:
+                self.on_event('wait', seconds=waited)
+            start = time.perf_counter()
+            async with self._semaphore:
+                status, headers, body = await self.transport('/chat/completions', payload)
+            if status == 200:
+                used = (body.get('usage') or {}).get('total_tokens', estimate)
+                self.limiter.adjust(used - estimate)
+                self.limiter.reward()
+                self.on_event('request', tokens=used, seconds=time.perf_counter() - start)
+                return body
+            if status != 429 and status < 500:
+                raise LLMRequestError(status, body)
+            # Rate limited or server error: back off, with jitter, and try again
+            hint = max(
+                (parse_reset(headers.get(h)) or 0)
+                for h in ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens')
+            )
+            delay = max(hint, min(2 ** attempt * 0.5, 30)) * random.uniform(1.0, 1.25)
+            if status == 429:
+                self.on_event('rate_limited')
+                self.limiter.penalize(delay)
+            else:
+                self.on_event('retry')
+                await asyncio.sleep(delay)
+        raise LLMRequestError(status, body)
+
+class _ExecutorThread:
+    """
+    Runs one LLMExecutor on an event loop in a daemon thread, for synchronous callers.
+    """
+    def __init__(self, **kwargs):
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True, name='llm-executor').start()
+        self.executor = asyncio.run_coroutine_threadsafe(self._create(kwargs), self.loop).result()
+
+    async def _create(self, kwargs) -> LLMExecutor:
+        return LLMExecutor(**kwargs)
+
+    def submit(self, model: str, messages: list, **params):
+        return asyncio.run_coroutine_threadsafe(self.executor.complete(model, messages, **params), self.loop)
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_executor_thread(**kwargs) -> _ExecutorThread:
+    """
+    The per-process executor (re-created after fork). kwargs are LLMExecutor arguments and
+    only apply on creation.
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is None or _runner.pid != os.getpid():
+            _runner = _ExecutorThread(**kwargs)
+        return _runner
+
+def complete_sync(model: str, messages: list, executor_kwargs: Optional[dict] = None, **params) -> dict:
+    """
+    Blocking chat completion through the shared executor.
+    """
+    return get_executor_thread(**(executor_kwargs or {})).submit(model, messages, **params).result()
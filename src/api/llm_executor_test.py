@@ -0,0 +1,138 @@
+import json
+import asyncio
+import socket
+import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fake_llm_server import FakeLLMServer
+from llm_executor import LLMExecutor, PooledHTTPTransport, RateLimiter, estimate_tokens, parse_reset
+
+def msgs(text):
+    return [{'role': 'user', 'content': text}]
+
+def test_estimate_tokens_reserves_completion_budget():
+    assert estimate_tokens(msgs('x' * 400), max_tokens=100) == 3 + 4 + 100 + 100
+
+def test_parse_reset_formats():
+    assert parse_reset('2') == 2.0
+    assert parse_reset('6m0s') == 360.0
+    assert parse_reset('1.5s') == 1.5
+    assert parse_reset('20ms') == 0.02
+    assert parse_reset(None) is None
+
+def test_limiter_waits_for_request_and_token_budget():
+    now = [0.0]
+    limiter = RateLimiter(rpm=60, tpm=1000, clock=lambda: now[0])
+    limiter.requests, limiter.tokens = 0, 1000
+    assert abs(limiter.wait_time(10) - 1.0) < 1e-9  # one request per second
+    limiter.requests = 5
+    assert abs(limiter.wait_time(1500) - 0.0) < 1e-9  # oversized requests wait for a full bucket only
+    limiter.tokens = 400
+    assert abs(limiter.wait_time(700) - 18.0) < 1e-9  # 300 tokens at 1000/min
+    limiter.penalize(5)
+    assert limiter.scale == 0.5 and limiter.wait_time(1) >= 5
+
+def test_bounded_concurrency():
+    active = {'now': 0, 'max': 0}
+
+    async def transport(path, payload):
+        active['now'] += 1
+        active['max'] = max(active['max'], active['now'])
+        await asyncio.sleep(0.01)
+        active['now'] -= 1
+        return 200, {}, {'usage': {'total_tokens': 10}, 'choices': []}
+
+    async def run():
+        executor = LLMExecutor(transport=transport, max_concurrency=3, rpm=10000, tpm=10 ** 7)
+        await asyncio.gather(*(executor.complete('m', msgs(str(i))) for i in range(20)))
+
+    asyncio.run(run())
+    assert active['max'] == 3
+
+def test_identical_requests_in_flight_share_one_call():
+    server = FakeLLMServer(latency=0.1).start()
+    try:
+        async def run():
+            executor = LLMExecutor(server.base_url, 'k', max_concurrency=4, rpm=10000, tpm=10 ** 7)
+            return await asyncio.gather(*(executor.complete('gpt-4o', msgs('same')) for _ in range(5)))
+        bodies = asyncio.run(run())
+        assert server.calls == 1
+        assert {b['choices'][0]['message']['content'] for b in bodies} == {'[fake completion] same'}
+    finally:
+        server.stop()
+
+def test_backs_off_on_429_until_all_succeed():
+    server = FakeLLMServer(rpm=5, window=0.5).start()
+    try:
+        events = []
+        async def run():
+            executor = LLMExecutor(server.base_url, 'k', max_concurrency=8, rpm=10000, tpm=10 ** 7,
+                                   on_event=lambda event, **data: events.append(event))
+            return await asyncio.gather(*(executor.complete('gpt-4o', msgs(f"p{i}")) for i in range(15)))
+        bodies = asyncio.run(run())
+        assert len(bodies) == 15 and server.calls == 15
+        assert server.rate_limited > 0 and 'rate_limited' in events
+    finally:
+        server.stop()
+
+class FlakyGateway:
+    """Answers the first `failures` requests with an HTML 502 page, then with a completion."""
+    def __init__(self, failures: int):
+        self.failures = failures
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                if gateway.failures:
+                    gateway.failures -= 1
+                    status, body, kind = 502, b'<html><body>502 Bad Gateway</body></html>', 'text/html'
+                else:
+                    status, body, kind = 200, json.dumps({'choices': [], 'usage': {'total_tokens': 5}}).encode(), 'application/json'
+                self.send_response(status)
+                self.send_header('Content-Type', kind)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+def test_html_error_pages_are_retried():
+    gateway = FlakyGateway(failures=2)
+    try:
+        events = []
+        async def run():
+            executor = LLMExecutor(gateway.base_url, 'k', rpm=10000, tpm=10 ** 7,
+                                   on_event=lambda event, **data: events.append(event))
+            return await executor.complete('gpt-4o', msgs('hi'))
+        assert asyncio.run(run())['usage'] == {'total_tokens': 5}
+        assert events.count('retry') == 2
+    finally:
+        gateway.server.shutdown()
+
+def test_non_retryable_html_error_is_reported():
+    transport = PooledHTTPTransport('http://unused', 'k', pool_size=1)
+    assert transport._parse_body(400, b'<html>Bad Request</html>') == {'error': {'message': '<html>Bad Request</html>'}}
+    assert transport._parse_body(429, b'{"error": {"message": "slow down"}}') == {'error': {'message': 'slow down'}}
+    transport.close()
+
+def test_timed_out_connection_is_closed_not_pooled():
+    silent = socket.create_server(('127.0.0.1', 0))  # accepts, never answers
+    transport = PooledHTTPTransport(f"http://127.0.0.1:{silent.getsockname()[1]}", 'k', pool_size=1, timeout=0.2)
+    opened = []
+    connection = transport._connection
+    transport._connection = lambda: opened.append(connection()) or opened[-1]
+    try:
+        with pytest.raises(TimeoutError):
+            transport._post('/chat/completions', {})
+    finally:
+        silent.close()
+    assert len(opened) == 1 and opened[0].sock is None and transport._pool.empty()
+    transport.close()
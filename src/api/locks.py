@@ -0,0 +1,52 @@
+"""
+Redis-backed locks shared by Celery workers and beat.
+
+A lock is a key set with NX and a TTL holding a random token; only the holder of the token
+can extend or release it, and a crashed holder's lock expires on its own.
+"""
+import os
+import uuid
+from typing import Optional
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# Compare-and-delete / compare-and-expire so a lock that expired and was re-acquired by
+# someone else is never released or extended by the previous holder.
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end
+return 0
+"""
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) end
+return 0
+"""
+
+_client = None
+
+def get_redis():
+    """
+    Returns:
+        redis.Redis: The shared client (redis is imported on first use, not with this module).
+    """
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _client
+
+def acquire_lock(name: str, ttl: int) -> Optional[str]:
+    """
+    Try to take the lock without waiting.
+    Returns:
+        str or None: The lock token if acquired, None if someone else holds it.
+    """
+    token = uuid.uuid4().hex
+    if get_redis().set(f"lock:{name}", token, nx=True, ex=ttl):
+        return token
+    return None
+
+def extend_lock(name: str, token: str, ttl: int) -> bool:
+    return bool(get_redis().eval(_EXTEND_SCRIPT, 1, f"lock:{name}", token, ttl))
+
+def release_lock(name: str, token: str) -> bool:
+    return bool(get_redis().eval(_RELEASE_SCRIPT, 1, f"lock:{name}", token))
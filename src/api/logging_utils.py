@@ -1,84 +1,429 @@
+import os
 import re
+import time
+import queue
+import atexit
 import logging
+import threading
+import logging.handlers
 import json as pyjson
 from typing import Optional
 from logging import Formatter
 
-class PIIRedactionFormatter(Formatter):
-    """Custom formatter that redacts PII from log messages."""
+class PIIRedactor:
+    """
+    Single-pass PII redaction engine shared by the log formatters.
+    All patterns are compiled into one alternation with a named group per PII type, so a
+    message is scanned once regardless of how many types are checked. Messages that cannot
+    contain PII (no '@', no digit, no key/token keyword) skip the regex entirely. Nothing is
+    cached: raw messages are not kept in memory.
+    """
+    # Order matters: at a given position the first matching alternative wins, so longer digit
+    # patterns come before the shorter ones they contain. Key names match inside longer
+    # identifiers (OPENAI_API_KEY=...); an email starts where its local part starts, so a long
+    # word is not re-scanned from each of its characters.
     PII_PATTERNS = {
-        'email': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}',
-        'phone': r'\\b\\d{3}[-.]?\\d{3}[-.]?\\d{4}\\b',
-        'ssn': r'\\b\\d{3}[-]?\\d{2}[-]?\\d{4}\\b',
-        'credit_card': r'\\b\\d{4}[- ]?\\d{4}[- ]?\\d{4}[- ]?\\d{4}\\b',
-        'ip_address': r'\\b\\d{1,3}\\.\\d{1,3}\\.\\d{1,3}\\.\\d{1,3}\\b',
-        'api_key': r'(?i)(api[_-]?key|secret[_-]?key|access[_-]?token)[=:]\\s*[\\w\\-\\.]+'
+        'email': r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]++@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+        'api_key': r'(?i:api[_\s-]?key|secret[_\s-]?key|access[_\s-]?token)[=:]\s*[\w\-\.]+',
+        'credit_card': r'\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
+        'ip_address': r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',
+        'phone': r'\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+        'ssn': r'\d{3}-?\d{2}-?\d{4}\b',
     }
-    def __init__(self, fmt: Optional[str] = None, datefmt: Optional[str] = None):
-        super().__init__(fmt, datefmt)
-        self.patterns = {k: re.compile(v) for k, v in self.PII_PATTERNS.items()}
-    def format(self, record: logging.LogRecord) -> str:
-        msg = record.getMessage()
-        redacted_msg = self.redact_pii(msg)
-        record.msg = redacted_msg
-        if hasattr(record, 'args'):
-            record.args = tuple(self.redact_pii(str(arg)) for arg in record.args)
-        return super().format(record)
+    # Patterns that start with a digit; grouped behind one \b(?=\d) check so positions that
+    # are not the start of a number skip all four at once.
+    DIGIT_PATTERNS = ('credit_card', 'ip_address', 'phone', 'ssn')
+    # Every pattern above needs an '@', a digit or one of these keywords to match.
+    PRESCAN_PATTERN = r'[@0-9]|(?i:key|token)'
+
+    def __init__(self):
+        groups = {name: f'(?P<{name}>{p})' for name, p in self.PII_PATTERNS.items()}
+        text_groups = [g for name, g in groups.items() if name not in self.DIGIT_PATTERNS]
+        digit_groups = [groups[name] for name in self.DIGIT_PATTERNS]
+        self.pattern = re.compile('|'.join(text_groups) + r'|\b(?=\d)(?:' + '|'.join(digit_groups) + ')')
+        self.prescan = re.compile(self.PRESCAN_PATTERN)
+        self.replacements = {name: f'[REDACTED {name.upper()}]' for name in self.PII_PATTERNS}
+
+    def _replace(self, match: re.Match) -> str:
+        return self.replacements[match.lastgroup]
+
+    def redact(self, text: str) -> str:
+        if not self.prescan.search(text):
+            return text
+        return self.pattern.sub(self._replace, text)
+
     def redact_pii(self, text: str) -> str:
         if not isinstance(text, str):
             return text
-        redacted = text
-        for pattern_name, pattern in self.patterns.items():
-            redacted = pattern.sub(f'[REDACTED {pattern_name.upper()}]', redacted)
-        return redacted
+        return self.redact(text)
 
-class PIIRedactionJSONFormatter(Formatter):
-    """Custom JSON formatter that redacts PII from log messages."""
-    PII_PATTERNS = PIIRedactionFormatter.PII_PATTERNS
-    def __init__(self, fmt: Optional[str] = None, datefmt: Optional[str] = None):
+_default_redactor = PIIRedactor()
+
+def redact_pii(text: str) -> str:
+    """
+    Redact PII from text using the shared redaction engine.
+    """
+    return _default_redactor.redact_pii(text)
+
+class PIIRedactionFormatter(Formatter):
+    """Custom formatter that redacts PII from log messages."""
+    PII_PATTERNS = PIIRedactor.PII_PATTERNS
+    def __init__(self, fmt: Optional[str] = None, datefmt: Optional[str] = None, redactor: Optional[PIIRedactor] = None):
         super().__init__(fmt, datefmt)
-        self.patterns = {k: re.compile(v) for k, v in self.PII_PATTERNS.items()}
+        self.redactor = redactor or _default_redactor
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        # record.message holds the fully interpolated message (msg % args), so it is redacted
+        # once here instead of redacting msg and every arg separately.
+        record.message = self.redact_pii(record.message)
+        return super().formatMessage(record)
+    def formatException(self, ei) -> str:
+        return self.redact_pii(super().formatException(ei))
+    def redact_pii(self, text: str) -> str:
+        return self.redactor.redact_pii(text)
+
+class PIIRedactionJSONFormatter(PIIRedactionFormatter):
+    """Custom JSON formatter that redacts PII from log messages."""
     def format(self, record: logging.LogRecord) -> str:
-        msg = record.getMessage()
-        redacted_msg = self.redact_pii(msg)
         log_record = {
             'timestamp': self.formatTime(record, self.datefmt),
             'level': record.levelname,
             'logger': record.name,
-            'message': redacted_msg,
+            'message': self.redact_pii(record.getMessage()),
         }
+        if record.exc_info:
+            log_record['exception'] = self.formatException(record.exc_info)
         # Optionally add extra fields
         if hasattr(record, 'extra') and isinstance(record.extra, dict):
             log_record.update(record.extra)
         return pyjson.dumps(log_record)
-    def redact_pii(self, text: str) -> str:
-        if not isinstance(text, str):
-            return text
-        redacted = text
-        for pattern_name, pattern in self.patterns.items():
-            redacted = pattern.sub(f'[REDACTED {pattern_name.upper()}]', redacted)
-        return redacted
+
+class _BatchingMixin:
+    """
+    Buffers formatted records and writes them to the stream in one call, when the buffer
+    reaches `batch_size` records or every `flush_interval` seconds.
+    """
+    def _init_batching(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._batch = []
+        self._flusher_pid = None
+        self._stop_flusher = threading.Event()
+
+    def _start_flusher(self):
+        # Started lazily, and again in a forked child where the parent's thread does not exist
+        self._flusher_pid = os.getpid()
+        self._stop_flusher = threading.Event()
+        threading.Thread(target=self._flush_periodically, args=(self._stop_flusher,), name='log-batch-flusher', daemon=True).start()
+
+    def _flush_periodically(self, stop: threading.Event):
+        while not stop.wait(self.flush_interval):
+            self.flush()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self._flusher_pid != os.getpid():
+                self._start_flusher()
+            self._batch.append(self.format(record) + self.terminator)
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        with self.lock:
+            if not self._batch:
+                return
+            data = ''.join(self._batch)
+            self._batch.clear()
+            if self.stream is None:
+                self.stream = self._open()
+            if self._should_rollover(len(data)):
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(data)
+            self.stream.flush()
+
+    def close(self):
+        self._stop_flusher.set()
+        self.flush()
+        super().close()
+
+class BatchingRotatingFileHandler(_BatchingMixin, logging.handlers.RotatingFileHandler):
+    """Size-rotated log file written in batches."""
+    def __init__(self, filename: str, max_bytes: int = 0, backup_count: int = 5, batch_size: int = 100, flush_interval: float = 1.0):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self._init_batching(batch_size, flush_interval)
+    def _should_rollover(self, pending_bytes: int) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        self.stream.seek(0, 2)
+        return self.stream.tell() + pending_bytes >= self.maxBytes
+
+class BatchingTimedRotatingFileHandler(_BatchingMixin, logging.handlers.TimedRotatingFileHandler):
+    """Time-rotated log file (e.g. when='midnight') written in batches."""
+    def __init__(self, filename: str, when: str = 'midnight', backup_count: int = 5, batch_size: int = 100, flush_interval: float = 1.0):
+        super().__init__(filename, when=when, backupCount=backup_count, delay=True)
+        self._init_batching(batch_size, flush_interval)
+    def _should_rollover(self, pending_bytes: int) -> bool:
+        return time.time() >= self.rolloverAt
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue. When the queue is full, records are dropped
+    (overflow='drop') or the caller waits up to `block_timeout` seconds before dropping
+    (overflow='block'). Dropped records are counted in `dropped`.
+    """
+    def __init__(self, log_queue: queue.Queue, overflow: str = 'drop', block_timeout: float = 1.0):
+        if overflow not in ('drop', 'block'):
+            raise ValueError("overflow must be 'drop' or 'block'")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve msg % args now so later mutation of args can't change the message;
+        # redaction and formatting happen on the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if self.overflow == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LazyMessage:
+    """
+    Log message built only when a handler formats it, e.g.
+        logger.info(LazyMessage(lambda: f"Report: {build_summary()}"))
+    Records dropped by a filter or level check never call the function.
+    """
+    __slots__ = ('build',)
+    def __init__(self, build):
+        self.build = build
+    def __str__(self) -> str:
+        return str(self.build())
+
+class _CallSite:
+    __slots__ = ('tokens', 'updated', 'seen', 'suppressed')
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+        self.seen = 0
+        self.suppressed = 0
+
+class LogRateLimitFilter(logging.Filter):
+    """
+    Logger filter applying 1-in-N sampling and/or a token-bucket rate limit per call site.
+    Rules are keyed by function name, with None as the default for the whole logger:
+        {None: {'rate': 10, 'burst': 50}, 'store_search_analytics': {'sample': 100}}
+    rate is records/sec, burst the bucket size (defaults to rate), sample keeps every Nth record.
+    Records at min_level or above always pass. The first record let through after suppression
+    carries a "(suppressed N similar messages)" suffix.
+    """
+    def __init__(self, rules: dict, min_level: int = logging.WARNING):
+        super().__init__()
+        self.rules = rules
+        self.min_level = min_level
+        self.suppressed_total = 0
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.min_level:
+            return True
+        rule = self.rules.get(record.funcName) or self.rules.get(None)
+        if not rule:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = _CallSite(rule.get('burst', rule.get('rate', 0)), now)
+            if not self._allow(rule, site, now):
+                site.suppressed += 1
+                self.suppressed_total += 1
+                return False
+            suppressed, site.suppressed = site.suppressed, 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} (suppressed {suppressed} similar messages)"
+            record.args = None
+        return True
+
+    def _allow(self, rule: dict, site: _CallSite, now: float) -> bool:
+        sample = rule.get('sample')
+        if sample:
+            site.seen += 1
+            if (site.seen - 1) % sample:
+                return False
+        rate = rule.get('rate')
+        if rate:
+            burst = rule.get('burst', rate)
+            site.tokens = min(burst, site.tokens + (now - site.updated) * rate)
+            site.updated = now
+            if site.tokens < 1:
+                return False
+            site.tokens -= 1
+        return True
+
+def limit_logging(logger: logging.Logger, func_name: Optional[str] = None, rate: Optional[float] = None,
+                  burst: Optional[float] = None, sample: Optional[int] = None) -> LogRateLimitFilter:
+    """
+    Rate limit and/or sample a logger's records below WARNING, for the whole logger or only for
+    calls made from `func_name`. Repeated calls on the same logger add rules to one filter.
+    """
+    limit_filter = next((f for f in logger.filters if isinstance(f, LogRateLimitFilter)), None)
+    if limit_filter is None:
+        limit_filter = LogRateLimitFilter({})
+        logger.addFilter(limit_filter)
+    rule = {k: v for k, v in (('rate', rate), ('burst', burst), ('sample', sample)) if v is not None}
+    limit_filter.rules[func_name] = rule
+    return limit_filter
+
+_logging_state = {}
+_logging_lock = threading.Lock()
 
 def setup_logging(
     level: int = logging.INFO,
     format_str: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     log_file: Optional[str] = None,
-    json_format: bool = False
+    json_format: bool = False,
+    queued: bool = False,
+    queue_size: int = 10000,
+    overflow: str = 'drop',
+    rotate_bytes: int = 0,
+    rotate_when: Optional[str] = None,
+    backup_count: int = 5,
+    batch_size: int = 100,
+    flush_interval: float = 1.0,
+    force: bool = False
 ) -> None:
-    if json_format:
-        formatter = PIIRedactionJSONFormatter()
-    else:
-        formatter = PIIRedactionFormatter(format_str)
-    root_logger = logging.getLogger()
-    root_logger.setLevel(level)
-    root_logger.handlers = []
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-    if log_file:
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+    """
+    Configure root logging with PII redaction. Only the first call in a process takes effect;
+    pass force=True to reconfigure. Processes call it through configure_logging().
+    Args:
+        queued (bool): Log through a bounded queue; redaction, formatting and file I/O run on a
+            listener thread instead of the caller's.
+        queue_size (int): Maximum records waiting in the queue.
+        overflow (str): 'drop' or 'block' when the queue is full. See get_logging_stats().
+        rotate_bytes (int): Rotate the log file at this size (0 disables size rotation).
+        rotate_when (str): Rotate by time instead, e.g. 'midnight' or 'H'.
+        batch_size (int): Records buffered before a file write (queued mode).
+        flush_interval (float): Maximum seconds a record waits in the file buffer (queued mode).
+    """
+    with _logging_lock:
+        if _logging_state and not force:
+            return
+        _teardown_logging()
+        if json_format:
+            formatter = PIIRedactionJSONFormatter()
+        else:
+            formatter = PIIRedactionFormatter(format_str)
+        handlers = []
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+        if log_file:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+            if queued:
+                if rotate_when:
+                    file_handler = BatchingTimedRotatingFileHandler(log_file, rotate_when, backup_count, batch_size, flush_interval)
+                else:
+                    file_handler = BatchingRotatingFileHandler(log_file, rotate_bytes, backup_count, batch_size, flush_interval)
+            elif rotate_when:
+                file_handler = logging.handlers.TimedRotatingFileHandler(log_file, when=rotate_when, backupCount=backup_count)
+            elif rotate_bytes:
+                file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=rotate_bytes, backupCount=backup_count)
+            else:
+                file_handler = logging.FileHandler(log_file)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        root_logger = logging.getLogger()
+        root_logger.setLevel(level)
+        root_logger.handlers = []
+        _logging_state['handlers'] = handlers
+        if queued:
+            queue_handler = BoundedQueueHandler(queue.Queue(queue_size), overflow)
+            listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _logging_state.update(queue_handler=queue_handler, listener=listener)
+            root_logger.addHandler(queue_handler)
+        else:
+            for handler in handlers:
+                root_logger.addHandler(handler)
+
+# Log file and format of each process type configured through configure_logging()
+SERVICE_LOGGING = {
+    'api': {'log_file': 'logs/app.log', 'json_format': True},
+    'worker': {'log_file': 'logs/celery.log'},
+}
+
+def configure_logging(service: str, **overrides) -> None:
+    """
+    Configure logging for a process from its entry point: the API app's lifespan and Celery's
+    setup_logging signal. Modules only call get_logger(); importing them configures nothing and
+    opens no files.
+    Args:
+        service (str): 'api' or 'worker' (see SERVICE_LOGGING).
+        overrides: setup_logging() arguments replacing the service's defaults.
+    """
+    options = {
+        'level': logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper()),
+        'queued': True,
+        **SERVICE_LOGGING[service],
+    }
+    options.update(overrides)
+    setup_logging(**options)
+
+def _teardown_logging():
+    listener = _logging_state.get('listener')
+    if listener is not None:
+        listener.stop()
+    for handler in _logging_state.get('handlers', []):
+        handler.close()
+    _logging_state.clear()
+
+def shutdown_logging() -> None:
+    """
+    Drain the log queue and flush and close all handlers.
+    """
+    with _logging_lock:
+        _teardown_logging()
+
+def get_logging_stats() -> dict:
+    """
+    Return queue statistics for queued logging: records dropped, waiting and the queue bound.
+    """
+    queue_handler = _logging_state.get('queue_handler')
+    if queue_handler is None:
+        return {'queued': False, 'dropped': 0, 'pending': 0, 'capacity': 0}
+    return {
+        'queued': True,
+        'dropped': queue_handler.dropped,
+        'pending': queue_handler.queue.qsize(),
+        'capacity': queue_handler.queue.maxsize
+    }
+
+def _restart_listener_after_fork():
+    # The listener thread does not survive fork; give the child its own queue and listener.
+    global _logging_lock
+    _logging_lock = threading.Lock()
+    queue_handler = _logging_state.get('queue_handler')
+    if queue_handler is None:
+        return
+    queue_handler.queue = queue.Queue(queue_handler.queue.maxsize)
+    queue_handler.dropped = 0
+    listener = logging.handlers.QueueListener(queue_handler.queue, *_logging_state['handlers'], respect_handler_level=True)
+    listener.start()
+    _logging_state['listener'] = listener
+
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+atexit.register(shutdown_logging)
 
 def get_logger(name: str) -> logging.Logger:
-    return logging.getLogger(name) 
\ No newline at end of file
+    return logging.getLogger(name)
@@ -0,0 +1,130 @@
+import time
+import logging
+import pytest
+from logging_utils import PIIRedactor, PIIRedactionFormatter, PIIRedactionJSONFormatter
+
+redactor = PIIRedactor()
+
+@pytest.mark.parametrize("text, expected", [
+    ("Contact john.doe@example.com today", "Contact [REDACTED EMAIL] today"),
+    ("Call 555-123-4567 or 555.123.4567", "Call [REDACTED PHONE] or [REDACTED PHONE]"),
+    ("SSN 123-45-6789 on file", "SSN [REDACTED SSN] on file"),
+    ("Card 4111-1111-1111-1111 charged", "Card [REDACTED CREDIT_CARD] charged"),
+    ("Card 4111 1111 1111 1111 charged", "Card [REDACTED CREDIT_CARD] charged"),
+    ("Request from 192.168.1.10", "Request from [REDACTED IP_ADDRESS]"),
+    ("api_key=abc123.def", "[REDACTED API_KEY]"),
+    ("API key: sk-1234567890", "[REDACTED API_KEY]"),
+    ("ACCESS-TOKEN: ya29.a0AfH6", "[REDACTED API_KEY]"),
+    ("OPENAI_API_KEY=sk-abc123", "OPENAI_[REDACTED API_KEY]"),
+    ("openai_api_key: sk-abc123", "openai_[REDACTED API_KEY]"),
+    ("x_access_token=ya29.a0AfH6 sent", "x_[REDACTED API_KEY] sent"),
+    ("Reply to _john@example.com", "Reply to [REDACTED EMAIL]"),
+    ("mail:john@example.com", "mail:[REDACTED EMAIL]"),
+])
+def test_redacts_each_pii_type(text, expected):
+    assert redactor.redact_pii(text) == expected
+
+@pytest.mark.parametrize("text", [
+    "Audit completed for https://example.com/page",
+    "Inserted 42 rows in 12.5 ms",
+    "Monkey business",
+    "",
+])
+def test_leaves_non_pii_untouched(text):
+    assert redactor.redact_pii(text) == text
+
+def test_non_string_passthrough():
+    assert redactor.redact_pii(None) is None
+    assert redactor.redact_pii(123) == 123
+
+def test_long_words_without_pii_stay_fast():
+    text = "x" * 200000 + " key"
+    start = time.perf_counter()
+    assert redactor.redact_pii(text) == text
+    assert time.perf_counter() - start < 0.5
+
+def _record(msg, args=(), exc_info=None):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, exc_info)
+
+def test_formatter_redacts_interpolated_args_once():
+    formatter = PIIRedactionFormatter("%(message)s")
+    record = _record("Inserting row for %s with %d clicks", ("john@example.com", 5))
+    assert formatter.format(record) == "Inserting row for [REDACTED EMAIL] with 5 clicks"
+    # The record itself is left intact for other handlers
+    assert record.args == ("john@example.com", 5)
+
+def test_json_formatter_redacts_message_and_exception():
+    formatter = PIIRedactionJSONFormatter()
+    try:
+        raise ValueError("bad email john@example.com")
+    except ValueError:
+        import sys
+        record = _record("Failed for %s", ("jane@example.com",), sys.exc_info())
+    output = formatter.format(record)
+    assert "jane@example.com" not in output
+    assert "john@example.com" not in output
+    assert "[REDACTED EMAIL]" in output
+
+def test_bounded_queue_handler_counts_drops():
+    import queue
+    from logging_utils import BoundedQueueHandler
+    handler = BoundedQueueHandler(queue.Queue(2), overflow='drop')
+    for i in range(5):
+        handler.handle(_record("message %d", (i,)))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert handler.queue.get_nowait().msg == "message 0"
+
+def test_batching_file_handler_rotates_by_size(tmp_path):
+    from logging_utils import BatchingRotatingFileHandler
+    log_file = tmp_path / "app.log"
+    handler = BatchingRotatingFileHandler(str(log_file), max_bytes=200, backup_count=2, batch_size=5, flush_interval=60)
+    handler.setFormatter(PIIRedactionFormatter("%(message)s"))
+    for i in range(4):
+        handler.handle(_record("buffered line %d", (i,)))
+    assert not log_file.exists() or log_file.read_text() == ""
+    for i in range(4, 20):
+        handler.handle(_record("buffered line %d", (i,)))
+    handler.close()
+    assert (tmp_path / "app.log.1").exists()
+    lines = (tmp_path / "app.log.1").read_text().splitlines() + log_file.read_text().splitlines()
+    assert "buffered line 19" in lines
+
+def _limited_logger(name, **rule):
+    from logging_utils import limit_logging
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.handlers = []
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return logger, limit_logging(logger, **rule), records
+
+def test_sampling_keeps_one_in_n_with_suppressed_summary():
+    logger, limit_filter, records = _limited_logger("sampled", sample=10)
+    for i in range(25):
+        logger.info("row %d", i)
+    assert [r.getMessage() for r in records] == [
+        "row 0",
+        "row 10 (suppressed 9 similar messages)",
+        "row 20 (suppressed 9 similar messages)",
+    ]
+    assert limit_filter.suppressed_total == 22
+
+def test_rate_limit_allows_burst_and_always_passes_warnings():
+    logger, _, records = _limited_logger("rate_limited", rate=0.001, burst=3)
+    for i in range(10):
+        logger.info("row %d", i)
+    logger.warning("disk full")
+    assert [r.getMessage() for r in records] == ["row 0", "row 1", "row 2", "disk full"]
+
+def test_suppressed_lazy_messages_are_never_built():
+    from logging_utils import LazyMessage
+    logger, _, records = _limited_logger("lazy", sample=5)
+    built = []
+    for i in range(10):
+        logger.info(LazyMessage(lambda i=i: built.append(i) or f"row {i}"))
+    assert [r.getMessage() for r in records] == ["row 0", "row 5 (suppressed 4 similar messages)"]
+    assert sorted(built) == [0, 5]
@@ -1,11 +1,24 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Body
+from fastapi import FastAPI, Depends, HTTPException, status, Body, Response, Request
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import ORJSONResponse
+from typing import Callable, List, Optional
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from .audit import correlate_metrics_and_generate_issues
+from .logging_utils import configure_logging
+from .metrics import render_metrics, record_cache
+from .responses import ResponseBody, ResponseCache, dumps, render
+from .tenant_generations import get_tenant_generation
+from .fair_share import LANES
+from .tracing import start_span, parse_traceparent, format_traceparent
 
-app = FastAPI(title="JaffeBot 3.0 API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging is configured once per server process here, never by importing a module
+    configure_logging("api")
+    yield
+
+app = FastAPI(title="JaffeBot 3.0 API", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Allow CORS for local Next.js dashboard
 app.add_middleware(
@@ -16,6 +29,31 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Root span per request; an incoming traceparent header continues (and may force-sample) a trace
+    parent = parse_traceparent(request.headers.get("traceparent"))
+    with start_span(f"{request.method} {request.url.path}", parent=parent, **{"http.method": request.method}) as span:
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+    response.headers["traceparent"] = format_traceparent(span)
+    return response
+
+# Per-tenant responses, dropped when a worker writes new audit data for the tenant
+response_cache = ResponseCache(generation=get_tenant_generation)
+
+def json_response(request: Request, content=None, body: Optional[ResponseBody] = None) -> Response:
+    # Strong ETag (304 on a matching If-None-Match), brotli/gzip above the size threshold
+    status_code, headers, data = render(
+        body or ResponseBody(dumps(content)), request.headers.get("if-none-match"), request.headers.get("accept-encoding")
+    )
+    return Response(content=data, status_code=status_code, headers=headers)
+
+def tenant_json_response(request: Request, tenant_id: int, build: Callable[[], dict]) -> Response:
+    body, hit = response_cache.get_or_build(tenant_id, f"{request.url.path}?{request.url.query}", build)
+    record_cache("api_response", hit)
+    return json_response(request, body=body)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
 # Dummy user/token for demonstration
@@ -39,21 +77,27 @@ def login():
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def metrics():
+    # Prometheus scrape endpoint (aggregates all worker processes when PROMETHEUS_MULTIPROC_DIR is set)
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 @app.get("/agents")
-def list_agents():
-    return {"agents": []}  # Placeholder
+def list_agents(request: Request):
+    return json_response(request, {"agents": []})  # Placeholder
 
 @app.get("/audits")
-def list_audits():
-    return {"audits": []}  # Placeholder
+def list_audits(request: Request):
+    return json_response(request, {"audits": []})  # Placeholder
 
 @app.get("/content")
-def list_content():
-    return {"content": []}  # Placeholder
+def list_content(request: Request):
+    return json_response(request, {"content": []})  # Placeholder
 
 @app.get("/backlinks")
-def list_backlinks():
-    return {"backlinks": []}  # Placeholder
+def list_backlinks(request: Request):
+    return json_response(request, {"backlinks": []})  # Placeholder
 
 @app.get("/settings")
 def get_settings(current_user: dict = Depends(get_current_user)):
@@ -62,11 +106,62 @@ def get_settings(current_user: dict = Depends(get_current_user)):
 class AuditRequest(BaseModel):
     domain: str
     path: Optional[str] = "/"
+    # Set to run queued audits through the per-tenant fair scheduler
+    tenant_id: Optional[int] = None
+    lane: str = "interactive"
 
 @app.post("/api/audit")
 def run_audit(request: AuditRequest = Body(...)):
+    # Audit checks (requests, BeautifulSoup, the GSC client) load on first use, not at server start
+    from .audit import correlate_metrics_and_generate_issues
     issues = correlate_metrics_and_generate_issues(request.domain)
     return {"issues": issues}
 
+@app.post("/api/audit/tasks")
+def submit_audit(request: AuditRequest = Body(...)):
+    # Queued, deduplicated audit: repeated requests for a domain share one run and its result
+    from .celery_app import run_audit as run_audit_task, submit_deduplicated
+    if request.lane not in LANES:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"lane must be one of {LANES}")
+    result, outcome = submit_deduplicated(run_audit_task, request.domain, tenant_id=request.tenant_id, lane=request.lane)
+    body = {"task_id": result.id, "outcome": outcome}
+    if outcome == "cache_hit":
+        body["issues"] = result.result
+    return body
+
+class URLCheckRequest(BaseModel):
+    kind: str
+    urls: List[str]
+
+@app.post("/api/audit/url-checks")
+def submit_url_checks(request: URLCheckRequest = Body(...)):
+    # One item id per URL, in order; poll each with GET /api/audit/tasks/{item_id}
+    from .celery_app import enqueue_url_checks
+    try:
+        item_ids = enqueue_url_checks(request.kind, request.urls)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return {"item_ids": item_ids}
+
+@app.get("/api/links/suggestions")
+def get_link_suggestions(request: Request, tenant_id: int, url: str, k: int = 3, rerank: bool = False):
+    # Top-k internal link targets from the tenant's link index; rerank=true has the LLM re-rank candidates
+    from .internal_links import suggest_links
+    from .openai_client import get_openai_client
+    return tenant_json_response(request, tenant_id, lambda: {
+        "url": url, "links": suggest_links(tenant_id, url, k, get_openai_client() if rerank else None)
+    })
+
+@app.get("/api/audit/tasks/{task_id}")
+def get_audit_task(request: Request, task_id: str):
+    from .celery_app import celery_app
+    result = celery_app.AsyncResult(task_id)
+    body = {"task_id": task_id, "state": result.state}
+    if result.successful():
+        body["issues"] = result.result
+    elif result.failed():
+        body["error"] = str(result.result)
+    return json_response(request, body)
+
 # Integration note:
 # The Next.js dashboard (http://localhost:3000) can call these endpoints directly. 
\ No newline at end of file
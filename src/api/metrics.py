@@ -0,0 +1,120 @@
+"""
+Prometheus metrics for the API and Celery agents.
+
+All metrics live in the default prometheus_client registry. When PROMETHEUS_MULTIPROC_DIR
+is set (required for Celery prefork workers and multi-worker Uvicorn), every process writes
+its samples to that directory and `render_metrics()` aggregates them with the multiprocess
+collector. The directory must be emptied before the processes start.
+
+- FastAPI serves `render_metrics()` at GET /metrics (see main.py)
+- Celery workers serve the same output on CELERY_METRICS_PORT (see celery_app.py)
+"""
+import os
+import time
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess, start_http_server
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6, 1e7)
+
+FETCH_SECONDS = Histogram(
+    'jaffebot_fetch_seconds', 'HTTP fetch latency', ['module', 'kind'], buckets=LATENCY_BUCKETS
+)
+FETCH_BYTES = Histogram(
+    'jaffebot_fetch_bytes', 'HTTP response body size', ['module', 'kind'], buckets=BYTES_BUCKETS
+)
+PARSE_SECONDS = Histogram(
+    'jaffebot_parse_seconds', 'HTML/XML parse time', ['kind'], buckets=LATENCY_BUCKETS
+)
+DB_WRITE_SECONDS = Histogram(
+    'jaffebot_db_write_seconds', 'Audit DB write time', ['table'], buckets=LATENCY_BUCKETS
+)
+TASK_SECONDS = Histogram(
+    'jaffebot_celery_task_seconds', 'Celery task run time', ['task', 'queue', 'state'], buckets=TASK_BUCKETS
+)
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    'jaffebot_celery_queue_wait_seconds', 'Time between publishing a task and a worker starting it',
+    ['task', 'queue'], buckets=TASK_BUCKETS
+)
+TENANT_QUEUE_WAIT_SECONDS = Histogram(
+    'jaffebot_tenant_queue_wait_seconds', 'Time between a tenant task entering the fair scheduler and a worker starting it',
+    ['tenant', 'lane'], buckets=TASK_BUCKETS
+)
+BATCH_SIZE_ITEMS = Histogram(
+    'jaffebot_url_batch_items', 'Items processed per URL check batch', ['kind'],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+LLM_REQUEST_SECONDS = Histogram(
+    'jaffebot_llm_request_seconds', 'LLM API request latency (successful requests)', buckets=TASK_BUCKETS
+)
+LLM_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    'jaffebot_llm_rate_limit_wait_seconds', 'Time LLM requests waited for the requests/tokens per minute budget',
+    buckets=TASK_BUCKETS
+)
+LLM_REQUESTS_TOTAL = Counter(
+    'jaffebot_llm_requests_total', 'LLM API requests by outcome (ok, rate_limited, retry, joined)', ['outcome']
+)
+LLM_TOKENS_TOTAL = Counter('jaffebot_llm_tokens_total', 'Tokens used by LLM API requests')
+CHECKS_TOTAL = Counter('jaffebot_checks_total', 'Audit checks run', ['check'])
+ISSUES_TOTAL = Counter('jaffebot_issues_total', 'Audit issues found', ['issue'])
+TASK_RETRIES_TOTAL = Counter('jaffebot_celery_task_retries_total', 'Celery task retries', ['task'])
+TASK_DEDUP_TOTAL = Counter(
+    'jaffebot_task_dedup_total', 'Deduplicated task submissions by outcome (executed, joined_inflight, cache_hit)',
+    ['task', 'outcome']
+)
+SCHEDULER_DISPATCHED_TOTAL = Counter(
+    'jaffebot_scheduler_dispatched_total', 'Tasks released by the fair scheduler', ['lane']
+)
+CACHE_HITS_TOTAL = Counter('jaffebot_cache_hits_total', 'Cache hits', ['cache'])
+CACHE_MISSES_TOTAL = Counter('jaffebot_cache_misses_total', 'Cache misses', ['cache'])
+
+def record_fetch(module: str, kind: str, seconds: float, size: int) -> None:
+    """
+    Record one HTTP fetch: latency and response size.
+    """
+    FETCH_SECONDS.labels(module, kind).observe(seconds)
+    FETCH_BYTES.labels(module, kind).observe(size)
+
+def record_cache(cache: str, hit: bool) -> None:
+    (CACHE_HITS_TOTAL if hit else CACHE_MISSES_TOTAL).labels(cache).inc()
+
+def timed_get(session, url: str, module: str, kind: str, **kwargs):
+    """
+    GET `url` with a requests-compatible session (or the requests module) and record its
+    latency and size.
+    """
+    start = time.perf_counter()
+    resp = session.get(url, **kwargs)
+    record_fetch(module, kind, time.perf_counter() - start, len(resp.content))
+    return resp
+
+def is_multiprocess() -> bool:
+    return bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+def metrics_registry():
+    """
+    Registry to expose: the multiprocess aggregate when enabled, else the default registry.
+    """
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+def render_metrics():
+    """
+    Returns:
+        tuple: (payload bytes, content type) in the Prometheus text exposition format.
+    """
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+def start_metrics_server(port: int) -> None:
+    start_http_server(port, registry=metrics_registry())
+
+def mark_process_dead(pid: int) -> None:
+    # Drops live gauges of a dead worker process; counters and histograms are kept
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid)
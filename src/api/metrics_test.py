@@ -0,0 +1,57 @@
+import os
+import sys
+import subprocess
+from prometheus_client import REGISTRY
+from src.api.metrics import CONTENT_TYPE_LATEST, record_cache, render_metrics, timed_get
+from conftest import REPO_ROOT
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_record_cache_counts_hits_and_misses():
+    hits = sample('jaffebot_cache_hits_total', {'cache': 'metrics_test'})
+    misses = sample('jaffebot_cache_misses_total', {'cache': 'metrics_test'})
+    record_cache('metrics_test', True)
+    record_cache('metrics_test', True)
+    record_cache('metrics_test', False)
+    assert sample('jaffebot_cache_hits_total', {'cache': 'metrics_test'}) == hits + 2
+    assert sample('jaffebot_cache_misses_total', {'cache': 'metrics_test'}) == misses + 1
+
+class FakeResponse:
+    content = b'x' * 2048
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return FakeResponse()
+
+def test_timed_get_records_latency_and_size():
+    labels = {'module': 'metrics_test', 'kind': 'page'}
+    count = sample('jaffebot_fetch_seconds_count', labels)
+    size = sample('jaffebot_fetch_bytes_sum', labels)
+    session = FakeSession()
+    resp = timed_get(session, 'https://example.com/', 'metrics_test', 'page', timeout=10)
+    assert isinstance(resp, FakeResponse) and session.calls == [('https://example.com/', {'timeout': 10})]
+    assert sample('jaffebot_fetch_seconds_count', labels) == count + 1
+    assert sample('jaffebot_fetch_bytes_sum', labels) == size + 2048
+
+def test_render_metrics_single_process(monkeypatch):
+    monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+    record_cache('metrics_test_render', True)
+    payload, content_type = render_metrics()
+    assert content_type == CONTENT_TYPE_LATEST
+    assert b'jaffebot_cache_hits_total{cache="metrics_test_render"} 1.0' in payload
+
+def test_render_metrics_aggregates_worker_processes(tmp_path, monkeypatch):
+    directory = tmp_path / 'prometheus'
+    directory.mkdir()
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(directory), PYTHONPATH=REPO_ROOT)
+    worker = "from src.api.metrics import record_cache; [record_cache('shared', True) for _ in range({})]"
+    for hits in (2, 3):  # two worker processes writing to the shared directory
+        subprocess.run([sys.executable, '-c', worker.format(hits)], env=env, cwd=str(tmp_path), check=True)
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(directory))
+    payload, _ = render_metrics()
+    assert b'jaffebot_cache_hits_total{cache="shared"} 5.0' in payload
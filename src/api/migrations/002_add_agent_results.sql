@@ -0,0 +1,38 @@
+-- Migration: 002_add_agent_results.sql
+-- Description: Adds tables for agent task results written by the write-behind DB writer
+-- Author: JaffeBot Team
+-- Date: 2026-10-19
+
+-- migrate:step create_tables
+CREATE TABLE IF NOT EXISTS content_suggestions (
+    id BIGSERIAL PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    suggestion TEXT,
+    model TEXT,
+    tenant_id INTEGER REFERENCES tenants(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS content_updates (
+    id BIGSERIAL PRIMARY KEY,
+    url TEXT NOT NULL,
+    content_preview TEXT,
+    status TEXT NOT NULL,
+    tenant_id INTEGER REFERENCES tenants(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS monitoring_events (
+    id BIGSERIAL PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    feedback TEXT,
+    tenant_id INTEGER REFERENCES tenants(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- migrate:step index_content_updates_url no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_updates_url ON content_updates(url);
+
+-- migrate:step index_monitoring_events_url no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_monitoring_events_url ON monitoring_events(url);
@@ -0,0 +1,19 @@
+-- Migration: 003_add_content_pages.sql
+-- Description: Adds the content_pages table listing URLs for the hourly content refresh
+-- Author: JaffeBot Team
+-- Date: 2026-10-19
+
+-- migrate:step create_content_pages
+CREATE TABLE IF NOT EXISTS content_pages (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INTEGER REFERENCES tenants(id),
+    url TEXT NOT NULL,
+    refresh_enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    last_refreshed_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_content_page UNIQUE (tenant_id, url)
+);
+
+-- migrate:step index_content_pages_refresh no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_pages_refresh
+    ON content_pages(last_refreshed_at NULLS FIRST) WHERE refresh_enabled;
@@ -0,0 +1,10 @@
+-- Migration: 004_add_tenant_scheduling.sql
+-- Description: Adds per-tenant fair-share weight and concurrency cap used by the task scheduler
+-- Author: JaffeBot Team
+-- Date: 2026-10-19
+
+-- migrate:step add_tenant_scheduling_columns
+-- Constant defaults: no table rewrite on PostgreSQL 11+
+ALTER TABLE tenants
+    ADD COLUMN IF NOT EXISTS schedule_weight INTEGER NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS max_concurrency INTEGER NOT NULL DEFAULT 4;
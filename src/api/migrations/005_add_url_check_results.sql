@@ -0,0 +1,20 @@
+-- Migration: 005_add_url_check_results.sql
+-- Description: Adds url_check_results for per-URL results of batched audit checks
+-- Author: JaffeBot Team
+-- Date: 2026-10-19
+
+-- migrate:step create_url_check_results
+CREATE TABLE IF NOT EXISTS url_check_results (
+    id BIGSERIAL PRIMARY KEY,
+    item_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    ok BOOLEAN NOT NULL,
+    result JSONB,
+    error TEXT,
+    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- migrate:step index_url_check_results no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_url_check_results_url
+    ON url_check_results(url, checked_at DESC);
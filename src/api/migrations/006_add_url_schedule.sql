@@ -0,0 +1,34 @@
+-- Migration: 006_add_url_schedule.sql
+-- Description: Adds url_schedule (per-URL change history and next re-audit time), per-tenant crawl budgets
+-- and the site each tenant's re-audits sync from
+-- Author: JaffeBot Team
+-- Date: 2026-10-19
+
+-- migrate:step create_url_schedule
+CREATE TABLE IF NOT EXISTS url_schedule (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INTEGER REFERENCES tenants(id),
+    url TEXT NOT NULL,
+    content_hash TEXT,
+    lastmod TIMESTAMPTZ, -- from the sitemap
+    last_checked_at TIMESTAMPTZ,
+    last_changed_at TIMESTAMPTZ,
+    checks INTEGER NOT NULL DEFAULT 0, -- visits with a previous hash to compare against
+    changes INTEGER NOT NULL DEFAULT 0, -- visits that found a change
+    observed_seconds DOUBLE PRECISION NOT NULL DEFAULT 0, -- total time covered by those visits
+    gsc_impressions INTEGER,
+    gsc_impressions_at_check INTEGER,
+    next_due_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_url_schedule UNIQUE (tenant_id, url)
+);
+
+ALTER TABLE tenants
+    ADD COLUMN IF NOT EXISTS crawl_budget_per_hour INTEGER NOT NULL DEFAULT 1000;
+
+-- Sitemap and Search Console property synced into url_schedule; NULL leaves the tenant out
+ALTER TABLE tenants
+    ADD COLUMN IF NOT EXISTS site_url TEXT;
+
+-- migrate:step index_url_schedule_due no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_url_schedule_due
+    ON url_schedule(tenant_id, next_due_at);
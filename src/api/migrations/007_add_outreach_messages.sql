@@ -0,0 +1,24 @@
+-- Migration: 007_add_outreach_messages.sql
+-- Description: Adds outreach_messages for the delivery status of each outreach email
+-- Author: JaffeBot Team
+-- Date: 2026-10-19
+
+-- migrate:step create_outreach_messages
+CREATE TABLE IF NOT EXISTS outreach_messages (
+    id BIGSERIAL PRIMARY KEY,
+    message_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    prospect_url TEXT NOT NULL,
+    tier TEXT,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    recipient_domain TEXT NOT NULL,
+    status TEXT NOT NULL, -- sent, bounced (5xx), deferred (4xx), failed (connection error)
+    smtp_code INTEGER,
+    smtp_response TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- migrate:step index_outreach_messages_recipient no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_outreach_messages_recipient
+    ON outreach_messages(recipient, created_at DESC);
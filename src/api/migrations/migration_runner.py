@@ -1,11 +1,23 @@
 import os
+import re
+import sys
+import time
+import importlib.util
 import psycopg2
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 
 MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
-MIGRATIONS = [
-    '001_add_tenants_and_cwv.sql',
-]
+
+# Migrations are discovered from MIGRATIONS_DIR: NNN_description.sql or NNN_description.py,
+# applied in numeric order.
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_[\w-]+\.(sql|py)$')
+
+# Splits a .sql migration into named steps, e.g.:
+#   -- migrate:step add_index no-transaction
+STEP_MARKER = re.compile(r'^--\s*migrate:step\s+([\w.-]+)((?:[ \t]+[\w-]+)*)[ \t]*$', re.MULTILINE)
+STEP_FLAGS = frozenset({'no-transaction'})
 
 DB_CONFIG = {
     'dbname': os.getenv('DB_NAME', 'jaffebot'),
@@ -16,6 +28,135 @@ DB_CONFIG = {
 }
 
 HISTORY_TABLE = 'migration_history'
+CHECKPOINT_TABLE = 'migration_checkpoints'
+
+# Fail fast instead of queueing behind long-running transactions on hot tables.
+LOCK_TIMEOUT = os.getenv('MIGRATION_LOCK_TIMEOUT', '5s')
+
+# Index built by a CREATE INDEX CONCURRENTLY statement (group 1), possibly schema-qualified or quoted
+CONCURRENT_INDEX = re.compile(
+    r'^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)',
+    re.IGNORECASE
+)
+DOLLAR_QUOTE = re.compile(r'\$(?:[A-Za-z_]\w*)?\$')
+
+def split_statements(sql: str) -> list:
+    """
+    Split SQL text on top-level semicolons, ignoring those inside quotes, dollar-quoted bodies
+    and comments. Returns the non-empty statements (comments are kept in them).
+    """
+    statements = []
+    start = i = 0
+    while i < len(sql):
+        if sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = len(sql) if end < 0 else end + 1
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = len(sql) if end < 0 else end + 2
+        elif sql[i] in '\'"':
+            end = sql.find(sql[i], i + 1)
+            # A doubled quote is an escaped quote: the scan simply continues from the next one
+            i = len(sql) if end < 0 else end + 1
+        elif sql[i] == '$' and DOLLAR_QUOTE.match(sql, i):
+            tag = DOLLAR_QUOTE.match(sql, i).group()
+            end = sql.find(tag, i + len(tag))
+            i = len(sql) if end < 0 else end + len(tag)
+        elif sql[i] == ';':
+            statements.append(sql[start:i + 1])
+            i = start = i + 1
+        else:
+            i += 1
+    statements.append(sql[start:])
+    return [s.strip() for s in statements if _has_code(s)]
+
+def _has_code(sql: str) -> bool:
+    code = re.sub(r'--[^\n]*|/\*.*?\*/', '', sql, flags=re.DOTALL)
+    return bool(code.strip(' \t\r\n;'))
+
+@dataclass
+class SQLStep:
+    """
+    A single SQL statement block.
+    Set transactional=False for statements that cannot run inside a transaction
+    (e.g. CREATE INDEX CONCURRENTLY).
+    """
+    name: str
+    sql: str
+    transactional: bool = True
+
+    def __post_init__(self):
+        # Outside a transaction, a failure after the first statement would leave the step half
+        # applied with no way to resume it
+        if not self.transactional and len(split_statements(self.sql)) > 1:
+            raise ValueError(f"no-transaction step '{self.name}' must contain a single statement")
+
+@dataclass
+class BackfillStep:
+    """
+    A keyed, batched backfill. `sql` is run once per batch with %(lower)s and %(upper)s
+    bound to the first and last key of the batch, e.g.:
+        UPDATE pagespeed SET tenant_id = 1 WHERE id BETWEEN %(lower)s AND %(upper)s AND tenant_id IS NULL
+    Each batch commits together with its checkpoint, so an interrupted backfill resumes
+    after the last completed batch.
+    """
+    name: str
+    table: str
+    key_column: str
+    sql: str
+    batch_size: int = 10000
+    pause: float = 0.1
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> list:
+    """
+    List migration files in the directory, ordered by their numeric prefix.
+    """
+    found = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if match:
+            found.append((int(match.group(1)), filename))
+    return [filename for _, filename in sorted(found)]
+
+def parse_sql_steps(sql: str) -> list:
+    """
+    Split SQL text into SQLSteps using `-- migrate:step <name> [no-transaction]` markers.
+    A file without markers is a single transactional step named 'main'. Unknown flags are rejected.
+    """
+    markers = list(STEP_MARKER.finditer(sql))
+    if not markers:
+        return [SQLStep(name='main', sql=sql)]
+    steps = []
+    preamble = sql[:markers[0].start()].strip()
+    if preamble and not all(line.strip().startswith('--') for line in preamble.splitlines() if line.strip()):
+        raise ValueError("SQL found before the first '-- migrate:step' marker")
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(sql)
+        flags = marker.group(2).split()
+        unknown = [flag for flag in flags if flag not in STEP_FLAGS]
+        if unknown:
+            raise ValueError(f"Unknown flag(s) {', '.join(unknown)} on step '{marker.group(1)}'")
+        steps.append(SQLStep(
+            name=marker.group(1),
+            sql=sql[marker.end():end].strip(),
+            transactional='no-transaction' not in flags
+        ))
+    return steps
+
+def load_steps(migration_file: str, directory: str = MIGRATIONS_DIR) -> list:
+    """
+    Load the steps of a migration. .py migrations declare a module-level STEPS list.
+    """
+    path = os.path.join(directory, migration_file)
+    if migration_file.endswith('.py'):
+        # Let migrations `from migration_runner import ...` share these classes even when run as a script.
+        sys.modules.setdefault('migration_runner', sys.modules[__name__])
+        spec = importlib.util.spec_from_file_location(f"migration_{migration_file[:-3]}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return list(module.STEPS)
+    with open(path, 'r') as f:
+        return parse_sql_steps(f.read())
 
 def ensure_history_table(conn):
     with conn.cursor() as cur:
@@ -27,31 +168,169 @@ def ensure_history_table(conn):
                 applied_by VARCHAR(255) NOT NULL
             );
         ''')
+        # Step-level rows have a step name; the row marking a whole migration as applied has step NULL.
+        cur.execute(f'''
+            ALTER TABLE {HISTORY_TABLE}
+                ADD COLUMN IF NOT EXISTS step VARCHAR(255),
+                ADD COLUMN IF NOT EXISTS duration_ms FLOAT,
+                ADD COLUMN IF NOT EXISTS rows_affected BIGINT;
+        ''')
+        cur.execute(f'''
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                migration VARCHAR(255) NOT NULL,
+                step VARCHAR(255) NOT NULL,
+                last_key TEXT,
+                rows_done BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (migration, step)
+            );
+        ''')
     conn.commit()
 
 def get_applied_migrations(conn):
     with conn.cursor() as cur:
-        cur.execute(f"SELECT migration FROM {HISTORY_TABLE};")
+        cur.execute(f"SELECT migration FROM {HISTORY_TABLE} WHERE step IS NULL;")
         return set(row[0] for row in cur.fetchall())
 
-def apply_migration(conn, migration_file):
-    with open(os.path.join(MIGRATIONS_DIR, migration_file), 'r') as f:
-        sql = f.read()
+def get_completed_steps(conn, migration_file: str) -> set:
     with conn.cursor() as cur:
-        cur.execute(sql)
+        cur.execute(f"SELECT step FROM {HISTORY_TABLE} WHERE migration = %s AND step IS NOT NULL;", (migration_file,))
+        return set(row[0] for row in cur.fetchall())
+
+def record_history(conn, migration_file: str, step: Optional[str], duration_ms: float, rows_affected: Optional[int]):
+    """
+    Insert a history row and commit, together with anything still uncommitted on `conn`.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO {HISTORY_TABLE} (migration, applied_at, applied_by, step, duration_ms, rows_affected)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (migration_file, datetime.utcnow(), os.getenv('USER', 'unknown'), step, duration_ms, rows_affected))
     conn.commit()
+
+def get_checkpoint(conn, migration_file: str, step: str):
     with conn.cursor() as cur:
         cur.execute(f"""
-            INSERT INTO {HISTORY_TABLE} (migration, applied_at, applied_by)
-            VALUES (%s, %s, %s)
-        """, (migration_file, datetime.utcnow(), os.getenv('USER', 'unknown')))
+            SELECT last_key, rows_done FROM {CHECKPOINT_TABLE} WHERE migration = %s AND step = %s;
+        """, (migration_file, step))
+        row = cur.fetchone()
+    return (row[0], row[1]) if row else (None, 0)
+
+def drop_invalid_index(conn, sql: str) -> Optional[str]:
+    """
+    A failed or interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which
+    `IF NOT EXISTS` would then skip. Drop it so the statement builds it again.
+    Returns:
+        str or None: The name of the index dropped.
+    """
+    match = CONCURRENT_INDEX.match(re.sub(r'^(\s*--[^\n]*\n)*', '', sql))
+    if not match:
+        return None
+    name = match.group(1)
+    with conn.cursor() as cur:
+        cur.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s);", (name,))
+        row = cur.fetchone()
+        if row is None or row[0]:
+            return None
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+    print(f"  Dropped invalid index {name} left by an earlier attempt")
+    return name
+
+def run_sql_step(conn, step: SQLStep, commit: bool = True) -> int:
+    """
+    Run a SQL step and return the affected row count (-1 if not reported).
+    With commit=False a transactional step is left uncommitted, for the caller to commit along
+    with its history row; a no-transaction step always commits as it runs.
+    """
+    if step.transactional:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL lock_timeout = %s;", (LOCK_TIMEOUT,))
+            cur.execute(step.sql)
+            rowcount = cur.rowcount
+        if commit:
+            conn.commit()
+        return rowcount
     conn.commit()
+    conn.autocommit = True
+    try:
+        drop_invalid_index(conn, step.sql)
+        with conn.cursor() as cur:
+            cur.execute(step.sql)
+            return cur.rowcount
+    finally:
+        conn.autocommit = False
+
+def run_backfill_step(conn, migration_file: str, step: BackfillStep) -> int:
+    """
+    Run a backfill in key-ordered batches, resuming from the stored checkpoint.
+    Returns the total number of rows updated across all runs.
+    """
+    last_key, rows_done = get_checkpoint(conn, migration_file, step.name)
+    while True:
+        with conn.cursor() as cur:
+            if last_key is None:
+                cur.execute(
+                    f"SELECT {step.key_column} FROM {step.table} ORDER BY {step.key_column} LIMIT %s;",
+                    (step.batch_size,)
+                )
+            else:
+                cur.execute(
+                    f"SELECT {step.key_column} FROM {step.table} WHERE {step.key_column} > %s "
+                    f"ORDER BY {step.key_column} LIMIT %s;",
+                    (last_key, step.batch_size)
+                )
+            keys = [row[0] for row in cur.fetchall()]
+            if not keys:
+                conn.commit()
+                return rows_done
+            cur.execute("SET LOCAL lock_timeout = %s;", (LOCK_TIMEOUT,))
+            cur.execute(step.sql, {'lower': keys[0], 'upper': keys[-1]})
+            rows_done += max(cur.rowcount, 0)
+            last_key = keys[-1]
+            cur.execute(f"""
+                INSERT INTO {CHECKPOINT_TABLE} (migration, step, last_key, rows_done, updated_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (migration, step)
+                DO UPDATE SET last_key = EXCLUDED.last_key, rows_done = EXCLUDED.rows_done, updated_at = EXCLUDED.updated_at;
+            """, (migration_file, step.name, str(last_key), rows_done, datetime.utcnow()))
+        conn.commit()
+        print(f"  {step.name}: {rows_done} rows backfilled (last key {last_key})")
+        if len(keys) < step.batch_size:
+            return rows_done
+        if step.pause:
+            time.sleep(step.pause)
+
+def apply_migration(conn, migration_file, directory: str = MIGRATIONS_DIR):
+    """
+    Apply the steps not yet recorded in the history. A transactional step commits in the same
+    transaction as its history row, so it is never applied without being recorded; a backfill
+    resumes from its checkpoint and a no-transaction step runs again if interrupted in between.
+    """
+    steps = load_steps(migration_file, directory)
+    completed = get_completed_steps(conn, migration_file)
+    total_start = time.perf_counter()
+    total_rows = 0
+    for step in steps:
+        if step.name in completed:
+            print(f"  Step already applied: {step.name}")
+            continue
+        start = time.perf_counter()
+        if isinstance(step, BackfillStep):
+            rows = run_backfill_step(conn, migration_file, step)
+        else:
+            rows = run_sql_step(conn, step, commit=False)
+        duration_ms = (time.perf_counter() - start) * 1000
+        rows = rows if rows is not None and rows >= 0 else None
+        total_rows += rows or 0
+        record_history(conn, migration_file, step.name, duration_ms, rows)
+        print(f"  Step {step.name}: {duration_ms:.1f} ms, rows affected: {rows if rows is not None else '-'}")
+    record_history(conn, migration_file, None, (time.perf_counter() - total_start) * 1000, total_rows)
 
 def main():
     conn = psycopg2.connect(**DB_CONFIG)
     ensure_history_table(conn)
     applied = get_applied_migrations(conn)
-    for migration in MIGRATIONS:
+    for migration in discover_migrations():
         if migration not in applied:
             print(f"Applying migration: {migration}")
             apply_migration(conn, migration)
@@ -60,4 +339,4 @@ def main():
     conn.close()
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,119 @@
+import pytest
+from migration_runner import (
+    SQLStep, apply_migration, discover_migrations, drop_invalid_index, parse_sql_steps, split_statements
+)
+
+def test_discover_orders_by_numeric_prefix(tmp_path):
+    for name in ('010_later.sql', '002_second.py', '1_first.sql', 'README.md', 'helpers.py', '003_bad name.sql', '004_x.txt'):
+        (tmp_path / name).write_text('')
+    assert discover_migrations(str(tmp_path)) == ['1_first.sql', '002_second.py', '010_later.sql']
+
+def test_discovers_the_shipped_migrations():
+    found = discover_migrations()
+    assert found[:2] == ['001_add_tenants_and_cwv.sql', '002_add_agent_results.sql']
+    assert found == sorted(found, key=lambda name: int(name.split('_')[0]))
+
+def test_file_without_markers_is_one_transactional_step():
+    sql = "ALTER TABLE t ADD COLUMN a INT;\nUPDATE t SET a = 1;\n"
+    assert parse_sql_steps(sql) == [SQLStep(name='main', sql=sql, transactional=True)]
+
+def test_markers_names_and_flags():
+    sql = """-- Adds the things
+-- migrate:step create_table
+CREATE TABLE t (id INT);
+CREATE TABLE u (id INT);
+
+--migrate:step add.index-1 no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_t ON t(id);
+-- migrate:step tail   no-transaction
+SELECT 1;
+"""
+    steps = parse_sql_steps(sql)
+    assert [(s.name, s.transactional) for s in steps] == [
+        ('create_table', True), ('add.index-1', False), ('tail', False),
+    ]
+    assert steps[0].sql == "CREATE TABLE t (id INT);\nCREATE TABLE u (id INT);"
+    assert steps[1].sql == "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_t ON t(id);"
+
+def test_unknown_step_flags_are_rejected():
+    with pytest.raises(ValueError, match="Unknown flag.*no-transactoin.*'idx'"):
+        parse_sql_steps("-- migrate:step idx no-transactoin\nCREATE INDEX CONCURRENTLY a ON t(x);\n")
+
+def test_sql_before_the_first_marker_is_rejected():
+    with pytest.raises(ValueError):
+        parse_sql_steps("CREATE TABLE t (id INT);\n-- migrate:step rest\nSELECT 1;")
+
+def test_no_transaction_steps_must_be_single_statements():
+    with pytest.raises(ValueError, match="single statement"):
+        parse_sql_steps("-- migrate:step idx no-transaction\n"
+                        "CREATE INDEX CONCURRENTLY a ON t(x);\nCREATE INDEX CONCURRENTLY b ON t(y);\n")
+    with pytest.raises(ValueError):
+        SQLStep('idx', 'VACUUM t; VACUUM u;', transactional=False)
+    # Semicolons in comments, strings and dollar-quoted bodies do not count
+    SQLStep('idx', "-- build it; then check\nCREATE INDEX CONCURRENTLY a ON t(x) WHERE note <> ';'; -- done;",
+            transactional=False)
+
+def test_split_statements_respects_quotes_and_comments():
+    sql = """SELECT 'it''s; fine', "odd;name" FROM t; /* a; b */
+DO $body$ BEGIN PERFORM 1; END $body$;
+-- trailing; comment
+SELECT $$;$$"""
+    assert split_statements(sql) == [
+        """SELECT 'it''s; fine', "odd;name" FROM t;""",
+        "/* a; b */\nDO $body$ BEGIN PERFORM 1; END $body$;",
+        "-- trailing; comment\nSELECT $$;$$",
+    ]
+    assert split_statements("-- only a comment\n;\n") == []
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    rowcount = 1
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+
+    def fetchone(self):
+        return self.conn.row
+
+    def fetchall(self):
+        return []
+
+class FakeConnection:
+    def __init__(self, row):
+        self.row = row
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.executed.append(('COMMIT', None))
+
+@pytest.mark.parametrize('row, dropped', [(None, None), ((True,), None), ((False,), 'public."idx_T"')])
+def test_invalid_index_from_a_failed_attempt_is_dropped(row, dropped):
+    conn = FakeConnection(row)
+    sql = '-- rebuild\nCREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS public."idx_T" ON t(x);'
+    assert drop_invalid_index(conn, sql) == dropped
+    assert conn.executed[0][1] == ('public."idx_T"',)
+    drops = [q for q, _ in conn.executed if q.startswith('DROP')]
+    assert drops == ([f'DROP INDEX CONCURRENTLY IF EXISTS {dropped};'] if dropped else [])
+    assert drop_invalid_index(FakeConnection((False,)), 'ALTER TABLE t ADD COLUMN a INT;') is None
+
+def test_transactional_step_commits_with_its_history_row(tmp_path):
+    (tmp_path / "001_add.sql").write_text("-- migrate:step add_column\nALTER TABLE t ADD COLUMN a INT;\n"
+                                         "-- migrate:step add_index no-transaction\nCREATE INDEX CONCURRENTLY i ON t(a);\n")
+    conn = FakeConnection(None)
+    conn.autocommit = False
+    apply_migration(conn, "001_add.sql", directory=str(tmp_path))
+    statements = [sql.split()[0] if sql != 'COMMIT' else sql for sql, _ in conn.executed]
+    step_sql = statements.index('ALTER')
+    assert statements[step_sql:step_sql + 3] == ['ALTER', 'INSERT', 'COMMIT']
+    assert conn.executed[step_sql + 1][1][3] == 'add_column'
@@ -1,93 +1,147 @@
+import os
+import asyncio
+from typing import Optional
+import numpy as np
+from .redirects import trace_redirects
+from .uptime import UptimeHistory
+from .alerts import AlertAggregator, AlertOutbox, TaskMasterClient
 from .logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-def monitor_redirects(urls: list, max_chain: int = 5) -> list:
+UPTIME_SNAPSHOT_PATH = os.getenv('UPTIME_SNAPSHOT_PATH', 'cache/uptime')
+_uptime = None
+_uptime_pid = None
+_aggregator = None
+_outbox = None
+_alerts_pid = None
+_task_master = None
+
+async def monitor_redirects_async(urls: list, max_chain: int = 5) -> list:
     """
-    Simulate monitoring HTTP redirects for a list of URLs.
+    Trace the HTTP redirects of a list of URLs, concurrently (see redirects.py).
     Args:
         urls (list): List of URLs to monitor.
         max_chain (int): Maximum allowed redirect chain length.
     Returns:
-        list: Results with URL, redirect chain, and detected issues.
+        list: Results with URL, redirect chain, per-hop status and latency, and detected issues.
     """
-    results = []
-    for url in urls:
-        # Mock: simulate a redirect chain
-        chain = [url]
-        for i in range(1, max_chain + 2):
-            next_url = f"{url}/redirect{i}"
-            chain.append(next_url)
-            if i == max_chain:
-                break
-        issues = []
-        if len(chain) > max_chain:
-            issues.append("Redirect chain exceeds threshold")
-        if len(set(chain)) < len(chain):
-            issues.append("Infinite redirect loop detected")
-        results.append({
-            "url": url,
-            "redirect_chain": chain,
-            "issues": issues
-        })
-    return results
+    return await trace_redirects(urls, max_chain=max_chain)
+
+def monitor_redirects(urls: list, max_chain: int = 5) -> list:
+    """
+    monitor_redirects_async() for synchronous callers (not from a running event loop).
+    """
+    return asyncio.run(monitor_redirects_async(urls, max_chain=max_chain))
 
-def monitor_uptime(urls: list, error_threshold: int = 2) -> list:
+def get_uptime_history() -> UptimeHistory:
     """
-    Simulate uptime monitoring for a list of URLs.
+    Per-process uptime history, restored from the last snapshot on first use.
+    """
+    global _uptime, _uptime_pid
+    if _uptime is None or _uptime_pid != os.getpid():
+        try:
+            _uptime = UptimeHistory.load(UPTIME_SNAPSHOT_PATH)
+        except FileNotFoundError:
+            _uptime = UptimeHistory()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Uptime snapshot unreadable, starting a new history: {e}")
+            _uptime = UptimeHistory()
+        _uptime_pid = os.getpid()
+    return _uptime
+
+def monitor_uptime(urls: list, error_threshold: int = 2, checks: Optional[list] = None) -> list:
+    """
+    Check a list of URLs once and classify each against its uptime history (see uptime.py).
     Args:
         urls (list): List of URLs to monitor.
-        error_threshold (int): Number of errors to flag as persistent.
+        error_threshold (int): Consecutive failed checks tolerated before an issue is persistent.
+        checks (list): monitor_redirects results for `urls`, reused as this sweep's checks
+            (default: check the URLs now).
     Returns:
-        list: Results with URL, status history, and detected issues.
+        list: Results with URL, status, latency, status history, classification, error rate,
+        latency percentiles, and detected issues.
     """
+    if checks is None:
+        checks = monitor_redirects(urls)
+    statuses = [0 if check["error"] or check["status"] is None else check["status"] for check in checks]
+    latencies = [check["elapsed_ms"] for check in checks]
+    history = get_uptime_history()
+    history.record(urls, statuses, latencies)
+    classes = history.classify(urls, persistent_streak=error_threshold + 1)
+    error_rates = history.error_rate(urls)
+    percentiles = history.percentiles(urls, (50, 95))
     results = []
-    for url in urls:
-        # Mock: simulate a status history
-        status_history = [200, 200, 500, 404, 200, 503]
-        errors = [code for code in status_history if code >= 400]
+    for url, status, latency, classification, error_rate, (p50, p95) in zip(
+            urls, statuses, latencies, classes, error_rates, percentiles):
         issues = []
-        if len(errors) > error_threshold:
-            issues.append("Persistent errors detected")
-        if 503 in status_history:
+        answer = f"HTTP {status}" if status else "no response"
+        if classification == "down":
             issues.append("Downtime detected")
+            logger.warning(f"Downtime: {url} ({answer})")
+        elif classification == "persistent":
+            issues.append("Persistent errors detected")
+            logger.warning(f"Persistent errors: {url} ({answer})")
         results.append({
             "url": url,
-            "status_history": status_history,
+            "status": status,
+            "latency_ms": latency,
+            "status_history": [check[1] for check in history.history(url)],
+            "classification": classification,
+            "error_rate": round(float(error_rate), 3),
+            "latency_p50_ms": None if np.isnan(p50) else round(float(p50), 1),
+            "latency_p95_ms": None if np.isnan(p95) else round(float(p95), 1),
             "issues": issues
         })
+    history.save(UPTIME_SNAPSHOT_PATH)
     return results
 
+def get_alert_aggregator() -> AlertAggregator:
+    """
+    Per-process aggregator, outbox and Task Master client (SQLite and HTTP connections must not
+    be shared across fork).
+    """
+    global _aggregator, _outbox, _task_master, _alerts_pid
+    if _aggregator is None or _alerts_pid != os.getpid():
+        _aggregator = AlertAggregator()
+        _outbox = AlertOutbox()
+        _task_master = TaskMasterClient()
+        _alerts_pid = os.getpid()
+    return _aggregator
+
 def aggregate_and_format_alerts(redirect_results: list, uptime_results: list) -> list:
     """
-    Aggregate and format alerts from redirect and uptime monitoring results.
+    Aggregate and format alerts from redirect and uptime monitoring results, against the issues
+    already alerted on in earlier cycles (see alerts.py).
     Args:
         redirect_results (list): Results from monitor_redirects.
         uptime_results (list): Results from monitor_uptime.
     Returns:
-        list: Alert payloads with URL, issue type, severity, and details.
+        list: Alert payloads to send this cycle (new, repeated, escalated and resolved issues) with
+        URL, issue type, severity, details, status and timestamps.
     """
-    alerts = []
-    url_issues = {}
-    # Aggregate redirect issues
+    issues = []
     for r in redirect_results:
-        if r["issues"]:
-            url_issues.setdefault(r["url"], []).extend([("redirect", issue) for issue in r["issues"]])
-    # Aggregate uptime issues
+        issues.extend((r["url"], "redirect", issue) for issue in r["issues"])
     for u in uptime_results:
-        if u["issues"]:
-            url_issues.setdefault(u["url"], []).extend([("uptime", issue) for issue in u["issues"]])
-    # Format alerts
-    for url, issues in url_issues.items():
-        for issue_type, detail in issues:
-            severity = "critical" if "downtime" in detail.lower() or "exceeds" in detail.lower() else "warning"
-            alerts.append({
-                "url": url,
-                "issue_type": issue_type,
-                "severity": severity,
-                "detail": detail
-            })
-    return alerts
+        issues.extend((u["url"], "uptime", issue) for issue in u["issues"])
+    checked = {r["url"] for r in redirect_results} | {u["url"] for u in uptime_results}
+    return get_alert_aggregator().observe(issues, checked)
+
+def push_alerts(alerts: list) -> dict:
+    """
+    Queue alerts in the outbox and send every due batch to Task Master. Batches that fail stay
+    in the outbox and are retried by later calls.
+    Returns:
+        dict: Counts of batches 'sent', 'retry' and 'dead', and 'alerts' sent.
+    """
+    get_alert_aggregator()
+    if alerts:
+        _outbox.enqueue(alerts)
+    counts = _outbox.flush(_task_master)
+    if counts['retry'] or counts['dead']:
+        logger.warning(f"Task Master delivery: {counts}; {_outbox.pending()} batches pending")
+    return counts
 
 def deploy_monitoring_agent(urls: list) -> list:
     """
@@ -99,7 +153,8 @@ def deploy_monitoring_agent(urls: list) -> list:
     """
     logger.info("Starting monitoring agent deployment...")
     redirect_results = monitor_redirects(urls)
-    uptime_results = monitor_uptime(urls)
+    uptime_results = monitor_uptime(urls, checks=redirect_results)
     alerts = aggregate_and_format_alerts(redirect_results, uptime_results)
+    push_alerts(alerts)
     logger.info(f"Monitoring complete. {len(alerts)} alerts generated.")
     return alerts 
\ No newline at end of file
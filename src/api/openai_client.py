@@ -1,28 +1,118 @@
 import os
+import json
+from .llm_cache import LLMCache, cache_key, get_llm_cache
+from .llm_executor import complete_sync
+from .metrics import record_cache, CACHE_HITS_TOTAL, CACHE_MISSES_TOTAL, LLM_REQUEST_SECONDS, LLM_RATE_LIMIT_WAIT_SECONDS, LLM_REQUESTS_TOTAL, LLM_TOKENS_TOTAL
+from .tracing import start_span
+from . import translation_memory
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", "cache/translation_memory.sqlite3")
+TRANSLATION_MEMORY_MAX_BYTES = int(os.getenv("TRANSLATION_MEMORY_MAX_BYTES", 1024 * 1024 * 1024))
+TRANSLATION_MEMORY_TTL = int(os.getenv("TRANSLATION_MEMORY_TTL", 365 * 86400))
+
+# Prompt templates: name -> (version, template). Bump the version when a template changes so
+# its cached responses are no longer used.
+PROMPT_TEMPLATES = {
+    "content_suggestion": ("1", "{prompt}"),
+    "schema": (
+        "1",
+        "Generate schema.org JSON-LD of type {schema_type} for the content below. "
+        "Reply with the JSON object only.\n\n{content}",
+    ),
+    "internal_links": (
+        "2",
+        "Pick up to {limit} of these internal URLs that are most relevant to link from the content below. "
+        "Reply with a JSON list of URLs only.\n\nURLs:\n{urls}\n\nContent:\n{content}",
+    ),
+    "translation": (
+        "1",
+        "Translate the content below into the language with code '{language}'. "
+        "Reply with the translation only.\n\n{content}",
+    ),
+    "translation_batch": (
+        "1",
+        "Translate each string in the JSON list below into the language with code '{language}'. "
+        "Reply with a JSON list of the translations only, in the same order.\n\n{segments}",
+    ),
+}
 
 def get_openai_client():
     """
     Set up and return an OpenAI API client for content generation.
-    Loads the API key from the environment.
+    Loads the API key (OPENAI_API_KEY) and endpoint (OPENAI_BASE_URL, e.g. a local fake server)
+    from the environment.
+    Returns:
+        dict: Client settings; without a key or endpoint, a mock client whose helpers return
+        placeholder output.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    base_url = os.getenv("OPENAI_BASE_URL")
+    if not api_key and not base_url:
+        return {"api_key": "mock-key", "client": "mock_openai_client"}
+    return {"api_key": api_key or "", "base_url": base_url or "https://api.openai.com/v1", "client": "openai"}
+
+def _is_mock(client: dict) -> bool:
+    return client.get("client") == "mock_openai_client"
+
+def _record_llm_event(event: str, tokens: int = 0, seconds: float = 0.0) -> None:
+    if event == 'request':
+        LLM_REQUESTS_TOTAL.labels('ok').inc()
+        LLM_TOKENS_TOTAL.inc(tokens)
+        LLM_REQUEST_SECONDS.observe(seconds)
+    elif event == 'wait':
+        LLM_RATE_LIMIT_WAIT_SECONDS.observe(seconds)
+    else:
+        LLM_REQUESTS_TOTAL.labels(event).inc()
+
+def _chat_completion(client: dict, model: str, messages: list, params: dict) -> str:
+    # Through the shared, rate-limited executor (llm_executor.py)
+    with start_span("llm.chat_completion", model=model):
+        body = complete_sync(
+            model, messages,
+            executor_kwargs={"base_url": client["base_url"], "api_key": client["api_key"], "on_event": _record_llm_event},
+            **params
+        )
+    return body["choices"][0]["message"]["content"].strip()
+
+def complete(client: dict, template: str, model: str = DEFAULT_MODEL, params: dict = None, parse=None, **fields):
+    """
+    Render a prompt template and return the model's reply, served from the response cache
+    when the same model, prompt, parameters and template version were seen before.
+    Args:
+        client (dict): Client from get_openai_client().
+        template (str): Name in PROMPT_TEMPLATES.
+        params (dict): Request parameters (max_tokens, temperature, ...).
+        parse (callable): Applied to the reply before caching (e.g. json.loads), so replies that
+            fail to parse raise and are not cached.
+        **fields: Values for the template's placeholders.
     Returns:
-        object: Mock OpenAI client (replace with real openai.Client in production).
+        The completion text, or its parsed value.
     """
-    api_key = os.getenv("OPENAI_API_KEY", "mock-key")
-    # Placeholder for real OpenAI client setup
-    # Example: client = openai.Client(api_key=api_key)
-    return {"api_key": api_key, "client": "mock_openai_client"}
+    version, text = PROMPT_TEMPLATES[template]
+    messages = [{"role": "user", "content": text.format(**fields)}]
+    params = params or {}
+    key = cache_key(model, messages, params, f"{template}:{version}")
+    def compute():
+        reply = _chat_completion(client, model, messages, params)
+        return parse(reply) if parse else reply
+
+    value, hit = get_llm_cache().get_or_compute(key, compute)
+    record_cache("llm", hit)
+    return value
 
 def generate_schema(client: dict, content: str, schema_type: str = "Article") -> dict:
     """
-    Simulate using OpenAI to generate a content schema (e.g., JSON-LD) for the given content.
+    Use OpenAI to generate a content schema (e.g., JSON-LD) for the given content.
     Args:
-        client (dict): OpenAI client (mocked).
+        client (dict): OpenAI client from get_openai_client().
         content (str): The content to generate schema for.
         schema_type (str): The type of schema to generate (default: "Article").
     Returns:
-        dict: Mock schema (replace with real OpenAI output in production).
+        dict: The schema (a placeholder schema with the mock client).
     """
-    # Placeholder for real OpenAI API call
+    if not _is_mock(client):
+        return complete(client, "schema", params={"temperature": 0}, parse=json.loads, content=content, schema_type=schema_type)
     return {
         "@context": "https://schema.org",
         "@type": schema_type,
@@ -32,36 +122,89 @@ def generate_schema(client: dict, content: str, schema_type: str = "Article") ->
         "description": content[:160]
     }
 
-def generate_internal_links(client: dict, content: str, existing_urls: list) -> list:
+def generate_internal_links(client: dict, content: str, existing_urls: list, limit: int = 3) -> list:
     """
-    Simulate using OpenAI to suggest internal links for the given content.
+    Use OpenAI to suggest internal links for the given content.
+    For whole sites, pass a short list of candidates from the link index (internal_links.suggest_links)
+    rather than every URL.
     Args:
-        client (dict): OpenAI client (mocked).
+        client (dict): OpenAI client from get_openai_client().
         content (str): The content to analyze.
-        existing_urls (list): List of possible internal URLs.
+        existing_urls (list): List of possible internal URLs, best candidates first.
+        limit (int): Maximum number of links.
     Returns:
-        list: Mock list of suggested internal links.
+        list: Suggested internal links (the first `limit` URLs with the mock client).
+    """
+    if not _is_mock(client):
+        suggested = complete(
+            client, "internal_links", params={"temperature": 0}, parse=json.loads,
+            content=content, urls="\n".join(existing_urls), limit=limit
+        )
+        allowed = set(existing_urls)
+        return [url for url in suggested if url in allowed][:limit]
+    return existing_urls[:limit]
+
+def get_translation_memory() -> LLMCache:
     """
-    # Placeholder for real OpenAI API call
-    # Mock: return up to 3 random URLs from existing_urls
-    return existing_urls[:3]
+    Segment translation store.
+    """
+    return LLMCache.for_process(TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_MAX_BYTES, TRANSLATION_MEMORY_TTL)
+
+def _translate_segments(client: dict, language: str, segments: list) -> list:
+    def parse(reply):
+        translated = json.loads(reply)
+        if not isinstance(translated, list) or len(translated) != len(segments):
+            raise ValueError(f"Expected a list of {len(segments)} translations")
+        return [str(t) for t in translated]
+
+    try:
+        return complete(
+            client, "translation_batch", params={"temperature": 0}, parse=parse,
+            segments=json.dumps(segments, ensure_ascii=False), language=language
+        )
+    except ValueError:
+        # The reply did not line up with the batch: translate its segments one by one
+        return [complete(client, "translation", content=segment, language=language) for segment in segments]
 
 def generate_multilingual_content(client: dict, content: str, languages: list) -> dict:
     """
-    Simulate using OpenAI to generate content in multiple languages.
+    Use OpenAI to generate content in multiple languages.
+    Sentences and lines are translated through the translation memory (translation_memory.py): each
+    is translated once per language and reused across pages, and only unseen ones are sent, in
+    batched requests.
     Args:
-        client (dict): OpenAI client (mocked).
+        client (dict): OpenAI client from get_openai_client().
         content (str): The content to translate or generate.
         languages (list): List of language codes (e.g., ['es', 'fr', 'de']).
     Returns:
-        dict: Mapping of language code to mock translation.
+        dict: Mapping of language code to translation (placeholders with the mock client).
+    """
+    return generate_multilingual_content_batch(client, [content], languages)[0]
+
+def generate_multilingual_content_batch(client: dict, contents: list, languages: list) -> list:
+    """
+    generate_multilingual_content() for many pages at once: their unseen segments are deduplicated
+    and batched together, so a site needs a few requests per language rather than one per page.
+    Returns:
+        list: For each content, a mapping of language code to translation.
     """
-    # Placeholder for real OpenAI API call
-    return {lang: f"[Translated {lang}] {content}" for lang in languages}
+    if _is_mock(client):
+        return [{lang: f"[Translated {lang}] {content}" for lang in languages} for content in contents]
+    stats = {}
+    version = PROMPT_TEMPLATES["translation_batch"][0]
+    with start_span("llm.translate", pages=len(contents), languages=len(languages)):
+        translations = translation_memory.translate_many(
+            contents, languages, lambda language, segments: _translate_segments(client, language, segments),
+            get_translation_memory(), model=DEFAULT_MODEL, version=version, stats=stats
+        )
+    CACHE_HITS_TOTAL.labels("translation").inc(stats["hits"])
+    CACHE_MISSES_TOTAL.labels("translation").inc(stats["misses"])
+    return translations
 
 def check_ai_output_quality(content: str, min_length: int = 100, required_keywords: list = None) -> dict:
     """
     Check if AI-generated content meets quality standards.
+    For many documents or keywords, use quality_check.check_ai_output_quality_batch.
     Args:
         content (str): The AI-generated content.
         min_length (int): Minimum required length.
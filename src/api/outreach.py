@@ -0,0 +1,407 @@
+"""
+Outreach email delivery.
+
+- Packets: iter_outreach_packets() yields one packet per prospect as it is consumed, and a
+  message is rendered only when it is sent, from a MessageTemplate compiled once (headers and
+  body in one format string with CRLF line endings, its fields checked up front)
+- Connections: SMTPPool keeps up to `size` SMTP connections open (EHLO, STARTTLS and login done
+  once) and reuses them across messages and calls; idle ones are checked with NOOP before reuse
+- Pipelining (RFC 2920): when the server advertises PIPELINING, a message's MAIL FROM, RCPT TO and
+  DATA go out in one write, together with the previous message's content, so a connection spends
+  one round trip per message instead of four
+- Rate limits: at most `sender_rate` messages/min per sending domain and `recipient_rate` per
+  recipient domain (GCRA, bursts of `burst`). A message held back by a limit waits in a schedule
+  while messages to other domains go ahead.
+- Results: every message gets a status (sent; bounced on a 5xx reply; deferred on a 4xx reply;
+  failed when the connection broke) and one row through `writer.enqueue('outreach_messages', row)`,
+  the db_writer write-behind buffer, which inserts them in bulk
+
+Limits apply per process. Stdlib only; benchmark.automate_outreach supplies the SMTP settings and
+the DB writer. smtp_sink.SMTPSink is a local server for tests and benchmarks.
+"""
+import os
+import time
+import heapq
+import queue
+import smtplib
+import threading
+from string import Formatter
+from uuid import uuid4
+from contextlib import contextmanager
+from email.header import Header
+from email.utils import formatdate
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 25))
+SMTP_USERNAME = os.getenv('SMTP_USERNAME')
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '0') == '1'
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 4))
+OUTREACH_SENDER = os.getenv('OUTREACH_SENDER', 'outreach@jaffebot.com')
+OUTREACH_SENDER_RATE = float(os.getenv('OUTREACH_SENDER_RATE', 600))
+OUTREACH_RECIPIENT_RATE = float(os.getenv('OUTREACH_RECIPIENT_RATE', 30))
+OUTREACH_BATCH_SIZE = int(os.getenv('OUTREACH_BATCH_SIZE', 50))
+# Idle connections older than this are checked with NOOP before reuse
+SMTP_IDLE_CHECK = 30.0
+
+OUTREACH_SUBJECT = "Collaboration opportunity with {domain}"
+OUTREACH_BODY = (
+    "Hello {name},\n\nI came across your site {url} and thought there could be a great opportunity for "
+    "collaboration with {domain}.\n\nWould you be interested in discussing a potential partnership or backlink "
+    "exchange?\n\nBest regards,\nJaffeBot Outreach Team"
+)
+
+STATUS_SENT, STATUS_BOUNCED, STATUS_DEFERRED, STATUS_FAILED = 'sent', 'bounced', 'deferred', 'failed'
+
+def email_domain(address: str) -> str:
+    return address.rpartition('@')[2].lower()
+
+def _single_line(value) -> str:
+    return str(value).replace('\r', ' ').replace('\n', ' ')
+
+class MessageTemplate:
+    # Filled in per message, besides the template's own fields
+    HEADER_FIELDS = ('sender', 'to', 'subject', 'date', 'message_id')
+
+    def __init__(self, subject: str = OUTREACH_SUBJECT, body: str = OUTREACH_BODY):
+        """
+        Args:
+            subject, body: str.format templates with plain {field} references.
+        """
+        self.fields = set()
+        for text in (subject, body):
+            for _, field, spec, conversion in Formatter().parse(text):
+                if field is None:
+                    continue
+                if not field.isidentifier() or spec or conversion or field in self.HEADER_FIELDS:
+                    raise ValueError(f"Unsupported template field {{{field}}}")
+                self.fields.add(field)
+        self.subject = subject
+        self.body = body
+        self.message = (
+            "From: {sender}\r\nTo: {to}\r\nSubject: {subject}\r\nDate: {date}\r\nMessage-ID: {message_id}\r\n"
+            "MIME-Version: 1.0\r\nContent-Type: text/plain; charset=utf-8\r\nContent-Transfer-Encoding: 8bit\r\n\r\n"
+            + '\r\n'.join(body.splitlines()) + '\r\n'
+        )
+
+    def render_body(self, fields: dict) -> str:
+        return self.body.format_map({name: fields[name] for name in self.fields})
+
+    def render(self, sender: str, to: str, fields: dict) -> tuple:
+        """
+        Returns:
+            tuple: (message id, message bytes); values are put on one line each.
+        """
+        values = {name: _single_line(fields[name]) for name in self.fields}
+        subject = self.subject.format_map(values)
+        if not subject.isascii():
+            subject = Header(subject, 'utf-8').encode()
+        message_id = f"<{uuid4().hex}@{email_domain(sender)}>"
+        values.update(sender=sender, to=to, subject=subject, date=formatdate(), message_id=message_id)
+        return message_id, self.message.format_map(values).encode()
+
+DEFAULT_TEMPLATE = MessageTemplate()
+
+def iter_outreach_packets(domain: str, prospects: dict) -> Iterator[dict]:
+    """
+    Outreach packets for each prospect, generated as they are consumed.
+    Args:
+        domain (str): The main domain.
+        prospects (dict): Tiered link prospects (tier -> URLs).
+    """
+    for tier, urls in prospects.items():
+        for url in urls:
+            host = url.replace('https://', '').replace('http://', '').split('/')[0]
+            site = host[:-4] if host.endswith('.com') else host
+            yield {
+                "domain": domain,
+                "prospect_url": url,
+                "tier": tier,
+                "contact": {"name": f"Contact for {url}", "email": f"info@{site}.com"},
+            }
+
+def packet_fields(packet: dict) -> dict:
+    return {"name": packet["contact"]["name"], "url": packet["prospect_url"], "domain": packet.get("domain", '')}
+
+class DomainRateLimiter:
+    """
+    Per-key rate limit (GCRA): at most `rate` per `period` seconds, with bursts of up to `burst`.
+    """
+    def __init__(self, rate: float, period: float = 60.0, burst: int = 1):
+        self.interval = period / rate
+        self.tolerance = (burst - 1) * self.interval
+        self._tat = {}  # key -> theoretical arrival time of the next message
+
+    def earliest(self, key: str, now: float) -> float:
+        return max(now, self._tat.get(key, now) - self.tolerance)
+
+    def take(self, key: str, at: float) -> None:
+        self._tat[key] = max(self._tat.get(key, at), at) + self.interval
+
+class SMTPPool:
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, size: int = SMTP_POOL_SIZE,
+                 username: Optional[str] = SMTP_USERNAME, password: Optional[str] = SMTP_PASSWORD,
+                 starttls: bool = SMTP_STARTTLS, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = queue.LifoQueue()  # (connection, last used)
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        conn.ehlo()
+        if self.starttls:
+            conn.starttls()
+            conn.ehlo()
+        if self.username:
+            conn.login(self.username, self.password)
+        self.opened += 1
+        return conn
+
+    def _take(self) -> smtplib.SMTP:
+        while True:
+            try:
+                conn, used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - used < SMTP_IDLE_CHECK:
+                return conn
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+            _close(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection; it goes back to the pool unless the block raised.
+        """
+        with self._slots:
+            conn = self._take()
+            try:
+                yield conn
+            except BaseException:
+                _close(conn)
+                raise
+            self._idle.put((conn, time.monotonic()))
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.quit()
+            except smtplib.SMTPException:
+                _close(conn)
+
+def _close(conn: smtplib.SMTP) -> None:
+    try:
+        conn.close()
+    except OSError:
+        pass
+
+def _stuffed(data: bytes) -> bytes:
+    # Transparency (RFC 5321 4.5.2) and the end-of-data line; messages start with a header
+    return data.replace(b'\n.', b'\n..') + b'.\r\n'
+
+def _failure(replies: tuple) -> tuple:
+    return next(((code, resp) for code, resp in replies if code >= 400), replies[-1])
+
+def send_pipelined(conn: smtplib.SMTP, messages: list, results: Optional[list] = None) -> list:
+    """
+    Send messages on one connection, pipelined.
+    Args:
+        messages: (sender, recipient, message bytes ending in CRLF) tuples.
+        results: A list of len(messages) Nones, filled in as replies arrive, so the outcomes read
+            before a connection error are kept (default: a new one).
+    Returns:
+        list: The (code, response) deciding each message's outcome, in order.
+    """
+    if results is None:
+        results = [None] * len(messages)
+    out, expect = [], []
+
+    def envelope(i):
+        sender, recipient, _ = messages[i]
+        out.append(f"MAIL FROM:<{sender}>\r\nRCPT TO:<{recipient}>\r\nDATA\r\n".encode())
+        expect.append(('envelope', i))
+
+    if messages:
+        envelope(0)
+    while expect:
+        conn.send(b''.join(out))
+        out.clear()
+        replies, expect[:] = list(expect), []
+        for kind, i in replies:
+            if kind == 'content':
+                results[i] = conn.getreply()
+                continue
+            if kind == 'reset':
+                conn.getreply()
+                continue
+            mail, rcpt, data = conn.getreply(), conn.getreply(), conn.getreply()
+            if data[0] == 354 and mail[0] < 400 and rcpt[0] < 400:
+                out.append(_stuffed(messages[i][2]))
+                expect.append(('content', i))
+            else:
+                results[i] = _failure((mail, rcpt, data))
+                # An empty message if the server took DATA anyway, then start over
+                out.append(b'.\r\nRSET\r\n' if data[0] == 354 else b'RSET\r\n')
+                expect.extend([('reset', i)] * (2 if data[0] == 354 else 1))
+            if i + 1 < len(messages):
+                envelope(i + 1)
+    return results
+
+def send_sequential(conn: smtplib.SMTP, messages: list, results: Optional[list] = None) -> list:
+    """
+    send_pipelined() for servers without PIPELINING.
+    """
+    if results is None:
+        results = [None] * len(messages)
+    for i, (sender, recipient, data) in enumerate(messages):
+        replies = [conn.mail(sender)]
+        if replies[0][0] < 400:
+            replies.append(conn.rcpt(recipient))
+        if replies[-1][0] < 400:
+            replies.append(conn.data(data))
+        results[i] = _failure(tuple(replies))
+        if results[i][0] >= 400:
+            conn.rset()
+    return results
+
+def status_of(code: int) -> str:
+    if code < 400:
+        return STATUS_SENT
+    return STATUS_DEFERRED if code < 500 else STATUS_BOUNCED
+
+class OutreachPipeline:
+    def __init__(self, pool: SMTPPool, template: MessageTemplate = DEFAULT_TEMPLATE, writer=None,
+                 sender_rate: float = OUTREACH_SENDER_RATE, recipient_rate: float = OUTREACH_RECIPIENT_RATE,
+                 burst: int = 10, period: float = 60.0, batch_size: int = OUTREACH_BATCH_SIZE, pipelining: bool = True):
+        """
+        Args:
+            writer: Receives one row per message via enqueue('outreach_messages', row) (a db_writer
+                WriteBehindWriter); None keeps only the counts.
+            sender_rate, recipient_rate: Messages per `period` per sending / recipient domain.
+            batch_size: Messages sent on a connection per borrow.
+            pipelining: Use PIPELINING when the server offers it.
+        """
+        self.pool = pool
+        self.template = template
+        self.writer = writer
+        self.sender_limits = DomainRateLimiter(sender_rate, period, burst)
+        self.recipient_limits = DomainRateLimiter(recipient_rate, period, burst)
+        self.batch_size = batch_size
+        self.pipelining = pipelining
+        self._limits_lock = threading.Lock()
+
+    def _deliver(self, sender: str, batch: list) -> list:
+        messages, ids = [], []
+        for packet in batch:
+            message_id, data = self.template.render(sender, packet["contact"]["email"], packet_fields(packet))
+            ids.append(message_id)
+            messages.append((sender, packet["contact"]["email"], data))
+        replies = [None] * len(batch)
+        try:
+            with self.pool.connection() as conn:
+                send = send_pipelined if self.pipelining and conn.has_extn('pipelining') else send_sequential
+                send(conn, messages, replies)
+        except (smtplib.SMTPException, OSError) as e:
+            # Messages answered before the error keep their outcome
+            replies = [reply or (None, str(e)) for reply in replies]
+        rows = []
+        for packet, message_id, (code, response) in zip(batch, ids, replies):
+            if isinstance(response, bytes):
+                response = response.decode(errors='replace')
+            recipient = packet["contact"]["email"]
+            rows.append({
+                "message_id": message_id,
+                "domain": packet.get("domain", ''),
+                "prospect_url": packet["prospect_url"],
+                "tier": packet["tier"],
+                "sender": sender,
+                "recipient": recipient,
+                "recipient_domain": email_domain(recipient),
+                "status": STATUS_FAILED if code is None else status_of(code),
+                "smtp_code": code,
+                "smtp_response": response,
+            })
+        if self.writer is not None:
+            for row in rows:
+                self.writer.enqueue('outreach_messages', row)
+        return rows
+
+    def send(self, packets: Iterable[dict], sender: str = OUTREACH_SENDER, max_pending: int = 10000) -> dict:
+        """
+        Send packets (consumed lazily) within the rate limits, on the pool's connections.
+        Args:
+            max_pending: Packets held back by the rate limits at a time; beyond it, reading more
+                packets waits for them.
+        Returns:
+            dict: total, and a count per status.
+        """
+        counts = dict.fromkeys((STATUS_SENT, STATUS_BOUNCED, STATUS_DEFERRED, STATUS_FAILED), 0)
+        counts_lock = threading.Lock()
+        sender_domain = email_domain(sender)
+        schedule, ready, seq = [], [], 0  # schedule: heap of (send at, seq, packet)
+        futures = []
+        in_flight = threading.BoundedSemaphore(self.pool.size * 2)
+
+        def tally(future):
+            in_flight.release()
+            rows = future.result()
+            with counts_lock:
+                for row in rows:
+                    counts[row["status"]] += 1
+
+        def submit():
+            in_flight.acquire()
+            future = executor.submit(self._deliver, sender, ready[:])
+            ready.clear()
+            future.add_done_callback(tally)
+            futures.append(future)
+
+        def release_due(block: bool):
+            # Move due packets from the schedule to full batches; with `block`, first wait for
+            # the next one to be due (sending what is ready meanwhile)
+            if block and schedule:
+                if ready:
+                    submit()
+                time.sleep(max(0.0, schedule[0][0] - time.monotonic()))
+            now = time.monotonic()
+            while schedule and schedule[0][0] <= now:
+                ready.append(heapq.heappop(schedule)[2])
+                if len(ready) >= self.batch_size:
+                    submit()
+
+        with ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix='smtp') as executor:
+            for packet in packets:
+                recipient_domain = email_domain(packet["contact"]["email"])
+                with self._limits_lock:
+                    now = time.monotonic()
+                    at = max(self.sender_limits.earliest(sender_domain, now),
+                             self.recipient_limits.earliest(recipient_domain, now))
+                    self.sender_limits.take(sender_domain, at)
+                    self.recipient_limits.take(recipient_domain, at)
+                heapq.heappush(schedule, (at, seq, packet))
+                seq += 1
+                release_due(block=len(schedule) >= max_pending)
+            while schedule:
+                release_due(block=True)
+            if ready:
+                submit()
+        for future in futures:
+            future.result()
+        return {"total": sum(counts.values()), **counts}
@@ -0,0 +1,102 @@
+import time
+import email
+import smtplib
+import pytest
+from outreach import (
+    DomainRateLimiter, MessageTemplate, OutreachPipeline, SMTPPool, iter_outreach_packets, send_pipelined, send_sequential
+)
+
+aiosmtpd = pytest.importorskip("aiosmtpd")
+from smtp_sink import SMTPSink
+
+class RecordingWriter:
+    def __init__(self):
+        self.rows = []
+
+    def enqueue(self, table, row):
+        self.rows.append((table, row))
+
+@pytest.fixture
+def sink():
+    sink = SMTPSink().start()
+    yield sink
+    sink.stop()
+
+def messages(*recipients):
+    template = MessageTemplate("Hi {name}", "Hello {name},\n.leading dot line\nBye")
+    return [("me@jaffebot.com", r, template.render("me@jaffebot.com", r, {"name": f"Ann\r\nBcc: x@evil.com"})[1])
+            for r in recipients]
+
+def test_template_renders_headers_and_rejects_unknown_fields():
+    message_id, data = MessageTemplate("Hi {name}", "Site: {url}").render("me@jaffebot.com", "you@site.com", {"name": "Zoë", "url": "https://site.com"})
+    parsed = email.message_from_bytes(data)
+    assert parsed["To"] == "you@site.com" and parsed["Message-ID"] == message_id and message_id.endswith("@jaffebot.com>")
+    assert str(email.header.make_header(email.header.decode_header(parsed["Subject"]))) == "Hi Zoë"
+    assert parsed.get_payload(decode=True).decode() == "Site: https://site.com\r\n"
+    with pytest.raises(ValueError):
+        MessageTemplate("Hi {name!r}", "")
+    with pytest.raises(ValueError):
+        MessageTemplate("Hi", "{to}")
+
+@pytest.mark.parametrize("send", [send_pipelined, send_sequential])
+def test_send_reports_each_outcome_and_keeps_the_connection_usable(sink, send):
+    conn = smtplib.SMTP("127.0.0.1", sink.port)
+    conn.ehlo()
+    results = send(conn, messages("a@site.com", "bounce@site.com", "defer@other.com", "b@site.com"))
+    assert [code for code, _ in results] == [250, 550, 451, 250]
+    assert send(conn, messages("c@site.com")) == [(250, b"Message accepted for delivery")]
+    conn.quit()
+    assert [m[1] for m in sink.messages] == [["a@site.com"], ["b@site.com"], ["c@site.com"]]
+    parsed = email.message_from_bytes(sink.messages[0][2])
+    assert parsed["Subject"] == "Hi Ann  Bcc: x@evil.com" and parsed["Bcc"] is None
+    assert b"\r\n.leading dot line\r\n" in sink.messages[0][2]
+
+@pytest.mark.parametrize("send", [send_pipelined, send_sequential])
+def test_replies_read_before_a_disconnect_are_kept(sink, send):
+    conn = smtplib.SMTP("127.0.0.1", sink.port)
+    conn.ehlo()
+    results = [None] * 4
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        send(conn, messages("a@site.com", "bounce@site.com", "drop@site.com", "b@site.com"), results)
+    assert [code for code, _ in results[:2]] == [250, 550] and results[2:] == [None, None]
+
+def test_pipeline_fails_only_unanswered_messages(sink):
+    writer = RecordingWriter()
+    pool = SMTPPool("127.0.0.1", sink.port, size=1)
+    pipeline = OutreachPipeline(pool, writer=writer, recipient_rate=1000, burst=100, batch_size=10)
+    packets = [{"prospect_url": f"https://{name}.com", "tier": "high", "contact": {"name": name, "email": f"{name}@site{i}.com"}}
+               for i, name in enumerate(["a", "b", "drop", "c"])]
+    summary = pipeline.send(packets, sender="outreach@mine.com")
+    assert summary == {"total": 4, "sent": 2, "bounced": 0, "deferred": 0, "failed": 2}
+    statuses = {row["recipient"]: row["status"] for _, row in writer.rows}
+    assert statuses == {"a@site0.com": "sent", "b@site1.com": "sent", "drop@site2.com": "failed", "c@site3.com": "failed"}
+    pool.close()
+
+def test_domain_rate_limiter_bursts_then_spaces():
+    limiter = DomainRateLimiter(rate=60, period=60.0, burst=2)
+    times = []
+    for _ in range(4):
+        at = limiter.earliest("site.com", 0.0)
+        limiter.take("site.com", at)
+        times.append(at)
+    assert times == [0.0, 0.0, 1.0, 2.0]
+    assert limiter.earliest("other.com", 0.0) == 0.0
+
+def test_pipeline_sends_lazily_within_recipient_limits(sink):
+    writer = RecordingWriter()
+    pool = SMTPPool("127.0.0.1", sink.port, size=2)
+    pipeline = OutreachPipeline(pool, writer=writer, recipient_rate=20, burst=1, period=1.0, batch_size=5)
+    prospects = {"high": [f"https://site{i}.com" for i in range(20)], "low": ["https://busy.com", "https://slow.com"] * 2}
+    packets = iter_outreach_packets("mine.com", prospects)
+    # 2 packets to each of slow.com and busy.com: the second of each waits 1/20 s
+    start = time.monotonic()
+    summary = pipeline.send(packets, sender="outreach@mine.com")
+    assert time.monotonic() - start >= 0.05
+    assert summary == {"total": 24, "sent": 24, "bounced": 0, "deferred": 0, "failed": 0}
+    assert len(sink.messages) == 24 and pool.opened <= 2
+    assert {table for table, _ in writer.rows} == {"outreach_messages"}
+    row = next(row for _, row in writer.rows if row["recipient"] == "info@site0.com")  # batches finish in any order
+    assert row["status"] == "sent" and row["smtp_code"] == 250 and row["domain"] == "mine.com"
+    pipeline.send(iter_outreach_packets("mine.com", {"high": ["https://site0.com"]}), sender="outreach@mine.com")
+    assert pool.opened <= 2  # connections reused across calls
+    pool.close()
@@ -0,0 +1,90 @@
+"""
+Benchmark alert delivery over a sequence of monitoring cycles against the local Task Master stand-in.
+
+Each cycle finds issues on --issue-rate of --urls URLs; between cycles --churn of the open
+issues resolve and as many new ones appear. Modes:
+- stateless, per alert: every issue found is sent every cycle, one request per alert (what
+  rebuilding alerts from scratch each cycle amounts to)
+- aggregator + outbox: only new, repeated, escalated and resolved issues are sent, in batches
+
+The server runs in its own process and answers after --latency seconds. Reports alerts sent,
+requests made and seconds spent sending.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_alert_delivery [--urls 20000] [--cycles 12] [--latency 0.002]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from src.api.alerts import AlertAggregator, AlertOutbox, TaskMasterClient, fingerprint, severity_of
+
+DETAILS = ('Downtime detected', 'Persistent errors detected', 'Redirect chain exceeds threshold')
+
+def cycles(urls: int, count: int, issue_rate: float, churn: float) -> list:
+    rng = random.Random(5)
+    open_issues = set(rng.sample(range(urls), int(urls * issue_rate)))
+    result = []
+    for _ in range(count):
+        result.append([(f"https://site{i}.example/", 'uptime', DETAILS[i % len(DETAILS)]) for i in sorted(open_issues)])
+        resolved = set(rng.sample(sorted(open_issues), int(len(open_issues) * churn)))
+        candidates = [i for i in rng.sample(range(urls), len(resolved) * 3) if i not in open_issues]
+        open_issues = (open_issues - resolved) | set(candidates[:len(resolved)])
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=20000)
+    parser.add_argument('--cycles', type=int, default=12)
+    parser.add_argument('--issue-rate', type=float, default=0.05)
+    parser.add_argument('--churn', type=float, default=0.05)
+    parser.add_argument('--latency', type=float, default=0.002)
+    parser.add_argument('--port', type=int, default=8097)
+    args = parser.parse_args()
+    server = subprocess.Popen([sys.executable, '-m', 'src.api.task_master_server',
+                               '--port', str(args.port), '--latency', str(args.latency)], stdout=subprocess.PIPE)
+    server.stdout.readline()
+    base_url = f"http://127.0.0.1:{args.port}"
+    found = cycles(args.urls, args.cycles, args.issue_rate, args.churn)
+    try:
+        client = TaskMasterClient(base_url)
+        sent = requests = 0
+        start = time.perf_counter()
+        for issues in found:
+            for url, issue_type, detail in issues:
+                alert = {"fingerprint": fingerprint(url, issue_type, detail), "url": url, "issue_type": issue_type,
+                         "severity": severity_of(detail), "detail": detail, "status": "new"}
+                client.post('/api/alerts/batch', json.dumps({"alerts": [alert]}).encode())
+                sent += 1
+                requests += 1
+        stateless = (sent, requests, time.perf_counter() - start)
+        client.close()
+
+        clock_now = [1_700_000_000.0]
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/alerts.sqlite3"
+            aggregator = AlertAggregator(path, clock=lambda: clock_now[0])
+            outbox = AlertOutbox(path, clock=lambda: clock_now[0])
+            client = TaskMasterClient(base_url)
+            sent = requests = 0
+            start = time.perf_counter()
+            for issues in found:
+                outbox.enqueue(aggregator.observe(issues))
+                counts = outbox.flush(client)
+                sent += counts['alerts']
+                requests += counts['sent'] + counts['retry'] + counts['dead']
+                clock_now[0] += 300
+            aggregated = (sent, requests, time.perf_counter() - start)
+            client.close()
+    finally:
+        server.terminate()
+    print(f"{args.urls} URLs, {args.cycles} cycles, {args.issue_rate:.0%} with issues, {args.churn:.0%} churn per cycle")
+    print(f"{'mode':<24} {'alerts sent':>12} {'requests':>9} {'seconds':>8}")
+    for name, (sent, requests, seconds) in (('stateless, per alert', stateless), ('aggregator + outbox', aggregated)):
+        print(f"{name:<24} {sent:>12} {requests:>9} {seconds:>8.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the API response layer on a dashboard-style polled endpoint.
+
+A FastAPI app serves the same tenant listing (--rows audit issue rows, built per request from
+in-memory data as a DB read would) in three ways, called in-process through ASGI (no network,
+so the numbers are the app's own cost):
+- before: the endpoint returns a dict (FastAPI's default JSON encoding, no compression, no ETag)
+- after: responses.ResponseCache + render(): orjson, cached per tenant, brotli or gzip
+- after, revalidating: the same, with the dashboard sending If-None-Match (304 while unchanged)
+
+Reports requests/sec and bytes served per request.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_api_responses [--requests 3000] [--rows 500]
+"""
+import time
+import random
+import asyncio
+import argparse
+from fastapi import FastAPI, Request, Response
+from src.api.responses import ResponseCache, render
+
+def listing(rows: int) -> dict:
+    rng = random.Random(1)
+    kinds = ('missing_title', 'slow_lcp', 'broken_link', 'redirect_chain', 'noindex')
+    return {"tenant_id": 1, "issues": [
+        {"id": i, "url": f"https://shop.example.com/products/item-{i}", "type": kinds[i % len(kinds)],
+         "severity": rng.choice(('critical', 'warning', 'info')), "detected_at": f"2026-10-{1 + i % 28:02d}T12:00:00Z",
+         "detail": f"Issue {i} found on the product page during the scheduled audit"}
+        for i in range(rows)
+    ]}
+
+def build_app(rows: int) -> FastAPI:
+    data = listing(rows)
+    cache = ResponseCache()
+    app = FastAPI()
+
+    def query():
+        # Stand-in for the DB read behind the endpoint
+        return {"tenant_id": data["tenant_id"], "issues": [dict(row) for row in data["issues"]]}
+
+    @app.get("/before")
+    def before():
+        return query()
+
+    @app.get("/after")
+    def after(request: Request):
+        body, _ = cache.get_or_build(1, "/after", query)
+        status_code, headers, content = render(
+            body, request.headers.get("if-none-match"), request.headers.get("accept-encoding")
+        )
+        return Response(content=content, status_code=status_code, headers=headers)
+
+    return app
+
+async def call(app, path: str, headers: dict) -> tuple:
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 8000),
+    }
+    sent = {'status': None, 'headers': {}, 'body': b''}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            sent['status'] = message['status']
+            sent['headers'] = {k.decode(): v.decode() for k, v in message['headers']}
+        else:
+            sent['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return sent['status'], sent['headers'], sent['body']
+
+async def run(app, path: str, requests: int, revalidate: bool) -> tuple:
+    headers = {'accept-encoding': 'gzip, deflate, br'}
+    total = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        status, response_headers, body = await call(app, path, headers)
+        total += len(body)
+        if revalidate and 'etag' in response_headers:
+            headers['if-none-match'] = response_headers['etag']
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, total / requests
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--rows', type=int, default=500)
+    args = parser.parse_args()
+    app = build_app(args.rows)
+    results = [
+        ('before', asyncio.run(run(app, '/before', args.requests, False))),
+        ('after', asyncio.run(run(app, '/after', args.requests, False))),
+        ('after, revalidating', asyncio.run(run(app, '/after', args.requests, True))),
+    ]
+    print(f"{args.rows}-row listing, {args.requests} requests per mode")
+    print(f"{'mode':<22} {'requests/s':>11} {'bytes/request':>14}")
+    for name, (rate, size) in results:
+        print(f"{name:<22} {rate:>11.0f} {size:>14.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark link-gap analysis: Python sets of referring-domain strings vs the backlink store.
+
+Generates a main domain and --competitors competitors with --links referring domains each, drawn
+with overlap from a shared pool, then times tiered prospect generation:
+- string sets: union of the competitors' sets minus the main domain's, tiered with a Counter
+  (the previous approach)
+- backlink store: link_gap() + tiers() over memory-mapped id arrays, plus name lookup for the
+  top --top prospects of each tier
+
+Store ingest (hashing and writing each profile) is reported separately; it happens once per
+backlink export, not per analysis.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_backlink_gap [--links 300000] [--competitors 10]
+"""
+import sys
+import time
+import argparse
+import tempfile
+from collections import Counter
+import numpy as np
+from src.api.backlink_store import BacklinkStore, link_gap, tiers
+
+def profiles(n_domains: int, links: int, seed: int = 11) -> list:
+    rng = np.random.default_rng(seed)
+    pool = links * 4
+    # Popular referring domains are shared by many sites (Zipf-like)
+    return [
+        [f"https://ref{k}.example.net/page" for k in np.unique((rng.pareto(1.2, links) * pool / 20).astype(np.int64) % pool)]
+        for _ in range(n_domains)
+    ]
+
+def string_sets(main: list, competitors: list) -> dict:
+    main_set = {url.split('/')[2] for url in main}
+    competitor_sets = [{url.split('/')[2] for url in profile} for profile in competitors]
+    counts = Counter()
+    for referring in competitor_sets:
+        counts.update(referring - main_set)
+    ranked = counts.most_common()
+    half = max(2, -(-len(competitors) // 2))
+    return {
+        'high': [d for d, c in ranked if c >= half],
+        'medium': [d for d, c in ranked if 2 <= c < half],
+        'low': [d for d, c in ranked if c < 2],
+    }, sum(sys.getsizeof(s) + sum(sys.getsizeof(d) for d in s) for s in [main_set, *competitor_sets])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--links', type=int, default=300000)
+    parser.add_argument('--competitors', type=int, default=10)
+    parser.add_argument('--top', type=int, default=1000)
+    args = parser.parse_args()
+    domains = ['main.com'] + [f"competitor{i}.com" for i in range(args.competitors)]
+    data = profiles(len(domains), args.links)
+
+    start = time.perf_counter()
+    baseline, baseline_bytes = string_sets(data[0], data[1:])
+    baseline_seconds = time.perf_counter() - start
+
+    store = BacklinkStore(tempfile.mkdtemp())
+    start = time.perf_counter()
+    for domain, sources in zip(domains, data):
+        store.put(domain, sources)
+    ingest_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    arrays = [store.ids(domain) for domain in domains]
+    gap, counts = link_gap(arrays[0], arrays[1:])
+    tiered = tiers(gap, counts, args.competitors)
+    names = store.lookup(domains[1:], np.concatenate([ids[:args.top] for ids in tiered.values()]))
+    store_seconds = time.perf_counter() - start
+    store_bytes = sum(a.nbytes for a in arrays)
+
+    assert {tier: len(ids) for tier, ids in tiered.items()} == {tier: len(d) for tier, d in baseline.items()}
+    print(f"{len(domains)} domains x ~{args.links} referring domains; prospects per tier: "
+          + ', '.join(f"{tier} {len(ids)}" for tier, ids in tiered.items()))
+    print(f"{'mode':<16} {'seconds':>8} {'set memory MB':>14}")
+    print(f"{'string sets':<16} {baseline_seconds:>8.2f} {baseline_bytes / 1e6:>14.1f}")
+    print(f"{'backlink store':<16} {store_seconds:>8.2f} {store_bytes / 1e6:>14.1f}   (ingest once: {ingest_seconds:.1f}s, {len(names)} names looked up)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark competitor backlink comparisons across tenants with overlapping competitor sets.
+
+--tenants tenants each compare their domain with --competitors competitors drawn from a pool of
+--pool shared competitors, against the local stand-in provider (--latency seconds per page of
+backlinks, at most 4 requests in flight). Modes:
+- serial, uncached: every comparison fetches the main domain and each competitor one after the
+  other (the previous compare_backlink_profiles)
+- profiler: BacklinkProfiler, concurrent fetches under the provider's limiter and profiles
+  shared through the cache
+- profiler, repeat: the same comparisons again within the TTL
+- profiler, next day: the same comparisons after the TTL: incremental refresh of each profile
+
+Reports seconds per comparison (first tenant and the rest) and provider requests.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_backlink_profiles [--tenants 20] [--competitors 10] [--pool 25]
+"""
+import time
+import random
+import argparse
+import tempfile
+from src.api.backlink_profiles import BacklinkProfiler, LocalBacklinkProvider, fold, new_profile
+from src.api.backlink_store import BacklinkStore
+from src.api.llm_cache import LLMCache
+
+DAY = 86400
+
+def fetch_serial(provider, domain: str) -> dict:
+    profile, cursor = new_profile(domain, provider.name), None
+    while True:
+        backlinks, cursor = provider.fetch(domain, cursor=cursor)
+        fold(profile, backlinks)
+        if cursor is None:
+            return profile
+
+def run(tenants, compare) -> tuple:
+    seconds = []
+    for domain, competitors in tenants:
+        start = time.perf_counter()
+        compare(domain, competitors)
+        seconds.append(time.perf_counter() - start)
+    return seconds[0], sum(seconds[1:]) / max(1, len(seconds) - 1)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=20)
+    parser.add_argument('--competitors', type=int, default=10)
+    parser.add_argument('--pool', type=int, default=25)
+    parser.add_argument('--latency', type=float, default=0.1)
+    args = parser.parse_args()
+    rng = random.Random(5)
+    pool = [f"competitor{i}.com" for i in range(args.pool)]
+    tenants = [(f"tenant{t}.com", rng.sample(pool, args.competitors)) for t in range(args.tenants)]
+    now = [time.time()]
+
+    rows = []
+    provider = LocalBacklinkProvider('serial', latency=args.latency, clock=lambda: now[0])
+    first, rest = run(tenants, lambda d, cs: [fetch_serial(provider, x) for x in [d, *cs]])
+    rows.append(('serial, uncached', first, rest, provider.calls))
+
+    tmp = tempfile.mkdtemp()
+    provider = LocalBacklinkProvider('profiler', latency=args.latency, clock=lambda: now[0])
+    profiler = BacklinkProfiler(provider, LLMCache(f"{tmp}/profiles.sqlite3", ttl=30 * DAY), BacklinkStore(f"{tmp}/store"),
+                                ttl=DAY, clock=lambda: now[0])
+    compare = lambda d, cs: profiler.profiles([d, *cs])
+    first, rest = run(tenants, compare)
+    rows.append(('profiler', first, rest, provider.calls))
+    calls = provider.calls
+    first, rest = run(tenants, compare)
+    rows.append(('profiler, repeat', first, rest, provider.calls - calls))
+    calls = provider.calls
+    now[0] += 2 * DAY
+    first, rest = run(tenants, compare)
+    rows.append(('profiler, next day', first, rest, provider.calls - calls))
+
+    print(f"{args.tenants} tenants x {args.competitors} competitors from a pool of {args.pool}, {args.latency}s per request")
+    print(f"{'mode':<20} {'first (s)':>10} {'others (s)':>11} {'requests':>9}")
+    for mode, first, rest, requests in rows:
+        print(f"{mode:<20} {first:>10.2f} {rest:>11.4f} {requests:>9}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark the cold-start import time of the process entry modules (see import_time.py).
+
+Each module in IMPORT_BUDGETS is imported in fresh interpreters with `python -X importtime`
+(fastest of --runs). Reports total import time, the repository's own share (excluding the
+framework packages the process needs anyway) against its budget, and the --top slowest
+imports outside those packages. Modules whose dependencies are not installed are skipped.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_import_time [--runs 5] [--top 8]
+"""
+import argparse
+from src.api.import_time import IMPORT_BUDGETS, check_budget
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+    print(f"{'module':<22} {'total ms':>9} {'own ms':>7} {'budget ms':>10}")
+    reports = []
+    for module, budget in IMPORT_BUDGETS.items():
+        try:
+            result = check_budget(module, runs=args.runs)
+        except ImportError as e:
+            print(f"{module:<22} skipped ({e})")
+            continue
+        print(f"{module:<22} {result['total_ms']:>9.1f} {result['own_ms']:>7.1f} {result['budget_ms']:>10.0f}")
+        reports.append((module, budget, result))
+    for module, budget, result in reports:
+        slowest = sorted(((ms, name) for name, ms in result['own_modules'].items() if name != module), reverse=True)
+        print(f"\n{module}: slowest imports outside {', '.join(budget['required'])}")
+        for ms, name in slowest[:args.top]:
+            print(f"  {ms:>8.1f} ms  {name}")
+        for violation in result['violations']:
+            print(f"  over budget: {violation}")
+
+if __name__ == '__main__':
+    main()
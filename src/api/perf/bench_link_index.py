@@ -0,0 +1,83 @@
+"""
+Benchmark the internal link index on a synthetic site.
+
+Pages mix Zipf-distributed filler words with words from one of --topics topics. Reports index
+build time, time per related() query, the projected time to suggest links for every page, the
+cost of incremental updates and of saving them, and precision@k (share of suggestions on the same topic).
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_link_index [--pages 100000] [--words 300] [--queries 1000]
+"""
+import os
+import time
+import random
+import tempfile
+import argparse
+import numpy as np
+from src.api.link_index import LinkIndex
+
+def synthetic_site(pages: int, words: int, topics: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    filler = [f"w{i}" for i in range(20000)]
+    topic_words = [[f"t{t}x{i}" for i in range(60)] for t in range(topics)]
+    site = []
+    for page in range(pages):
+        topic = page % topics
+        n_topic = int(words * 0.25)
+        tokens = [filler[min(int(z) - 1, len(filler) - 1)] for z in rng.zipf(1.3, words - n_topic)]
+        tokens += [topic_words[topic][i] for i in rng.integers(0, 60, n_topic)]
+        site.append((f"https://example.com/{topic}/{page}", ' '.join(tokens), f"page {page} {topic_words[topic][page % 60]}"))
+    return site
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--topics', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=3)
+    args = parser.parse_args()
+    site = synthetic_site(args.pages, args.words, args.topics)
+
+    index = LinkIndex()
+    start = time.perf_counter()
+    for url, text, title in site:
+        index.add(url, text, title)
+    index.compact()
+    build = time.perf_counter() - start
+
+    sample = random.Random(1).sample([url for url, _, _ in site], min(args.queries, len(site)))
+    start = time.perf_counter()
+    results = {url: index.related(url, args.k) for url in sample}
+    per_query = (time.perf_counter() - start) / len(sample)
+    same_topic = [url.split('/')[3] == hit.split('/')[3] for url, hits in results.items() for hit, _ in hits]
+
+    updates = random.Random(2).sample(site, min(1000, len(site)))
+    start = time.perf_counter()
+    for url, text, title in updates:
+        index.add(url, text[::-1], title)
+    index.related(updates[0][0], args.k)
+    per_update = (time.perf_counter() - start) / len(updates)
+    start = time.perf_counter()
+    index.compact()
+    compact = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'site')
+        start = time.perf_counter()
+        index.save(path)
+        full_save = time.perf_counter() - start
+        for url, text, title in updates[:10]:
+            index.add(url, text, title)
+        start = time.perf_counter()
+        index.save(path)
+        append_save = time.perf_counter() - start
+
+    print(f"pages: {len(site)}, terms: {len(index.vocab)}, postings: {len(index._doc_terms)}")
+    print(f"build: {build:.1f}s, compact: {compact:.1f}s, incremental update: {per_update * 1000:.2f}ms/page")
+    print(f"save: {full_save:.2f}s for the whole index, {append_save * 1000:.1f}ms for 10 changed pages")
+    print(f"related(): {per_query * 1000:.1f}ms/page, all pages (projected): {per_query * len(site) / 60:.1f} min")
+    print(f"precision@{args.k}: {sum(same_topic) / max(len(same_topic), 1):.3f}")
+
+if __name__ == '__main__':
+    main()
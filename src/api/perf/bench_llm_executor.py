@@ -0,0 +1,79 @@
+"""
+Benchmark LLM request throughput against the local fake server with emulated rate limits.
+
+The fake server answers after --latency seconds and allows --rpm requests and --tpm tokens
+per --window seconds (a scaled-down minute), returning 429 beyond that. Modes:
+- sequential: one blocking request at a time (the previous module-level call pattern)
+- concurrent, no limiter: the executor with client-side limits disabled; relies on 429 backoff
+- executor: the executor with requests/tokens limits matching the server's
+
+Reports completed requests/sec, tokens/sec and 429 responses received.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_llm_executor [--requests 300] [--rpm 100] [--tpm 20000] [--window 5]
+"""
+import json
+import time
+import asyncio
+import argparse
+import urllib.request
+from src.api.fake_llm_server import FakeLLMServer
+from src.api.llm_executor import LLMExecutor
+
+def prompts(count: int) -> list:
+    return [[{'role': 'user', 'content': f"Suggest updated content for https://example.com/page{i} " + 'x' * 200}]
+            for i in range(count)]
+
+def run_sequential(server, messages_list, max_tokens):
+    tokens = 0
+    for messages in messages_list:
+        body = json.dumps({'model': 'gpt-4o', 'messages': messages, 'max_tokens': max_tokens}).encode()
+        while True:
+            req = urllib.request.Request(f"{server.base_url}/chat/completions", body, {'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(req) as resp:
+                    tokens += json.load(resp)['usage']['total_tokens']
+                break
+            except urllib.error.HTTPError as e:
+                if e.code != 429:
+                    raise
+                time.sleep(float(e.headers.get('Retry-After', 1)))
+    return tokens
+
+def run_executor(server, messages_list, max_tokens, concurrency, rpm, tpm, window):
+    async def run():
+        executor = LLMExecutor(server.base_url, 'bench', max_concurrency=concurrency, rpm=rpm, tpm=tpm, period=window)
+        bodies = await asyncio.gather(*(
+            executor.complete('gpt-4o', messages, max_tokens=max_tokens) for messages in messages_list
+        ))
+        executor.transport.close()
+        return sum(b['usage']['total_tokens'] for b in bodies)
+    return asyncio.run(run())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--rpm', type=int, default=100, help="Server requests per window")
+    parser.add_argument('--tpm', type=int, default=20000, help="Server tokens per window")
+    parser.add_argument('--window', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--max-tokens', type=int, default=64)
+    args = parser.parse_args()
+    messages_list = prompts(args.requests)
+    modes = (
+        ('sequential', lambda s: run_sequential(s, messages_list, args.max_tokens)),
+        ('concurrent, no limiter', lambda s: run_executor(s, messages_list, args.max_tokens, args.concurrency, 10 ** 9, 10 ** 12, args.window)),
+        ('executor', lambda s: run_executor(s, messages_list, args.max_tokens, args.concurrency, args.rpm, args.tpm, args.window)),
+    )
+    print(f"{'mode':<24} {'seconds':>8} {'req/s':>8} {'tokens/s':>9} {'429s':>6}")
+    for name, run in modes:
+        server = FakeLLMServer(latency=args.latency, rpm=args.rpm, tpm=args.tpm, window=args.window).start()
+        start = time.perf_counter()
+        tokens = run(server)
+        seconds = time.perf_counter() - start
+        print(f"{name:<24} {seconds:>8.2f} {args.requests / seconds:>8.1f} {tokens / seconds:>9.0f} {server.rate_limited:>6}")
+        server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark the cost of hot-path log statements with and without sampling/rate limiting.
+
+Each scenario logs one record per simulated DB row insert through the redacting
+formatter into a null stream, mirroring audit_db.store_search_analytics:
+- unconditional: f-string message, every record formatted (the previous behaviour)
+- %-args: lazy %-style arguments, every record formatted
+- sampled 1/100: %-args behind LogRateLimitFilter(sample=100)
+- rate limited: %-args behind LogRateLimitFilter(rate=5, burst=20)
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_log_sampling [--rows 200000]
+"""
+import io
+import time
+import logging
+import argparse
+from src.api.logging_utils import PIIRedactionFormatter, LogRateLimitFilter
+
+ROW = {'query': 'running shoes', 'clicks': 100, 'impressions': 1000, 'ctr': 10.0, 'position': 1.2}
+
+def make_logger(name: str, rules: dict = None) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setFormatter(PIIRedactionFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    if rules:
+        logger.addFilter(LogRateLimitFilter(rules))
+    return logger
+
+def run_fstring(logger: logging.Logger, rows: int):
+    for i in range(rows):
+        row = dict(ROW, clicks=i)
+        logger.info(f"Inserting search_analytics for https://example.com (tenant 1): {row}")
+
+def run_args(logger: logging.Logger, rows: int):
+    for i in range(rows):
+        row = dict(ROW, clicks=i)
+        logger.info("Inserting search_analytics for %s (tenant %s): %s", "https://example.com", 1, row)
+
+def run_baseline(rows: int):
+    # The work without any logging, to show what the log statement costs on top
+    for i in range(rows):
+        dict(ROW, clicks=i)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+    scenarios = [
+        ('no logging', lambda: run_baseline(args.rows)),
+        ('unconditional f-string', lambda: run_fstring(make_logger('fstring'), args.rows)),
+        ('%-args', lambda: run_args(make_logger('args'), args.rows)),
+        ('%-args, sampled 1/100', lambda: run_args(make_logger('sampled', {None: {'sample': 100}}), args.rows)),
+        ('%-args, rate 5/s burst 20', lambda: run_args(make_logger('rate', {None: {'rate': 5, 'burst': 20}}), args.rows)),
+    ]
+    for name, fn in scenarios:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28} {elapsed * 1e6 / args.rows:>8.2f} us/row  {args.rows / elapsed:>12,.0f} rows/s")
+
+if __name__ == '__main__':
+    main()
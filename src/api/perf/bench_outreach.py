@@ -0,0 +1,72 @@
+"""
+Benchmark outreach delivery throughput against the local SMTP sink.
+
+The sink runs behind a proxy adding --latency seconds each way (a round trip costs 2 * latency).
+--messages messages go to distinct prospect domains, with rate limits high enough not to bind.
+Modes:
+- connection per message: smtplib.SMTP + sendmail + quit for every message
+- pooled: OutreachPipeline over --pool reused connections, one command per round trip
+- pooled + pipelining: the same with PIPELINING (one round trip per message)
+
+Reports messages/sec.
+
+Needs aiosmtpd (pip install aiosmtpd), which the API itself does not depend on.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_outreach [--messages 2000] [--pool 4] [--latency 0.002]
+"""
+import time
+import smtplib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from src.api.outreach import DEFAULT_TEMPLATE, OutreachPipeline, SMTPPool, iter_outreach_packets, packet_fields
+try:
+    from src.api.smtp_sink import SMTPSink
+except ImportError as e:
+    raise SystemExit(f"bench_outreach needs aiosmtpd for its local SMTP sink: {e}")
+
+SENDER = 'outreach@mine.com'
+
+def prospects(count: int) -> dict:
+    return {'high': [f"https://prospect{i}.com" for i in range(count)]}
+
+def connection_per_message(sink, count: int, workers: int) -> None:
+    def send(packet):
+        _, data = DEFAULT_TEMPLATE.render(SENDER, packet['contact']['email'], packet_fields(packet))
+        with smtplib.SMTP('127.0.0.1', sink.port) as conn:
+            conn.sendmail(SENDER, [packet['contact']['email']], data)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(send, iter_outreach_packets('mine.com', prospects(count))))
+
+def pipeline(sink, count: int, workers: int, pipelining: bool) -> None:
+    pool = SMTPPool('127.0.0.1', sink.port, size=workers)
+    OutreachPipeline(pool, sender_rate=1e9, recipient_rate=1e9, pipelining=pipelining).send(
+        iter_outreach_packets('mine.com', prospects(count)), sender=SENDER
+    )
+    pool.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--pool', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.002)
+    args = parser.parse_args()
+    modes = [
+        ('connection per message', lambda sink: connection_per_message(sink, args.messages, args.pool)),
+        ('pooled', lambda sink: pipeline(sink, args.messages, args.pool, False)),
+        ('pooled + pipelining', lambda sink: pipeline(sink, args.messages, args.pool, True)),
+    ]
+    print(f"{args.messages} messages, {args.pool} connections, {args.latency * 2 * 1000:.0f} ms round trip")
+    print(f"{'mode':<24} {'seconds':>8} {'messages/s':>11}")
+    for name, run in modes:
+        sink = SMTPSink(latency=args.latency).start()
+        start = time.perf_counter()
+        run(sink)
+        elapsed = time.perf_counter() - start
+        assert sink.count() == args.messages
+        sink.stop()
+        print(f"{name:<24} {elapsed:>8.2f} {args.messages / elapsed:>11.0f}")
+
+if __name__ == '__main__':
+    main()
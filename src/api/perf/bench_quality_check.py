@@ -0,0 +1,65 @@
+"""
+Benchmark batch AI-output quality checks against the per-keyword loop.
+
+Generates --documents drafts of --words words and --keywords required keywords (1-3 word phrases)
+from a shared vocabulary, then times:
+- per-keyword loop: openai_client.check_ai_output_quality for each document
+- automaton: check_ai_output_quality_batch in this process
+- automaton + pool: check_ai_output_quality_batch over --processes worker processes
+and checks that every mode returns the loop's verdicts and issues.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_quality_check [--documents 2000] [--words 800] [--keywords 300] [--processes 4]
+"""
+import time
+import random
+import argparse
+import tempfile
+from src.api.openai_client import check_ai_output_quality
+from src.api.quality_check import check_ai_output_quality_batch
+from src.api.tracing import JSONFileExporter, set_exporter
+
+def corpus(documents: int, words: int, keywords: int, seed: int = 3):
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9))) for _ in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    # Keywords are topical terms, not the most frequent words
+    phrases = [' '.join(rng.choices(vocabulary[500:], k=rng.randint(1, 3))) for _ in range(keywords)]
+    drafts = []
+    for _ in range(documents):
+        tokens = rng.choices(vocabulary, weights, k=words)
+        for phrase in rng.sample(phrases, keywords // 2):
+            tokens.insert(rng.randrange(len(tokens)), phrase)
+        drafts.append(' '.join(tokens).capitalize() + '.')
+    return drafts, phrases
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=800)
+    parser.add_argument('--keywords', type=int, default=300)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+    # Spans go to a throwaway file, not logs/ in the working tree
+    set_exporter(JSONFileExporter(f"{tempfile.mkdtemp()}/traces.jsonl"))
+    drafts, keywords = corpus(args.documents, args.words, args.keywords)
+
+    runs = (
+        ('per-keyword loop', lambda: [check_ai_output_quality(d, required_keywords=keywords) for d in drafts]),
+        ('automaton', lambda: check_ai_output_quality_batch(drafts, keywords)),
+        (f"automaton + {args.processes} processes", lambda: check_ai_output_quality_batch(drafts, keywords, processes=args.processes)),
+    )
+    print(f"{args.documents} documents x {args.words} words, {args.keywords} keywords")
+    print(f"{'mode':<28} {'seconds':>8} {'docs/s':>9}")
+    expected = None
+    for name, run in runs:
+        start = time.perf_counter()
+        results = run()
+        seconds = time.perf_counter() - start
+        print(f"{name:<28} {seconds:>8.2f} {args.documents / seconds:>9.0f}")
+        verdicts = [(r["compliant"], r["issues"]) for r in results]
+        expected = expected or verdicts
+        assert verdicts == expected, f"{name}: verdicts differ from the per-keyword loop"
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Simulate re-audit scheduling: fetches spent vs freshness achieved.
+
+URLs change as Poisson processes with a realistic mix of rates (mostly static pages, some
+weekly, a few daily or hourly). Each policy visits URLs over --days and is scored on:
+- fetches: total page fetches
+- freshness: time-weighted share of URLs whose last audit still matches the live page
+
+Policies: fixed hourly and daily cadences, and the adaptive change-rate scheduler
+(change_rate.next_interval) at --target freshness per URL.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_reaudit_scheduling [--urls 2000] [--days 60] [--target 0.95]
+"""
+import bisect
+import random
+import argparse
+from src.api.change_rate import DEFAULT_INTERVAL, next_interval
+
+HOUR, DAY = 3600, 86400
+# (share of URLs, mean seconds between changes)
+RATE_MIX = ((0.70, 60 * DAY), (0.20, 7 * DAY), (0.08, DAY), (0.02, 2 * HOUR))
+
+def change_times(rng: random.Random, mean_interval: float, horizon: float) -> list:
+    times, t = [], 0.0
+    while True:
+        t += rng.expovariate(1 / mean_interval)
+        if t >= horizon:
+            return times
+        times.append(t)
+
+def freshness(changes: list, visits: list, horizon: float) -> float:
+    """
+    Share of [first visit, horizon) during which no change happened since the latest visit.
+    """
+    fresh = 0.0
+    bounds = visits + [horizon]
+    for start, end in zip(bounds, bounds[1:]):
+        i = bisect.bisect_right(changes, start)
+        next_change = changes[i] if i < len(changes) else horizon
+        fresh += min(next_change, end) - start
+    return fresh / (horizon - visits[0])
+
+def fixed_visits(interval: float, horizon: float, offset: float) -> list:
+    visits, t = [], offset
+    while t < horizon:
+        visits.append(t)
+        t += interval
+    return visits
+
+def adaptive_visits(changes: list, horizon: float, offset: float, target: float) -> list:
+    visits = [offset]
+    checks = changed = 0
+    observed = 0.0
+    interval = DEFAULT_INTERVAL
+    while True:
+        t = visits[-1] + interval
+        if t >= horizon:
+            return visits
+        # Did the page change since the previous visit?
+        if bisect.bisect_right(changes, t) > bisect.bisect_right(changes, visits[-1]):
+            changed += 1
+        checks += 1
+        observed += t - visits[-1]
+        visits.append(t)
+        interval = next_interval(checks, changed, observed, target=target)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--target', type=float, default=0.95)
+    args = parser.parse_args()
+    rng = random.Random(11)
+    horizon = args.days * DAY
+    pages = []
+    for _ in range(args.urls):
+        roll, mean = rng.random(), RATE_MIX[-1][1]
+        for share, mean_interval in RATE_MIX:
+            if roll < share:
+                mean = mean_interval
+                break
+            roll -= share
+        pages.append((change_times(rng, mean, horizon), rng.uniform(0, HOUR)))
+    policies = (
+        ('fixed hourly', lambda ch, off: fixed_visits(HOUR, horizon, off)),
+        ('fixed daily', lambda ch, off: fixed_visits(DAY, horizon, off)),
+        (f'adaptive {args.target:.2f}', lambda ch, off: adaptive_visits(ch, horizon, off, args.target)),
+    )
+    print(f"{'policy':<16} {'fetches':>10} {'freshness':>10}")
+    for name, visits_for in policies:
+        fetches, fresh = 0, 0.0
+        for changes, offset in pages:
+            visits = visits_for(changes, offset)
+            fetches += len(visits)
+            fresh += freshness(changes, visits, horizon)
+        print(f"{name:<16} {fetches:>10} {fresh / len(pages):>10.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark PII redaction throughput in messages/sec.
+
+Compares the shared single-pass engine against the previous approach of one re.sub per
+PII type (the previous patterns, with their escaping fixed so both do the same work).
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_redaction [--messages 200000]
+"""
+import re
+import time
+import random
+import argparse
+from src.api.logging_utils import PIIRedactor
+
+SAMPLE_MESSAGES = [
+    "Inserting search_analytics for https://example.com (tenant {n}): {{'query': 'shoes', 'clicks': {n}}}",
+    "Audit agent task executed",
+    "Monitoring complete. {n} alerts generated.",
+    "Sending email to info@prospect-{n}.com for https://prospect-{n}.com (tier: high)",
+    "Request from 10.0.{m}.{n} completed in {n} ms",
+    "Created tenant 'acme' with id {n}",
+    "Discovery agent task executed",
+    "Automated content refresh for https://example.com/page{n} completed.",
+]
+
+LEGACY_PATTERNS = {
+    'email': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+    'phone': r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+    'ssn': r'\b\d{3}[-]?\d{2}[-]?\d{4}\b',
+    'credit_card': r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
+    'ip_address': r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',
+    'api_key': r'(?i)(api[_-]?key|secret[_-]?key|access[_-]?token)[=:]\s*[\w\-\.]+'
+}
+
+def legacy_redact(patterns: dict, text: str) -> str:
+    for name, pattern in patterns.items():
+        text = pattern.sub(f'[REDACTED {name.upper()}]', text)
+    return text
+
+def build_messages(count: int, distinct: int) -> list:
+    rng = random.Random(42)
+    pool = [
+        rng.choice(SAMPLE_MESSAGES).format(n=rng.randint(1, 999), m=rng.randint(0, 255))
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+def measure(fn, messages: list) -> float:
+    start = time.perf_counter()
+    for msg in messages:
+        fn(msg)
+    return len(messages) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--distinct', type=int, default=2000, help="Distinct messages in the stream")
+    args = parser.parse_args()
+    messages = build_messages(args.messages, args.distinct)
+    legacy_patterns = {name: re.compile(p) for name, p in LEGACY_PATTERNS.items()}
+    results = {
+        'legacy (one re.sub per type)': measure(lambda m: legacy_redact(legacy_patterns, m), messages),
+        'single-pass engine': measure(PIIRedactor().redact_pii, messages),
+    }
+    baseline = results['legacy (one re.sub per type)']
+    for name, rate in results.items():
+        print(f"{name:<32} {rate:>12,.0f} msg/s  ({rate / baseline:.1f}x)")
+
+if __name__ == '__main__':
+    main()
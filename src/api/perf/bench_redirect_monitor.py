@@ -0,0 +1,91 @@
+"""
+Benchmark redirect-chain monitoring against the local fixture server.
+
+The fixture server runs in its own process and answers after --latency seconds. URLs are a mix
+of plain pages (60%), short chains (25%), long chains (8%), loops (5%) and HEAD-less chains (2%).
+Modes:
+- urllib, sequential: urllib.request.urlopen (GET, redirects followed by urllib, no keep-alive)
+  for each URL of a --baseline sample
+- redirects.trace_redirects: async, pooled, HEAD first, --concurrency URLs in flight
+
+Reports URLs/min, requests/sec and connections opened.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_redirect_monitor [--urls 20000] [--latency 0.02] [--concurrency 500]
+"""
+import sys
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+from src.api.redirects import ConnectionPool, trace_redirects
+
+def fixture_urls(base: str, count: int) -> list:
+    rng = random.Random(3)
+    urls = []
+    for i in range(count):
+        r = rng.random()
+        if r < 0.60:
+            path = f"/ok/{i}"
+        elif r < 0.85:
+            path = f"/chain/2/{i}"
+        elif r < 0.93:
+            path = f"/chain/7/{i}"
+        elif r < 0.98:
+            path = f"/loop/3/0/{i}"
+        else:
+            path = f"/nohead/2/{i}"
+        urls.append(base + path)
+    return urls
+
+def urllib_sequential(urls: list) -> None:
+    for url in urls:
+        try:
+            urllib.request.urlopen(url, timeout=10).read()
+        except urllib.error.HTTPError:
+            pass  # loops end in "redirect loop" errors
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=20000)
+    parser.add_argument('--baseline', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--port', type=int, default=8098)
+    args = parser.parse_args()
+    server = subprocess.Popen([sys.executable, '-m', 'src.api.redirect_fixture_server',
+                               '--port', str(args.port), '--latency', str(args.latency)], stdout=subprocess.PIPE)
+    server.stdout.readline()
+    try:
+        base = f"http://127.0.0.1:{args.port}"
+        sample = fixture_urls(base, args.baseline)
+        start = time.perf_counter()
+        urllib_sequential(sample)
+        baseline = time.perf_counter() - start
+
+        urls = fixture_urls(base, args.urls)
+
+        async def sweep():
+            pool = ConnectionPool(per_host=args.concurrency)
+            results = await trace_redirects(urls, concurrency=args.concurrency, pool=pool)
+            pool.close()
+            return results, pool.opened
+
+        start = time.perf_counter()
+        results, opened = asyncio.run(sweep())
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+    requests = sum(len(r['hops']) for r in results)
+    flagged = sum(1 for r in results if r['issues'])
+    errors = sum(1 for r in results if r['error'])
+    print(f"{args.latency * 1000:.0f} ms server latency; {flagged} of {len(results)} URLs flagged, {errors} errors")
+    print(f"{'mode':<22} {'URLs':>6} {'seconds':>8} {'URLs/min':>9} {'requests/s':>11} {'connections':>12}")
+    print(f"{'urllib, sequential':<22} {len(sample):>6} {baseline:>8.2f} {len(sample) / baseline * 60:>9.0f} {'-':>11} {len(sample):>12}")
+    print(f"{'trace_redirects':<22} {len(urls):>6} {elapsed:>8.2f} {len(urls) / elapsed * 60:>9.0f} {requests / elapsed:>11.0f} {opened:>12}")
+
+if __name__ == '__main__':
+    main()
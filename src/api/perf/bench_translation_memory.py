@@ -0,0 +1,104 @@
+"""
+Benchmark segment-level translation memory on a templated site.
+
+Pages share a nav, product-spec lines, CTAs and a footer and differ in a few sentences. Both modes
+call the local fake model server (--latency seconds per request plus --latency-per-token per
+completion token):
+- whole page: one translation request per page and language (the previous behaviour)
+- translation memory, per page: openai_client.generate_multilingual_content for each page
+- translation memory, site batch: generate_multilingual_content_batch for all pages at once
+
+Each translation memory mode starts from an empty memory.
+
+Reports model requests, prompt characters sent and wall time.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_translation_memory [--pages 40] [--languages 5]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+LANGUAGES = ['es', 'fr', 'de', 'it', 'pt', 'nl', 'sv', 'pl', 'ja', 'zh', 'ko', 'tr']
+
+def site(pages: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    nav = "Home | Shop | Blenders | Kettles | Support | Contact us"
+    ctas = ["Add to cart.", "Free returns within 30 days.", "Subscribe to our newsletter for 10% off your first order."]
+    footer = ("Free shipping on orders over $50. Our support team answers within one business day. "
+              "Prices include VAT. All rights reserved.")
+    specs = [f"{name}: {value}" for name, value in (
+        ("Warranty", "two years, parts and labour"), ("Power", "1200 W"), ("Material", "stainless steel"),
+        ("Dishwasher safe", "yes, all removable parts"), ("Colour", "brushed silver"),
+    )]
+    nouns = ["blender", "kettle", "toaster", "mixer", "grinder", "juicer", "air fryer", "rice cooker"]
+    verbs = ["crushes ice in seconds", "heats water quietly", "is easy to clean", "saves counter space",
+             "keeps drinks warm", "comes with a recipe book"]
+    content = []
+    for i in range(pages):
+        noun = nouns[i % len(nouns)]
+        intro = f"Meet the model {i} {noun}. It {rng.choice(verbs)}, and it {rng.choice(verbs)}."
+        body = '\n'.join(rng.sample(specs, 4))
+        content.append(f"{nav}\n\n{intro}\n{body}\n{' '.join(ctas)}\n\n{footer}\n")
+    return content
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--languages', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--latency-per-token', type=float, default=0.0005)
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp()
+    os.environ['LLM_CACHE_PATH'] = os.path.join(tmp, 'llm.sqlite3')
+    os.environ['TRANSLATION_MEMORY_PATH'] = os.path.join(tmp, 'tm.sqlite3')
+    os.environ['TRACE_EXPORT_PATH'] = os.path.join(tmp, 'traces.jsonl')
+    from src.api.fake_llm_server import FakeLLMServer
+    server = FakeLLMServer(latency=args.latency, latency_per_token=args.latency_per_token).start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    from src.api import openai_client
+    from src.api.openai_client import (
+        get_openai_client, complete, generate_multilingual_content, generate_multilingual_content_batch
+    )
+
+    client = get_openai_client()
+    pages = site(args.pages)
+    languages = LANGUAGES[:args.languages]
+
+    def whole_page():
+        for content in pages:
+            for language in languages:
+                complete(client, "translation", content=content, language=language)
+
+    def fresh_memory(name):
+        openai_client.TRANSLATION_MEMORY_PATH = os.path.join(tmp, f"{name}.sqlite3")
+
+    def per_page():
+        fresh_memory('per_page')
+        for content in pages:
+            generate_multilingual_content(client, content, languages)
+
+    def site_batch():
+        fresh_memory('site_batch')
+        generate_multilingual_content_batch(client, pages, languages)
+
+    print(f"{args.pages} pages x {args.languages} languages")
+    print(f"{'mode':<32} {'requests':>9} {'prompt chars':>13} {'seconds':>8}")
+    modes = (
+        ('whole page', whole_page),
+        ('translation memory, per page', per_page),
+        ('translation memory, site batch', site_batch),
+    )
+    for name, run in modes:
+        server.requests.clear()
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        chars = sum(len(m['content']) for body in server.requests for m in body['messages'])
+        print(f"{name:<32} {len(server.requests):>9} {chars:>13} {seconds:>8.1f}")
+    server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark uptime history bookkeeping for a large monitored fleet (no network: checks are synthetic).
+
+Every sweep checks each URL once (95% 200, 2% 404, 2% 503, 1% no response, log-normal latency).
+Modes:
+- per-URL lists: a Python list of (ts, status, latency) per URL, trimmed to --capacity, with error
+  rates and np.percentile recomputed from each URL's list after every sweep (on a --baseline sample)
+- uptime.UptimeHistory: ring buffers with incremental counts and latency histograms
+
+Reports ms per sweep (record + classify + percentiles), bytes held per URL, and the snapshot's
+size and save/load times.
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_uptime [--urls 100000] [--sweeps 300] [--capacity 288]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+from src.api.uptime import UptimeHistory
+
+def synthetic_sweep(rng: np.random.Generator, count: int) -> tuple:
+    statuses = rng.choice([200, 404, 503, 0], size=count, p=[0.95, 0.02, 0.02, 0.01])
+    return statuses, rng.lognormal(4.5, 0.6, count).astype(np.float32)
+
+def list_sweep(histories: dict, urls: list, statuses, latencies, ts: int, capacity: int, short_window: int) -> None:
+    for url, status, latency in zip(urls, statuses.tolist(), latencies.tolist()):
+        history = histories.setdefault(url, [])
+        history.append((ts, status, latency))
+        del history[:-capacity]
+        errors = [s for _, s, _ in history if s == 0 or s >= 400]
+        recent = [s for _, s, _ in history[-short_window:] if s == 0 or s >= 400]
+        answered = [l for _, s, l in history if s]
+        if answered:
+            np.percentile(answered, (50, 95))
+        len(errors), len(recent)
+
+def deep_size(histories: dict) -> int:
+    size = sys.getsizeof(histories)
+    for url, history in histories.items():
+        size += sys.getsizeof(url) + sys.getsizeof(history)
+        for entry in history:
+            size += sys.getsizeof(entry) + sum(sys.getsizeof(v) for v in entry)
+    return size
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=100000)
+    parser.add_argument('--baseline', type=int, default=5000)
+    parser.add_argument('--sweeps', type=int, default=300)
+    parser.add_argument('--capacity', type=int, default=288)
+    args = parser.parse_args()
+    rng = np.random.default_rng(11)
+    urls = [f"https://site{i % 5000}.example/page/{i}" for i in range(args.urls)]
+
+    histories = {}
+    sample = urls[:args.baseline]
+    timings = []
+    for sweep in range(args.sweeps):
+        statuses, latencies = synthetic_sweep(rng, len(sample))
+        start = time.perf_counter()
+        list_sweep(histories, sample, statuses, latencies, sweep * 300, args.capacity, 3)
+        timings.append(time.perf_counter() - start)
+    # Histories fill up over the first `capacity` sweeps; time the last ones
+    baseline_ms = np.mean(timings[-20:]) * 1000
+    baseline_bytes = deep_size(histories) / len(sample)
+
+    history = UptimeHistory(capacity=args.capacity)
+    timings = []
+    for sweep in range(args.sweeps):
+        statuses, latencies = synthetic_sweep(rng, len(urls))
+        start = time.perf_counter()
+        history.record(urls, statuses, latencies, ts=1_700_000_000 + sweep * 300)
+        classes = history.classify()
+        history.percentiles(q=(50, 95))
+        timings.append(time.perf_counter() - start)
+    ring_ms = np.mean(timings[-20:]) * 1000
+    ring_bytes = sum(getattr(history, name).nbytes for name in
+                     ('ts', 'status', 'latency', 'head', 'count', 'short_errors', 'errors', 'streak', 'histogram'))
+    ring_bytes /= len(history.head)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'uptime')
+        start = time.perf_counter()
+        history.save(path)
+        save_s = time.perf_counter() - start
+        size = os.path.getsize(path + '.npz') + os.path.getsize(path + '.json')
+        start = time.perf_counter()
+        UptimeHistory.load(path)
+        load_s = time.perf_counter() - start
+
+    counts = {c: classes.count(c) for c in ('ok', 'transient', 'persistent', 'down')}
+    print(f"{args.sweeps} sweeps, history of {args.capacity} checks; last sweep: {counts}")
+    print(f"{'mode':<22} {'URLs':>7} {'ms/sweep':>9} {'us/URL':>7} {'bytes/URL':>10}")
+    print(f"{'per-URL lists':<22} {len(sample):>7} {baseline_ms:>9.1f} {baseline_ms * 1000 / len(sample):>7.2f} {baseline_bytes:>10.0f}")
+    print(f"{'UptimeHistory':<22} {len(urls):>7} {ring_ms:>9.1f} {ring_ms * 1000 / len(urls):>7.2f} {ring_bytes:>10.0f}")
+    print(f"snapshot: {size / 2**20:.1f} MB, saved in {save_s:.2f}s, loaded in {load_s:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark micro-batched URL checks against one Celery task per URL.
+
+Serves a small HTML page from a local fixture server and runs the `indexability` check for
+--urls URLs both ways, waiting for every item's result:
+- per-url: check_url.delay() per URL (one message, connection and DB transaction each)
+- batched: enqueue_url_checks() (items in Redis, one process_url_batch message per batch)
+
+Reports the task messages workers received (counted from worker `task-received` events, so
+process_url_batch continuations published by the workers themselves are included),
+messages/sec and URLs/sec for each mode.
+
+Requires the broker, Redis, the audit DB and a worker consuming the `audit` queue, e.g.:
+    celery -A src.api.celery_app worker -Q audit -c 8
+
+Usage (from the repository root):
+    python -m src.api.perf.bench_url_batches [--urls 2000]
+"""
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from celery.result import AsyncResult
+from src.api.celery_app import celery_app, check_url, enqueue_url_checks, process_url_batch
+from src.api.url_batches import URL_BATCH_MAX_WAIT
+from src.api.tracing import JSONFileExporter, set_exporter
+
+PAGE = b'<html><head><meta name="robots" content="index,follow"><title>t</title></head><body>ok</body></html>'
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+def start_fixture_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def wait_all(ids: list, timeout: float = 600) -> int:
+    """
+    Wait for every result; returns the number that failed.
+    """
+    deadline = time.monotonic() + timeout
+    failed = 0
+    for task_id in ids:
+        result = AsyncResult(task_id, app=celery_app)
+        result.get(timeout=max(deadline - time.monotonic(), 1), propagate=False)
+        failed += result.failed()
+    return failed
+
+class MessageCounter:
+    """
+    Counts task messages delivered to workers, by task name, from the workers' task-received events.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.counts = Counter()
+        self.ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._capture, daemon=True).start()
+        self.ready.wait(10)
+        self.app.control.enable_events()
+        time.sleep(1)
+
+    def _capture(self):
+        with self.app.connection_for_read() as conn:
+            receiver = self.app.events.Receiver(conn, handlers={'task-received': self._received})
+            self.ready.set()
+            receiver.capture(limit=None, timeout=None, wakeup=True)
+
+    def _received(self, event):
+        self.counts[event['name']] += 1
+
+    def settle(self, task_name: str, quiet: float = 2.0) -> int:
+        """
+        Wait until no new messages for task_name arrive for `quiet` seconds; returns the count.
+        """
+        count = -1
+        while count != self.counts[task_name]:
+            count = self.counts[task_name]
+            time.sleep(quiet)
+        return count
+
+def run_per_url(urls: list, counter: MessageCounter):
+    before = counter.counts[check_url.name]
+    start = time.perf_counter()
+    ids = [check_url.delay('indexability', url).id for url in urls]
+    failed = wait_all(ids)
+    elapsed = time.perf_counter() - start
+    return counter.settle(check_url.name) - before, elapsed, failed
+
+def run_batched(urls: list, counter: MessageCounter):
+    before = counter.counts[process_url_batch.name]
+    start = time.perf_counter()
+    ids = enqueue_url_checks('indexability', urls)
+    failed = wait_all(ids)
+    elapsed = time.perf_counter() - start
+    # Includes the continuations that found an empty queue once the items ran out
+    return counter.settle(process_url_batch.name, quiet=URL_BATCH_MAX_WAIT + 2) - before, elapsed, failed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=2000)
+    args = parser.parse_args()
+    # Spans go to a throwaway file, not logs/ in the working tree
+    set_exporter(JSONFileExporter(f"{tempfile.mkdtemp()}/traces.jsonl"))
+    server = start_fixture_server()
+    counter = MessageCounter(celery_app)
+    counter.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{'mode':<10} {'messages':>9} {'seconds':>9} {'msgs/sec':>10} {'urls/sec':>10} {'failed':>7}")
+    for name, run in (('per-url', run_per_url), ('batched', run_batched)):
+        urls = [f"{base}/{name}/{i}" for i in range(args.urls)]
+        messages, seconds, failed = run(urls, counter)
+        print(f"{name:<10} {messages:>9} {seconds:>9.2f} {messages / seconds:>10.1f} {len(urls) / seconds:>10.1f} {failed:>7}")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
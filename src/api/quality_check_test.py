@@ -0,0 +1,50 @@
+from quality_check import KeywordAutomaton, check_ai_output_quality_batch, check_document
+
+def test_automaton_finds_overlapping_phrases_with_offsets():
+    automaton = KeywordAutomaton(["SEO audit", "audit", "audit report", "site"])
+    text = "Our SEO Audit: the audit report covers your site."
+    assert automaton.find(text) == {
+        "SEO audit": [1],
+        "audit": [2, 4],
+        "audit report": [4],
+        "site": [8],
+    }
+
+def test_automaton_follows_failure_links():
+    automaton = KeywordAutomaton(["core web vitals", "web vitals report"])
+    assert automaton.find("core web vitals report") == {"core web vitals": [0], "web vitals report": [1]}
+    assert automaton.find("core core web vitals") == {"core web vitals": [1]}
+    assert automaton.find("core web page vitals report") == {}
+
+def test_whole_words_only():
+    assert KeywordAutomaton(["ai"]).find("She said AI, not ai-generated rain.") == {"ai": [2, 4]}
+
+def test_document_report_matches_single_check():
+    report = check_document(KeywordAutomaton(["schema", "backlinks"]), "Schema markup helps schema.org parsing.", min_length=100)
+    assert not report["compliant"]
+    assert report["issues"] == [
+        "Content too short (length 39 < 100)",
+        "Missing required keyword: backlinks",
+    ]
+    assert report["words"] == 6
+    assert report["keywords"] == {"schema": {"count": 2, "density": 2 / 6, "positions": [0, 3]}}
+
+def test_batch_with_process_pool_matches_in_process():
+    documents = [f"Draft {i} about internal links and page speed. " * (i % 5) for i in range(50)]
+    keywords = ["internal links", "page speed", "schema"]
+    expected = check_ai_output_quality_batch(documents, keywords, min_length=50)
+    assert check_ai_output_quality_batch(documents, keywords, min_length=50, processes=2, chunk_size=8) == expected
+    assert "page speed" not in expected[0]["keywords"]
+    assert expected[4]["keywords"]["page speed"]["count"] == 4
+
+def test_verdict_uses_substring_semantics_like_single_check():
+    from src.api.openai_client import check_ai_output_quality
+    keywords = ["backlink", "C++", "++", "Backlinks", "page speed", "rust", "rust", "co-op"]
+    documents = ["Build backlinks for C++ sites; check page speed.", "Trusted co-op guide", "C ++ and ++i"]
+    for document, report in zip(documents, check_ai_output_quality_batch(documents, keywords, min_length=10)):
+        single = check_ai_output_quality(document, min_length=10, required_keywords=keywords)
+        assert (report["compliant"], report["issues"]) == (single["compliant"], single["issues"])
+    # Present as substrings, but not as whole words: no statistics
+    report = check_document(KeywordAutomaton(keywords), documents[0], min_length=0)
+    assert "Missing required keyword: backlink" not in report["issues"]
+    assert set(report["keywords"]) == {"Backlinks", "C++", "page speed"}
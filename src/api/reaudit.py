@@ -0,0 +1,117 @@
+"""
+Adaptive re-audits driven by each URL's estimated change rate.
+
+url_schedule holds one row per tenant URL: its content-hash history, sitemap lastmod, GSC
+impressions and next_due_at, and serves as the priority queue of re-audits (indexed by
+tenant and due time).
+
+- sync_sitemap(): adds sitemap URLs (due now) and makes URLs with a newer lastmod due now
+- sync_gsc_impressions(): records per-page GSC impressions; a large move makes the URL due now
+  (both run per tenant with a site_url, fanned out from beat in celery_app.py)
+- dispatch_due(): every REAUDIT_DISPATCH_INTERVAL seconds (beat), claims each tenant's most
+  overdue URLs, at most crawl_budget_per_hour spread over the hour, and hands them out in batches
+- reaudit_batch(): fetches a batch over one session, hashes the visible content, reschedules
+  every URL from its updated change-rate estimate (change_rate.reschedule) in one transaction,
+  and returns the URLs that changed so the full checks run only for them
+"""
+import os
+import hashlib
+from contextlib import closing
+from datetime import datetime, timezone
+import requests
+from bs4 import BeautifulSoup
+from .audit_db import (
+    get_connection, get_tenant_crawl_budgets, get_tenant_sites, upsert_sitemap_urls, update_gsc_impressions,
+    claim_due_urls, get_url_schedules, update_url_schedules
+)
+from .change_rate import GSC_MOVEMENT_THRESHOLD, reschedule
+from .discovery import fetch_sitemap_entries
+from .gsc import fetch_page_impressions
+from .metrics import timed_get, PARSE_SECONDS
+from .tracing import start_span
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+REAUDIT_DISPATCH_INTERVAL = int(os.getenv('REAUDIT_DISPATCH_INTERVAL', 300))
+REAUDIT_BATCH_SIZE = int(os.getenv('REAUDIT_BATCH_SIZE', 50))
+# How long a dispatched URL is held back from re-dispatch while its re-audit runs
+REAUDIT_LEASE_SECONDS = int(os.getenv('REAUDIT_LEASE_SECONDS', 3600))
+
+def content_hash(html: str) -> str:
+    """
+    Hash of the page's visible text, so script/style churn (nonces, build ids) and whitespace
+    do not count as changes.
+    """
+    with PARSE_SECONDS.labels('html').time():
+        soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    text = ' '.join(soup.get_text(' ').split())
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def tenant_sites() -> dict:
+    with closing(get_connection()) as conn:
+        return get_tenant_sites(conn)
+
+def sync_sitemap(tenant_id: int, domain: str) -> list:
+    """
+    Returns:
+        list: The sitemap's URLs.
+    """
+    entries = fetch_sitemap_entries(domain)
+    with closing(get_connection()) as conn:
+        upsert_sitemap_urls(conn, tenant_id, entries)
+    return [url for url, _ in entries]
+
+def sync_gsc_impressions(tenant_id: int, site_url: str) -> int:
+    impressions = fetch_page_impressions(site_url)
+    if impressions:
+        with closing(get_connection()) as conn:
+            update_gsc_impressions(conn, tenant_id, impressions, GSC_MOVEMENT_THRESHOLD)
+    return len(impressions)
+
+def dispatch_due(publish) -> int:
+    """
+    Claim due URLs within each tenant's crawl budget and pass them to `publish(tenant_id, urls)`
+    in batches of REAUDIT_BATCH_SIZE.
+    Returns:
+        int: Number of URLs dispatched.
+    """
+    dispatched = 0
+    with closing(get_connection()) as conn:
+        for tenant_id, budget_per_hour in get_tenant_crawl_budgets(conn).items():
+            limit = -(-budget_per_hour * REAUDIT_DISPATCH_INTERVAL // 3600)
+            urls = claim_due_urls(conn, tenant_id, limit, REAUDIT_LEASE_SECONDS)
+            for i in range(0, len(urls), REAUDIT_BATCH_SIZE):
+                publish(tenant_id, urls[i:i + REAUDIT_BATCH_SIZE])
+            dispatched += len(urls)
+    return dispatched
+
+def reaudit_batch(tenant_id: int, urls: list) -> list:
+    """
+    Re-fetch URLs and reschedule them.
+    Returns:
+        list: URLs whose content changed since their previous check (or were seen for the first time).
+    """
+    now = datetime.now(timezone.utc)
+    with closing(get_connection()) as conn:
+        rows = get_url_schedules(conn, tenant_id, urls)
+    updated, changed = [], []
+    with start_span('reaudit.batch', tenant=tenant_id, urls=len(urls)), requests.Session() as session:
+        for url, row in rows.items():
+            try:
+                resp = timed_get(session, url, 'reaudit', 'page', timeout=10)
+                resp.raise_for_status()
+                new_hash = content_hash(resp.text)
+            except Exception as e:
+                logger.warning(f"Re-audit fetch failed for {url}: {e}")
+                new_hash = None
+            new_row = reschedule(row, new_hash, now)
+            first_visit = row['content_hash'] is None and new_hash is not None
+            if first_visit or new_row.get('last_changed_at') == now:
+                changed.append(url)
+            updated.append(new_row)
+    with closing(get_connection()) as conn:
+        update_url_schedules(conn, tenant_id, updated)
+    return changed
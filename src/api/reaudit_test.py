@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+import psycopg2
+import pytest
+from src.api import reaudit
+from src.api.audit_db import (
+    claim_due_urls, get_tenant_sites, get_url_schedules, update_url_schedules, upsert_sitemap_urls
+)
+from src.api.migrations.migration_runner import MIGRATIONS_DIR, parse_sql_steps, run_sql_step
+
+pgserver = pytest.importorskip('pgserver')
+
+@pytest.fixture(scope='module')
+def dsn(tmp_path_factory):
+    server = pgserver.get_server(str(tmp_path_factory.mktemp('pg')), cleanup_mode='stop')
+    # A non-UTC session zone: times written from Python and CURRENT_TIMESTAMP must still agree
+    dsn = server.get_uri() + '&options=-c%20timezone%3DAmerica/New_York'
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+        cur.execute("CREATE TABLE tenants (id SERIAL PRIMARY KEY, name TEXT NOT NULL);")
+    conn = psycopg2.connect(dsn)
+    with open(f"{MIGRATIONS_DIR}/006_add_url_schedule.sql") as f:
+        for step in parse_sql_steps(f.read()):
+            run_sql_step(conn, step)
+    conn.close()
+    yield dsn
+    server.cleanup()
+
+@pytest.fixture
+def conn(dsn, monkeypatch):
+    conn = psycopg2.connect(dsn)
+    monkeypatch.setattr(reaudit, 'get_connection', lambda: psycopg2.connect(dsn))
+    yield conn
+    conn.close()
+
+def create_tenant(conn, site_url=None) -> int:
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO tenants (name, site_url) VALUES (md5(random()::text), %s) RETURNING id;", (site_url,))
+        tenant_id = cur.fetchone()[0]
+    conn.commit()
+    return tenant_id
+
+def add_urls(conn, tenant_id, urls, at_check=None, due_in=timedelta(days=7)):
+    with conn.cursor() as cur:
+        for url in urls:
+            cur.execute("""
+                INSERT INTO url_schedule (tenant_id, url, gsc_impressions_at_check, last_checked_at, next_due_at)
+                VALUES (%s, %s, %s, %s, %s);
+            """, (tenant_id, url, at_check, datetime.now(timezone.utc) - timedelta(days=1),
+                  datetime.now(timezone.utc) + due_in))
+    conn.commit()
+
+def test_large_impression_move_makes_a_url_due(conn, monkeypatch):
+    tenant_id = create_tenant(conn, 'https://example.com/')
+    add_urls(conn, tenant_id, ['/up', '/flat', '/down'], at_check=1000)
+    add_urls(conn, tenant_id, ['/new'])  # no impressions at its last check yet
+    impressions = {'/up': 2000, '/flat': 1100, '/down': 600, '/new': 50000, '/unknown': 10}
+    monkeypatch.setattr(reaudit, 'fetch_page_impressions', lambda site_url: impressions)
+    assert reaudit.sync_gsc_impressions(tenant_id, 'https://example.com/') == 5
+    assert sorted(claim_due_urls(conn, tenant_id, 10, 3600)) == ['/down', '/up']
+    assert get_tenant_sites(conn)[tenant_id] == 'https://example.com/'
+    rows = get_url_schedules(conn, tenant_id, ['/flat', '/new'])
+    assert rows['/flat']['gsc_impressions'] == 1100 and rows['/new']['gsc_impressions'] == 50000
+
+def test_python_and_sql_times_agree_in_any_session_zone(conn):
+    tenant_id = create_tenant(conn)
+    add_urls(conn, tenant_id, ['/overdue', '/later'])
+    now = datetime.now(timezone.utc)
+    rows = get_url_schedules(conn, tenant_id, ['/overdue', '/later'])
+    rows['/overdue']['next_due_at'] = now - timedelta(minutes=1)
+    rows['/later']['next_due_at'] = now + timedelta(hours=1)
+    update_url_schedules(conn, tenant_id, list(rows.values()))
+    assert claim_due_urls(conn, tenant_id, 10, 3600) == ['/overdue']
+    leased = get_url_schedules(conn, tenant_id, ['/overdue'])['/overdue']['next_due_at']
+    assert timedelta(minutes=59) < leased - now < timedelta(minutes=61)
+
+def test_newer_sitemap_lastmod_makes_a_url_due(conn):
+    tenant_id = create_tenant(conn)
+    add_urls(conn, tenant_id, ['/edited', '/untouched'])
+    now = datetime.now(timezone.utc)
+    upsert_sitemap_urls(conn, tenant_id, [('/edited', now - timedelta(hours=1)), ('/untouched', now - timedelta(days=30)),
+                                          ('/added', None)])
+    assert sorted(claim_due_urls(conn, tenant_id, 10, 3600)) == ['/added', '/edited']
@@ -0,0 +1,143 @@
+"""
+Local HTTP server with redirect chains, loops and HEAD-less endpoints, for redirect monitoring
+tests and benchmarks.
+
+Paths (any suffix after them is kept, so many distinct URLs share one behaviour):
+- /ok: 200
+- /chain/<n>/...: <n> 301 redirects (relative Locations), then 200
+- /abs/<n>/...: the same with absolute Locations
+- /broken/<n>/...: <n> redirects, then 404
+- /loop/<k>/<i>/...: 302 to /loop/<k>/<i+1 mod k>/..., a loop of k URLs
+- /nohead/<n>/...: 405 to HEAD; to GET, <n> redirects through /nohead/ then 200
+- /slow/<ms>/...: 200 after <ms> milliseconds
+- /foreign/<kind>/...: 302 to a URL the monitor cannot follow: an ftp:// or mailto: URL, or (nohost)
+  an https URL without a host
+- anything else: 404
+
+Keep-alive HTTP/1.1 on asyncio in a background thread; `latency` delays every response.
+
+Usage:
+    server = RedirectFixtureServer().start()
+    ... server.url('/chain/3/page1') ...
+    server.stop()
+
+or standalone (from the repository root):
+    python -m src.api.redirect_fixture_server --port 8098
+"""
+import asyncio
+import argparse
+import threading
+
+_REASONS = {200: 'OK', 301: 'Moved Permanently', 302: 'Found', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+FOREIGN_LOCATIONS = {
+    'ftp': 'ftp://files.example.com/{rest}',
+    'mailto': 'mailto:webmaster@example.com',
+    'nohost': 'https:///{rest}',
+}
+
+def route(method: str, path: str) -> tuple:
+    """
+    Returns:
+        tuple: (status, Location or None, delay in seconds)
+    """
+    parts = path.split('?')[0].strip('/').split('/')
+    kind, args = parts[0], parts[1:]
+    try:
+        if kind == 'ok':
+            return 200, None, 0
+        if kind in ('chain', 'abs', 'broken', 'nohead'):
+            n, rest = int(args[0]), '/'.join(args[1:])
+            if kind == 'nohead' and method == 'HEAD':
+                return 405, None, 0
+            if n <= 0:
+                return (404 if kind == 'broken' else 200), None, 0
+            return 301, f"/{kind}/{n - 1}/{rest}", 0
+        if kind == 'loop':
+            k, i, rest = int(args[0]), int(args[1]), '/'.join(args[2:])
+            return 302, f"/loop/{k}/{(i + 1) % k}/{rest}", 0
+        if kind == 'slow':
+            return 200, None, int(args[0]) / 1000
+        if kind == 'foreign':
+            rest = '/'.join(args[1:])
+            return 302, FOREIGN_LOCATIONS[args[0]].format(rest=rest), 0
+    except (IndexError, KeyError, ValueError, ZeroDivisionError):
+        pass
+    return 404, None, 0
+
+class RedirectFixtureServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.requests = 0
+        self.methods = {}
+        self._loop = None
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def start(self) -> 'RedirectFixtureServer':
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(ready,), daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        async def shutdown():
+            self._server.close()
+            handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self, ready: threading.Event) -> None:
+        self._loop = loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                method, path = head.split(b' ', 2)[:2]
+                method, path = method.decode(), path.decode()
+                self.requests += 1
+                self.methods[method] = self.methods.get(method, 0) + 1
+                status, location, delay = route(method, path)
+                if delay or self.latency:
+                    await asyncio.sleep(delay + self.latency)
+                if location and path.startswith('/abs/'):
+                    location = self.base_url + location
+                body = f"{status}\n".encode()
+                lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}", f"Content-Length: {len(body)}"]
+                if location:
+                    lines.append(f"Location: {location}")
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + (b'' if method == 'HEAD' else body))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the redirect fixture server.")
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    server = RedirectFixtureServer(port=args.port, latency=args.latency)
+    print(f"Redirect fixture server on {server.base_url}")
+    server._run(threading.Event())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Redirect-chain tracing for the monitoring agent.
+
+trace_redirects() follows every URL's redirects concurrently on one event loop:
+- HEAD first; a 405/501 answer (or a connection dropped on HEAD) is retried with GET. GET bodies
+  are never read beyond a small redirect body: the connection is closed instead.
+- Hops are followed manually (Location resolved against the current URL) up to `max_hops`, and a
+  URL seen twice in one chain (visited set) is a loop
+- Only http(s) URLs with a host are requested: a Location to anything else (ftp:, mailto:, a
+  missing host) ends the chain with an issue
+- Every hop records its method, status, Location and latency (request sent to headers received,
+  including a new connection's setup)
+- A URL's whole chain is capped at `url_timeout` seconds; the hops traced so far are kept
+- Connections are HTTP/1.1 keep-alive, pooled per (scheme, host, port), with at most `per_host`
+  requests per origin and `concurrency` overall in flight. At most `max_idle` idle connections are
+  kept across all origins: the least recently used one is closed to make room
+
+redirect_fixture_server serves chains, loops and HEAD-less endpoints for tests and benchmarks.
+"""
+import os
+import ssl
+import time
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+from typing import Optional
+
+REDIRECT_CONCURRENCY = int(os.getenv('REDIRECT_CONCURRENCY', 200))
+REDIRECT_PER_HOST = int(os.getenv('REDIRECT_PER_HOST', 8))
+REDIRECT_MAX_IDLE = int(os.getenv('REDIRECT_MAX_IDLE', 100))
+REDIRECT_URL_TIMEOUT = float(os.getenv('REDIRECT_URL_TIMEOUT', 15.0))
+REDIRECT_MAX_HOPS = int(os.getenv('REDIRECT_MAX_HOPS', 10))
+USER_AGENT = 'JaffeBot-Monitor/1.0'
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+HEAD_FALLBACK_STATUSES = frozenset({405, 501})
+# Bodies up to this size are read so the connection can be reused; larger ones close it
+MAX_DRAIN_BYTES = 64 * 1024
+
+class _Response:
+    __slots__ = ('status', 'headers', 'reusable')
+
+    def __init__(self, status: int, headers: dict, reusable: bool):
+        self.status = status
+        self.headers = headers
+        self.reusable = reusable
+
+class ConnectionPool:
+    """
+    Idle keep-alive connections per origin (at most `max_idle` in all, least recently used closed
+    first), and the per-origin request limit.
+    """
+    def __init__(self, per_host: int = REDIRECT_PER_HOST, ssl_context: Optional[ssl.SSLContext] = None,
+                 max_idle: int = REDIRECT_MAX_IDLE):
+        self.per_host = per_host
+        self.max_idle = max_idle
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.opened = 0
+        self._idle = {}             # origin -> [(reader, writer)]
+        self._lru = OrderedDict()   # (reader, writer) -> origin, least recently put first
+        self._limits = {}           # origin -> Semaphore
+
+    def limit(self, origin: tuple) -> asyncio.Semaphore:
+        semaphore = self._limits.get(origin)
+        if semaphore is None:
+            semaphore = self._limits[origin] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    async def open(self, origin: tuple) -> tuple:
+        scheme, host, port = origin
+        self.opened += 1
+        return await asyncio.open_connection(host, port, ssl=self.ssl_context if scheme == 'https' else None)
+
+    def take(self, origin: tuple) -> Optional[tuple]:
+        idle = self._idle.get(origin)
+        if not idle:
+            return None
+        conn = idle.pop()
+        if not idle:
+            del self._idle[origin]
+        del self._lru[conn]
+        return conn
+
+    def put(self, origin: tuple, conn: tuple) -> None:
+        self._idle.setdefault(origin, []).append(conn)
+        self._lru[conn] = origin
+        while len(self._lru) > self.max_idle:
+            oldest, oldest_origin = self._lru.popitem(last=False)
+            idle = self._idle[oldest_origin]
+            idle.remove(oldest)
+            if not idle:
+                del self._idle[oldest_origin]
+            oldest[1].close()
+
+    def close(self) -> None:
+        for _, writer in self._lru:
+            writer.close()
+        self._idle.clear()
+        self._lru.clear()
+
+def _is_http(url: str) -> bool:
+    parts = urlsplit(url)
+    return parts.scheme.lower() in ('http', 'https') and bool(parts.hostname)
+
+def _origin(parts) -> tuple:
+    scheme = parts.scheme.lower()
+    return scheme, parts.hostname, parts.port or (443 if scheme == 'https' else 80)
+
+async def _read_response(reader: asyncio.StreamReader, method: str) -> _Response:
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    version, status = lines[0].split(' ', 2)[:2]
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    status = int(status)
+    reusable = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    if method != 'HEAD' and status >= 200 and status not in (204, 304):
+        length = headers.get('content-length')
+        if length is not None and 'transfer-encoding' not in headers and int(length) <= MAX_DRAIN_BYTES:
+            await reader.readexactly(int(length))
+        else:
+            reusable = False
+    return _Response(status, headers, reusable)
+
+async def request(pool: ConnectionPool, method: str, url: str) -> _Response:
+    """
+    One request on a pooled connection (retried once on a fresh one if a reused connection was
+    closed by the server).
+    """
+    parts = urlsplit(url)
+    origin = _origin(parts)
+    target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    host = parts.netloc.rpartition('@')[2]
+    data = (
+        f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n"
+        f"Accept: */*\r\nConnection: keep-alive\r\n\r\n"
+    ).encode('latin-1')
+    async with pool.limit(origin):
+        conn = pool.take(origin)
+        for attempt in range(2):
+            reused = conn is not None
+            if conn is None:
+                conn = await pool.open(origin)
+            reader, writer = conn
+            try:
+                writer.write(data)
+                response = await _read_response(reader, method)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                writer.close()
+                conn = None
+                if reused and not attempt and (not isinstance(e, asyncio.IncompleteReadError) or not e.partial):
+                    continue
+                raise
+            except BaseException:
+                # Timeout or cancellation mid-response: the connection state is unknown
+                writer.close()
+                raise
+            if response.reusable:
+                pool.put(origin, conn)
+            else:
+                writer.close()
+            return response
+
+async def trace(pool: ConnectionPool, url: str, max_hops: int, result: dict) -> None:
+    """
+    Follow `url`'s redirects, appending each hop to result['hops'] as it is traced.
+    """
+    if not _is_http(url):
+        raise ValueError(f"Not an http(s) URL: {url}")
+    visited = set()
+    current = url
+    while True:
+        visited.add(current.split('#')[0])
+        method = 'HEAD'
+        start = time.perf_counter()
+        try:
+            response = await request(pool, method, current)
+            if response.status in HEAD_FALLBACK_STATUSES:
+                method = 'GET'
+                response = await request(pool, method, current)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            if method == 'GET':
+                raise
+            method = 'GET'
+            response = await request(pool, method, current)
+        location = response.headers.get('location') if response.status in REDIRECT_STATUSES else None
+        result['hops'].append({
+            'url': current,
+            'method': method,
+            'status': response.status,
+            'location': location,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+        })
+        if not location:
+            return
+        target = urljoin(current, location)
+        if target.split('#')[0] in visited:
+            result['loop'] = True
+            result['issues'].append("Infinite redirect loop detected")
+            return
+        if not _is_http(target):
+            result['issues'].append(f"Redirect to a non-HTTP URL: {target}")
+            return
+        if len(result['hops']) >= max_hops:
+            return
+        current = target
+
+async def _trace_url(pool: ConnectionPool, limit: asyncio.Semaphore, url: str, max_hops: int, max_chain: int,
+                     url_timeout: float) -> dict:
+    result = {'url': url, 'hops': [], 'loop': False, 'issues': [], 'error': None}
+    start = time.perf_counter()
+    async with limit:
+        try:
+            await asyncio.wait_for(trace(pool, url, max_hops, result), url_timeout)
+        except asyncio.TimeoutError:
+            result['error'] = f"Timed out after {url_timeout:g}s"
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+    hops = result['hops']
+    result['redirect_chain'] = [hop['url'] for hop in hops]
+    if hops and hops[-1]['location']:
+        result['redirect_chain'].append(urljoin(hops[-1]['url'], hops[-1]['location']))
+    result['redirects'] = sum(1 for hop in hops if hop['location'])
+    result['final_url'] = hops[-1]['url'] if hops else url
+    result['status'] = hops[-1]['status'] if hops else None
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    if result['redirects'] > max_chain:
+        result['issues'].append("Redirect chain exceeds threshold")
+    if result['error']:
+        result['issues'].append(f"Request failed: {result['error']}")
+    elif result['status'] is not None and result['status'] >= 400 and result['redirects']:
+        result['issues'].append(f"Redirect chain ends in HTTP {result['status']}")
+    return result
+
+async def trace_redirects(urls: list, max_chain: int = 5, max_hops: int = REDIRECT_MAX_HOPS,
+                          concurrency: int = REDIRECT_CONCURRENCY, per_host: int = REDIRECT_PER_HOST,
+                          url_timeout: float = REDIRECT_URL_TIMEOUT, pool: Optional[ConnectionPool] = None) -> list:
+    """
+    Trace the redirect chains of `urls` concurrently.
+    Args:
+        max_chain: Chains with more redirects than this are flagged.
+        max_hops: Stop following after this many redirects.
+        url_timeout: Seconds allowed for one URL's whole chain.
+        pool: Reuse connections across calls (on the same event loop); by default one pool per call.
+    Returns:
+        list: Per URL (in order): url, hops (url, method, status, location, latency_ms),
+        redirect_chain, redirects, final_url, status, loop, error, elapsed_ms and issues.
+    """
+    own_pool = pool is None
+    pool = pool or ConnectionPool(per_host)
+    limit = asyncio.Semaphore(concurrency)
+    try:
+        return await asyncio.gather(*(
+            _trace_url(pool, limit, url, max(max_hops, max_chain + 1), max_chain, url_timeout) for url in urls
+        ))
+    finally:
+        if own_pool:
+            pool.close()
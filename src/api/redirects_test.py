@@ -0,0 +1,101 @@
+import asyncio
+from redirects import ConnectionPool, trace_redirects
+from redirect_fixture_server import RedirectFixtureServer
+
+def run(urls, **kwargs):
+    return asyncio.run(trace_redirects(urls, **kwargs))
+
+def test_chains_loops_and_head_fallback():
+    server = RedirectFixtureServer().start()
+    try:
+        ok, chain, absolute, loop, nohead, broken = run([
+            server.url('/ok'), server.url('/chain/3/a'), server.url('/abs/2/b'), server.url('/loop/3/0/c'),
+            server.url('/nohead/1/d'), server.url('/broken/1/e'),
+        ])
+    finally:
+        server.stop()
+    assert ok['redirects'] == 0 and ok['status'] == 200 and ok['issues'] == [] and ok['hops'][0]['method'] == 'HEAD'
+    assert chain['redirect_chain'] == [server.url(f'/chain/{n}/a') for n in (3, 2, 1, 0)]
+    assert [hop['status'] for hop in chain['hops']] == [301, 301, 301, 200] and chain['issues'] == []
+    assert all(hop['latency_ms'] >= 0 for hop in chain['hops'])
+    assert absolute['final_url'] == server.url('/abs/0/b') and absolute['status'] == 200
+    assert loop['loop'] and loop['redirects'] == 3 and loop['issues'] == ["Infinite redirect loop detected"]
+    assert loop['redirect_chain'][-1] == loop['redirect_chain'][0]
+    assert [hop['method'] for hop in nohead['hops']] == ['GET', 'GET'] and nohead['status'] == 200
+    assert broken['issues'] == ["Redirect chain ends in HTTP 404"]
+
+def test_long_chains_are_flagged_and_capped():
+    server = RedirectFixtureServer().start()
+    try:
+        long_chain, = run([server.url('/chain/50/x')], max_chain=5, max_hops=8)
+    finally:
+        server.stop()
+    assert long_chain['redirects'] == 8 and long_chain['issues'] == ["Redirect chain exceeds threshold"]
+
+def test_time_cap_per_url_keeps_traced_hops():
+    server = RedirectFixtureServer().start()
+    try:
+        slow, fast = run([server.url('/slow/2000/x'), server.url('/chain/1/y')], url_timeout=0.3)
+    finally:
+        server.stop()
+    assert slow['error'] == "Timed out after 0.3s" and slow['hops'] == [] and slow['issues'] == ["Request failed: Timed out after 0.3s"]
+    assert fast['error'] is None and fast['redirects'] == 1
+
+def test_connections_are_pooled_per_host():
+    server = RedirectFixtureServer().start()
+
+    async def sweep():
+        pool = ConnectionPool(per_host=2)
+        results = await trace_redirects([server.url(f'/chain/2/{i}') for i in range(40)], pool=pool)
+        pool.close()
+        return results, pool.opened
+
+    try:
+        results, opened = asyncio.run(sweep())
+    finally:
+        server.stop()
+    assert all(r['status'] == 200 for r in results) and opened == 2 and server.requests == 120
+
+class FakeWriter:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+def test_idle_connections_are_capped_across_hosts():
+    pool = ConnectionPool(max_idle=2)
+    a1, a2, b1 = (None, FakeWriter()), (None, FakeWriter()), (None, FakeWriter())
+    a, b = ('http', 'a.example', 80), ('http', 'b.example', 80)
+    pool.put(a, a1)
+    pool.put(b, b1)
+    pool.put(a, a2)  # over the cap: b1 was put before a2 but after a1
+    assert a1[1].closed and not b1[1].closed and not a2[1].closed
+    assert pool.take(a) is a2 and pool.take(a) is None
+    a3 = (None, FakeWriter())
+    pool.put(a, a2)
+    pool.put(a, a3)
+    assert b1[1].closed and pool.take(b) is None
+    pool.close()
+    assert a2[1].closed and a3[1].closed and pool.take(a) is None
+
+def test_unreachable_host_is_an_error():
+    result, = run(['http://127.0.0.1:9/never'], url_timeout=2)
+    assert result['error'] and result['hops'] == [] and result['issues'][0].startswith("Request failed")
+
+def test_non_http_locations_end_the_chain():
+    server = RedirectFixtureServer().start()
+    try:
+        ftp, mailto, nohost = run([server.url('/foreign/ftp/a'), server.url('/foreign/mailto/b'),
+                                   server.url('/foreign/nohost/c')])
+    finally:
+        server.stop()
+    assert ftp['issues'] == ["Redirect to a non-HTTP URL: ftp://files.example.com/a"]
+    assert mailto['issues'] == ["Redirect to a non-HTTP URL: mailto:webmaster@example.com"]
+    assert nohost['issues'] == ["Redirect to a non-HTTP URL: https:///c"]
+    for result in (ftp, mailto, nohost):
+        assert len(result['hops']) == 1 and result['status'] == 302 and result['error'] is None
+    assert server.requests == 3  # nothing was requested beyond the first hops
+
+def test_non_http_url_is_an_error():
+    result, = run(['mailto:webmaster@example.com'])
+    assert result['hops'] == [] and result['issues'] == ["Request failed: ValueError: Not an http(s) URL: mailto:webmaster@example.com"]
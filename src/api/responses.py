@@ -0,0 +1,202 @@
+"""
+JSON response layer for the API: fast serialization, compression, ETags and a per-tenant cache.
+
+- dumps(): orjson (datetimes, dataclasses and NumPy arrays serialize natively)
+- Bodies of RESPONSE_COMPRESS_MIN_BYTES or more are sent brotli- or gzip-encoded, whichever the
+  client accepts (brotli preferred; brotli is optional and gzip is used without it). Smaller
+  bodies are sent as is: compression would cost more than it saves.
+- Every body gets a strong ETag, a hash of its bytes; each encoding has its own tag ("<hash>",
+  "<hash>-gzip", "<hash>-br") as a strong validator must, and If-None-Match matching any of them
+  is answered 304 with no body. With Cache-Control: no-cache the dashboard revalidates on each
+  poll and only downloads what changed.
+- ResponseCache keeps built bodies per (tenant, request) for `ttl` seconds, with their encoded
+  variants computed once. invalidate(tenant) drops a tenant's entries in this process; the
+  optional `generation(tenant)` hook (re-read at most every `generation_check` seconds per
+  tenant) drops them when another process has written new audit data for the tenant.
+
+Framework-independent (render() returns status, headers and bytes); main.py adapts it to FastAPI.
+"""
+import os
+import gzip
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 30))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_CONTROL = 'private, no-cache'
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Returns:
+        str or None: 'br', 'gzip' or None (identity) for an Accept-Encoding header.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+    best = max(candidates, key=lambda name: accepted.get(name, accepted.get('*', 0.0)))
+    return best if accepted.get(best, accepted.get('*', 0.0)) > 0 else None
+
+class ResponseBody:
+    """
+    A serialized response body, its ETag, and its encoded variants (computed on first use).
+    """
+    __slots__ = ('content', 'tag', '_variants')
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.tag = hashlib.blake2b(content, digest_size=16).hexdigest()
+        self._variants = {}
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        return f'"{self.tag}-{encoding}"' if encoding else f'"{self.tag}"'
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.content
+        data = self._variants.get(encoding)
+        if data is None:
+            if encoding == 'br':
+                data = brotli.compress(self.content, quality=BROTLI_QUALITY)
+            else:
+                data = gzip.compress(self.content, GZIP_LEVEL, mtime=0)
+            self._variants[encoding] = data
+        return data
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """
+        Whether an If-None-Match header names this body (in any encoding).
+        """
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            if tag.startswith('W/'):
+                tag = tag[2:]  # If-None-Match uses the weak comparison
+            if tag.strip('"').split('-')[0] == self.tag:
+                return True
+        return False
+
+def render(body: ResponseBody, if_none_match: Optional[str] = None, accept_encoding: Optional[str] = None,
+           min_bytes: int = RESPONSE_COMPRESS_MIN_BYTES) -> tuple:
+    """
+    Returns:
+        tuple: (status, headers dict, content bytes); 304 with an empty body if the client's copy
+        is current.
+    """
+    encoding = negotiate_encoding(accept_encoding) if len(body.content) >= min_bytes else None
+    headers = {'ETag': body.etag(encoding), 'Cache-Control': CACHE_CONTROL, 'Vary': 'Accept-Encoding'}
+    if body.matches(if_none_match):
+        return 304, headers, b''
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    headers['Content-Type'] = 'application/json'
+    return 200, headers, body.encoded(encoding)
+
+class ResponseCache:
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 generation: Optional[Callable[[object], object]] = None, generation_check: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            generation: Current generation of a tenant's data (any comparable value), shared
+                between processes; None to rely on ttl and invalidate() only.
+            generation_check: Seconds a tenant's generation is trusted before it is read again.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = generation
+        self.generation_check = generation_check
+        self.clock = clock
+        self._entries = OrderedDict()  # (tenant, key) -> (expires, stamp, ResponseBody), least recently used first
+        self._epochs = {}              # tenant -> local invalidation count
+        self._generations = {}         # tenant -> (generation, read at)
+        self._lock = threading.Lock()
+
+    def _stamp(self, tenant, now: float) -> tuple:
+        generation = None
+        if self.generation is not None:
+            generation, read_at = self._generations.get(tenant, (None, None))
+            if read_at is None or now - read_at >= self.generation_check:
+                generation = self.generation(tenant)
+                self._generations[tenant] = (generation, now)
+        return self._epochs.get(tenant, 0), generation
+
+    def _lookup(self, tenant, key: str, now: float, stamp: tuple) -> Optional[ResponseBody]:
+        with self._lock:
+            entry = self._entries.get((tenant, key))
+            if entry is None:
+                return None
+            expires, entry_stamp, body = entry
+            if expires <= now or entry_stamp != stamp:
+                del self._entries[(tenant, key)]
+                return None
+            self._entries.move_to_end((tenant, key))
+            return body
+
+    def _store(self, tenant, key: str, content: bytes, stamp: tuple) -> ResponseBody:
+        body = ResponseBody(content)
+        with self._lock:
+            self._entries[(tenant, key)] = (self.clock() + self.ttl, stamp, body)
+            self._entries.move_to_end((tenant, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def get(self, tenant, key: str) -> Optional[ResponseBody]:
+        now = self.clock()
+        return self._lookup(tenant, key, now, self._stamp(tenant, now))
+
+    def put(self, tenant, key: str, content: bytes) -> ResponseBody:
+        return self._store(tenant, key, content, self._stamp(tenant, self.clock()))
+
+    def get_or_build(self, tenant, key: str, build: Callable[[], object]) -> tuple:
+        """
+        Returns:
+            tuple: (ResponseBody, hit)
+        """
+        now = self.clock()
+        # Stamped before building: data written meanwhile must invalidate what was built
+        stamp = self._stamp(tenant, now)
+        body = self._lookup(tenant, key, now, stamp)
+        if body is not None:
+            return body, True
+        return self._store(tenant, key, dumps(build()), stamp), False
+
+    def invalidate(self, tenant) -> None:
+        """
+        Drop a tenant's cached responses in this process (entries go lazily, on lookup or eviction).
+        """
+        with self._lock:
+            self._epochs[tenant] = self._epochs.get(tenant, 0) + 1
+            self._generations.pop(tenant, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
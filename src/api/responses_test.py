@@ -0,0 +1,75 @@
+import gzip
+import numpy as np
+import pytest
+from responses import ResponseBody, ResponseCache, brotli, dumps, negotiate_encoding, render
+
+needs_brotli = pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@needs_brotli
+def test_negotiation_prefers_brotli_and_honours_q_values():
+    assert negotiate_encoding('gzip, deflate, br') == 'br'
+    assert negotiate_encoding('gzip;q=1.0, br;q=0.5') == 'gzip'
+    assert negotiate_encoding('br;q=0, gzip') == 'gzip'
+    assert negotiate_encoding('*') == 'br'
+    assert negotiate_encoding('identity') is None and negotiate_encoding(None) is None
+
+@needs_brotli
+def test_render_compresses_large_bodies_and_answers_304():
+    content = {"links": [{"url": f"https://example.com/page/{i}", "score": np.float32(i / 3)} for i in range(200)]}
+    body = ResponseBody(dumps(content))
+    status, headers, data = render(body, accept_encoding='gzip, br')
+    assert status == 200 and headers['Content-Encoding'] == 'br' and brotli.decompress(data) == body.content
+    assert headers['ETag'] == f'"{body.tag}-br"' and len(data) < len(body.content) / 4
+    status, headers, data = render(body, accept_encoding='gzip')
+    assert gzip.decompress(data) == body.content and headers['ETag'] == f'"{body.tag}-gzip"'
+    assert render(body, accept_encoding='gzip')[2] is data  # encoded once
+    status, headers, data = render(body, if_none_match=f'"other", W/"{body.tag}-gzip"', accept_encoding='br')
+    assert status == 304 and data == b'' and headers['ETag'] == f'"{body.tag}-br"'
+    small = ResponseBody(dumps({"audits": []}))
+    status, headers, data = render(small, accept_encoding='br')
+    assert status == 200 and 'Content-Encoding' not in headers and data == b'{"audits":[]}'
+    assert render(small, if_none_match='"0123"')[0] == 200
+
+def test_cache_ttl_invalidation_and_generations():
+    clock = Clock()
+    generations = {1: 0, 2: 0}
+    reads = []
+
+    def generation(tenant):
+        reads.append(tenant)
+        return generations[tenant]
+
+    cache = ResponseCache(ttl=30, generation=generation, generation_check=1.0, clock=clock)
+    builds = []
+
+    def build(value):
+        return lambda: builds.append(value) or {"value": value}
+
+    first, hit = cache.get_or_build(1, '/a', build(1))
+    assert not hit and cache.get_or_build(1, '/a', build(2)) == (first, True) and builds == [1]
+    cache.get_or_build(2, '/a', build(3))
+    assert len(reads) == 2  # each tenant's generation read once within generation_check
+
+    cache.invalidate(1)
+    assert cache.get(1, '/a') is None and cache.get(2, '/a') is not None
+
+    cache.get_or_build(1, '/a', build(4))
+    generations[1] += 1  # another process wrote audit data for tenant 1
+    assert cache.get(1, '/a') is not None  # generation not re-read yet
+    clock.now += 1
+    assert cache.get(1, '/a') is None and cache.get(2, '/a') is not None
+    clock.now += 30
+    assert cache.get(2, '/a') is None
+
+def test_cache_is_bounded():
+    cache = ResponseCache(max_entries=3)
+    for i in range(5):
+        cache.put(1, f'/{i}', b'{}')
+    assert len(cache) == 3 and cache.get(1, '/0') is None and cache.get(1, '/4') is not None
@@ -0,0 +1,147 @@
+"""
+Per-tenant fair scheduling of agent tasks.
+
+Tenant work is not published to the Celery queues directly. enqueue_tenant_task() appends it to
+a Redis list per (lane, tenant), and dispatch_pending() releases at most SCHEDULER_MAX_INFLIGHT
+tasks at a time to the broker, choosing them with fair_share.plan_dispatch() (weighted
+round-robin across lanes and tenants, per-tenant concurrency caps from the tenants table).
+Because the broker queues stay short, a small interactive audit waits for a free slot, not for
+another tenant's backlog.
+
+Dispatch runs right after an enqueue, after each scheduled task finishes (task_postrun in
+celery_app.py), and every few seconds from beat as a safety net. One dispatcher runs at a time.
+
+Redis keys:
+- sched:q:{lane}:{tenant_id}  queued jobs (JSON)
+- sched:tenants:{lane}        tenants that have used the lane
+- sched:running               "{tenant_id}:{task_id}" of dispatched tasks, scored by dispatch time
+- sched:state                 round-robin scores carried between dispatch rounds
+"""
+import os
+import json
+import time
+import uuid
+from contextlib import closing
+from typing import Optional
+from .locks import get_redis, acquire_lock, release_lock
+from .audit_db import get_connection, get_tenant_schedules
+from .fair_share import LANES, LANE_PRIORITY, TenantPolicy, plan_dispatch
+from .metrics import SCHEDULER_DISPATCHED_TOTAL
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Tasks released to the broker and not yet finished, across all tenants
+SCHEDULER_MAX_INFLIGHT = int(os.getenv('SCHEDULER_MAX_INFLIGHT', 64))
+# A dispatched task not reported finished within this time (e.g. its worker was killed) stops counting
+SCHEDULER_INFLIGHT_TTL = int(os.getenv('SCHEDULER_INFLIGHT_TTL', 3600))
+# How long tenant weights and caps are cached before being re-read from the DB
+SCHEDULER_POLICY_TTL = int(os.getenv('SCHEDULER_POLICY_TTL', 60))
+DISPATCH_LOCK = 'scheduler_dispatch'
+
+_policies = {}
+_policies_loaded_at = 0.0
+
+def _load_policies() -> dict:
+    global _policies, _policies_loaded_at
+    if time.monotonic() - _policies_loaded_at > SCHEDULER_POLICY_TTL:
+        try:
+            with closing(get_connection()) as conn:
+                schedules = get_tenant_schedules(conn)
+            _policies = {tenant: TenantPolicy(weight, cap) for tenant, (weight, cap) in schedules.items()}
+        except Exception as e:
+            # Keep scheduling with the last known (or default) policies
+            logger.warning(f"Could not load tenant schedules: {e}")
+        _policies_loaded_at = time.monotonic()
+    return _policies
+
+def enqueue_tenant_task(task_name: str, args: tuple = (), kwargs: Optional[dict] = None, *, tenant_id: int,
+                        lane: str = 'interactive', queue: Optional[str] = None, task_id: Optional[str] = None) -> str:
+    """
+    Queue a task for a tenant in a priority lane.
+    Returns:
+        str: The Celery task id the task will run under.
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane {lane!r}; expected one of {LANES}")
+    task_id = task_id or str(uuid.uuid4())
+    job = {
+        'task': task_name, 'args': list(args), 'kwargs': kwargs or {}, 'queue': queue,
+        'task_id': task_id, 'enqueued_at': time.time(),
+    }
+    pipe = get_redis().pipeline()
+    pipe.rpush(f"sched:q:{lane}:{tenant_id}", json.dumps(job))
+    pipe.sadd(f"sched:tenants:{lane}", tenant_id)
+    pipe.execute()
+    return task_id
+
+def task_finished(tenant_id, task_id: str) -> None:
+    get_redis().zrem('sched:running', f"{tenant_id}:{task_id}")
+
+def _pending_counts(r) -> dict:
+    tenants = {lane: [int(t) for t in r.smembers(f"sched:tenants:{lane}")] for lane in LANES}
+    pipe = r.pipeline()
+    for lane in LANES:
+        for tenant in tenants[lane]:
+            pipe.llen(f"sched:q:{lane}:{tenant}")
+    lengths = iter(pipe.execute())
+    return {lane: {tenant: next(lengths) for tenant in tenants[lane]} for lane in LANES}
+
+def _running_counts(r) -> dict:
+    r.zremrangebyscore('sched:running', '-inf', time.time() - SCHEDULER_INFLIGHT_TTL)
+    running = {}
+    for member in r.zrange('sched:running', 0, -1):
+        tenant = int(member.split(':', 1)[0])
+        running[tenant] = running.get(tenant, 0) + 1
+    return running
+
+def _load_state(r) -> dict:
+    raw = json.loads(r.get('sched:state') or '{}')
+    # JSON object keys are strings; tenant ids are ints
+    return {key: (scores if key == 'lanes' else {int(t): v for t, v in scores.items()}) for key, scores in raw.items()}
+
+def dispatch_pending(app) -> int:
+    """
+    Release queued tenant tasks into free slots. Returns the number dispatched (0 if another
+    dispatcher is running). If publishing fails, the job goes back to the head of its queue and
+    the round stops.
+    """
+    token = acquire_lock(DISPATCH_LOCK, 30)
+    if token is None:
+        return 0
+    try:
+        r = get_redis()
+        running = _running_counts(r)
+        capacity = SCHEDULER_MAX_INFLIGHT - sum(running.values())
+        if capacity <= 0:
+            return 0
+        state = _load_state(r)
+        picks = plan_dispatch(_pending_counts(r), running, _load_policies(), capacity, state)
+        dispatched = 0
+        for lane, tenant in picks:
+            raw = r.lpop(f"sched:q:{lane}:{tenant}")
+            if raw is None:
+                continue
+            job = json.loads(raw)
+            member = f"{tenant}:{job['task_id']}"
+            r.zadd('sched:running', {member: time.time()})
+            try:
+                app.send_task(
+                    job['task'], args=job['args'], kwargs=job['kwargs'], task_id=job['task_id'], queue=job['queue'],
+                    priority=LANE_PRIORITY[lane],
+                    headers={'sched_tenant': tenant, 'sched_lane': lane, 'sched_enqueued_at': job['enqueued_at']},
+                )
+            except Exception as e:
+                # Put the job back at the head of its queue and free its slot; the next dispatch retries it
+                pipe = r.pipeline()
+                pipe.lpush(f"sched:q:{lane}:{tenant}", raw)
+                pipe.zrem('sched:running', member)
+                pipe.execute()
+                logger.error(f"Publishing {job['task']} for tenant {tenant} failed, job requeued: {e}")
+                break
+            SCHEDULER_DISPATCHED_TOTAL.labels(lane).inc()
+            dispatched += 1
+        r.set('sched:state', json.dumps(state))
+        return dispatched
+    finally:
+        release_lock(DISPATCH_LOCK, token)
@@ -0,0 +1,47 @@
+import json
+import pytest
+from src.api import scheduler
+
+fakeredis = pytest.importorskip('fakeredis')
+
+class FakeApp:
+    """send_task() records published jobs; the first `failures` calls raise like an unreachable broker."""
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+
+    def send_task(self, name, args=None, kwargs=None, task_id=None, **options):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('broker unreachable')
+        self.sent.append((name, args, task_id))
+
+@pytest.fixture
+def r(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(scheduler, 'get_redis', lambda: client)
+    monkeypatch.setattr(scheduler, 'acquire_lock', lambda name, ttl: 'token')
+    monkeypatch.setattr(scheduler, 'release_lock', lambda name, token: None)
+    monkeypatch.setattr(scheduler, '_load_policies', lambda: {})
+    return client
+
+def test_dispatch_publishes_and_tracks_running_tasks(r):
+    ids = [scheduler.enqueue_tenant_task('audit', ('a.com',), tenant_id=7, lane='interactive') for _ in range(2)]
+    app = FakeApp()
+    assert scheduler.dispatch_pending(app) == 2
+    assert [task_id for _, _, task_id in app.sent] == ids
+    assert sorted(r.zrange('sched:running', 0, -1)) == sorted(f"7:{task_id}" for task_id in ids)
+    scheduler.task_finished(7, ids[0])
+    assert r.zrange('sched:running', 0, -1) == [f"7:{ids[1]}"]
+
+def test_failed_publish_requeues_the_job_and_frees_its_slot(r):
+    first = scheduler.enqueue_tenant_task('audit', ('a.com',), tenant_id=7)
+    second = scheduler.enqueue_tenant_task('audit', ('b.com',), tenant_id=7)
+    app = FakeApp(failures=1)
+    assert scheduler.dispatch_pending(app) == 0
+    assert app.sent == [] and r.zcard('sched:running') == 0
+    assert [json.loads(job)['task_id'] for job in r.lrange('sched:q:interactive:7', 0, -1)] == [first, second]
+    # The broker is back: both jobs go out in their original order
+    assert scheduler.dispatch_pending(app) == 2
+    assert [task_id for _, _, task_id in app.sent] == [first, second]
+    assert r.llen('sched:q:interactive:7') == 0
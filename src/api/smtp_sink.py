@@ -0,0 +1,123 @@
+"""
+Local SMTP sink (aiosmtpd) for outreach tests and benchmarks.
+
+Accepts every message on 127.0.0.1 and keeps (sender, recipients, content) in `messages`, except:
+- recipients whose local part starts with "bounce" are rejected with 550 (a hard bounce)
+- recipients whose local part starts with "defer" are rejected with 451 (try again later)
+- recipients whose local part starts with "drop" make it close the connection
+
+It advertises PIPELINING. `latency` emulates a network: a forwarding proxy in front of the server
+delays every chunk by `latency` seconds each way without serializing them, so a round trip costs
+2 * latency and pipelined commands share one. Clients connect to `port` (the proxy, if any).
+
+Usage:
+    sink = SMTPSink(latency=0.005).start()
+    ... smtplib.SMTP('127.0.0.1', sink.port) ...
+    sink.stop()
+
+or standalone (from the repository root):
+    python -m src.api.smtp_sink --port 8025 --latency 0.005
+"""
+import time
+import socket
+import asyncio
+import argparse
+import threading
+from aiosmtpd.controller import Controller
+
+class _Handler:
+    def __init__(self, sink: 'SMTPSink'):
+        self.sink = sink
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        return responses[:-1] + ['250-PIPELINING', responses[-1]]
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        local = address.split('@')[0].lower()
+        if local.startswith('drop'):
+            server.transport.close()
+            return '421 4.3.0 Closing connection'
+        if local.startswith('bounce'):
+            return '550 5.1.1 Mailbox unavailable'
+        if local.startswith('defer'):
+            return '451 4.3.0 Try again later'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.sink._lock:
+            self.sink.messages.append((envelope.mail_from, list(envelope.rcpt_tos), envelope.content))
+        return '250 Message accepted for delivery'
+
+def _free_port(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+class SMTPSink:
+    def __init__(self, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency
+        self.host = host
+        self.messages = []
+        self._lock = threading.Lock()
+        server_port = _free_port(host) if latency or not port else port
+        self.controller = Controller(_Handler(self), hostname=host, port=server_port)
+        self.port = server_port if not latency else port or _free_port(host)
+        self._loop = None
+        self._proxy = None
+
+    def start(self) -> 'SMTPSink':
+        self.controller.start()
+        if self.latency:
+            ready = threading.Event()
+            threading.Thread(target=self._run_proxy, args=(ready,), daemon=True).start()
+            ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self.controller.stop()
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self.messages)
+
+    def _run_proxy(self, ready: threading.Event) -> None:
+        self._loop = loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        async def pump(reader, writer):
+            # Deliver each chunk `latency` after it was read, in order
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    loop.call_later(self.latency, writer.close)
+                    return
+                loop.call_later(self.latency, writer.write, data)
+
+        async def handle(client_reader, client_writer):
+            server_reader, server_writer = await asyncio.open_connection(self.host, self.controller.port)
+            await asyncio.gather(pump(client_reader, server_writer), pump(server_reader, client_writer))
+
+        self._proxy = loop.run_until_complete(asyncio.start_server(handle, self.host, self.port))
+        ready.set()
+        loop.run_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink.")
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    sink = SMTPSink(latency=args.latency, port=args.port).start()
+    print(f"SMTP sink on {sink.host}:{sink.port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{sink.count()} messages received")
+    except KeyboardInterrupt:
+        sink.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Local stand-in for the Task Master alert API, for tests and benchmarks.
+
+Serves POST /api/alerts/batch on 127.0.0.1: a JSON body {"alerts": [...]} as built by
+alerts.AlertAggregator. Each alert opens, updates or resolves a ticket keyed by its
+fingerprint; a batch whose Idempotency-Key was already applied is acknowledged without being
+applied again. Answers 202 {"accepted": n, "duplicate": bool}.
+
+fail(n, status) makes the next n requests fail with `status` (with Retry-After if `retry_after`
+is set), to emulate an outage; `latency` delays every response.
+
+Usage:
+    server = TaskMasterServer().start()
+    client = alerts.TaskMasterClient(server.base_url)
+    ...
+    server.stop()
+
+or standalone (from the repository root):
+    python -m src.api.task_master_server --port 8097
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class TaskMasterServer:
+    def __init__(self, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self.batches = 0
+        self.tickets = {}   # fingerprint -> {'status', 'severity', 'updates', ...}
+        self._applied = set()
+        self._failures = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'TaskMasterServer':
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def fail(self, n: int, status: int = 503, retry_after: float = None) -> None:
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * n)
+
+    def apply(self, key: str, body: dict) -> tuple:
+        """
+        Returns:
+            tuple: (HTTP status, headers dict, response body dict)
+        """
+        with self._lock:
+            self.requests += 1
+            if self._failures:
+                status, retry_after = self._failures.pop(0)
+                headers = {'Retry-After': f"{retry_after:g}"} if retry_after is not None else {}
+                return status, headers, {'error': 'Service unavailable'}
+            alerts = body.get('alerts')
+            if not isinstance(alerts, list):
+                return 400, {}, {'error': 'Expected {"alerts": [...]}'}
+            if key:
+                if key in self._applied:
+                    return 202, {}, {'accepted': len(alerts), 'duplicate': True}
+                self._applied.add(key)
+            self.batches += 1
+            for alert in alerts:
+                ticket = self.tickets.setdefault(alert['fingerprint'], {
+                    'url': alert['url'], 'issue_type': alert['issue_type'], 'detail': alert['detail'], 'updates': 0,
+                })
+                ticket['updates'] += 1
+                ticket['severity'] = alert['severity']
+                ticket['status'] = 'resolved' if alert['status'] == 'resolved' else 'open'
+            return 202, {}, {'accepted': len(alerts), 'duplicate': False}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if server.latency:
+                    time.sleep(server.latency)
+                if self.path.rstrip('/') != '/api/alerts/batch':
+                    status, headers, payload = 404, {}, {'error': f"Unknown path {self.path}"}
+                else:
+                    try:
+                        body = json.loads(raw or b'{}')
+                    except ValueError:
+                        status, headers, payload = 400, {}, {'error': 'Invalid JSON'}
+                    else:
+                        status, headers, payload = server.apply(self.headers.get('Idempotency-Key'), body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Task Master alert API stand-in.")
+    parser.add_argument('--port', type=int, default=8097)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    server = TaskMasterServer(latency=args.latency, port=args.port)
+    print(f"Task Master stand-in on {server.base_url}")
+    server.httpd.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Per-tenant data generations in Redis, shared by Celery workers and API processes.
+
+Code that writes new audit data for a tenant bumps the tenant's generation after committing;
+the API's response cache (responses.ResponseCache) compares it with the generation its cached
+responses were built at, so they are dropped in every API process, not just the writer's.
+
+Redis errors are logged, not raised: a missed bump only leaves cached responses stale until
+their TTL runs out, which must not fail the write that triggered it.
+"""
+from .locks import get_redis
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+def _key(tenant_id) -> str:
+    return f"tenant_generation:{tenant_id}"
+
+def bump_tenant_generation(tenant_id) -> None:
+    import redis
+    try:
+        get_redis().incr(_key(tenant_id))
+    except (redis.RedisError, OSError) as e:
+        logger.warning(f"Could not bump data generation of tenant {tenant_id}: {e}")
+
+def get_tenant_generation(tenant_id) -> int:
+    """
+    Returns:
+        int: The tenant's generation (0 if never bumped, -1 if Redis is unavailable).
+    """
+    import redis
+    try:
+        return int(get_redis().get(_key(tenant_id)) or 0)
+    except (redis.RedisError, OSError) as e:
+        logger.warning(f"Could not read data generation of tenant {tenant_id}: {e}")
+        return -1
@@ -0,0 +1,113 @@
+"""
+Print a flame-style breakdown of a single trace from the JSON-lines span export.
+
+Usage (from the repository root):
+    python -m src.api.trace_report --list              # most recent traces
+    python -m src.api.trace_report <trace_id>          # breakdown of one trace
+    python -m src.api.trace_report <trace_id> --file logs/traces.jsonl --min-ms 1
+
+Each line shows a span's wall time, its self time (not covered by child spans), and a bar
+proportional to its share of the trace. Repeated sibling spans with the same name (e.g. one
+http.fetch per URL) are merged into one line with a call count.
+"""
+import os
+import sys
+import json
+import argparse
+from collections import defaultdict
+from .tracing import TRACE_EXPORT_PATH
+
+BAR_WIDTH = 40
+
+def load_spans(path: str, trace_id: str = None) -> list:
+    spans = []
+    with open(path) as f:
+        for line in f:
+            span = json.loads(line)
+            if trace_id is None or span['traceId'] == trace_id:
+                spans.append(span)
+    return spans
+
+def list_traces(path: str, limit: int = 20) -> list:
+    """
+    Summarize the most recent traces: (trace_id, root span name, duration ms, span count).
+    """
+    traces = defaultdict(list)
+    for span in load_spans(path):
+        traces[span['traceId']].append(span)
+    summaries = []
+    for trace_id, spans in traces.items():
+        start = min(s['startTimeUnixNano'] for s in spans)
+        end = max(s['endTimeUnixNano'] for s in spans)
+        root = min(spans, key=lambda s: s['startTimeUnixNano'])
+        summaries.append((start, trace_id, root['name'], (end - start) / 1e6, len(spans)))
+    summaries.sort(reverse=True)
+    return [s[1:] for s in summaries[:limit]]
+
+def _duration_ms(span: dict) -> float:
+    return (span['endTimeUnixNano'] - span['startTimeUnixNano']) / 1e6
+
+def build_breakdown(spans: list) -> list:
+    """
+    Returns:
+        list: (depth, name, calls, total ms, self ms, errors) rows in tree order, with
+        same-named siblings merged.
+    """
+    children = defaultdict(list)
+    ids = {s['spanId'] for s in spans}
+    roots = []
+    for span in spans:
+        if span['parentSpanId'] in ids:
+            children[span['parentSpanId']].append(span)
+        else:
+            roots.append(span)
+    rows = []
+
+    def walk(group: list, depth: int):
+        by_name = defaultdict(list)
+        for span in sorted(group, key=lambda s: s['startTimeUnixNano']):
+            by_name[span['name']].append(span)
+        for name, same in by_name.items():
+            total = sum(_duration_ms(s) for s in same)
+            kids = [c for s in same for c in children[s['spanId']]]
+            child_total = sum(_duration_ms(c) for c in kids)
+            errors = sum(1 for s in same if s['status']['code'] == 'ERROR')
+            rows.append((depth, name, len(same), total, max(total - child_total, 0.0), errors))
+            walk(kids, depth + 1)
+
+    walk(roots, 0)
+    return rows
+
+def format_breakdown(rows: list, min_ms: float = 0.0) -> str:
+    if not rows:
+        return "No spans found."
+    trace_ms = max(r[3] for r in rows if r[0] == 0)
+    lines = [f"{'span':<56} {'calls':>5} {'total ms':>10} {'self ms':>10}"]
+    for depth, name, calls, total, self_ms, errors in rows:
+        if total < min_ms:
+            continue
+        bar = '#' * max(1, round(BAR_WIDTH * total / trace_ms)) if trace_ms else ''
+        label = ('  ' * depth + name + (f" [{errors} errors]" if errors else ''))[:56]
+        lines.append(f"{label:<56} {calls:>5} {total:>10.1f} {self_ms:>10.1f} {bar}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a flame-style breakdown of a trace.")
+    parser.add_argument('trace_id', nargs='?')
+    parser.add_argument('--file', default=TRACE_EXPORT_PATH)
+    parser.add_argument('--list', action='store_true', help="List recent traces")
+    parser.add_argument('--min-ms', type=float, default=0.0, help="Hide spans shorter than this")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.file):
+        print(f"No trace export found at {args.file}", file=sys.stderr)
+        return 1
+    if args.list or not args.trace_id:
+        for trace_id, name, duration, count in list_traces(args.file):
+            print(f"{trace_id}  {duration:>10.1f} ms  {count:>5} spans  {name}")
+        return 0
+    spans = load_spans(args.file, args.trace_id)
+    print(format_breakdown(build_breakdown(spans), args.min_ms))
+    return 0 if spans else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
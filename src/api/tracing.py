@@ -0,0 +1,175 @@
+"""
+Lightweight tracing from API request through Celery to HTTP fetches and DB writes.
+
+Spans are kept in a contextvar, so nested calls (`start_span` / `@traced`) become children of
+the current span. A sampling decision is made once per trace at the root span (TRACE_SAMPLE_RATE,
+default 0.1) and carried with the context; unsampled spans cost a contextvar set/reset and
+are never exported.
+
+Context travels between processes as a W3C `traceparent` value: in HTTP headers (see main.py)
+and in Celery message headers (see celery_app.py).
+
+Finished spans are appended to TRACE_EXPORT_PATH (default logs/traces.jsonl) as one JSON
+object per line, using OTLP field names. `python -m src.api.trace_report <trace_id>` prints a
+breakdown of a single trace.
+"""
+import os
+import json
+import time
+import atexit
+import random
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', 'logs/traces.jsonl')
+
+class Span:
+    __slots__ = (
+        'trace_id', 'span_id', 'parent_id', 'name', 'sampled', 'local_root', 'start_ns', 'end_ns', 'attributes', 'status'
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.sampled = sampled
+        self.local_root = False
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.status = 'OK'
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'startTimeUnixNano': self.start_ns,
+            'endTimeUnixNano': self.end_ns,
+            'attributes': self.attributes,
+            'status': {'code': self.status},
+        }
+
+class JSONFileExporter:
+    """
+    Appends finished spans to a JSON-lines file. Spans are buffered and written when
+    `batch_size` are pending or the outermost span in this process finishes.
+    """
+    def __init__(self, path: str, batch_size: int = 256):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._pending.append(span.to_otlp())
+            if span.local_root or len(self._pending) >= self.batch_size:
+                self._write()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(s, default=str) + '\n' for s in self._pending))
+        self._pending.clear()
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_exporter = JSONFileExporter(TRACE_EXPORT_PATH)
+atexit.register(_exporter.flush)
+
+def set_exporter(exporter) -> None:
+    global _exporter
+    _exporter = exporter
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextmanager
+def start_span(name: str, parent: Optional[Span] = None, sample_rate: Optional[float] = None, **attributes):
+    """
+    Start a span as a child of `parent` (default: the current span), or a new trace if there is none.
+    """
+    parent = parent or _current_span.get()
+    if parent is None:
+        rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        span = Span(name, f"{random.getrandbits(128):032x}", None, random.random() < rate, attributes)
+    else:
+        span = Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+    span.local_root = not isinstance(parent, Span)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = 'ERROR'
+        span.attributes['error'] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end_ns = time.time_ns()
+        if span.sampled:
+            _exporter.export(span)
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator running the function inside a span (named after the function by default).
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class RemoteParent:
+    """Parent span context received from another process."""
+    __slots__ = ('trace_id', 'span_id', 'sampled')
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+def format_traceparent(span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-{'01' if span.sampled else '00'}"
+
+def parse_traceparent(value: Optional[str]) -> Optional[RemoteParent]:
+    """
+    Parse a W3C traceparent value; returns None if it is missing or malformed.
+    """
+    if not value:
+        return None
+    parts = value.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return RemoteParent(parts[1], parts[2], sampled)
+
+def inject(headers: dict) -> None:
+    """
+    Add the current span's traceparent to outgoing headers (HTTP or Celery message headers).
+    """
+    span = _current_span.get()
+    if span is not None:
+        headers['traceparent'] = format_traceparent(span)
+
+def flush() -> None:
+    _exporter.flush()
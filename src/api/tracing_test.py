@@ -0,0 +1,95 @@
+import os
+import json
+import pytest
+from src.api.trace_report import build_breakdown, format_breakdown, list_traces, load_spans
+from src.api.tracing import (
+    current_span, format_traceparent, inject, parse_traceparent, start_span, traced
+)
+
+def exported(exporter) -> list:
+    exporter.flush()
+    if not os.path.exists(exporter.path):
+        return []
+    with open(exporter.path) as f:
+        return [json.loads(line) for line in f]
+
+def test_nested_spans_share_the_trace_and_export_on_root_finish(trace_exporter):
+    with start_span('request', sample_rate=1.0, route='/audits') as root:
+        with start_span('fetch') as child:
+            assert current_span() is child
+            assert child.trace_id == root.trace_id and child.parent_id == root.span_id and child.sampled
+        assert current_span() is root
+    assert current_span() is None
+    with open(trace_exporter.path) as f:
+        spans = [json.loads(line) for line in f]  # written when the local root finished, no flush
+    assert [s['name'] for s in spans] == ['fetch', 'request']
+    assert spans[1]['parentSpanId'] == '' and spans[1]['attributes'] == {'route': '/audits'}
+    assert spans[0]['endTimeUnixNano'] >= spans[0]['startTimeUnixNano']
+
+def test_unsampled_traces_are_not_exported(trace_exporter):
+    with start_span('request', sample_rate=0.0) as root:
+        with start_span('fetch') as child:
+            assert not child.sampled and child.trace_id == root.trace_id
+    assert exported(trace_exporter) == []
+
+def test_errors_mark_the_span_and_propagate(trace_exporter):
+    @traced()
+    def failing():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        with start_span('request', sample_rate=1.0):
+            failing()
+    spans = exported(trace_exporter)
+    assert [s['name'] for s in spans] == ['test_errors_mark_the_span_and_propagate.<locals>.failing', 'request']
+    assert all(s['status']['code'] == 'ERROR' for s in spans)
+    assert spans[0]['attributes']['error'] == "ValueError('boom')"
+
+def test_traceparent_round_trip_and_inject(trace_exporter):
+    headers = {}
+    inject(headers)
+    assert headers == {}  # no current span
+    with start_span('publish', sample_rate=1.0) as span:
+        inject(headers)
+    parent = parse_traceparent(headers['traceparent'])
+    assert (parent.trace_id, parent.span_id, parent.sampled) == (span.trace_id, span.span_id, True)
+    assert format_traceparent(parent) == headers['traceparent']
+    # A remote parent continues the trace, keeps its sampling decision and starts a local root
+    with start_span('task', parent=parse_traceparent(f"00-{'a' * 32}-{'b' * 16}-00")) as task:
+        assert task.trace_id == 'a' * 32 and task.parent_id == 'b' * 16 and not task.sampled and task.local_root
+
+@pytest.mark.parametrize('value', [
+    None, '', 'garbage', f"00-{'a' * 31}-{'b' * 16}-01", f"00-{'a' * 32}-{'b' * 15}-01", f"00-{'a' * 32}-{'b' * 16}-zz",
+])
+def test_malformed_traceparent_is_ignored(value):
+    assert parse_traceparent(value) is None
+
+def span(trace_id, span_id, parent, name, start_ms, end_ms, status='OK'):
+    return {'traceId': trace_id, 'spanId': span_id, 'parentSpanId': parent, 'name': name,
+            'startTimeUnixNano': int(start_ms * 1e6), 'endTimeUnixNano': int(end_ms * 1e6),
+            'attributes': {}, 'status': {'code': status}}
+
+def test_breakdown_merges_siblings_and_computes_self_time(tmp_path):
+    spans = [
+        span('t1', 'r', '', 'GET /audits', 0, 100),
+        span('t1', 'a', 'r', 'http.fetch', 0, 30),
+        span('t1', 'b', 'r', 'http.fetch', 30, 60, status='ERROR'),
+        span('t1', 'c', 'a', 'parse.html', 10, 20),
+        span('t1', 'd', 'r', 'db.write', 60, 90),
+    ]
+    rows = build_breakdown(spans)
+    assert rows == [
+        (0, 'GET /audits', 1, 100.0, 10.0, 0),
+        (1, 'http.fetch', 2, 60.0, 50.0, 1),
+        (2, 'parse.html', 1, 10.0, 10.0, 0),
+        (1, 'db.write', 1, 30.0, 30.0, 0),
+    ]
+    text = format_breakdown(rows, min_ms=20)
+    assert 'http.fetch [1 errors]' in text and 'parse.html' not in text
+    assert text.splitlines()[1].endswith('#' * 40)
+    assert format_breakdown([]) == "No spans found."
+
+    path = tmp_path / 'traces.jsonl'
+    path.write_text(''.join(json.dumps(s) + '\n' for s in spans + [span('t2', 'x', '', 'task', 200, 205)]))
+    assert list_traces(str(path)) == [('t2', 'task', 5.0, 1), ('t1', 'GET /audits', 100.0, 5)]
+    assert len(load_spans(str(path), 't1')) == 5
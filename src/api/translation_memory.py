@@ -0,0 +1,135 @@
+"""
+Segment-level translation memory.
+
+Content is split into segments (lines, then sentences) with the whitespace between them kept
+aside, so a page is reassembled exactly in its original layout. Each segment is translated once
+per (model, segment, language, template version) and stored, so the nav, footers, CTAs and
+product specs repeated across a site are translated once for all its pages.
+
+For a list of pages (or one page) and a set of languages, translate_many():
+1. looks up every distinct segment for every language
+2. groups the unseen ones, per language, into batches of at most TM_BATCH_SEGMENTS segments /
+   TM_BATCH_CHARS characters, and sends the batches concurrently through `translate_batch`
+3. stores the new translations and reassembles each language's text in the original order
+
+Segments without letters (numbers, prices, blank lines) are kept as they are.
+
+The caller supplies the model call and the store (an LLMCache file of its own).
+"""
+import os
+import re
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+TM_BATCH_SEGMENTS = int(os.getenv('TM_BATCH_SEGMENTS', 40))
+TM_BATCH_CHARS = int(os.getenv('TM_BATCH_CHARS', 6000))
+TM_CONCURRENCY = int(os.getenv('TM_CONCURRENCY', 8))
+
+# Line breaks (with any indentation after them), or the spaces after a sentence's end
+_BOUNDARY_RE = re.compile(r"(\s*\n\s*|(?<=[.!?])[ \t]+)")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+def split_segments(text: str) -> list:
+    """
+    Returns:
+        list: [segment, separator, segment, ..., segment]; ''.join() of it is `text`.
+    """
+    return _BOUNDARY_RE.split(text)
+
+def is_translatable(segment: str) -> bool:
+    return _LETTER_RE.search(segment) is not None
+
+def normalize_segment(segment: str) -> str:
+    return ' '.join(segment.split())
+
+def segment_key(model: str, segment: str, language: str, version: str = '') -> str:
+    payload = json.dumps([model, normalize_segment(segment), language, version], separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def batches(segments: list, max_segments: int = TM_BATCH_SEGMENTS, max_chars: int = TM_BATCH_CHARS) -> list:
+    """
+    Group segments, in order, into batches within both limits (a longer segment gets its own batch).
+    """
+    grouped, current, chars = [], [], 0
+    for segment in segments:
+        if current and (len(current) >= max_segments or chars + len(segment) > max_chars):
+            grouped.append(current)
+            current, chars = [], 0
+        current.append(segment)
+        chars += len(segment)
+    if current:
+        grouped.append(current)
+    return grouped
+
+def reassemble(parts: list, translations: dict) -> str:
+    """
+    Args:
+        parts: split_segments() output.
+        translations: normalized segment -> translation.
+    """
+    out = []
+    for i, part in enumerate(parts):
+        if i % 2 or not is_translatable(part):
+            out.append(part)
+            continue
+        # Keep the segment's own leading/trailing whitespace
+        stripped = part.strip()
+        start = part.index(stripped[0])
+        out.append(part[:start] + translations[normalize_segment(part)] + part[start + len(stripped):])
+    return ''.join(out)
+
+def translate_many(contents: list, languages: list, translate_batch, memory, model: str = '', version: str = '',
+                   max_segments: int = TM_BATCH_SEGMENTS, max_chars: int = TM_BATCH_CHARS,
+                   concurrency: int = TM_CONCURRENCY, stats: dict = None) -> list:
+    """
+    Translate each of `contents` into each language, reusing stored segment translations.
+    Segments are deduplicated across all of `contents`, so translating a site's pages in one call
+    batches their unseen segments together.
+    Args:
+        translate_batch: callable(language, segments) -> list of translations, same order and length.
+        memory: Store with get(key) -> (found, value) and set(key, value) (an LLMCache).
+        model, version: Part of each segment's key, so a new model or prompt template
+            version does not reuse older translations.
+        stats (dict): If given, receives 'segments' (distinct segment/language pairs), 'hits',
+            'misses' and 'calls' counts.
+    Returns:
+        list: For each content, a mapping of language code to the translated content.
+    """
+    all_parts = [split_segments(content) for content in contents]
+    segments = list(dict.fromkeys(
+        normalize_segment(p) for parts in all_parts for p in parts[::2] if is_translatable(p)
+    ))
+    translations, jobs, hits = {}, [], 0
+    for language in languages:
+        known, missing = {}, []
+        for segment in segments:
+            found, value = memory.get(segment_key(model, segment, language, version))
+            if found:
+                known[segment] = value
+            else:
+                missing.append(segment)
+        hits += len(known)
+        translations[language] = known
+        jobs.extend((language, batch) for batch in batches(missing, max_segments, max_chars))
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs)))) as pool:
+            results = pool.map(lambda job: translate_batch(*job), jobs)
+            for (language, batch), translated in zip(jobs, results):
+                if len(translated) != len(batch):
+                    raise ValueError(f"Expected {len(batch)} translations, got {len(translated)}")
+                for segment, value in zip(batch, translated):
+                    memory.set(segment_key(model, segment, language, version), value)
+                    translations[language][segment] = value
+    if stats is not None:
+        total = len(segments) * len(languages)
+        stats.update(segments=total, hits=hits, misses=total - hits, calls=len(jobs))
+    return [{language: reassemble(parts, translations[language]) for language in languages} for parts in all_parts]
+
+def translate(content: str, languages: list, translate_batch, memory, **kwargs) -> dict:
+    """
+    translate_many() for one content.
+    Returns:
+        dict: Mapping of language code to the translated content.
+    """
+    return translate_many([content], languages, translate_batch, memory, **kwargs)[0]
@@ -0,0 +1,74 @@
+import pytest
+from llm_cache import LLMCache
+from translation_memory import batches, split_segments, translate, translate_many
+
+NAV = "Home | Products | Contact us"
+FOOTER = "Free shipping on orders over $50. Questions? Call us any time."
+
+def page(body: str) -> str:
+    return f"{NAV}\n\n{body}\n  49.99 / 120-240\n{FOOTER}\n"
+
+class DictStore(dict):
+    def get(self, key):
+        return key in self, dict.get(self, key)
+
+    def set(self, key, value):
+        self[key] = value
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, language, segments):
+        self.calls.append((language, list(segments)))
+        return [f"<{language}:{segment}>" for segment in segments]
+
+def test_split_segments_round_trips():
+    text = "First sentence. Second one!  Third?\n\n  Indented line\nLast"
+    parts = split_segments(text)
+    assert "".join(parts) == text
+    assert parts[::2] == ["First sentence.", "Second one!", "Third?", "Indented line", "Last"]
+
+def test_translation_keeps_layout_and_untranslatable_segments():
+    model = FakeModel()
+    result = translate(page("A new blender. It crushes ice."), ["es"], model, DictStore())
+    assert result["es"] == (
+        "<es:Home | Products | Contact us>\n\n<es:A new blender.> <es:It crushes ice.>\n  49.99 / 120-240\n"
+        "<es:Free shipping on orders over $50.> <es:Questions?> <es:Call us any time.>\n"
+    )
+
+def test_repeated_segments_are_translated_once(tmp_path):
+    memory = LLMCache(str(tmp_path / "tm.sqlite3"))
+    model = FakeModel()
+    stats = {}
+    translate(page("A new blender. It crushes ice."), ["es", "fr"], model, memory, stats=stats)
+    assert stats == {"segments": 12, "hits": 0, "misses": 12, "calls": 2}
+    model.calls.clear()
+    result = translate(page("A new kettle. It crushes ice."), ["es", "fr"], model, memory, stats=stats)
+    assert sorted(model.calls) == [("es", ["A new kettle."]), ("fr", ["A new kettle."])]
+    assert stats == {"segments": 12, "hits": 10, "misses": 2, "calls": 2}
+    assert result["fr"].startswith("<fr:Home | Products | Contact us>\n\n<fr:A new kettle.> <fr:It crushes ice.>")
+
+def test_model_and_version_are_part_of_the_key():
+    store, model = DictStore(), FakeModel()
+    translate("Hello there.", ["de"], model, store, model="a", version="1")
+    translate("Hello there.", ["de"], model, store, model="a", version="1")
+    translate("Hello there.", ["de"], model, store, model="a", version="2")
+    assert len(model.calls) == 2
+
+def test_batches_respect_segment_and_char_limits():
+    segments = ["a" * 10, "b" * 10, "c" * 10, "d" * 25, "e"]
+    assert batches(segments, max_segments=2, max_chars=100) == [segments[0:2], segments[2:4], segments[4:]]
+    assert batches(segments, max_segments=10, max_chars=25) == [segments[0:2], segments[2:3], segments[3:4], segments[4:]]
+
+def test_mismatched_batch_reply_raises():
+    with pytest.raises(ValueError):
+        translate("One. Two.", ["es"], lambda language, segments: ["only one"], DictStore())
+
+def test_pages_translated_together_share_batches():
+    model = FakeModel()
+    stats = {}
+    results = translate_many([page("A new blender."), page("A new kettle.")], ["es", "fr"], model, DictStore(), stats=stats)
+    assert len(model.calls) == 2  # one batch per language for both pages
+    assert stats["segments"] == 2 * 6
+    assert "<es:A new kettle.>" in results[1]["es"] and "<es:A new blender.>" in results[0]["es"]
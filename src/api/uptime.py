@@ -0,0 +1,263 @@
+"""
+Uptime history for the monitoring agent: a fixed-size ring buffer of checks per URL.
+
+Each monitored URL owns one row of three (URLs x capacity) arrays: check time (uint32 seconds),
+HTTP status (uint16, 0 = no response) and latency (float32 ms). A new check overwrites the
+oldest, so memory per URL is constant (about 3 KB at the default 288 checks: a day of 5-minute
+checks) however long the monitor runs.
+
+Statistics are kept up to date as checks are recorded (O(1) per check, vectorized over a
+sweep's URLs), not recomputed from the history:
+- error counts over the last `short_window` checks and over the whole buffer (a check is an
+  error if it got no response or a 4xx/5xx status), and the current streak of consecutive errors
+- a latency histogram over the whole buffer (LATENCY_BUCKETS log-spaced buckets from 1 ms to
+  2 min) for percentiles, accurate to one bucket (about 28%)
+
+classify() tells transient from persistent issues, as monitoring_agent_architecture.md asks:
+- down: the last `persistent_streak` checks or more all failed, the latest with no response or a 5xx
+- persistent: the same streak with a 4xx, or errors in `persistent_rate` of the buffer and in the
+  short window (flapping)
+- transient: errors in the short window only
+- ok: no recent errors
+
+save() / load() snapshot the buffers (not the derived statistics, which load() rebuilds) to a
+.npz file next to a .json list of URLs: about 0.5 KB per URL, written in a few seconds for 100k URLs.
+"""
+import os
+import json
+import time
+import zipfile
+from typing import Iterable, Optional
+import numpy as np
+
+UPTIME_CAPACITY = int(os.getenv('UPTIME_CAPACITY', 288))
+UPTIME_SHORT_WINDOW = int(os.getenv('UPTIME_SHORT_WINDOW', 3))
+PERSISTENT_STREAK = 3
+PERSISTENT_RATE = 0.2
+LATENCY_BUCKETS = 48
+# Upper edges of the latency buckets (ms); the last bucket also takes anything slower
+LATENCY_EDGES = np.geomspace(1.0, 120000.0, LATENCY_BUCKETS).astype(np.float32)
+CLASSES = ('ok', 'transient', 'persistent', 'down')
+
+def _bucket(latencies: np.ndarray) -> np.ndarray:
+    return np.minimum(np.searchsorted(LATENCY_EDGES, latencies), LATENCY_BUCKETS - 1)
+
+def _errors(statuses: np.ndarray) -> np.ndarray:
+    return (statuses == 0) | (statuses >= 400)
+
+class UptimeHistory:
+    def __init__(self, capacity: int = UPTIME_CAPACITY, short_window: int = UPTIME_SHORT_WINDOW,
+                 persistent_streak: int = PERSISTENT_STREAK, persistent_rate: float = PERSISTENT_RATE):
+        if not 0 < short_window <= capacity:
+            raise ValueError("short_window must be between 1 and capacity")
+        self.capacity = capacity
+        self.short_window = short_window
+        self.persistent_streak = persistent_streak
+        self.persistent_rate = persistent_rate
+        self.urls = []
+        self._index = {}
+        self._allocate(0)
+
+    def _allocate(self, rows: int) -> None:
+        self.ts = np.zeros((rows, self.capacity), dtype=np.uint32)
+        self.status = np.zeros((rows, self.capacity), dtype=np.uint16)
+        self.latency = np.zeros((rows, self.capacity), dtype=np.float32)
+        self.head = np.zeros(rows, dtype=np.int64)     # next slot to write
+        self.count = np.zeros(rows, dtype=np.int64)    # checks held (<= capacity)
+        self.short_errors = np.zeros(rows, dtype=np.int64)
+        self.errors = np.zeros(rows, dtype=np.int64)
+        self.streak = np.zeros(rows, dtype=np.int64)
+        self.histogram = np.zeros((rows, LATENCY_BUCKETS), dtype=np.uint16)
+
+    def _grow(self, rows: int) -> None:
+        old = {name: getattr(self, name) for name in
+               ('ts', 'status', 'latency', 'head', 'count', 'short_errors', 'errors', 'streak', 'histogram')}
+        self._allocate(rows)
+        n = len(old['head'])
+        for name, array in old.items():
+            getattr(self, name)[:n] = array
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def rows(self, urls: Iterable[str], create: bool = False) -> np.ndarray:
+        """
+        Row of each URL (-1 for unknown ones, unless `create` adds them).
+        """
+        rows = []
+        for url in urls:
+            row = self._index.get(url)
+            if row is None and create:
+                row = self._index[url] = len(self.urls)
+                self.urls.append(url)
+            rows.append(-1 if row is None else row)
+        if len(self.urls) > len(self.head):
+            self._grow(max(len(self.urls), 2 * len(self.head), 64))
+        return np.asarray(rows, dtype=np.int64)
+
+    def record(self, urls: list, statuses, latencies_ms, ts: Optional[float] = None) -> None:
+        """
+        Record one check per URL (a sweep). A URL listed twice is recorded twice, in order.
+        Args:
+            statuses: HTTP status per URL, 0 if there was no response.
+            latencies_ms: Response time per URL (ignored where status is 0).
+            ts: Check time (default: now).
+        """
+        rows = self.rows(urls, create=True)
+        statuses = np.asarray(statuses, dtype=np.uint16)
+        latencies = np.asarray(latencies_ms, dtype=np.float32)
+        ts = np.uint32(time.time() if ts is None else ts)
+        # Vectorized updates need distinct rows; repeats go in later rounds
+        order = np.arange(len(rows))
+        while len(order):
+            _, first = np.unique(rows[order], return_index=True)
+            first.sort()
+            take = order[first]
+            self._record_rows(rows[take], statuses[take], latencies[take], ts)
+            order = np.delete(order, first)
+
+    def _record_rows(self, rows: np.ndarray, statuses: np.ndarray, latencies: np.ndarray, ts) -> None:
+        cap = self.capacity
+        head, count = self.head[rows], self.count[rows]
+        full = count == cap
+        # The check leaving the whole-buffer window (overwritten) ...
+        evicted_status = self.status[rows, head]
+        evicted_error = full & _errors(evicted_status)
+        self.errors[rows] -= evicted_error
+        answered = full & (evicted_status > 0)
+        # Rows are distinct, so plain fancy-indexed updates cannot collide
+        self.histogram[rows[answered], _bucket(self.latency[rows[answered], head[answered]])] -= 1
+        # ... and the one leaving the short window
+        leaving = count >= self.short_window
+        short_pos = (head - self.short_window) % cap
+        self.short_errors[rows] -= leaving & _errors(self.status[rows, short_pos])
+
+        error = _errors(statuses)
+        self.ts[rows, head] = ts
+        self.status[rows, head] = statuses
+        self.latency[rows, head] = np.where(statuses > 0, latencies, 0)
+        self.errors[rows] += error
+        self.short_errors[rows] += error
+        self.streak[rows] = np.where(error, self.streak[rows] + 1, 0)
+        answered = statuses > 0
+        self.histogram[rows[answered], _bucket(latencies[answered])] += 1
+        self.head[rows] = (head + 1) % cap
+        self.count[rows] = np.minimum(count + 1, cap)
+
+    def _select(self, urls: Optional[Iterable[str]]) -> np.ndarray:
+        if urls is None:
+            return np.arange(len(self.urls))
+        rows = self.rows(urls)
+        if (rows < 0).any():
+            raise KeyError("Unknown URL")
+        return rows
+
+    def error_rate(self, urls: Optional[Iterable[str]] = None, window: str = 'short') -> np.ndarray:
+        """
+        Share of failed checks over the short window ('short') or the whole buffer ('all').
+        """
+        rows = self._select(urls)
+        if window == 'short':
+            return self.short_errors[rows] / np.maximum(np.minimum(self.count[rows], self.short_window), 1)
+        return self.errors[rows] / np.maximum(self.count[rows], 1)
+
+    def percentiles(self, urls: Optional[Iterable[str]] = None, q=(50, 95, 99)) -> np.ndarray:
+        """
+        Latency percentiles (ms, bucket upper edges) over the buffer's answered checks.
+        Returns:
+            np.ndarray: (URLs x len(q)); NaN for URLs without any answered check.
+        """
+        rows = self._select(urls)
+        cumulative = np.cumsum(self.histogram[rows], axis=1, dtype=np.int64)
+        total = cumulative[:, -1:]
+        ranks = np.ceil(np.asarray(q, dtype=np.float64) / 100 * total).clip(min=1)
+        result = np.empty((len(rows), len(q)), dtype=np.float64)
+        for j in range(len(q)):
+            result[:, j] = LATENCY_EDGES[np.minimum((cumulative < ranks[:, j:j + 1]).sum(axis=1), LATENCY_BUCKETS - 1)]
+        result[total[:, 0] == 0] = np.nan
+        return result
+
+    def classify(self, urls: Optional[Iterable[str]] = None, persistent_streak: Optional[int] = None) -> list:
+        """
+        Args:
+            persistent_streak: Override the history's setting for this call.
+        Returns:
+            list: 'ok', 'transient', 'persistent' or 'down' per URL.
+        """
+        streak = persistent_streak or self.persistent_streak
+        rows = self._select(urls)
+        latest = self.status[rows, (self.head[rows] - 1) % self.capacity]
+        persistent = self.streak[rows] >= streak
+        down = persistent & ((latest == 0) | (latest >= 500))
+        flapping = ((self.short_errors[rows] > 0) & (self.errors[rows] >= streak)
+                    & (self.error_rate(urls, 'all') >= self.persistent_rate))
+        classes = np.where(down, 3, np.where(persistent | flapping, 2, np.where(self.short_errors[rows] > 0, 1, 0)))
+        return [CLASSES[c] for c in classes]
+
+    def history(self, url: str) -> list:
+        """
+        Returns:
+            list: (ts, status, latency ms) per check held, oldest first.
+        """
+        row = self._select([url])[0]
+        count, head = int(self.count[row]), int(self.head[row])
+        positions = (head - count + np.arange(count)) % self.capacity
+        return list(zip(self.ts[row, positions].tolist(), self.status[row, positions].tolist(),
+                        self.latency[row, positions].tolist()))
+
+    def _rebuild(self) -> None:
+        """
+        Recompute the derived statistics from the buffers.
+        """
+        n, cap = len(self.urls), self.capacity
+        age = (self.head[:n, None] - 1 - np.arange(cap)[None, :]) % cap  # position of the k-th newest check
+        ages = np.arange(cap)[None, :]
+        held = ages < self.count[:n, None]
+        status = np.take_along_axis(self.status[:n], age, axis=1)
+        error = _errors(status) & held
+        self.errors[:n] = error.sum(axis=1)
+        self.short_errors[:n] = (error & (ages < self.short_window)).sum(axis=1)
+        self.streak[:n] = np.where(error.all(axis=1), cap, np.argmin(error, axis=1))
+        answered = held & (status > 0)
+        buckets = _bucket(np.take_along_axis(self.latency[:n], age, axis=1))
+        flat = (np.arange(n)[:, None] * LATENCY_BUCKETS + buckets)[answered]
+        self.histogram[:n] = np.bincount(flat, minlength=n * LATENCY_BUCKETS).reshape(n, LATENCY_BUCKETS)
+
+    def save(self, path: str) -> None:
+        """
+        Write path.npz (buffers) and path.json (URLs and settings), atomically. Latencies are
+        stored at half precision (capped at 65 s); the archive uses fast (level 1) compression.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        n = len(self.urls)
+        arrays = {
+            'ts': self.ts[:n], 'status': self.status[:n],
+            'latency': np.minimum(self.latency[:n], np.finfo(np.float16).max).astype(np.float16),
+            'head': self.head[:n], 'count': self.count[:n],
+        }
+        with zipfile.ZipFile(f"{path}.npz.tmp", 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for name, array in arrays.items():
+                with archive.open(f"{name}.npy", 'w', force_zip64=True) as f:
+                    np.lib.format.write_array(f, array)
+        with open(f"{path}.json.tmp", 'w') as f:
+            json.dump({'capacity': self.capacity, 'short_window': self.short_window,
+                       'persistent_streak': self.persistent_streak, 'persistent_rate': self.persistent_rate,
+                       'urls': self.urls}, f)
+        os.replace(f"{path}.npz.tmp", f"{path}.npz")
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @classmethod
+    def load(cls, path: str) -> 'UptimeHistory':
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+        history = cls(meta['capacity'], meta['short_window'], meta['persistent_streak'], meta['persistent_rate'])
+        history.urls = meta['urls']
+        history._index = {url: i for i, url in enumerate(history.urls)}
+        history._allocate(len(history.urls))
+        with np.load(f"{path}.npz") as data:
+            for name in ('ts', 'status', 'latency', 'head', 'count'):
+                getattr(history, name)[:] = data[name]
+        history._rebuild()
+        return history
@@ -0,0 +1,60 @@
+import numpy as np
+from uptime import UptimeHistory, LATENCY_EDGES
+
+def replay(history, sequences, latency=50.0):
+    # sequences: url -> statuses, one sweep per position
+    urls = list(sequences)
+    for i in range(max(len(s) for s in sequences.values())):
+        sweep = [url for url in urls if i < len(sequences[url])]
+        history.record(sweep, [sequences[url][i] for url in sweep], [latency] * len(sweep), ts=1_700_000_000 + 300 * i)
+
+def test_transient_persistent_and_down():
+    history = UptimeHistory(capacity=20, short_window=3, persistent_streak=3, persistent_rate=0.3)
+    replay(history, {
+        'ok': [200] * 10,
+        'blip': [200] * 8 + [503, 200],
+        'gone': [200] * 6 + [404] * 4,
+        'down': [200] * 7 + [0, 503, 500],
+        'flapping': [200, 500, 200, 500, 200, 500, 200, 500, 200, 200],
+        'recovered': [503] * 5 + [200] * 5,
+    })
+    assert history.classify() == ['ok', 'transient', 'persistent', 'down', 'persistent', 'ok']
+    assert history.classify(['gone'], persistent_streak=5) == ['transient']
+    assert list(history.error_rate(['blip', 'down'])) == [1 / 3, 1.0]
+    assert history.error_rate(['flapping'], 'all')[0] == 0.4
+    assert [status for _, status, _ in history.history('blip')] == [200] * 8 + [503, 200]
+
+def test_ring_buffer_keeps_constant_memory_and_incremental_stats():
+    history = UptimeHistory(capacity=16, short_window=4)
+    rng = np.random.default_rng(7)
+    urls = [f'https://site{i}.example/' for i in range(50)]
+    for sweep in range(100):
+        statuses = rng.choice([200, 200, 200, 404, 500, 0], size=len(urls))
+        history.record(urls, statuses, rng.lognormal(4, 1, len(urls)), ts=sweep)
+    assert history.status.shape[1] == 16 and all(len(history.history(url)) == 16 for url in urls)
+    assert [ts for ts, _, _ in history.history(urls[0])] == list(range(84, 100))
+    incremental = (history.errors.copy(), history.short_errors.copy(), history.streak.copy(), history.histogram.copy())
+    history._rebuild()
+    for before, after in zip(incremental, (history.errors, history.short_errors, history.streak, history.histogram)):
+        assert (before == after).all()
+
+def test_percentiles_and_repeated_urls():
+    history = UptimeHistory(capacity=100, short_window=5)
+    history.record(['a'] * 100, [200] * 100, np.arange(1, 101, dtype=np.float32))
+    p50, p99 = history.percentiles(['a'], (50, 99))[0]
+    assert 50 <= p50 <= 50 * 1.3 and 99 <= p99 <= 99 * 1.3
+    assert p50 in LATENCY_EDGES
+    history.record(['b'], [0], [0])
+    assert np.isnan(history.percentiles(['b'])).all()
+
+def test_snapshot_round_trip(tmp_path):
+    history = UptimeHistory(capacity=10, short_window=3)
+    replay(history, {'a': [200, 500, 500, 500], 'b': [200] * 12, 'c': [404, 200]})
+    path = str(tmp_path / 'uptime')
+    history.save(path)
+    restored = UptimeHistory.load(path)
+    assert restored.urls == history.urls and restored.classify() == history.classify() == ['down', 'ok', 'transient']
+    assert all(restored.history(url) == history.history(url) for url in history.urls)  # 50 ms is exact in float16
+    assert (restored.histogram[:3] == history.histogram[:3]).all() and list(restored.streak) == [3, 0, 0]
+    restored.record(['d'], [200], [10.0])
+    assert restored.classify(['d']) == ['ok']
@@ -0,0 +1,147 @@
+"""
+Micro-batched URL checks (after the Celery "batches" pattern).
+
+Producers enqueue URL-level work items with enqueue_url_checks(); each item gets its own id.
+Items wait in a Redis list per check kind, and only a small number of process_url_batch tasks
+are published to the broker. A worker running one of those tasks collects up to URL_BATCH_SIZE
+items, waiting at most URL_BATCH_MAX_WAIT seconds for a batch to fill, then processes them with
+one shared HTTP session and writes all results in one DB transaction.
+
+Each item's outcome is also stored in the Celery result backend under the item id, so items
+remain individually addressable (AsyncResult(item_id), GET /api/audit/tasks/{item_id}); a
+failing URL fails only its own item.
+
+Redis keys:
+- batch:q:{kind}        queued items (JSON)
+- batch:pending:{kind}  process_url_batch tasks published but not yet started
+"""
+import os
+import json
+import time
+import uuid
+from contextlib import closing
+import requests
+from .locks import get_redis
+from .audit import check_indexability, check_schema_markup, check_mobile_friendly
+from .audit_db import get_connection, store_url_check_results
+from .metrics import BATCH_SIZE_ITEMS
+from .tracing import start_span
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+URL_BATCH_SIZE = int(os.getenv('URL_BATCH_SIZE', 50))
+URL_BATCH_MAX_WAIT = float(os.getenv('URL_BATCH_MAX_WAIT', 1.0))
+# Most batch tasks in flight per kind; bounds how many workers one backlog occupies
+URL_BATCH_MAX_TASKS = int(os.getenv('URL_BATCH_MAX_TASKS', 8))
+
+URL_CHECKS = {
+    'indexability': check_indexability,
+    'schema': check_schema_markup,
+    'mobile': check_mobile_friendly,
+}
+
+def enqueue_url_checks(kind: str, urls: list) -> list:
+    """
+    Queue one check per URL. Returns the item ids, in the order of `urls`.
+    Call trigger_batches() afterwards so a worker picks them up.
+    """
+    if kind not in URL_CHECKS:
+        raise ValueError(f"Unknown check {kind!r}; expected one of {sorted(URL_CHECKS)}")
+    item_ids = [str(uuid.uuid4()) for _ in urls]
+    now = time.time()
+    get_redis().rpush(
+        f"batch:q:{kind}",
+        *[json.dumps({'id': item_id, 'url': url, 'enqueued_at': now}) for item_id, url in zip(item_ids, urls)]
+    )
+    return item_ids
+
+# Reserve batch task slots: KEYS[1] queue, KEYS[2] pending counter; ARGV batch size, max tasks,
+# counter TTL. Runs atomically, so concurrent producers never reserve more than max tasks.
+_RESERVE_BATCHES_SCRIPT = """
+local wanted = math.min(math.ceil(redis.call('llen', KEYS[1]) / tonumber(ARGV[1])), tonumber(ARGV[2]))
+    - tonumber(redis.call('get', KEYS[2]) or 0)
+if wanted <= 0 then return 0 end
+redis.call('incrby', KEYS[2], wanted)
+redis.call('expire', KEYS[2], tonumber(ARGV[3]))
+return wanted
+"""
+# A worker lost before starting its batch would otherwise hold a slot forever
+BATCH_PENDING_TTL = 300
+
+def trigger_batches(kind: str, publish) -> int:
+    """
+    Publish enough batch tasks (via `publish()`) to cover the queued items, up to
+    URL_BATCH_MAX_TASKS outstanding. Returns the number published.
+    """
+    r = get_redis()
+    wanted = r.eval(_RESERVE_BATCHES_SCRIPT, 2, f"batch:q:{kind}", f"batch:pending:{kind}",
+                    URL_BATCH_SIZE, URL_BATCH_MAX_TASKS, BATCH_PENDING_TTL)
+    for published in range(wanted):
+        try:
+            publish()
+        except Exception:
+            # Give back the slots reserved for tasks that were never published
+            r.decrby(f"batch:pending:{kind}", wanted - published)
+            raise
+    return wanted
+
+def batch_started(kind: str) -> None:
+    r = get_redis()
+    if r.decr(f"batch:pending:{kind}") < 0:
+        r.set(f"batch:pending:{kind}", 0)
+
+def collect_batch(kind: str, size: int = URL_BATCH_SIZE, max_wait: float = URL_BATCH_MAX_WAIT) -> list:
+    """
+    Pop up to `size` items, waiting at most `max_wait` seconds for the batch to fill.
+    """
+    r = get_redis()
+    key = f"batch:q:{kind}"
+    deadline = time.monotonic() + max_wait
+    batch = []
+    while len(batch) < size:
+        batch.extend(r.lpop(key, size - len(batch)) or [])
+        remaining = deadline - time.monotonic()
+        if len(batch) >= size or remaining <= 0:
+            break
+        popped = r.blpop([key], timeout=max(remaining, 0.01))
+        if popped:
+            batch.append(popped[1])
+    return [json.loads(raw) for raw in batch]
+
+def requeue(kind: str, items: list) -> None:
+    """
+    Put items back at the head of the queue (e.g. after a failed DB write) so the retry sees them.
+    """
+    get_redis().lpush(f"batch:q:{kind}", *[json.dumps(item) for item in reversed(items)])
+
+def process_batch(kind: str, items: list, backend=None) -> list:
+    """
+    Run the check for each item with one shared HTTP session and store all outcomes in one
+    DB transaction (and per item in the result backend, if given).
+    Returns:
+        list: One dict per item: item_id, kind, url, ok, and result or error.
+    """
+    check = URL_CHECKS[kind]
+    outcomes = []
+    with start_span('batch.process', kind=kind, items=len(items)), requests.Session() as session:
+        for item in items:
+            try:
+                # path '' keeps the full URL (urljoin(url, '') == url)
+                result = check(item['url'], '', session=session)
+                outcomes.append({'item_id': item['id'], 'kind': kind, 'url': item['url'], 'ok': True, 'result': result})
+            except Exception as e:
+                outcomes.append({'item_id': item['id'], 'kind': kind, 'url': item['url'], 'ok': False, 'error': repr(e)})
+    BATCH_SIZE_ITEMS.labels(kind).observe(len(items))
+    with closing(get_connection()) as conn:
+        store_url_check_results(conn, outcomes)
+    if backend is not None:
+        for outcome in outcomes:
+            if outcome['ok']:
+                backend.store_result(outcome['item_id'], outcome['result'], 'SUCCESS')
+            else:
+                backend.store_result(outcome['item_id'], RuntimeError(outcome['error']), 'FAILURE')
+    failed = sum(1 for o in outcomes if not o['ok'])
+    if failed:
+        logger.warning(f"{failed} of {len(outcomes)} {kind} checks failed in batch")
+    return outcomes
@@ -0,0 +1,127 @@
+import json
+import time
+import threading
+import pytest
+from src.api import url_batches
+
+fakeredis = pytest.importorskip('fakeredis')
+
+@pytest.fixture
+def r(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(url_batches, 'get_redis', lambda: client)
+    return client
+
+def queue_items(r, n, kind='indexability'):
+    return url_batches.enqueue_url_checks(kind, [f"https://example.com/{i}" for i in range(n)])
+
+def test_collect_batch_returns_at_most_size_items_in_order(r):
+    ids = queue_items(r, 5)
+    start = time.monotonic()
+    batch = url_batches.collect_batch('indexability', size=3, max_wait=5)
+    assert [item['id'] for item in batch] == ids[:3]
+    assert time.monotonic() - start < 1  # a full batch does not wait
+    assert [item['id'] for item in url_batches.collect_batch('indexability', size=3, max_wait=0.05)] == ids[3:]
+
+def test_collect_batch_waits_up_to_max_wait_for_a_batch_to_fill(r):
+    queue_items(r, 1)
+    start = time.monotonic()
+    assert len(url_batches.collect_batch('indexability', size=3, max_wait=0.2)) == 1
+    assert 0.15 <= time.monotonic() - start < 2
+    assert url_batches.collect_batch('indexability', size=3, max_wait=0.05) == []
+
+def test_collect_batch_takes_items_arriving_while_it_waits(r):
+    queue_items(r, 1)
+    late = threading.Timer(0.05, queue_items, args=(r, 2))
+    late.start()
+    start = time.monotonic()
+    assert len(url_batches.collect_batch('indexability', size=3, max_wait=5)) == 3
+    assert time.monotonic() - start < 4
+    late.join()
+
+class FakeConnection:
+    def close(self):
+        pass
+
+class FakeBackend:
+    def __init__(self):
+        self.stored = {}
+
+    def store_result(self, task_id, result, state):
+        self.stored[task_id] = (state, result)
+
+def test_each_item_keeps_its_own_result_or_error(monkeypatch):
+    def check(url, path, session=None):
+        assert session is not None and path == ''
+        if url.endswith('/bad'):
+            raise ValueError('no robots meta')
+        return {'url': url, 'indexable': True}
+
+    written = []
+    monkeypatch.setitem(url_batches.URL_CHECKS, 'indexability', check)
+    monkeypatch.setattr(url_batches, 'get_connection', FakeConnection)
+    monkeypatch.setattr(url_batches, 'store_url_check_results', lambda conn, outcomes: written.append(outcomes))
+    items = [{'id': 'i1', 'url': 'https://example.com/ok'}, {'id': 'i2', 'url': 'https://example.com/bad'}]
+    backend = FakeBackend()
+    outcomes = url_batches.process_batch('indexability', items, backend=backend)
+    assert [(o['item_id'], o['ok']) for o in outcomes] == [('i1', True), ('i2', False)]
+    assert written == [outcomes]  # one DB write for the whole batch
+    assert backend.stored['i1'] == ('SUCCESS', {'url': 'https://example.com/ok', 'indexable': True})
+    state, error = backend.stored['i2']
+    assert state == 'FAILURE' and 'no robots meta' in str(error)
+
+def test_trigger_publishes_one_task_per_batch_up_to_the_limit(r, monkeypatch):
+    monkeypatch.setattr(url_batches, 'URL_BATCH_SIZE', 50)
+    monkeypatch.setattr(url_batches, 'URL_BATCH_MAX_TASKS', 4)
+    published = []
+    queue_items(r, 120)
+    assert url_batches.trigger_batches('indexability', lambda: published.append(1)) == 3
+    assert url_batches.trigger_batches('indexability', lambda: published.append(1)) == 0  # already covered
+    queue_items(r, 200)
+    assert url_batches.trigger_batches('indexability', lambda: published.append(1)) == 1  # capped at 4 outstanding
+    url_batches.batch_started('indexability')
+    assert url_batches.trigger_batches('indexability', lambda: published.append(1)) == 1
+    assert len(published) == 5 and int(r.get('batch:pending:indexability')) == 4
+    assert r.ttl('batch:pending:indexability') > 0
+
+def test_concurrent_triggers_never_exceed_the_limit(r, monkeypatch):
+    monkeypatch.setattr(url_batches, 'URL_BATCH_MAX_TASKS', 8)
+    queue_items(r, 10000)
+    published = []
+    barrier = threading.Barrier(16)
+
+    def publish():
+        time.sleep(0.01)  # a broker round trip
+        published.append(1)
+
+    def trigger():
+        barrier.wait()
+        url_batches.trigger_batches('indexability', publish)
+
+    threads = [threading.Thread(target=trigger) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(published) == 8 and int(r.get('batch:pending:indexability')) == 8
+
+def test_failed_publish_gives_back_the_unpublished_slots(r, monkeypatch):
+    monkeypatch.setattr(url_batches, 'URL_BATCH_SIZE', 10)
+    queue_items(r, 30)
+    published = []
+
+    def publish():
+        if len(published) == 1:
+            raise ConnectionError('broker unreachable')
+        published.append(1)
+
+    with pytest.raises(ConnectionError):
+        url_batches.trigger_batches('indexability', publish)
+    assert int(r.get('batch:pending:indexability')) == 1
+    assert url_batches.trigger_batches('indexability', lambda: published.append(1)) == 2
+
+def test_requeue_puts_items_back_at_the_head(r):
+    ids = queue_items(r, 3)
+    batch = url_batches.collect_batch('indexability', size=2, max_wait=0)
+    url_batches.requeue('indexability', batch)
+    assert [json.loads(raw)['id'] for raw in r.lrange('batch:q:indexability', 0, -1)] == ids